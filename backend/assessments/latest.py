@@ -0,0 +1,89 @@
+"""
+Latest assessment per user
+
+Dashboards summarize each client by their most recent assessment. These
+helpers answer that for any set of users in a single query, either as a
+correlated subquery to annotate a user queryset with, or as a window over
+the assessments themselves, instead of one ``.first()`` query per user.
+Both are served by the (user, completed_at) index on Assessment.
+"""
+
+from django.db.models import Count, F, OuterRef, Subquery, Window
+from django.db.models.functions import RowNumber
+
+from .models import Assessment
+
+# Clinical severity levels grouped into the four risk buckets the dashboards show
+RISK_BUCKETS = {
+    'minimal': 'low',
+    'mild': 'low',
+    'moderate': 'medium',
+    'moderately_severe': 'high',
+    'severe': 'critical',
+    'low': 'low',
+    'medium': 'medium',
+    'high': 'high',
+    'critical': 'critical',
+}
+
+RISK_LEVELS = ('low', 'medium', 'high', 'critical')
+
+
+def risk_bucket(risk_level, default=None):
+    """Dashboard risk bucket of an assessment risk level"""
+    if not risk_level:
+        return default
+    return RISK_BUCKETS.get(risk_level.lower(), default)
+
+
+def latest_assessment(field, user_ref='pk', before=None):
+    """
+    Subquery for a field of the user's latest assessment, to annotate a user queryset with
+
+    ``before`` looks back from a point in time: only assessments completed
+    before it are considered.
+    """
+    assessments = Assessment.objects.filter(user_id=OuterRef(user_ref))
+    if before is not None:
+        assessments = assessments.filter(completed_at__lt=before)
+    return Subquery(assessments.order_by('-completed_at', '-id').values(field)[:1])
+
+
+def latest_assessments(user_ids=None):
+    """Each user's latest assessment as a queryset, optionally limited to some users"""
+    assessments = Assessment.objects.all()
+    if user_ids is not None:
+        assessments = assessments.filter(user_id__in=user_ids)
+    return (
+        assessments
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=[F('user_id')],
+            order_by=[F('completed_at').desc(), F('id').desc()]
+        ))
+        .filter(rank=1)
+    )
+
+
+def risk_distribution(users, unassessed='low', before=None):
+    """
+    Count users by the risk bucket of their latest assessment, in one query
+
+    Users without an assessment count towards ``unassessed`` (not at all if
+    None); latest levels outside the known buckets are not counted.
+    ``before`` gives the distribution as it stood at that time.
+    """
+    rows = (
+        users
+        .order_by()
+        .annotate(latest_risk=latest_assessment('risk_level', before=before))
+        .values('latest_risk')
+        .annotate(user_count=Count('id'))
+    )
+
+    counts = dict.fromkeys(RISK_LEVELS, 0)
+    for row in rows:
+        bucket = risk_bucket(row['latest_risk']) if row['latest_risk'] else unassessed
+        if bucket is not None:
+            counts[bucket] += row['user_count']
+    return counts
@@ -0,0 +1,41 @@
+"""
+Management command to backfill and repair the daily analytics snapshots
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from assessments.snapshots import rebuild_daily_snapshots, refresh_daily_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily analytics snapshots (DailyAnalyticsSnapshot) from users and assessments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ANALYTICS_SNAPSHOT_BACKFILL_DAYS,
+            help='Number of days to rebuild, ending today'
+        )
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Only rebuild from the earliest missing or partial day onwards'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding daily analytics snapshots...')
+
+        if options['missing']:
+            written = refresh_daily_snapshots()
+            self.stdout.write(self.style.SUCCESS(f'Wrote {written} missing or partial daily snapshots'))
+            return
+
+        today = timezone.localdate()
+        since = today - timedelta(days=options['days'] - 1)
+        written = rebuild_daily_snapshots(since, today)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Wrote {written} daily snapshots from {since} to {today}')
+        )
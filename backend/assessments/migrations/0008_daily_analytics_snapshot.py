@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0007_assessment_user_latest_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAnalyticsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('total_users', models.PositiveIntegerField(default=0)),
+                ('active_users', models.PositiveIntegerField(default=0)),
+                ('assessments_completed', models.PositiveIntegerField(default=0)),
+                ('low_risk', models.PositiveIntegerField(default=0)),
+                ('medium_risk', models.PositiveIntegerField(default=0)),
+                ('high_risk', models.PositiveIntegerField(default=0)),
+                ('critical_risk', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'assessments_daily_snapshot',
+                'ordering': ['-date'],
+            },
+        ),
+    ]
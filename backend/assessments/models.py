@@ -105,6 +105,10 @@ class Assessment(models.Model):
     class Meta:
         db_table = 'assessments_assessment'
         ordering = ['-completed_at']
+        indexes = [
+            # Latest assessment per user
+            models.Index(fields=['user', '-completed_at'], name='assessment_user_latest_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.assessment_type.name} ({self.completed_at.date()})"
@@ -113,6 +117,28 @@ class Assessment(models.Model):
         """Calculate percentage score"""
         return round((self.total_score / self.assessment_type.max_score) * 100, 1)
 
+class DailyAnalyticsSnapshot(models.Model):
+    """System-wide engagement and risk figures for one day, precomputed for analytics trends"""
+    date = models.DateField(unique=True)
+    total_users = models.PositiveIntegerField(default=0)
+    active_users = models.PositiveIntegerField(default=0)
+    assessments_completed = models.PositiveIntegerField(default=0)
+
+    # Users by the risk bucket of their latest assessment at the end of the day
+    low_risk = models.PositiveIntegerField(default=0)
+    medium_risk = models.PositiveIntegerField(default=0)
+    high_risk = models.PositiveIntegerField(default=0)
+    critical_risk = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'assessments_daily_snapshot'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"Analytics snapshot {self.date}"
+
 class QuestionOption(models.Model):
     """Options for multiple choice questions"""
     question = models.ForeignKey(AssessmentQuestion, on_delete=models.CASCADE, related_name='options')
@@ -0,0 +1,104 @@
+"""
+In-process schedule for the daily analytics snapshots
+
+Deployments without celery beat and a worker still need the snapshots
+refreshed every ``ANALYTICS_SNAPSHOT_INTERVAL`` seconds. Like the alert
+scheduler, every web process that starts the scheduler competes for a lease
+in the cache and only the holder runs ``refresh_daily_snapshots``.
+"""
+
+import logging
+import os
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from backend.background import BackgroundThread
+from .snapshots import refresh_daily_snapshots
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotScheduler:
+    """
+    Refreshes the analytics snapshots in exactly one process at a time
+
+    The lease lives in ``ANALYTICS_SNAPSHOT_CACHE_ALIAS``, which must be
+    shared between processes for it to be exclusive. The holder renews it
+    every cycle; if it dies, the lease expires and another process takes over.
+    """
+
+    lease_key = 'analytics-snapshots:leader'
+
+    def __init__(self, interval=None):
+        self._interval = interval
+        self.owner_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._thread = BackgroundThread('analytics-snapshots', self._run)
+
+    @property
+    def interval(self):
+        if self._interval is not None:
+            return self._interval
+        return getattr(settings, 'ANALYTICS_SNAPSHOT_INTERVAL', 900)
+
+    @property
+    def lease_ttl(self):
+        # Survives one slow refresh, expires soon after the leader stops renewing
+        return self.interval * 3
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'ANALYTICS_SNAPSHOT_CACHE_ALIAS', 'default')]
+
+    def acquire_leadership(self):
+        """Take the lease if it is free, or renew it if this scheduler holds it"""
+        if self.cache.add(self.lease_key, self.owner_id, self.lease_ttl):
+            return True
+        if self.cache.get(self.lease_key) == self.owner_id:
+            return self.cache.touch(self.lease_key, self.lease_ttl)
+        return False
+
+    def release_leadership(self):
+        if self.cache.get(self.lease_key) == self.owner_id:
+            self.cache.delete(self.lease_key)
+
+    def run_once(self, today=None):
+        """Refresh the snapshots if this process is the leader; the rows written, or None when it is not"""
+        if not self.acquire_leadership():
+            return None
+        return refresh_daily_snapshots(today=today)
+
+    def ensure_started(self):
+        """Start the scheduling thread for this process if it is not running"""
+        if self._thread.ensure_started(self._on_start):
+            logger.info("Started analytics snapshot scheduler")
+
+    def _on_start(self, forked):
+        if forked:
+            # Forked worker: compete for the lease under its own identity
+            self.owner_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                written = self.run_once()
+                if written is not None:
+                    logger.info(f"Refreshed {written} daily analytics snapshots")
+            except Exception as e:
+                logger.error(f"Analytics snapshot scheduler error: {e}")
+            finally:
+                # The thread lives for the whole process; do not hold a connection between runs
+                connections.close_all()
+            time.sleep(max(0, self.interval - (time.monotonic() - started)))
+
+
+snapshot_scheduler = SnapshotScheduler()
+
+
+def run_periodic_snapshot_refresh():
+    """Start the snapshot scheduler in this process if it is explicitly enabled"""
+    if getattr(settings, 'ANALYTICS_SNAPSHOT_SCHEDULER', False):
+        snapshot_scheduler.ensure_started()
@@ -0,0 +1,225 @@
+"""
+Daily analytics snapshots
+
+Keeps one DailyAnalyticsSnapshot row per calendar day with the system-wide
+user count, daily active users, assessments completed and the risk
+distribution as it stood at the end of the day, so the analytics trend
+charts read a handful of rows instead of re-counting history on every load.
+
+``refresh_daily_snapshots`` is the scheduled job and the deploy-time
+backfill: it recomputes from the earliest missing or partial day (one
+written before the day was over) through today. Reads only fill in the
+last few days themselves.
+"""
+
+import logging
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from accounts.models import User
+from .latest import risk_distribution
+from .models import Assessment, DailyAnalyticsSnapshot
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = [
+    'total_users', 'active_users', 'assessments_completed',
+    'low_risk', 'medium_risk', 'high_risk', 'critical_risk', 'updated_at',
+]
+
+
+def day_bounds(day):
+    """Start and end of a calendar day in the current time zone"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def build_daily_snapshots(start_day, end_day):
+    """Compute unsaved snapshot rows for every day from start_day to end_day inclusive.
+
+    Activity and sign-ups for the whole range come from two grouped queries;
+    the risk distribution takes one query per day.
+    """
+    range_start = day_bounds(start_day)[0]
+    range_end = day_bounds(end_day)[1]
+    clients = User.objects.filter(role='user')
+
+    activity = {
+        row['day']: row
+        for row in (
+            Assessment.objects
+            .filter(completed_at__gte=range_start, completed_at__lt=range_end)
+            .annotate(day=TruncDate('completed_at'))
+            .values('day')
+            .annotate(
+                completed=Count('id'),
+                active=Count('user_id', distinct=True, filter=Q(user__role='user'))
+            )
+            .order_by()
+        )
+    }
+    joined = dict(
+        clients
+        .filter(date_joined__gte=range_start, date_joined__lt=range_end)
+        .annotate(day=TruncDate('date_joined'))
+        .values('day')
+        .annotate(user_count=Count('id'))
+        .values_list('day', 'user_count')
+        .order_by()
+    )
+    total_users = clients.filter(date_joined__lt=range_start).count()
+
+    snapshots = []
+    day = start_day
+    while day <= end_day:
+        day_end = day_bounds(day)[1]
+        total_users += joined.get(day, 0)
+        risk = risk_distribution(clients.filter(date_joined__lt=day_end), before=day_end)
+        snapshots.append(DailyAnalyticsSnapshot(
+            date=day,
+            total_users=total_users,
+            active_users=activity.get(day, {}).get('active', 0),
+            assessments_completed=activity.get(day, {}).get('completed', 0),
+            low_risk=risk['low'],
+            medium_risk=risk['medium'],
+            high_risk=risk['high'],
+            critical_risk=risk['critical'],
+        ))
+        day += timedelta(days=1)
+    return snapshots
+
+
+def upsert_snapshots(snapshots, batch_size=500):
+    """Insert or update snapshot rows by date"""
+    DailyAnalyticsSnapshot.objects.bulk_create(
+        snapshots,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=SNAPSHOT_FIELDS
+    )
+    return len(snapshots)
+
+
+def rebuild_daily_snapshots(since, until=None):
+    """Recompute every day from ``since`` through ``until`` (today by default)"""
+    until = until or timezone.localdate()
+    if since > until:
+        return 0
+    return upsert_snapshots(build_daily_snapshots(since, until))
+
+
+def is_partial(snapshot):
+    """Whether a snapshot was written before its day was over"""
+    return snapshot.updated_at < day_bounds(snapshot.date)[1]
+
+
+def days_between(start_day, end_day):
+    return [start_day + timedelta(days=offset) for offset in range((end_day - start_day).days + 1)]
+
+
+def refresh_daily_snapshots(today=None):
+    """Bring the snapshot table up to date, incrementally.
+
+    Recomputes from the earliest day in the last
+    ``ANALYTICS_SNAPSHOT_BACKFILL_DAYS`` that is missing or was written
+    before the day was over, through today. Returns the number of rows written.
+    """
+    today = today or timezone.localdate()
+    earliest = today - timedelta(days=settings.ANALYTICS_SNAPSHOT_BACKFILL_DAYS - 1)
+    stored = {
+        snapshot.date: snapshot
+        for snapshot in DailyAnalyticsSnapshot.objects.filter(date__gte=earliest, date__lte=today).only('date', 'updated_at')
+    }
+    for day in days_between(earliest, today):
+        if day not in stored or is_partial(stored[day]):
+            return rebuild_daily_snapshots(day, today)
+    return 0
+
+
+def get_daily_snapshots(start_day, end_day):
+    """Snapshot rows from start_day to end_day, oldest first, filling recent gaps on the way.
+
+    Within the last ``ANALYTICS_SNAPSHOT_READ_FILL_DAYS`` days, missing rows
+    and rows written before their day was over are computed and stored here
+    (today's only once it is older than ``ANALYTICS_SNAPSHOT_INTERVAL``), so
+    recent figures stay correct without the scheduler. Older days are left
+    to ``refresh_daily_snapshots`` and the rebuild command, and are skipped
+    when missing.
+    """
+    snapshots = {
+        snapshot.date: snapshot
+        for snapshot in DailyAnalyticsSnapshot.objects.filter(date__gte=start_day, date__lte=end_day)
+    }
+    today = timezone.localdate()
+    fill_from = max(start_day, today - timedelta(days=settings.ANALYTICS_SNAPSHOT_READ_FILL_DAYS - 1))
+    stale_after = timezone.now() - timedelta(seconds=settings.ANALYTICS_SNAPSHOT_INTERVAL)
+
+    def needs_refresh(day):
+        snapshot = snapshots.get(day)
+        if snapshot is None:
+            return True
+        if day == today:
+            return snapshot.updated_at < stale_after
+        return is_partial(snapshot)
+
+    stale = [day for day in days_between(fill_from, end_day) if needs_refresh(day)]
+    if stale:
+        rebuilt = build_daily_snapshots(stale[0], stale[-1])
+        upsert_snapshots(rebuilt)
+        snapshots.update((snapshot.date, snapshot) for snapshot in rebuilt)
+
+    missing = sum(1 for day in days_between(start_day, fill_from - timedelta(days=1)) if day not in snapshots)
+    if missing:
+        logger.warning(
+            f"{missing} daily analytics snapshots before {fill_from} are missing; "
+            f"run 'manage.py rebuild_analytics_snapshots --missing'"
+        )
+    return [snapshots[day] for day in sorted(snapshots)]
+
+
+def month_starts(today, months):
+    """First day of each of the last ``months`` calendar months, oldest first, ending with today's"""
+    starts = [today.replace(day=1)]
+    while len(starts) < months:
+        starts.append((starts[-1] - timedelta(days=1)).replace(day=1))
+    return starts[::-1]
+
+
+def analytics_trends(today=None, days=7, months=6):
+    """
+    Trend series for the analytics dashboard from the daily snapshots
+
+    ``weeklyEngagement`` is the share of clients active on each of the last
+    ``days`` days, ``monthlyAssessments`` the assessments completed in each of
+    the last ``months`` calendar months and ``riskTrends`` the share of
+    clients whose latest assessment put them at high or critical risk at the
+    end of each day. All series run oldest to newest.
+    """
+    today = today or timezone.localdate()
+    first_months = month_starts(today, months)
+    first_day = today - timedelta(days=days - 1)
+    snapshots = get_daily_snapshots(min(first_months[0], first_day), today)
+
+    def percent(count, total):
+        return round(count / total * 100, 1) if total else 0
+
+    recent = [snapshot for snapshot in snapshots if snapshot.date >= first_day]
+    monthly = dict.fromkeys(first_months, 0)
+    for snapshot in snapshots:
+        month = snapshot.date.replace(day=1)
+        if month in monthly:
+            monthly[month] += snapshot.assessments_completed
+
+    return {
+        'weeklyEngagement': [percent(snapshot.active_users, snapshot.total_users) for snapshot in recent],
+        'monthlyAssessments': list(monthly.values()),
+        'riskTrends': [
+            percent(snapshot.high_risk + snapshot.critical_risk, snapshot.total_users) for snapshot in recent
+        ],
+        'dates': [snapshot.date.isoformat() for snapshot in recent],
+        'months': [month.strftime('%Y-%m') for month in first_months],
+    }
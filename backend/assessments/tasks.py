@@ -0,0 +1,19 @@
+"""
+Background jobs for the assessments app
+"""
+
+import logging
+from celery import shared_task
+
+from .snapshots import refresh_daily_snapshots
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def refresh_analytics_snapshots():
+    """
+    Recompute the daily analytics snapshots from the latest stored day through today
+    """
+    written = refresh_daily_snapshots()
+    logger.info(f"Refreshed {written} daily analytics snapshots")
@@ -17,6 +17,7 @@ from .serializers import (
     CreateAssessmentTypeSerializer
 )
 from accounts.permissions import HasCompletedOnboarding
+from backend.dashboard_snapshots import snapshots as dashboard_snapshots, wants_fresh
 from django.db.models import Count, Avg
 from datetime import datetime, timedelta
 from django.utils import timezone
@@ -521,7 +522,15 @@ class AdminDashboardStatsView(APIView):
         if request.user.role != 'admin':
             raise permissions.PermissionDenied("Admin access required")
         
-        # Get admin statistics
+        # Served from a stored snapshot, refreshed in the background once stale
+        stats, snapshot = dashboard_snapshots.get(
+            'admin_dashboard_stats', self._get_stats, fresh=wants_fresh(request)
+        )
+        
+        return Response(dict(stats, snapshot=snapshot))
+    
+    def _get_stats(self):
+        """Request, assessment and assignment totals with the latest requests"""
         total_requests = AssessmentRequest.objects.count()
         pending_requests = AssessmentRequest.objects.filter(status='pending').count()
         approved_requests = AssessmentRequest.objects.filter(status='approved').count()
@@ -530,7 +539,7 @@ class AdminDashboardStatsView(APIView):
         total_assessments = Assessment.objects.count()
         total_assignments = ClientAssessmentAssignment.objects.count()
         
-        stats = {
+        return {
             'total_requests': total_requests,
             'pending_requests': pending_requests,
             'approved_requests': approved_requests,
@@ -542,8 +551,6 @@ class AdminDashboardStatsView(APIView):
                 many=True
             ).data
         }
-        
-        return Response(stats)
 
 
 class AdminAssessmentStatsView(APIView):
@@ -14,6 +14,8 @@ from assessments.models import Assessment, AssessmentRequest
 from community.models import ForumPost, ForumComment, ChatRoom
 from content.models import Article, Video, AudioContent
 
+from .dashboard_snapshots import snapshots as dashboard_snapshots, wants_fresh
+
 
 class SystemStatsView(APIView):
     """
@@ -29,30 +31,16 @@ class SystemStatsView(APIView):
             }, status=status.HTTP_403_FORBIDDEN)
         
         try:
-            # System health metrics
-            cpu_usage = psutil.cpu_percent(interval=1)
+            # System health metrics; CPU usage since the previous call rather than a one-second sample
+            cpu_usage = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             disk = psutil.disk_usage('/')
             
-            # Database statistics
-            total_users = User.objects.count()
-            total_assessments = Assessment.objects.count()
-            total_forum_posts = ForumPost.objects.count()
-            total_content_items = (
-                Article.objects.count() + 
-                Video.objects.count() + 
-                AudioContent.objects.count()
+            # Database statistics, served from a stored snapshot
+            database_stats, snapshot = dashboard_snapshots.get(
+                'system_stats', self._get_database_stats, fresh=wants_fresh(request)
             )
             
-            # Activity in last 24 hours
-            yesterday = timezone.now() - timedelta(days=1)
-            recent_activity = {
-                'new_users': User.objects.filter(date_joined__gte=yesterday).count(),
-                'new_assessments': Assessment.objects.filter(completed_at__gte=yesterday).count(),
-                'new_forum_posts': ForumPost.objects.filter(created_at__gte=yesterday).count(),
-                'new_comments': ForumComment.objects.filter(created_at__gte=yesterday).count(),
-            }
-            
             # System alerts (basic checks)
             alerts = []
             if cpu_usage > 80:
@@ -85,15 +73,11 @@ class SystemStatsView(APIView):
                     'available_memory_gb': round(memory.available / (1024**3), 2),
                     'total_memory_gb': round(memory.total / (1024**3), 2)
                 },
-                'database_stats': {
-                    'total_users': total_users,
-                    'total_assessments': total_assessments,
-                    'total_forum_posts': total_forum_posts,
-                    'total_content_items': total_content_items
-                },
-                'recent_activity': recent_activity,
+                'database_stats': database_stats['totals'],
+                'recent_activity': database_stats['recent_activity'],
                 'alerts': alerts,
-                'uptime_hours': round((timezone.now().timestamp() - psutil.boot_time()) / 3600, 1)
+                'uptime_hours': round((timezone.now().timestamp() - psutil.boot_time()) / 3600, 1),
+                'snapshot': snapshot
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -103,3 +87,25 @@ class SystemStatsView(APIView):
                 'system_alerts': 1,
                 'content_reports': 0
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def _get_database_stats(self):
+        """Record totals and activity in the last 24 hours"""
+        yesterday = timezone.now() - timedelta(days=1)
+        return {
+            'totals': {
+                'total_users': User.objects.count(),
+                'total_assessments': Assessment.objects.count(),
+                'total_forum_posts': ForumPost.objects.count(),
+                'total_content_items': (
+                    Article.objects.count() + 
+                    Video.objects.count() + 
+                    AudioContent.objects.count()
+                )
+            },
+            'recent_activity': {
+                'new_users': User.objects.filter(date_joined__gte=yesterday).count(),
+                'new_assessments': Assessment.objects.filter(completed_at__gte=yesterday).count(),
+                'new_forum_posts': ForumPost.objects.filter(created_at__gte=yesterday).count(),
+                'new_comments': ForumComment.objects.filter(created_at__gte=yesterday).count(),
+            }
+        }
@@ -6,16 +6,33 @@ Monitors system metrics and triggers alerts based on thresholds
 import time
 import logging
 import json
+import math
+import os
+import uuid
 from typing import Dict, List, Any, Optional
-from django.core.cache import cache
+from django.core.cache import cache, caches
 from django.conf import settings
 from django.core.mail import send_mail
 import psutil
-import threading
+
+from .background import BackgroundPool, BackgroundThread
+from .sampler import get_sampler
 
 # Logger
 alert_logger = logging.getLogger('performance')
 
+# Rule metrics that can be read from the sampler's one-minute history
+HISTORY_METRICS = {
+    'cpu_percent': lambda point: point['cpu_percent'],
+    'memory_percent': lambda point: point['memory_percent'],
+    'disk_percent': lambda point: point['disk_percent'],
+    'avg_response_time': lambda point: (
+        point['response_time_total'] / point['requests'] if point['requests'] else None
+    ),
+    'error_rate': lambda point: point['errors'] / point['requests'] * 100 if point['requests'] else 0,
+}
+HISTORY_RESOLUTION = 60
+
 class AlertManager:
     """
     Manages alert rules, thresholds, and notifications
@@ -25,6 +42,7 @@ class AlertManager:
         self.alert_rules = self._load_alert_rules()
         self.active_alerts = {}
         self.notification_channels = self._setup_notification_channels()
+        self._notifier = BackgroundPool('alert-notify', max_workers=1)
     
     def _load_alert_rules(self) -> Dict[str, Dict]:
         """Load alert rules configuration"""
@@ -142,22 +160,60 @@ class AlertManager:
             },
         }
     
-    def check_alerts(self, metrics: Dict[str, Any]) -> List[Dict]:
-        """Check all alert rules against current metrics"""
+    def check_alerts(self, metrics: Dict[str, Any], history: Optional[List] = None,
+                     now: Optional[float] = None) -> List[Dict]:
+        """Check all alert rules against current metrics.
+        
+        With ``history`` (one-minute sampler points), rules on sampled metrics
+        fire only when every point in their duration window breaches the
+        threshold; other rules need the condition on consecutive checks for
+        their duration. Rules that no longer hold are resolved.
+        """
+        now = time.time() if now is None else now
         triggered_alerts = []
         
         for rule_id, rule in self.alert_rules.items():
             if not rule['enabled']:
                 continue
             
-            if self._evaluate_rule(rule, metrics):
-                alert = self._create_alert(rule_id, rule, metrics)
-                if self._should_trigger_alert(rule_id, alert):
-                    triggered_alerts.append(alert)
-                    self._send_notifications(alert)
+            if history is not None and rule['metric'] in HISTORY_METRICS and rule['duration'] >= HISTORY_RESOLUTION:
+                breached, current_value = self._evaluate_window(rule, history, now)
+                firing = breached
+                if breached and rule_id not in self.active_alerts:
+                    self.active_alerts[rule_id] = {'first_detected': now - rule['duration'], 'last_triggered': 0}
+            else:
+                breached = self._evaluate_rule(rule, metrics)
+                current_value = self._get_metric_value(metrics, rule['metric'])
+                firing = breached and self._should_trigger_alert(rule_id, now)
+            
+            if not breached:
+                self.resolve_alert(rule_id)
+                continue
+            
+            if firing:
+                alert = self._create_alert(rule_id, rule, current_value, now)
+                triggered_alerts.append(alert)
+                if self._should_notify(rule_id, now):
+                    self.dispatch_notifications(alert)
         
         return triggered_alerts
     
+    def _evaluate_window(self, rule: Dict, history: List, now: float):
+        """Whether every sampled point in the rule's window breaches its threshold, and the latest value"""
+        window_start = now - rule['duration']
+        values = [
+            HISTORY_METRICS[rule['metric']](point)
+            for timestamp, point in history
+            if timestamp >= window_start
+        ]
+        values = [value for value in values if value is not None]
+        
+        # Tolerate one missing point at the window's edges, but not a gap in sampling
+        if not values or len(values) < max(1, math.floor(rule['duration'] / HISTORY_RESOLUTION) - 1):
+            return False, values[-1] if values else None
+        breached = all(self._compare(value, rule['operator'], rule['threshold']) for value in values)
+        return breached, values[-1]
+    
     def _evaluate_rule(self, rule: Dict, metrics: Dict[str, Any]) -> bool:
         """Evaluate a single alert rule"""
         metric_name = rule['metric']
@@ -170,7 +226,10 @@ class AlertManager:
         if metric_value is None:
             return False
         
-        # Evaluate condition
+        return self._compare(metric_value, operator, threshold)
+    
+    def _compare(self, metric_value, operator: str, threshold) -> bool:
+        """Evaluate a rule condition"""
         if operator == '>':
             return metric_value > threshold
         elif operator == '<':
@@ -210,22 +269,22 @@ class AlertManager:
         
         return None
     
-    def _create_alert(self, rule_id: str, rule: Dict, metrics: Dict[str, Any]) -> Dict:
+    def _create_alert(self, rule_id: str, rule: Dict, current_value, now: float) -> Dict:
         """Create alert object"""
         return {
-            'id': f"{rule_id}_{int(time.time())}",
+            'id': f"{rule_id}_{int(now)}",
             'rule_id': rule_id,
             'name': rule['name'],
             'description': rule['description'],
             'severity': rule['severity'],
             'metric': rule['metric'],
             'threshold': rule['threshold'],
-            'current_value': self._get_metric_value(metrics, rule['metric']),
-            'timestamp': time.time(),
+            'current_value': current_value,
+            'timestamp': now,
             'status': 'active',
         }
     
-    def _should_trigger_alert(self, rule_id: str, alert: Dict) -> bool:
+    def _should_trigger_alert(self, rule_id: str, now: float) -> bool:
         """Check if alert should be triggered based on duration"""
         rule = self.alert_rules[rule_id]
         duration = rule['duration']
@@ -234,17 +293,29 @@ class AlertManager:
         if rule_id in self.active_alerts:
             # Check if enough time has passed since first detection
             first_detected = self.active_alerts[rule_id]['first_detected']
-            if time.time() - first_detected >= duration:
+            if now - first_detected >= duration:
                 return True
         else:
             # First time detecting this condition
             self.active_alerts[rule_id] = {
-                'first_detected': time.time(),
+                'first_detected': now,
                 'last_triggered': 0,
             }
         
         return False
     
+    def _should_notify(self, rule_id: str, now: float) -> bool:
+        """Notify when an alert first fires, then at most once per ALERT_REPEAT_INTERVAL"""
+        state = self.active_alerts[rule_id]
+        if now - state['last_triggered'] < getattr(settings, 'ALERT_REPEAT_INTERVAL', 3600):
+            return False
+        state['last_triggered'] = now
+        return True
+    
+    def dispatch_notifications(self, alert: Dict):
+        """Send notifications on a background thread so slow channels never delay evaluation"""
+        return self._notifier.submit(None, self._send_notifications, alert)
+    
     def _send_notifications(self, alert: Dict):
         """Send alert notifications through configured channels"""
         severity = alert['severity']
@@ -339,10 +410,20 @@ class MetricsCollector:
             'security': self._collect_security_metrics(),
         }
     
+    def collect_history(self, now: float) -> List:
+        """One-minute sampler points covering the longest rule window"""
+        longest = max(rule['duration'] for rule in self.alert_manager.alert_rules.values())
+        try:
+            return get_sampler().store.read('1m', since=now - longest)
+        except Exception as e:
+            alert_logger.error(f"Failed to read metric history: {e}")
+            return []
+    
     def _collect_system_metrics(self) -> Dict[str, float]:
         """Collect system metrics"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # Non-blocking: CPU usage since the previous call
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             disk = psutil.disk_usage('/')
             
@@ -358,9 +439,9 @@ class MetricsCollector:
     def _collect_application_metrics(self) -> Dict[str, Any]:
         """Collect application metrics"""
         try:
-            api_metrics = cache.get('api_metrics', {})
+            from .metrics import get_api_metrics
             return {
-                'api': api_metrics
+                'api': get_api_metrics()
             }
         except Exception as e:
             alert_logger.error(f"Failed to collect application metrics: {e}")
@@ -388,11 +469,13 @@ class MetricsCollector:
             alert_logger.error(f"Failed to collect security metrics: {e}")
             return {}
     
-    def run_alert_check(self):
+    def run_alert_check(self, now: Optional[float] = None):
         """Run complete alert check cycle"""
         try:
+            now = time.time() if now is None else now
             metrics = self.collect_all_metrics()
-            triggered_alerts = self.alert_manager.check_alerts(metrics)
+            history = self.collect_history(now)
+            triggered_alerts = self.alert_manager.check_alerts(metrics, history=history, now=now)
             
             if triggered_alerts:
                 alert_logger.warning(f"Triggered {len(triggered_alerts)} alerts")
@@ -403,27 +486,88 @@ class MetricsCollector:
             return []
 
 
-# Global metrics collector instance
-metrics_collector = MetricsCollector()
-
-
-def run_periodic_alert_check():
-    """Run periodic alert checks in background thread"""
-    def alert_check_loop():
+class AlertScheduler:
+    """
+    Runs alert checks in exactly one process at a time
+    
+    Every process that starts the scheduler competes for a lease in the
+    cache (``ALERTING_CACHE_ALIAS``); only the holder evaluates rules, and
+    it renews the lease every cycle. If the leader dies, its lease expires
+    and another process takes over. Multi-process deployments need a cache
+    shared between processes for the lease to be exclusive.
+    """
+    
+    lease_key = 'alerting:leader'
+    
+    def __init__(self, collector: MetricsCollector, interval: Optional[float] = None):
+        self.collector = collector
+        self._interval = interval
+        self.owner_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._thread = BackgroundThread('alert-scheduler', self._run)
+    
+    @property
+    def interval(self) -> float:
+        if self._interval is not None:
+            return self._interval
+        return getattr(settings, 'ALERTING_INTERVAL', 60)
+    
+    @property
+    def lease_ttl(self) -> float:
+        # Survives one slow cycle, expires soon after the leader stops renewing
+        return self.interval * 3
+    
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'ALERTING_CACHE_ALIAS', 'default')]
+    
+    def acquire_leadership(self) -> bool:
+        """Take the lease if it is free, or renew it if this scheduler holds it"""
+        if self.cache.add(self.lease_key, self.owner_id, self.lease_ttl):
+            return True
+        if self.cache.get(self.lease_key) == self.owner_id:
+            return self.cache.touch(self.lease_key, self.lease_ttl)
+        return False
+    
+    def release_leadership(self):
+        if self.cache.get(self.lease_key) == self.owner_id:
+            self.cache.delete(self.lease_key)
+    
+    def run_once(self, now: Optional[float] = None) -> Optional[List[Dict]]:
+        """Evaluate alerts if this process is the leader; None when it is not"""
+        if not self.acquire_leadership():
+            return None
+        return self.collector.run_alert_check(now=now)
+    
+    def ensure_started(self):
+        """Start the scheduling thread for this process if it is not running"""
+        if self._thread.ensure_started(self._on_start):
+            alert_logger.info("Started alert scheduler")
+    
+    def _on_start(self, forked):
+        if forked:
+            # Forked worker: compete for the lease under its own identity
+            self.owner_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    
+    def _run(self):
         while True:
+            started = time.monotonic()
             try:
-                metrics_collector.run_alert_check()
-                time.sleep(60)  # Check every minute
+                if self.run_once() is not None:
+                    # The leader needs the sampler's history
+                    get_sampler().ensure_started()
             except Exception as e:
-                alert_logger.error(f"Alert check loop error: {e}")
-                time.sleep(60)
-    
-    # Start background thread for alert checking
-    alert_thread = threading.Thread(target=alert_check_loop, daemon=True)
-    alert_thread.start()
-    alert_logger.info("Started periodic alert checking")
+                alert_logger.error(f"Alert scheduler error: {e}")
+            time.sleep(max(0, self.interval - (time.monotonic() - started)))
 
 
-# Auto-start alert checking when module is imported
-if getattr(settings, 'ENABLE_ALERTING', True):
-    run_periodic_alert_check()
+# Global metrics collector instance
+metrics_collector = MetricsCollector()
+
+# Global alert scheduler instance
+alert_scheduler = AlertScheduler(metrics_collector)
+
+
+def run_periodic_alert_check():
+    """Start the alert scheduler in this process if alerting is explicitly enabled"""
+    if getattr(settings, 'ENABLE_ALERTING', False):
+        alert_scheduler.ensure_started()
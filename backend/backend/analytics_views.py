@@ -11,14 +11,35 @@ from django.contrib.auth import get_user_model
 # Import models from different apps
 from accounts.models import User
 from assessments.models import Assessment, ClientAssessmentAssignment, AssessmentRequest, AssessmentQuestion, AssessmentResponse
+from assessments.latest import risk_distribution
+from assessments.snapshots import analytics_trends
 from community.models import ForumPost, ForumComment, ChatRoom
 from content.models import Article, Video, AudioContent
+from crisis.interventions import intervention_metrics
 from crisis.models import CrisisAlert
 from mood.models import MoodEntry as MoodTrackerEntry
 from wellness.models import MoodEntry, DailyChallenge, UserChallengeCompletion
 
+from .dashboard_snapshots import snapshots as dashboard_snapshots, wants_fresh
+
 User = get_user_model()
 
+
+def intervention_summary(alerts):
+    """Dashboard intervention figures for a queryset of crisis alerts"""
+    metrics = intervention_metrics(alerts)
+    return {
+        'totalInterventions': metrics['total'],
+        'successfulInterventions': metrics['resolved'],
+        'escalations': metrics['escalations'],
+        # Minutes from an alert being raised to it being resolved
+        'averageResponseTime': metrics['resolve']['mean'] or 0,
+        'responseTimes': {
+            'acknowledge': metrics['acknowledge'],
+            'resolve': metrics['resolve']
+        }
+    }
+
 class SystemAnalyticsView(APIView):
     """
     Comprehensive system analytics with real data aggregation
@@ -36,32 +57,19 @@ class SystemAnalyticsView(APIView):
             # Get time range parameter
             time_range = request.GET.get('timeRange', '30d')
             days = self._parse_time_range(time_range)
-            start_date = timezone.now() - timedelta(days=days)
             
-            # Client Engagement Metrics
-            client_engagement = self._get_client_engagement(start_date)
-            
-            # Risk Assessment Distribution
-            risk_assessment = self._get_risk_assessment()
+            # Served from a stored snapshot, refreshed in the background once stale
+            analytics, snapshot = dashboard_snapshots.get(
+                'system_analytics',
+                lambda: self._get_analytics(days),
+                params={'days': days},
+                fresh=wants_fresh(request)
+            )
             
-            # Intervention Metrics
-            interventions = self._get_intervention_metrics(start_date)
-            
-            # Trend Data
-            trends = self._get_trends(days)
-            
-            # System Overview
-            system_overview = self._get_system_overview()
-            
-            return Response({
-                'clientEngagement': client_engagement,
-                'riskAssessment': risk_assessment,
-                'interventions': interventions,
-                'trends': trends,
-                'systemOverview': system_overview,
-                'timeRange': time_range,
-                'generatedAt': timezone.now().isoformat()
-            }, status=status.HTTP_200_OK)
+            return Response(
+                dict(analytics, timeRange=time_range, snapshot=snapshot),
+                status=status.HTTP_200_OK
+            )
             
         except Exception as e:
             return Response({
@@ -91,6 +99,24 @@ class SystemAnalyticsView(APIView):
                 }
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    def _get_analytics(self, days):
+        """Compute the full analytics payload for the last ``days`` days"""
+        start_date = timezone.now() - timedelta(days=days)
+        
+        return {
+            # Client Engagement Metrics
+            'clientEngagement': self._get_client_engagement(start_date),
+            # Risk Assessment Distribution
+            'riskAssessment': self._get_risk_assessment(),
+            # Intervention Metrics
+            'interventions': self._get_intervention_metrics(start_date),
+            # Trend Data
+            'trends': self._get_trends(days),
+            # System Overview
+            'systemOverview': self._get_system_overview(),
+            'generatedAt': timezone.now().isoformat()
+        }
+    
     def _parse_time_range(self, time_range):
         """Parse time range string to days"""
         if time_range == '7d':
@@ -112,7 +138,7 @@ class SystemAnalyticsView(APIView):
         # Active clients (users who completed assessments in time range)
         active_clients = User.objects.filter(
             role='user',
-            assessment_set__completed_at__gte=start_date
+            assessments__completed_at__gte=start_date
         ).distinct().count()
         
         # Assessments completed in time range
@@ -131,36 +157,9 @@ class SystemAnalyticsView(APIView):
         }
     
     def _get_risk_assessment(self):
-        """Calculate risk level distribution"""
-        # Get all users with role 'user'
-        total_users = User.objects.filter(role='user').count()
-        
-        # If no users, return zeros
-        if total_users == 0:
-            return {
-                'lowRisk': 0,
-                'mediumRisk': 0,
-                'highRisk': 0,
-                'criticalRisk': 0
-            }
-        
-        # Get latest assessment for each user
-        risk_counts = {'low': 0, 'medium': 0, 'high': 0, 'critical': 0}
-        
-        # Get all users and their latest assessments
-        users = User.objects.filter(role='user')
-        for user in users:
-            latest_assessment = Assessment.objects.filter(
-                user=user
-            ).order_by('-completed_at').first()
-            
-            if latest_assessment and latest_assessment.risk_level:
-                risk_level = latest_assessment.risk_level.lower()
-                if risk_level in risk_counts:
-                    risk_counts[risk_level] += 1
-            else:
-                # Users without assessments are considered low risk
-                risk_counts['low'] += 1
+        """Calculate risk level distribution from each user's latest assessment"""
+        # Users without assessments are considered low risk
+        risk_counts = risk_distribution(User.objects.filter(role='user'), unassessed='low')
         
         return {
             'lowRisk': risk_counts['low'],
@@ -171,87 +170,11 @@ class SystemAnalyticsView(APIView):
     
     def _get_intervention_metrics(self, start_date):
         """Calculate intervention and crisis response metrics"""
-        # Crisis alerts as interventions
-        total_interventions = CrisisAlert.objects.filter(
-            created_at__gte=start_date
-        ).count()
-        
-        # Successful interventions (resolved alerts)
-        successful_interventions = CrisisAlert.objects.filter(
-            created_at__gte=start_date,
-            status='resolved'
-        ).count()
-        
-        # Escalations (critical alerts)
-        escalations = CrisisAlert.objects.filter(
-            created_at__gte=start_date,
-            severity_level='critical'
-        ).count()
-        
-        # Calculate average response time (placeholder - would need actual response tracking)
-        # For now, use a reasonable estimate based on alert resolution times
-        resolved_alerts = CrisisAlert.objects.filter(
-            created_at__gte=start_date,
-            status='resolved',
-            resolved_at__isnull=False
-        )
-        
-        if resolved_alerts.exists():
-            total_response_time = sum([
-                (alert.resolved_at - alert.created_at).total_seconds() / 60
-                for alert in resolved_alerts
-            ])
-            average_response_time = total_response_time / resolved_alerts.count()
-        else:
-            average_response_time = 0
-        
-        return {
-            'totalInterventions': total_interventions,
-            'successfulInterventions': successful_interventions,
-            'escalations': escalations,
-            'averageResponseTime': round(average_response_time, 1)
-        }
+        return intervention_summary(CrisisAlert.objects.filter(created_at__gte=start_date))
     
     def _get_trends(self, days):
-        """Calculate trend data for charts"""
-        # Weekly engagement (last 7 days)
-        weekly_engagement = []
-        for i in range(7):
-            day_start = timezone.now() - timedelta(days=i+1)
-            day_end = day_start + timedelta(days=1)
-            
-            daily_active = User.objects.filter(
-                role='user',
-                assessment_set__completed_at__range=[day_start, day_end]
-            ).distinct().count()
-            
-            total_users = User.objects.filter(role='user').count()
-            engagement_rate = (daily_active / total_users * 100) if total_users > 0 else 0
-            weekly_engagement.append(round(engagement_rate, 1))
-        
-        weekly_engagement.reverse()  # Show oldest to newest
-        
-        # Monthly assessments (last few months)
-        monthly_assessments = []
-        for i in range(6):  # Last 6 months
-            month_start = timezone.now().replace(day=1) - timedelta(days=30*i)
-            month_end = month_start + timedelta(days=30)
-            
-            monthly_count = Assessment.objects.filter(
-                completed_at__range=[month_start, month_end]
-            ).count()
-            monthly_assessments.append(monthly_count)
-        
-        monthly_assessments.reverse()
-        
-        # Risk trends (simplified)
-        risk_trends = [15, 25, 35, 45, 40, 30, 25]  # Placeholder trend data
-        
-        return {
-            'weeklyEngagement': weekly_engagement,
-            'monthlyAssessments': monthly_assessments,
-            'riskTrends': risk_trends
-        }
+        """Calculate trend data for charts from the daily analytics snapshots"""
+        return analytics_trends()
     
     def _get_system_overview(self):
         """Get overall system statistics"""
@@ -289,56 +212,70 @@ class GuideAnalyticsView(APIView):
         try:
             time_range = request.GET.get('timeRange', '30d')
             days = self._parse_time_range(time_range)
-            start_date = timezone.now() - timedelta(days=days)
+            guide = request.user
             
-            # Get guide's assigned clients
-            assigned_clients = ClientAssessmentAssignment.objects.filter(
-                guide=request.user
-            ).values('client').distinct()
+            # Served from a stored snapshot per guide, refreshed in the background once stale
+            analytics, snapshot = dashboard_snapshots.get(
+                'guide_analytics',
+                lambda: self._get_analytics(guide, days),
+                params={'days': days},
+                scope=guide.id,
+                fresh=wants_fresh(request)
+            )
             
-            client_ids = [assignment['client'] for assignment in assigned_clients]
-            
-            # Client engagement for this guide
-            total_clients = len(client_ids)
-            active_clients = User.objects.filter(
-                id__in=client_ids,
-                assessment_set__completed_at__gte=start_date
-            ).distinct().count()
-            
-            assessments_completed = Assessment.objects.filter(
-                user_id__in=client_ids,
-                completed_at__gte=start_date
-            ).count()
-            
-            average_engagement = (active_clients / total_clients * 100) if total_clients > 0 else 0
-            
-            # Risk assessment for guide's clients
-            risk_distribution = self._get_guide_risk_distribution(client_ids)
-            
-            # Guide interventions
-            guide_interventions = self._get_guide_interventions(client_ids, start_date)
-            
-            # Trends for guide's clients
-            guide_trends = self._get_guide_trends(client_ids, days)
-            
-            return Response({
-                'clientEngagement': {
-                    'totalClients': total_clients,
-                    'activeClients': active_clients,
-                    'assessmentsCompleted': assessments_completed,
-                    'averageEngagement': round(average_engagement, 1)
-                },
-                'riskAssessment': risk_distribution,
-                'interventions': guide_interventions,
-                'trends': guide_trends,
-                'timeRange': time_range
-            })
+            return Response(dict(analytics, timeRange=time_range, snapshot=snapshot))
             
         except Exception as e:
             return Response({
                 'error': f'Failed to generate guide analytics: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    def _get_analytics(self, guide, days):
+        """Compute the analytics payload for a guide's clients over the last ``days`` days"""
+        start_date = timezone.now() - timedelta(days=days)
+        
+        # Get guide's assigned clients
+        assigned_clients = ClientAssessmentAssignment.objects.filter(
+            guide=guide
+        ).values('client').distinct()
+        
+        client_ids = [assignment['client'] for assignment in assigned_clients]
+        
+        # Client engagement for this guide
+        total_clients = len(client_ids)
+        active_clients = User.objects.filter(
+            id__in=client_ids,
+            assessments__completed_at__gte=start_date
+        ).distinct().count()
+        
+        assessments_completed = Assessment.objects.filter(
+            user_id__in=client_ids,
+            completed_at__gte=start_date
+        ).count()
+        
+        average_engagement = (active_clients / total_clients * 100) if total_clients > 0 else 0
+        
+        # Risk assessment for guide's clients
+        risk_distribution = self._get_guide_risk_distribution(client_ids)
+        
+        # Guide interventions
+        guide_interventions = self._get_guide_interventions(client_ids, start_date)
+        
+        # Trends for guide's clients
+        guide_trends = self._get_guide_trends(client_ids, days)
+        
+        return {
+            'clientEngagement': {
+                'totalClients': total_clients,
+                'activeClients': active_clients,
+                'assessmentsCompleted': assessments_completed,
+                'averageEngagement': round(average_engagement, 1)
+            },
+            'riskAssessment': risk_distribution,
+            'interventions': guide_interventions,
+            'trends': guide_trends
+        }
+    
     def _parse_time_range(self, time_range):
         """Parse time range string to days"""
         if time_range == '7d':
@@ -354,17 +291,7 @@ class GuideAnalyticsView(APIView):
     
     def _get_guide_risk_distribution(self, client_ids):
         """Get risk distribution for guide's clients"""
-        risk_counts = {'low': 0, 'medium': 0, 'high': 0, 'critical': 0}
-        
-        for client_id in client_ids:
-            latest_assessment = Assessment.objects.filter(
-                user_id=client_id
-            ).order_by('-completed_at').first()
-            
-            if latest_assessment and latest_assessment.risk_level:
-                risk_level = latest_assessment.risk_level.lower()
-                if risk_level in risk_counts:
-                    risk_counts[risk_level] += 1
+        risk_counts = risk_distribution(User.objects.filter(id__in=client_ids), unassessed=None)
         
         return {
             'lowRisk': risk_counts['low'],
@@ -375,47 +302,10 @@ class GuideAnalyticsView(APIView):
     
     def _get_guide_interventions(self, client_ids, start_date):
         """Get intervention metrics for guide's clients"""
-        # Crisis alerts for guide's clients
-        total_interventions = CrisisAlert.objects.filter(
+        return intervention_summary(CrisisAlert.objects.filter(
             user_id__in=client_ids,
             created_at__gte=start_date
-        ).count()
-        
-        successful_interventions = CrisisAlert.objects.filter(
-            user_id__in=client_ids,
-            created_at__gte=start_date,
-            status='resolved'
-        ).count()
-        
-        escalations = CrisisAlert.objects.filter(
-            user_id__in=client_ids,
-            created_at__gte=start_date,
-            severity_level='critical'
-        ).count()
-        
-        # Average response time calculation
-        resolved_alerts = CrisisAlert.objects.filter(
-            user_id__in=client_ids,
-            created_at__gte=start_date,
-            status='resolved',
-            resolved_at__isnull=False
-        )
-        
-        if resolved_alerts.exists():
-            total_response_time = sum([
-                (alert.resolved_at - alert.created_at).total_seconds() / 60
-                for alert in resolved_alerts
-            ])
-            average_response_time = total_response_time / resolved_alerts.count()
-        else:
-            average_response_time = 0
-        
-        return {
-            'totalInterventions': total_interventions,
-            'successfulInterventions': successful_interventions,
-            'escalations': escalations,
-            'averageResponseTime': round(average_response_time, 1)
-        }
+        ))
     
     def _get_guide_trends(self, client_ids, days):
         """Get trend data for guide's clients"""
@@ -427,7 +317,7 @@ class GuideAnalyticsView(APIView):
             
             daily_active = User.objects.filter(
                 id__in=client_ids,
-                assessment_set__completed_at__range=[day_start, day_end]
+                assessments__completed_at__range=[day_start, day_end]
             ).distinct().count()
             
             total_clients = len(client_ids)
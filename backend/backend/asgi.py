@@ -0,0 +1,25 @@
+"""
+ASGI config for edumindsolutions project.
+
+Serves the Django HTTP application and the chat WebSocket endpoints from one
+callable. Run it under an ASGI server, e.g.
+``gunicorn backend.asgi:application -k uvicorn.workers.UvicornWorker``.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+# Set up Django before importing anything that touches models
+django_application = get_asgi_application()
+
+from community.routing import websocket_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
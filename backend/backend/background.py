@@ -0,0 +1,145 @@
+"""
+Fork-safe background work
+
+Gunicorn imports the application and then forks its workers, and threads
+do not survive a fork: a pool or thread created in the parent is dead
+weight in every worker. The helpers here create their threads lazily in
+the process that uses them and start over when they find themselves in a
+new process.
+
+``BackgroundPool`` is a small thread pool for keyed jobs, where a key that
+is already running is not submitted again. ``BackgroundThread`` keeps one
+long-running daemon thread per process, such as a sampler or a flush loop.
+``enqueue`` queues a Celery task, falling back to a pool in this process
+when there is no broker.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from django.conf import settings
+from django.db import connections
+
+
+class BackgroundPool:
+    """A lazily created, per-process thread pool that runs each key at most once at a time"""
+
+    def __init__(self, name, max_workers=2):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = None
+        self._pid = None
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _ensure_executor(self):
+        """The executor for this process; caller holds the lock"""
+        if self._executor is None or self._pid != os.getpid():
+            # Forked worker: the parent's pool threads did not survive
+            self._pid = os.getpid()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+            self._in_flight = {}
+        return self._executor
+
+    def running(self, key):
+        """The future of the job running under ``key``, if any"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return None
+            return self._in_flight.get(key)
+
+    def submit(self, key, func, *args, **kwargs):
+        """
+        Run ``func`` on the pool under ``key`` and return its future
+
+        If a job is already running under the key, its future is returned
+        and ``func`` is not submitted. Jobs with a key of None always run.
+        """
+        with self._lock:
+            executor = self._ensure_executor()
+            if key is not None and key in self._in_flight:
+                return self._in_flight[key]
+            # Unkeyed jobs are tracked under a token of their own so wait() covers them
+            token = key if key is not None else object()
+            future = executor.submit(self._execute, token, func, args, kwargs)
+            self._in_flight[token] = future
+        # A job cancelled before it started never reaches _execute; added outside the lock
+        # because a future that is already done runs the callback right away
+        future.add_done_callback(partial(self._forget_cancelled, token))
+        return future
+
+    def _execute(self, token, func, args, kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            # Pool threads hold their own database connections
+            connections.close_all()
+            with self._lock:
+                self._in_flight.pop(token, None)
+
+    def _forget_cancelled(self, token, future):
+        if future.cancelled():
+            with self._lock:
+                if self._in_flight.get(token) is future:
+                    del self._in_flight[token]
+
+    def wait(self):
+        """Block until the jobs running now have finished"""
+        with self._lock:
+            futures = list(self._in_flight.values()) if self._pid == os.getpid() else []
+        for future in futures:
+            if not future.cancelled():
+                future.exception()
+
+
+class BackgroundThread:
+    """One daemon thread per process running ``target``, restarted after a fork or if it died"""
+
+    def __init__(self, name, target):
+        self.name = name
+        self.target = target
+        self._thread = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def is_running(self):
+        return self._pid == os.getpid() and self._thread is not None and self._thread.is_alive()
+
+    def ensure_started(self, on_start=None):
+        """
+        Start the thread in this process if it is not running; returns whether it was started
+
+        ``on_start`` is called before the thread starts with whether this
+        process is a fork of the one that created or last started it, to
+        reset any state that belonged to the parent.
+        """
+        if self.is_running():
+            return False
+        with self._lock:
+            if self.is_running():
+                return False
+            forked = self._pid != os.getpid()
+            self._pid = os.getpid()
+            if on_start is not None:
+                on_start(forked)
+            self._thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+            self._thread.start()
+            return True
+
+
+_task_pool = BackgroundPool('celery-fallback', max_workers=2)
+
+
+def enqueue(task, *args, **kwargs):
+    """
+    Queue a Celery task without making the caller wait for it
+
+    Tasks go to the broker when ``CELERY_BROKER_URL`` is set and run inline
+    when ``CELERY_TASK_ALWAYS_EAGER`` is on (as in tests). Otherwise they run
+    on this process's background pool, so a deploy without a worker still
+    keeps them off the request.
+    """
+    if getattr(settings, 'CELERY_BROKER_URL', '') or getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+        return task.delay(*args, **kwargs)
+    return _task_pool.submit(None, task.apply, args, kwargs)
@@ -0,0 +1,331 @@
+"""
+Cache backends shared by all workers
+
+``settings.CACHES`` defines one alias per namespace (``default``,
+``metrics``, ``throttle``, ``queries``), each with its own key prefix and
+default TTL. In production every namespace lives in Redis; without Redis
+each one is a SQLite file that all workers on the node open, so counters,
+throttles and leases are shared instead of silently per process. ``add``
+and ``incr`` are single statements in both backends, so they stay atomic
+across workers.
+
+Both backends count hits and misses per namespace in the metrics registry;
+the SQLite backend also counts expired and evicted entries when it culls.
+``get_cache_stats`` merges those counts across workers.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.redis import RedisCache as DjangoRedisCache
+
+from .metrics import get_merged_metrics, registry as metrics_registry
+
+_MISSING = object()
+
+# Keys per statement for the *_many operations, under SQLite's variable limit
+CHUNK_SIZE = 500
+
+
+class CacheStatsMixin:
+    """Counts hits and misses of ``get``/``get_many`` per namespace (the key prefix)"""
+
+    @property
+    def namespace(self):
+        return self.key_prefix or 'default'
+
+    def _record(self, metric, count, **labels):
+        if count:
+            metrics_registry.inc(metric, count, labels={'cache': self.namespace, **labels})
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._record('cache_requests_total', 1, result='miss')
+            return default
+        self._record('cache_requests_total', 1, result='hit')
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        self._record('cache_requests_total', len(found), result='hit')
+        self._record('cache_requests_total', len(keys) - len(found), result='miss')
+        return found
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def _open_database(location, name):
+    """This process's connection to a cache database and the lock serializing its use"""
+    # Each in-memory namespace is its own private database
+    key = (os.getpid(), location if location != ':memory:' else f":memory:{name}")
+    database = _databases.get(key)
+    if database is not None:
+        return database
+
+    with _databases_lock:
+        if key not in _databases:
+            if location != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(location)), exist_ok=True)
+            connection = sqlite3.connect(location, timeout=5, isolation_level=None, check_same_thread=False)
+            if location != ':memory:':
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value BLOB, expires REAL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires)')
+            _databases[key] = (connection, threading.Lock())
+        return _databases[key]
+
+
+class BaseSQLiteCache(BaseCache):
+    """
+    Cache in a SQLite database shared by the processes on one node
+
+    Integers are stored natively so ``incr`` is one atomic ``UPDATE``; other
+    values are pickled. Each process keeps one connection per database,
+    guarded by a lock, and processes coordinate through SQLite's file locking in WAL mode.
+    Past ``MAX_ENTRIES`` expired entries are removed first, then the
+    ``1/CULL_FREQUENCY`` of entries closest to expiry. A ``LOCATION`` of
+    ``:memory:`` gives each process a private database, for tests.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.location = location
+        self._writes = 0
+        # Counting rows is a scan, so only check the size every few writes
+        self._cull_every = max(1, min(100, self._max_entries // 100))
+
+    def _record(self, metric, count, **labels):
+        pass
+
+    @contextmanager
+    def _database(self):
+        # Django gives each thread its own backend instance, so the connection is shared per process
+        connection, lock = _open_database(self.location, self.key_prefix)
+        with lock:
+            yield connection
+
+    def _execute(self, sql, params=()):
+        with self._database() as db:
+            return db.execute(sql, params)
+
+    def _fetchone(self, sql, params=()):
+        # Fetch under the lock so the statement is finished before another thread uses the connection
+        with self._database() as db:
+            return db.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql, params=()):
+        with self._database() as db:
+            return db.execute(sql, params).fetchall()
+
+    def _encode(self, value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def _decode(self, value):
+        return pickle.loads(value) if isinstance(value, bytes) else value
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._execute(
+            'INSERT INTO cache_entries (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache_entries.expires <= ?',
+            (key, self._encode(value), self.get_backend_timeout(timeout), time.time()),
+        )
+        added = cursor.rowcount == 1
+        if added:
+            self._maybe_cull()
+        return added
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._fetchone(
+            'SELECT value FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        )
+        return default if row is None else self._decode(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)',
+            (key, self._encode(value), self.get_backend_timeout(timeout)),
+        )
+        self._maybe_cull()
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._execute(
+            'UPDATE cache_entries SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._execute('DELETE FROM cache_entries WHERE key = ?', (key,)).rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._fetchone(
+            'SELECT 1 FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        )
+        return row is not None
+
+    def incr(self, key, delta=1, version=None):
+        cache_key = self.make_and_validate_key(key, version=version)
+        row = self._fetchone(
+            "UPDATE cache_entries SET value = value + ? "
+            "WHERE key = ? AND (expires IS NULL OR expires > ?) AND typeof(value) = 'integer' "
+            "RETURNING value",
+            (delta, cache_key, time.time()),
+        )
+        if row is None:
+            raise ValueError("Key '%s' not found" % key)
+        return row[0]
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        cache_keys = list(key_map)
+        found = {}
+        now = time.time()
+        for start in range(0, len(cache_keys), CHUNK_SIZE):
+            chunk = cache_keys[start:start + CHUNK_SIZE]
+            rows = self._fetchall(
+                f"SELECT key, value FROM cache_entries WHERE key IN ({', '.join('?' * len(chunk))}) "
+                f"AND (expires IS NULL OR expires > ?)",
+                (*chunk, now),
+            )
+            for cache_key, value in rows:
+                found[key_map[cache_key]] = self._decode(value)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self.make_and_validate_key(key, version=version), self._encode(value), expires)
+            for key, value in data.items()
+        ]
+        with self._database() as db:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                db.executemany('INSERT OR REPLACE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)', rows)
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        self._maybe_cull()
+        return []
+
+    def delete_many(self, keys, version=None):
+        cache_keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        for start in range(0, len(cache_keys), CHUNK_SIZE):
+            chunk = cache_keys[start:start + CHUNK_SIZE]
+            self._execute(f"DELETE FROM cache_entries WHERE key IN ({', '.join('?' * len(chunk))})", chunk)
+
+    def clear(self):
+        self._execute('DELETE FROM cache_entries')
+
+    def _maybe_cull(self):
+        self._writes += 1
+        if self._writes % self._cull_every == 0:
+            self.cull()
+
+    def cull(self):
+        """Remove expired entries and, over ``MAX_ENTRIES``, evict those closest to expiry"""
+        with self._database() as db:
+            expired = db.execute('DELETE FROM cache_entries WHERE expires <= ?', (time.time(),)).rowcount
+            count = db.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+            evicted = 0
+            if count > self._max_entries:
+                if self._cull_frequency == 0:
+                    evicted = db.execute('DELETE FROM cache_entries').rowcount
+                else:
+                    evicted = db.execute(
+                        'DELETE FROM cache_entries WHERE key IN ('
+                        'SELECT key FROM cache_entries ORDER BY expires IS NULL, expires LIMIT ?)',
+                        (count // self._cull_frequency,),
+                    ).rowcount
+        self._record('cache_evictions_total', expired, reason='expired')
+        self._record('cache_evictions_total', evicted, reason='capacity')
+
+    def info(self):
+        row = self._fetchone(
+            'SELECT COUNT(*), SUM(expires IS NULL OR expires > ?) FROM cache_entries', (time.time(),)
+        )
+        return {
+            'backend': 'sqlite',
+            'location': self.location,
+            'entries': row[0],
+            'live_entries': row[1] or 0,
+            'max_entries': self._max_entries,
+        }
+
+
+class SQLiteCache(CacheStatsMixin, BaseSQLiteCache):
+    """SQLite cache with per-namespace hit, miss and eviction counts"""
+
+
+class RedisCache(CacheStatsMixin, DjangoRedisCache):
+    """Django's Redis cache with per-namespace hit/miss counts"""
+
+    def info(self):
+        # Redis evicts under maxmemory across all namespaces, so these figures are server-wide
+        client = self._cache.get_client()
+        stats = client.info('stats')
+        memory = client.info('memory')
+        return {
+            'backend': 'redis',
+            'keyspace_hits': stats.get('keyspace_hits'),
+            'keyspace_misses': stats.get('keyspace_misses'),
+            'expired_keys': stats.get('expired_keys'),
+            'evicted_keys': stats.get('evicted_keys'),
+            'used_memory': memory.get('used_memory'),
+            'maxmemory_policy': memory.get('maxmemory_policy'),
+        }
+
+
+def get_cache_stats():
+    """Hits, misses and evictions per cache namespace across all workers, with backend details"""
+    counters = get_merged_metrics()['counters']
+    stats = {}
+    for alias, config in settings.CACHES.items():
+        namespace = config.get('KEY_PREFIX') or 'default'
+        counts = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0}
+        for (name, labels), value in counters.items():
+            labels = dict(labels)
+            if labels.get('cache') != namespace:
+                continue
+            if name == 'cache_requests_total':
+                counts['hits' if labels.get('result') == 'hit' else 'misses'] += value
+            elif name == 'cache_evictions_total':
+                counts['evicted' if labels.get('reason') == 'capacity' else 'expired'] += value
+
+        lookups = counts['hits'] + counts['misses']
+        entry = {
+            'namespace': namespace,
+            'timeout': config.get('TIMEOUT', 300),
+            **counts,
+            'hit_rate': round(counts['hits'] / lookups, 3) if lookups else 0,
+        }
+        backend = caches[alias]
+        if hasattr(backend, 'info'):
+            try:
+                entry['backend'] = backend.info()
+            except Exception as e:
+                entry['backend'] = {'error': str(e)}
+        stats[alias] = entry
+    return stats
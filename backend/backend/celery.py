@@ -0,0 +1,17 @@
+"""
+Celery application for background jobs
+
+Tests run tasks eagerly. Without ``CELERY_BROKER_URL``, tasks queued through
+``backend.background.enqueue`` run on a thread pool in the calling process,
+which keeps development and small deploys working without a broker.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+app = Celery('backend')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
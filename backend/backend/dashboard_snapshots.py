@@ -0,0 +1,134 @@
+"""
+Precomputed dashboard snapshots
+
+Admin and guide dashboards are built from dozens of COUNT and aggregate
+queries. Instead of running them on every page load, each dashboard payload
+is stored in the ``queries`` cache namespace under its view name, parameters
+(such as the time range) and scope (such as the guide id), together with
+when it was generated and how long it took to compute.
+
+A snapshot younger than ``DASHBOARD_SNAPSHOT_TTL`` seconds is served as it
+is. An older one is still served, marked ``stale``, while one background
+refresh runs; only snapshots older than ``DASHBOARD_SNAPSHOT_MAX_STALE`` (or
+missing) are computed on the request. ``fresh=True`` always recomputes.
+Refreshes take a short lease in the cache, so only one worker at a time
+recomputes a given snapshot.
+
+Compute time is recorded per view as ``dashboard_snapshot_compute_seconds``
+and served/stale/computed lookups as ``dashboard_snapshot_requests_total``.
+"""
+
+import logging
+import os
+import time
+from django.conf import settings
+from django.core.cache import caches
+
+from .background import BackgroundPool
+from .metrics import registry as metrics_registry
+
+performance_logger = logging.getLogger('performance')
+
+KEY_PREFIX = 'dashboard'
+
+
+def snapshot_key(view, params=None, scope=None):
+    """Cache key of one view's snapshot for a set of parameters and a scope"""
+    parts = [KEY_PREFIX, view, 'all' if scope is None else str(scope)]
+    parts.extend(f"{name}={value}" for name, value in sorted((params or {}).items()))
+    return ':'.join(parts)
+
+
+class DashboardSnapshots:
+    """Stored dashboard payloads and the pool that refreshes them in the background"""
+
+    def __init__(self, max_workers=2):
+        self.pool = BackgroundPool('dashboard-snapshot', max_workers)
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'DASHBOARD_SNAPSHOT_CACHE_ALIAS', 'queries')]
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'DASHBOARD_SNAPSHOT_TTL', 60)
+
+    @property
+    def max_stale(self):
+        return getattr(settings, 'DASHBOARD_SNAPSHOT_MAX_STALE', 3600)
+
+    def get(self, view, compute, params=None, scope=None, fresh=False):
+        """
+        A view's payload and its snapshot details, as a ``(payload, meta)`` pair
+
+        ``compute`` takes no arguments and returns the payload; it runs on
+        the request when there is no usable snapshot, and in the background
+        when the snapshot is only stale. Errors from a synchronous compute
+        propagate and nothing is stored.
+        """
+        key = snapshot_key(view, params, scope)
+        entry = None if fresh else self.cache.get(key)
+        age = time.time() - entry['generated_at'] if entry else None
+
+        if entry is not None and age < self.ttl:
+            result = 'fresh'
+        elif entry is not None and age < self.max_stale:
+            result = 'stale'
+            self._refresh(view, key, compute)
+        else:
+            result = 'bypass' if fresh else 'computed'
+            entry = self._compute(view, key, compute)
+            age = 0.0
+
+        metrics_registry.inc('dashboard_snapshot_requests_total', labels={'view': view, 'result': result})
+        return entry['payload'], {
+            'key': key,
+            'generatedAt': entry['generated_at'],
+            'age': round(age, 3),
+            'stale': result == 'stale',
+            'computeMs': round(entry['compute_time'] * 1000, 2),
+        }
+
+    def invalidate(self, view, params=None, scope=None):
+        self.cache.delete(snapshot_key(view, params, scope))
+
+    def _compute(self, view, key, compute):
+        start_time = time.perf_counter()
+        payload = compute()
+        compute_time = time.perf_counter() - start_time
+
+        entry = {'payload': payload, 'generated_at': time.time(), 'compute_time': compute_time}
+        self.cache.set(key, entry, self.max_stale)
+        metrics_registry.observe('dashboard_snapshot_compute_seconds', compute_time, labels={'view': view})
+        performance_logger.info(f"Dashboard snapshot {key} computed in {compute_time * 1000:.1f}ms")
+        return entry
+
+    def _refresh(self, view, key, compute):
+        """Start a background refresh unless this or another worker is already running one"""
+        if self.pool.running(key) is not None:
+            return
+        # The lease stops other workers refreshing the same snapshot; it
+        # lapses on its own if this one dies mid-refresh
+        if not self.cache.add(f"{key}:refreshing", os.getpid(), self.ttl):
+            return
+        self.pool.submit(key, self._run_refresh, view, key, compute)
+
+    def _run_refresh(self, view, key, compute):
+        try:
+            self._compute(view, key, compute)
+        except Exception as e:
+            performance_logger.error(f"Dashboard snapshot {key} refresh failed: {e}")
+        finally:
+            self.cache.delete(f"{key}:refreshing")
+
+    def wait(self):
+        """Block until the background refreshes running now have finished"""
+        self.pool.wait()
+
+
+snapshots = DashboardSnapshots()
+
+
+def wants_fresh(request):
+    """Whether the request asked to bypass stored snapshots with ``?fresh=1``"""
+    return request.GET.get('fresh') == '1'
@@ -5,9 +5,15 @@ from django.http import JsonResponse
 from django.db import connection
 from django.conf import settings
 import logging
+import time
+
+from .health_probes import overall_status, probes
 
 logger = logging.getLogger(__name__)
 
+# Checks behind /health/detailed/; request activity is reported by /monitoring/health/
+DEPENDENCY_CHECKS = ['database', 'cache', 'disk', 'system']
+
 def health_check(request):
     """
     Basic health check endpoint
@@ -41,50 +47,29 @@ def health_check(request):
 
 def detailed_health_check(request):
     """
-    Detailed health check with database metrics
+    Detailed health check of every dependency
+
+    Checks run concurrently and are cached briefly (see ``backend.health_probes``);
+    ``?fresh=1`` bypasses the cache.
     """
     try:
-        from assessments.models import Review
-        from accounts.models import User
-        from wellness.models import Activity
-        
-        # Get basic counts
-        review_count = Review.objects.count()
-        user_count = User.objects.count()
-        product_count = Product.objects.count()
-        
-        # Database connection check
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            db_status = "healthy"
-            
+        results = probes.run(DEPENDENCY_CHECKS, fresh=request.GET.get('fresh') == '1')
+        status = overall_status(results)
+
         health_data = {
-            "status": "healthy",
-            "database": {
-                "status": db_status,
-                "connection": "active"
-            },
-            "metrics": {
-                "total_reviews": review_count,
-                "total_users": user_count,
-                "total_products": product_count
-            },
-            "system": {
+            "status": status,
+            "timestamp": time.time(),
+            **results,
+            "system_info": {
                 "debug_mode": settings.DEBUG,
                 "version": "1.0.0",
                 "database_engine": settings.DATABASES['default']['ENGINE']
             },
-            "services": {
-                "accounts": "active",
-                "assessments": "active",
-                "store": "active", 
-                "carts": "active",
-                "orders": "partial"
-            }
+            "latency_ms": {name: result['latency_ms'] for name, result in results.items()},
         }
-        
-        return JsonResponse(health_data, status=200)
-        
+
+        return JsonResponse(health_data, status=503 if status == 'unhealthy' else 200)
+
     except Exception as e:
         logger.error(f"Detailed health check failed: {str(e)}")
         return JsonResponse({
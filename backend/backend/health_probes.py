@@ -0,0 +1,222 @@
+"""
+Concurrent, cached health probes
+
+Health endpoints are polled constantly by load balancers and uptime
+monitors, so each dependency check runs on a small thread pool with its own
+timeout, all checks at once, and its result is cached for
+``HEALTH_CHECK_TTL`` seconds. Once a result expires it is still served,
+marked ``stale``, while one background refresh runs; only results older than
+``HEALTH_CHECK_MAX_STALE`` make a probe wait (up to the check's timeout) for
+a new one. A check that hangs therefore costs one pool thread, never a
+pile-up of probe requests.
+
+Every reported check carries its latency, when it ran and how old it is.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import TimeoutError as FutureTimeout
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connection
+import psutil
+
+from .background import BackgroundPool
+from .metrics import get_api_metrics
+
+performance_logger = logging.getLogger('performance')
+
+Check = namedtuple('Check', ['name', 'func', 'timeout'])
+CheckEntry = namedtuple('CheckEntry', ['result', 'checked_at', 'latency'])
+
+
+def check_database():
+    """Round trip to the default database"""
+    start_time = time.time()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    response_time = time.time() - start_time
+
+    return {
+        'healthy': response_time < 1.0,  # Less than 1 second
+        'response_time': response_time,
+        'status': 'connected',
+    }
+
+
+def check_cache():
+    """Write and read back a key in the default cache"""
+    start_time = time.time()
+    key = f"health:probe:{os.getpid()}"
+    cache.set(key, start_time, 30)
+    healthy = cache.get(key) == start_time
+
+    return {
+        'healthy': healthy,
+        'response_time': time.time() - start_time,
+        'status': 'connected' if healthy else 'unavailable',
+        'backend': type(caches['default']).__name__,
+    }
+
+
+def check_disk():
+    disk = psutil.disk_usage('/')
+    return {
+        'healthy': disk.percent < 90,
+        'disk_percent': disk.percent,
+        'free_gb': round(disk.free / 1024 ** 3, 2),
+    }
+
+
+def check_system():
+    # Non-blocking: CPU usage since the previous probe rather than a one-second sample
+    cpu_percent = psutil.cpu_percent(interval=None)
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('/')
+
+    # Health thresholds
+    cpu_healthy = cpu_percent < 80
+    memory_healthy = memory.percent < 85
+    disk_healthy = disk.percent < 90
+
+    return {
+        'healthy': cpu_healthy and memory_healthy and disk_healthy,
+        'cpu_percent': cpu_percent,
+        'cpu_healthy': cpu_healthy,
+        'memory_percent': memory.percent,
+        'memory_healthy': memory_healthy,
+        'disk_percent': disk.percent,
+        'disk_healthy': disk_healthy,
+    }
+
+
+def check_application():
+    # Consider app healthy if it received requests in the last 5 minutes
+    last_request = get_api_metrics()['last_updated']
+    app_active = (time.time() - last_request) < 300
+
+    return {
+        'healthy': app_active,
+        'last_request': last_request,
+        'active': app_active,
+    }
+
+
+class HealthProbes:
+    """Registered checks, their cached results and the pool that refreshes them"""
+
+    def __init__(self, max_workers=8):
+        self.checks = {}
+        self.pool = BackgroundPool('health-probe', max_workers)
+        self._results = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'HEALTH_CHECK_TTL', 10)
+
+    @property
+    def max_stale(self):
+        return getattr(settings, 'HEALTH_CHECK_MAX_STALE', 60)
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'HEALTH_CHECK_TIMEOUT', 2)
+
+    def register(self, name, func, timeout=None):
+        self.checks[name] = Check(name, func, timeout)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def run(self, names=None, fresh=False):
+        """
+        Results of the named checks (all by default), keyed by name
+
+        Fresh cached results are returned as they are, expired ones are
+        served stale while a refresh runs, and missing or too old ones are
+        waited for. ``fresh`` ignores the cache altogether.
+        """
+        names = list(names or self.checks)
+        started = time.monotonic()
+        now = time.time()
+        results = {}
+        waiting = {}
+
+        with self._lock:
+            for name in names:
+                entry = None if fresh else self._results.get(name)
+                age = now - entry.checked_at if entry else None
+                if entry is not None and age < self.ttl:
+                    results[name] = self._report(entry, now, stale=False)
+                    continue
+
+                future = self._refresh(name)
+                if entry is not None and age < self.max_stale:
+                    results[name] = self._report(entry, now, stale=True)
+                else:
+                    waiting[name] = future
+
+        for name, future in waiting.items():
+            timeout = self.checks[name].timeout or self.timeout
+            try:
+                entry = future.result(timeout=max(0, started + timeout - time.monotonic()))
+                results[name] = self._report(entry, time.time(), stale=False)
+            except FutureTimeout:
+                performance_logger.warning(f"Health check {name} timed out after {timeout}s")
+                results[name] = {
+                    'healthy': False,
+                    'status': 'timeout',
+                    'error': f"No result within {timeout}s",
+                    'latency_ms': round(timeout * 1000, 2),
+                    'stale': False,
+                }
+
+        return {name: results[name] for name in names}
+
+    def _report(self, entry, now, stale):
+        return dict(
+            entry.result,
+            latency_ms=round(entry.latency * 1000, 2),
+            checked_at=entry.checked_at,
+            age=round(max(0.0, now - entry.checked_at), 3),
+            stale=stale,
+        )
+
+    def _refresh(self, name):
+        """The running refresh of a check, starting one if there is none"""
+        return self.pool.submit(name, self._execute, self.checks[name])
+
+    def _execute(self, check):
+        start_time = time.perf_counter()
+        try:
+            result = check.func()
+        except Exception as e:
+            performance_logger.error(f"Health check {check.name} failed: {e}")
+            result = {'healthy': False, 'status': 'error', 'error': str(e)}
+        entry = CheckEntry(result, time.time(), time.perf_counter() - start_time)
+
+        with self._lock:
+            self._results[check.name] = entry
+        return entry
+
+
+def overall_status(results):
+    """healthy, degraded when a non-critical check fails, unhealthy when the database does"""
+    if 'database' in results and not results['database']['healthy']:
+        return 'unhealthy'
+    if all(result['healthy'] for result in results.values()):
+        return 'healthy'
+    return 'degraded'
+
+
+probes = HealthProbes()
+probes.register('database', check_database)
+probes.register('cache', check_cache)
+probes.register('disk', check_disk)
+probes.register('system', check_system)
+probes.register('application', check_application)
@@ -0,0 +1,241 @@
+"""
+Queued logging pipeline
+
+Log calls on the request thread only copy the record onto a bounded
+in-memory queue. One listener thread per process drains it in batches and
+writes JSON lines to the rotating files, taking each file's lock and
+flushing once per batch rather than once per record, so file rotation and
+disk stalls never reach request latency.
+
+When the queue is full the record is dropped instead of blocking, and
+counted per logger. High-volume streams such as ``access`` can also be
+sampled: below WARNING only ``sample_rate`` of records are kept.
+
+Handlers are configured from ``settings.LOGGING``::
+
+    'access_file': {
+        'class': 'backend.log_pipeline.QueuedRotatingFileHandler',
+        'filename': 'logs/access.log',
+        'sample_rate': 0.1,
+    }
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, RotatingFileHandler
+
+from .background import BackgroundThread
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+# Attributes every LogRecord has; anything else was passed through ``extra=``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any ``extra=`` fields"""
+
+    def format(self, record):
+        document = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.thread,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                document[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            document['exception'] = record.exc_text
+        return json.dumps(document, default=str)
+
+
+class BatchRotatingFileHandler(RotatingFileHandler):
+    """Rotating file handler that can write a batch of records with one flush"""
+
+    def emit_batch(self, records):
+        self.acquire()
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            for record in records:
+                try:
+                    if self.shouldRollover(record):
+                        self.doRollover()
+                    self.stream.write(self.format(record) + self.terminator)
+                except Exception:
+                    self.handleError(record)
+            self.stream.flush()
+        finally:
+            self.release()
+
+
+class LogPipeline:
+    """The process's bounded log queue and the listener thread that drains it"""
+
+    def __init__(self, maxsize=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.queue = queue.Queue(maxsize)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = {}
+        self.sampled_out = {}
+        self._listener = BackgroundThread('log-pipeline', self._run)
+
+    def put(self, handler, record):
+        """Queue a record for ``handler``; returns False if it was dropped"""
+        self.ensure_listener()
+        try:
+            self.queue.put_nowait((handler, record))
+            return True
+        except queue.Full:
+            self._count(self.dropped, 'log_records_dropped_total', record.name)
+            return False
+
+    def sampled_out_record(self, record):
+        self._count(self.sampled_out, 'log_records_sampled_out_total', record.name)
+
+    def _count(self, counts, metric, logger_name):
+        # Plain dict increments are atomic enough for monitoring counts under the GIL
+        counts[logger_name] = counts.get(logger_name, 0) + 1
+        try:
+            from .metrics import registry
+            registry.inc(metric, labels={'logger': logger_name})
+        except Exception:
+            pass
+
+    def stats(self):
+        return {
+            'queue_size': self.queue.qsize(),
+            'queue_capacity': self.queue.maxsize,
+            'dropped': dict(self.dropped),
+            'sampled_out': dict(self.sampled_out),
+        }
+
+    def ensure_listener(self):
+        """Start the listener thread for this process if it is not running"""
+        self._listener.ensure_started(self._on_start)
+
+    def _on_start(self, forked):
+        if forked:
+            # Forked worker: the parent's queue contents did not survive
+            self.queue = queue.Queue(self.queue.maxsize)
+
+    def flush(self, timeout=5):
+        """Block until every record queued so far has been written"""
+        if not self._listener.is_running():
+            return True
+        written = threading.Event()
+        try:
+            self.queue.put((None, written), timeout=timeout)
+        except queue.Full:
+            return False
+        return written.wait(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                # A flush request ends the batch early
+                if batch[-1][0] is None:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        by_handler = {}
+        markers = []
+        for handler, record in batch:
+            if handler is None:
+                markers.append(record)
+            else:
+                by_handler.setdefault(handler, []).append(record)
+
+        for handler, records in by_handler.items():
+            try:
+                if hasattr(handler, 'emit_batch'):
+                    handler.emit_batch(records)
+                else:
+                    for record in records:
+                        handler.handle(record)
+            except Exception:
+                pass
+
+        for marker in markers:
+            marker.set()
+
+
+pipeline = LogPipeline()
+atexit.register(pipeline.flush)
+
+
+class QueuedHandler(QueueHandler):
+    """
+    Queues records for a target handler that the pipeline listener writes
+
+    Records below WARNING are kept with probability ``sample_rate``.
+    """
+
+    def __init__(self, target, sample_rate=1.0, pipeline=pipeline):
+        super().__init__(pipeline.queue)
+        self.target = target
+        self.sample_rate = sample_rate
+        self.pipeline = pipeline
+
+    def setFormatter(self, fmt):
+        # The formatter configured for this handler is the one the file is written with
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Resolve the message and traceback now: args may be mutated after the call returns
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.target.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if record.levelno < logging.WARNING and self.sample_rate < 1 and random.random() >= self.sample_rate:
+            self.pipeline.sampled_out_record(record)
+            return
+        try:
+            self.pipeline.put(self.target, self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.pipeline.flush()
+        self.target.close()
+        super().close()
+
+
+class QueuedRotatingFileHandler(QueuedHandler):
+    """Queued JSON-lines rotating file, configurable straight from ``settings.LOGGING``"""
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding='utf-8', sample_rate=1.0):
+        target = BatchRotatingFileHandler(filename, maxBytes=maxBytes, backupCount=backupCount,
+                                          encoding=encoding, delay=True)
+        target.setFormatter(JsonFormatter())
+        super().__init__(target, sample_rate=sample_rate)
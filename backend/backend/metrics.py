@@ -0,0 +1,397 @@
+"""
+In-process metrics registry
+
+Counters and histograms are recorded into a per-thread shard, so the request
+hot path never takes a lock or touches the cache. When a thread exits, its
+shard is folded into a retired total and dropped, so short-lived threads do
+not accumulate shards. Each worker process
+periodically flushes its aggregated totals to the shared Django cache under
+its own key; readers merge every live worker's snapshot. A worker only ever
+overwrites its own key, so concurrent workers cannot lose each other's
+updates the way a shared read-modify-write dict does.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+import weakref
+from bisect import bisect_left
+from django.conf import settings
+from django.core.cache import caches
+
+from .background import BackgroundThread
+
+performance_logger = logging.getLogger('performance')
+
+
+
+def log_buckets(start, count, per_doubling):
+    """Upper bounds growing geometrically from ``start``, ``per_doubling`` buckets per doubling"""
+    return tuple(round(start * 2 ** (index / per_doubling), 9) for index in range(count))
+
+
+# Upper bounds (seconds) of the latency histogram buckets, 1ms to ~55s with
+# four buckets per doubling, so a quantile estimated inside a bucket is within
+# ~19% of the true value. Values beyond the last bound fall in an overflow bucket.
+DEFAULT_BUCKETS = log_buckets(0.001, 64, 4)
+
+KEY_PREFIX = 'metrics'
+
+
+def series_key(name, labels=None):
+    """Hashable series identifier: the metric name plus sorted label pairs"""
+    return (name, tuple(sorted(labels.items()))) if labels else (name, ())
+
+
+class _Shard:
+    """Metrics recorded by one thread; only that thread writes to it"""
+
+    __slots__ = ('counters', 'histograms')
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+
+class _ShardOwner:
+    """Held only by a thread's locals, so it is collected when the thread exits"""
+
+    __slots__ = ('__weakref__',)
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms for one process"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.started_at = time.time()
+        self.last_updated = 0
+        self._local = threading.local()
+        self._shards = []
+        # Totals of exited threads; replaced, never mutated, so snapshots can read it unlocked
+        self._retired = _Shard()
+        # Reentrant: a shard can be retired by garbage collection on a thread that holds it
+        self._shards_lock = threading.RLock()
+        self._gauges = {}
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = _Shard()
+            owner = _ShardOwner()
+            self._local.shard = shard
+            self._local.owner = owner
+            # Registration happens once per thread, never on later records
+            with self._shards_lock:
+                self._shards.append(shard)
+            weakref.finalize(owner, self._retire, shard)
+        return shard
+
+    def _retire(self, shard):
+        """Fold an exited thread's shard into the retired totals and drop it"""
+        with self._shards_lock:
+            retired = _Shard()
+            for source in (self._retired, shard):
+                for key, value in source.counters.items():
+                    retired.counters[key] = retired.counters.get(key, 0) + value
+                for key, histogram in source.histograms.items():
+                    merge_histogram(retired.histograms, key, list(histogram))
+            self._retired = retired
+            self._shards.remove(shard)
+
+    def inc(self, name, value=1, labels=None):
+        """Add to a counter"""
+        counters = self._shard().counters
+        key = series_key(name, labels)
+        counters[key] = counters.get(key, 0) + value
+        self.last_updated = time.time()
+
+    def observe(self, name, value, labels=None):
+        """Record a histogram observation"""
+        histograms = self._shard().histograms
+        key = series_key(name, labels)
+        histogram = histograms.get(key)
+        if histogram is None:
+            # [count, sum, bucket counts...]
+            histogram = histograms[key] = [0, 0.0] + [0] * (len(self.buckets) + 1)
+        histogram[0] += 1
+        histogram[1] += value
+        histogram[2 + bisect_left(self.buckets, value)] += 1
+        self.last_updated = time.time()
+
+    def set_gauge(self, name, value, labels=None):
+        """Set a gauge to its current value"""
+        self._gauges[series_key(name, labels)] = value
+
+    def snapshot(self):
+        """Totals across every thread's shard"""
+        with self._shards_lock:
+            shards = list(self._shards) + [self._retired]
+
+        counters = {}
+        histograms = {}
+        for shard in shards:
+            # dict.copy() and list() are atomic under the GIL, so the owning
+            # thread can keep recording while we read
+            for key, value in shard.counters.copy().items():
+                counters[key] = counters.get(key, 0) + value
+            for key, histogram in shard.histograms.copy().items():
+                merge_histogram(histograms, key, list(histogram))
+
+        return {
+            'worker_id': self.worker_id,
+            'started_at': self.started_at,
+            'last_updated': self.last_updated,
+            'buckets': self.buckets,
+            'counters': counters,
+            'histograms': histograms,
+            'gauges': self._gauges.copy(),
+        }
+
+
+def merge_histogram(histograms, key, histogram):
+    existing = histograms.get(key)
+    if existing is None:
+        histograms[key] = histogram
+    else:
+        for index, value in enumerate(histogram):
+            existing[index] += value
+
+
+def histogram_quantile(buckets, histogram, quantile):
+    """Estimate a quantile from a [count, sum, bucket counts...] histogram.
+
+    The rank is located in its bucket and interpolated geometrically between
+    the bucket's bounds, matching the log-scaled bucket layout.
+    """
+    count = histogram[0]
+    if not count:
+        return None
+
+    rank = quantile * count
+    cumulative = 0
+    for index, bucket_count in enumerate(histogram[2:]):
+        if bucket_count and cumulative + bucket_count >= rank:
+            if index >= len(buckets):
+                # Overflow bucket: the last bound is the best we can say
+                return buckets[-1]
+            upper = buckets[index]
+            lower = buckets[index - 1] if index else 0
+            fraction = (rank - cumulative) / bucket_count
+            if lower <= 0:
+                return upper * fraction
+            return lower * (upper / lower) ** fraction
+        cumulative += bucket_count
+    return buckets[-1]
+
+
+def merge_snapshots(snapshots):
+    """Sum worker snapshots into one view; gauges are summed across workers"""
+    merged = {
+        'workers': len(snapshots),
+        'last_updated': 0,
+        'buckets': DEFAULT_BUCKETS,
+        'counters': {},
+        'histograms': {},
+        'gauges': {},
+    }
+    for snapshot in snapshots:
+        merged['last_updated'] = max(merged['last_updated'], snapshot['last_updated'])
+        merged['buckets'] = snapshot['buckets']
+        for key, value in snapshot['counters'].items():
+            merged['counters'][key] = merged['counters'].get(key, 0) + value
+        for key, histogram in snapshot['histograms'].items():
+            merge_histogram(merged['histograms'], key, list(histogram))
+        for key, value in snapshot['gauges'].items():
+            merged['gauges'][key] = merged['gauges'].get(key, 0) + value
+    return merged
+
+
+class MetricsStore:
+    """Publishes worker snapshots to the shared cache and reads them back.
+
+    Workers claim one of ``METRICS_MAX_WORKERS`` slots with an atomic
+    ``cache.add``; the slot and snapshot keys expire if a worker stops
+    flushing, so dead workers drop out of the merged view.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.slot = None
+        self._lock = threading.Lock()
+        self._flusher = BackgroundThread('metrics-flush', self._run)
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'METRICS_CACHE_ALIAS', 'default')]
+
+    @property
+    def interval(self):
+        return getattr(settings, 'METRICS_FLUSH_INTERVAL', 10)
+
+    @property
+    def ttl(self):
+        # Outlive a few missed flushes before the worker is considered gone
+        return max(60, self.interval * 6)
+
+    @property
+    def max_workers(self):
+        return getattr(settings, 'METRICS_MAX_WORKERS', 64)
+
+    def _slot_key(self, slot):
+        return f"{KEY_PREFIX}:slot:{slot}"
+
+    def _worker_key(self, worker_id):
+        return f"{KEY_PREFIX}:worker:{worker_id}"
+
+    def _claim_slot(self):
+        worker_id = self.registry.worker_id
+        if self.slot is not None and self.cache.get(self._slot_key(self.slot)) == worker_id:
+            return self.slot
+        for slot in range(self.max_workers):
+            if self.cache.add(self._slot_key(slot), worker_id, self.ttl):
+                self.slot = slot
+                return slot
+        return None
+
+    def flush(self):
+        """Write this worker's totals to the shared cache"""
+        with self._lock:
+            try:
+                slot = self._claim_slot()
+                if slot is None:
+                    performance_logger.warning("No free metrics slot; raise METRICS_MAX_WORKERS")
+                    return False
+                worker_id = self.registry.worker_id
+                self.cache.set_many({
+                    self._slot_key(slot): worker_id,
+                    self._worker_key(worker_id): self.registry.snapshot(),
+                }, self.ttl)
+                return True
+            except Exception as e:
+                performance_logger.error(f"Failed to flush metrics: {e}")
+                return False
+
+    def read(self):
+        """Merged snapshots of every live worker"""
+        slots = self.cache.get_many([self._slot_key(slot) for slot in range(self.max_workers)])
+        keys = [self._worker_key(worker_id) for worker_id in set(slots.values())]
+        return merge_snapshots(list(self.cache.get_many(keys).values()))
+
+    def ensure_flusher(self):
+        """Start the periodic flush thread for this process if it is not running"""
+        self._flusher.ensure_started(self._on_start)
+
+    def _on_start(self, forked):
+        if forked:
+            # Forked worker: start over with a fresh identity
+            with self._lock:
+                self.slot = None
+            self.registry.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+registry = MetricsRegistry()
+store = MetricsStore(registry)
+
+
+def get_merged_metrics():
+    """Merged metrics of all workers, including this worker's latest totals"""
+    store.flush()
+    return store.read()
+
+
+def get_api_metrics():
+    """Request metrics summarized in the shape the monitoring views report"""
+    merged = get_merged_metrics()
+    counters = merged['counters']
+    histograms = merged['histograms']
+
+    status_codes = {}
+    started = finished = 0
+    for (name, labels), value in counters.items():
+        if name == 'http_requests_total':
+            status = dict(labels)['status']
+            status_codes[status] = status_codes.get(status, 0) + value
+            finished += value
+        elif name == 'http_requests_started_total':
+            started += value
+
+    endpoints = {}
+    total_response_time = 0.0
+    for (name, labels), histogram in histograms.items():
+        if name != 'http_request_duration_seconds':
+            continue
+        labels = dict(labels)
+        count, total_time = histogram[0], histogram[1]
+        endpoints[f"{labels['method']} {labels['route']}"] = {
+            'count': count,
+            'total_time': total_time,
+            'avg_time': total_time / count if count else 0,
+            'p50': histogram_quantile(merged['buckets'], histogram, 0.5),
+            'p95': histogram_quantile(merged['buckets'], histogram, 0.95),
+            'p99': histogram_quantile(merged['buckets'], histogram, 0.99),
+        }
+        total_response_time += total_time
+
+    return {
+        'total_requests': finished,
+        'total_response_time': total_response_time,
+        'avg_response_time': total_response_time / finished if finished else 0,
+        'concurrent_requests': max(0, started - finished),
+        'status_codes': status_codes,
+        'endpoints': endpoints,
+        'workers': merged['workers'],
+        'last_updated': merged['last_updated'],
+    }
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in pairs) + '}'
+
+
+def render_prometheus(merged=None):
+    """Merged metrics in the Prometheus text exposition format (version 0.0.4)"""
+    if merged is None:
+        merged = get_merged_metrics()
+
+    lines = []
+    by_name = {}
+    for (name, labels), value in merged['counters'].items():
+        by_name.setdefault(('counter', name), []).append((labels, value))
+    for (name, labels), value in merged['gauges'].items():
+        by_name.setdefault(('gauge', name), []).append((labels, value))
+    for (name, labels), histogram in merged['histograms'].items():
+        by_name.setdefault(('histogram', name), []).append((labels, histogram))
+
+    for (kind, name), series in sorted(by_name.items(), key=lambda item: item[0][1]):
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(series, key=lambda item: item[0]):
+            if kind != 'histogram':
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(merged['buckets'], value[2:]):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', repr(float(bound)))])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {value[0]}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value[1]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value[0]}")
+
+    lines.append("# TYPE metrics_workers gauge")
+    lines.append(f"metrics_workers {merged['workers']}")
+    return '\n'.join(lines) + '\n'
@@ -6,15 +6,23 @@ Provides comprehensive monitoring, logging, and metrics collection
 import time
 import logging
 import json
+import random
 from django.utils.deprecation import MiddlewareMixin
 from django.http import JsonResponse
 from django.conf import settings
 from django.core.cache import cache
 from django.db import connection
 import threading
-import psutil
 import os
 
+from assessments.scheduler import run_periodic_snapshot_refresh
+from .alerting import run_periodic_alert_check
+from .metrics import registry as metrics_registry, store as metrics_store
+from .ratelimit import RateLimiter
+from .sampler import get_sampler
+from .sql_profiler import get_slow_query_log, profile_queries
+from .tracing import get_request_id
+
 # Loggers
 access_logger = logging.getLogger('access')
 performance_logger = logging.getLogger('performance')
@@ -30,7 +38,8 @@ class MonitoringMiddleware(MiddlewareMixin):
     - Request/response metrics
     - Performance data
     - Security events
-    - System metrics
+    
+    System metrics are sampled in the background by ``backend.sampler``.
     """
     
     def process_request(self, request):
@@ -63,15 +72,12 @@ class MonitoringMiddleware(MiddlewareMixin):
         # Track security events
         self.track_security_events(request, response)
         
-        # Update system metrics
-        self.update_system_metrics()
-        
         # Track concurrent requests
         self.track_concurrent_requests(-1)
         
         # Add monitoring headers
         response['X-Response-Time'] = f"{response_time:.3f}s"
-        response['X-Request-ID'] = getattr(request, 'request_id', 'unknown')
+        response['X-Request-ID'] = get_request_id(request)
         
         return response
     
@@ -98,14 +104,14 @@ class MonitoringMiddleware(MiddlewareMixin):
     
     def log_access_start(self, request):
         """Log request start"""
-        # Generate request ID
-        request.request_id = f"{int(time.time())}-{threading.get_ident()}"
+        # Request ID assigned by TracingMiddleware, or a fresh one
+        request_id = get_request_id(request)
 
         # Use performance logger instead of access logger for start events
         performance_logger.info(
             "Request started",
             extra={
-                'request_id': request.request_id,
+                'request_id': request_id,
                 'method': request.method,
                 'path': request.path,
                 'user': str(request.user) if hasattr(request, 'user') else 'anonymous',
@@ -116,28 +122,29 @@ class MonitoringMiddleware(MiddlewareMixin):
     
     def log_access_complete(self, request, response, response_time):
         """Log request completion"""
-        try:
-            # Use a simple string format to avoid formatter issues
-            log_message = (
-                f"Request completed - {request.method} {request.path} - "
-                f"Status: {response.status_code} - Time: {response_time:.3f}s - "
-                f"User: {str(request.user) if hasattr(request, 'user') else 'anonymous'} - "
-                f"IP: {self.get_client_ip(request)}"
-            )
-            access_logger.info(log_message)
-        except Exception as e:
-            # Fallback to performance logger if access logger fails
-            performance_logger.info(f"Request completed: {request.method} {request.path} - Status: {response.status_code}")
+        access_logger.info(
+            "Request completed",
+            extra={
+                'request_id': get_request_id(request),
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'response_time': round(response_time, 4),
+                'user': str(request.user) if hasattr(request, 'user') else 'anonymous',
+                'ip': self.get_client_ip(request),
+            }
+        )
     
     def log_performance_metrics(self, request, response, response_time):
         """Log detailed performance metrics"""
-        # Database query metrics
-        db_queries = len(connection.queries) if settings.DEBUG else 0
-        db_time = sum(float(q['time']) for q in connection.queries) if settings.DEBUG else 0
-        
-        # Memory usage
-        process = psutil.Process()
-        memory_info = process.memory_info()
+        # Database query metrics, from the SQL profiler when this request is sampled
+        profile = getattr(request, 'sql_profile', None)
+        if profile is not None:
+            db_queries = profile.count
+            db_time = profile.duration
+        else:
+            db_queries = len(connection.queries) if settings.DEBUG else 0
+            db_time = sum(float(q['time']) for q in connection.queries) if settings.DEBUG else 0
         
         performance_logger.info(
             "Performance metrics",
@@ -149,9 +156,6 @@ class MonitoringMiddleware(MiddlewareMixin):
                 'response_time': response_time,
                 'db_queries': db_queries,
                 'db_time': db_time,
-                'memory_rss': memory_info.rss,
-                'memory_vms': memory_info.vms,
-                'cpu_percent': process.cpu_percent(),
             }
         )
     
@@ -193,34 +197,6 @@ class MonitoringMiddleware(MiddlewareMixin):
                 }
             )
     
-    def update_system_metrics(self):
-        """Update system-level metrics in cache"""
-        try:
-            # CPU and memory metrics
-            cpu_percent = psutil.cpu_percent()
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
-            
-            # Network metrics
-            network = psutil.net_io_counters()
-            
-            metrics = {
-                'timestamp': time.time(),
-                'cpu_percent': cpu_percent,
-                'memory_percent': memory.percent,
-                'memory_available': memory.available,
-                'disk_percent': disk.percent,
-                'disk_free': disk.free,
-                'network_bytes_sent': network.bytes_sent,
-                'network_bytes_recv': network.bytes_recv,
-            }
-            
-            # Store in cache for dashboard
-            cache.set('system_metrics', metrics, timeout=60)
-            
-        except Exception as e:
-            performance_logger.error(f"Failed to update system metrics: {e}")
-    
     def track_concurrent_requests(self, delta):
         """Track concurrent request count"""
         try:
@@ -254,16 +230,9 @@ class MonitoringMiddleware(MiddlewareMixin):
             if pattern in full_path:
                 return True
         
-        # Check for excessive request rate from same IP
+        # Check for excessive request rate from same IP: more than 100 requests per minute
         ip = self.get_client_ip(request)
-        cache_key = f"request_rate_{ip}"
-        current_count = cache.get(cache_key, 0)
-        
-        if current_count > 100:  # More than 100 requests per minute
-            return True
-        
-        cache.set(cache_key, current_count + 1, timeout=60)
-        return False
+        return not RateLimiter('100/minute', 'suspicious').hit(ip).allowed
     
     def get_suspicious_reason(self, request):
         """Get reason for suspicious request classification"""
@@ -283,65 +252,168 @@ class MonitoringMiddleware(MiddlewareMixin):
 class MetricsMiddleware(MiddlewareMixin):
     """
     Lightweight metrics collection middleware
+
+    Records into the per-worker registry in ``backend.metrics``; nothing on
+    the request path touches the cache. Latency is labelled by route
+    template rather than raw path so series stay bounded. The first request
+    in each process also starts the metrics flusher, the system sampler and,
+    when ``ENABLE_ALERTING`` is on, the alert scheduler.
     """
     
     def process_request(self, request):
         """Start request timing"""
-        request._monitoring_start_time = time.time()
+        request._monitoring_start_time = time.perf_counter()
+        metrics_registry.inc('http_requests_started_total')
+        metrics_store.ensure_flusher()
+        get_sampler().ensure_started()
+        run_periodic_alert_check()
+        run_periodic_snapshot_refresh()
         return None
     
     def process_response(self, request, response):
         """Collect response metrics"""
         if hasattr(request, '_monitoring_start_time'):
-            response_time = time.time() - request._monitoring_start_time
-            
-            # Update metrics in cache
+            response_time = time.perf_counter() - request._monitoring_start_time
             self.update_metrics(request, response, response_time)
         
         return response
     
     def update_metrics(self, request, response, response_time):
-        """Update aggregated metrics"""
+        """Record the request into this worker's registry"""
         try:
-            # Get current metrics
-            metrics = cache.get('api_metrics', {
-                'total_requests': 0,
-                'total_response_time': 0,
-                'status_codes': {},
-                'endpoints': {},
-                'last_updated': time.time(),
-            })
-            
-            # Update counters
-            metrics['total_requests'] += 1
-            metrics['total_response_time'] += response_time
-            metrics['last_updated'] = time.time()
-            
-            # Track status codes
-            status_code = str(response.status_code)
-            metrics['status_codes'][status_code] = metrics['status_codes'].get(status_code, 0) + 1
-            
-            # Track endpoints
-            endpoint = f"{request.method} {request.path}"
-            if endpoint not in metrics['endpoints']:
-                metrics['endpoints'][endpoint] = {
-                    'count': 0,
-                    'total_time': 0,
-                    'avg_time': 0,
-                }
-            
-            endpoint_metrics = metrics['endpoints'][endpoint]
-            endpoint_metrics['count'] += 1
-            endpoint_metrics['total_time'] += response_time
-            endpoint_metrics['avg_time'] = endpoint_metrics['total_time'] / endpoint_metrics['count']
-            
-            # Store updated metrics
-            cache.set('api_metrics', metrics, timeout=3600)
-            
+            resolver_match = getattr(request, 'resolver_match', None)
+            route = resolver_match.route if resolver_match is not None else '<unmatched>'
+            metrics_registry.inc('http_requests_total', labels={'status': str(response.status_code)})
+            metrics_registry.observe(
+                'http_request_duration_seconds',
+                response_time,
+                labels={'method': request.method, 'route': route}
+            )
         except Exception as e:
             performance_logger.error(f"Failed to update metrics: {e}")
 
 
+class SQLProfilerMiddleware:
+    """
+    Profiles the SQL of a sampled share of requests
+
+    ``SQL_PROFILER_SAMPLE_RATE`` of requests run under ``profile_queries``;
+    with DEBUG on, an ``X-Profile-SQL: 1`` request header forces profiling.
+    Profiled responses carry query count, DB time and N+1 headers, and the
+    profile goes to the performance log and the slow query report.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        
+        with profile_queries() as profile:
+            request.sql_profile = profile
+            response = self.get_response(request)
+        
+        try:
+            self.record_profile(request, response, profile)
+        except Exception as e:
+            performance_logger.error(f"Failed to record SQL profile: {e}")
+        return response
+    
+    def should_profile(self, request):
+        if settings.DEBUG and request.headers.get('X-Profile-SQL') == '1':
+            return True
+        sample_rate = getattr(settings, 'SQL_PROFILER_SAMPLE_RATE', 0)
+        return sample_rate > 0 and random.random() < sample_rate
+    
+    def record_profile(self, request, response, profile):
+        resolver_match = getattr(request, 'resolver_match', None)
+        route = resolver_match.route if resolver_match is not None else '<unmatched>'
+        n_plus_one = profile.n_plus_one()
+        
+        response['X-DB-Query-Count'] = str(profile.count)
+        response['X-DB-Time'] = f"{profile.duration * 1000:.1f}ms"
+        response['X-DB-N-Plus-One'] = str(len(n_plus_one))
+        
+        metrics_registry.inc('db_queries_total', profile.count, labels={'route': route})
+        metrics_registry.observe('db_time_seconds', profile.duration, labels={'route': route})
+        if n_plus_one:
+            metrics_registry.inc('db_n_plus_one_total', labels={'route': route})
+        get_slow_query_log().record(profile, route, request.method)
+        
+        performance_logger.info(
+            "SQL profile",
+            extra={
+                'path': request.path,
+                'route': route,
+                'method': request.method,
+                'status': response.status_code,
+                'db_queries': profile.count,
+                'db_time': profile.duration,
+                'n_plus_one': [
+                    {'fingerprint': shape, 'count': count, 'time': duration}
+                    for shape, count, duration in n_plus_one
+                ],
+            }
+        )
+        for shape, count, duration in n_plus_one:
+            performance_logger.warning(
+                f"Probable N+1 on {request.method} {route}: {count} queries "
+                f"({duration * 1000:.1f}ms) shaped {shape}"
+            )
+
+
+class RateLimitMiddleware(MiddlewareMixin):
+    """
+    Per-client-IP rate limit of ``RATE_LIMIT_RATE`` (e.g. ``600/minute``)
+    
+    Uses the shared sliding-window engine, so the limit holds across
+    workers whenever the cache is shared. Load balancer probes are exempt.
+    """
+    
+    exempt_paths = ('/health/', '/health/quick/', '/ping/')
+    
+    def process_request(self, request):
+        rate = getattr(settings, 'RATE_LIMIT_RATE', '')
+        if not rate or request.path in self.exempt_paths:
+            return None
+        
+        result = RateLimiter(rate, 'ip').hit(self.get_client_ip(request))
+        request.rate_limit = result
+        if result.allowed:
+            return None
+        
+        metrics_registry.inc('rate_limited_total', labels={'scope': 'ip'})
+        retry_after = max(1, int(result.retry_after + 0.999))
+        response = JsonResponse({
+            'detail': f"Request was throttled. Expected available in {retry_after} seconds."
+        }, status=429)
+        response['Retry-After'] = str(retry_after)
+        return response
+    
+    def process_response(self, request, response):
+        result = getattr(request, 'rate_limit', None)
+        if result is not None:
+            response['X-RateLimit-Limit'] = str(result.limit)
+            response['X-RateLimit-Remaining'] = str(result.remaining)
+        return response
+    
+    def get_client_ip(self, request):
+        """
+        Client IP as seen by the last of ``NUM_PROXIES`` trusted proxies
+        
+        Clients can send any X-Forwarded-For they like; each proxy appends
+        the address it received the request from, so only the entry
+        ``NUM_PROXIES`` hops from the right can be trusted.
+        """
+        num_proxies = getattr(settings, 'NUM_PROXIES', 0)
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        if num_proxies and x_forwarded_for:
+            addresses = [address.strip() for address in x_forwarded_for.split(',')]
+            return addresses[-min(num_proxies, len(addresses))]
+        return request.META.get('REMOTE_ADDR')
+
+
 class HealthCheckMiddleware(MiddlewareMixin):
     """
     Health check middleware for load balancer probes
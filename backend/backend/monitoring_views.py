@@ -7,7 +7,7 @@ import time
 import json
 import logging
 from datetime import datetime, timedelta
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.core.cache import cache
@@ -16,6 +16,15 @@ from django.conf import settings
 import psutil
 import os
 
+from mood.emotion_cache import get_emotion_cache
+
+from .cache_backends import get_cache_stats
+from .health_probes import probes
+from .log_pipeline import pipeline as log_pipeline
+from .metrics import get_api_metrics, get_merged_metrics, render_prometheus, store as metrics_store
+from .sampler import get_trends
+from .sql_profiler import get_slow_query_log
+
 # Loggers
 performance_logger = logging.getLogger('performance')
 
@@ -79,22 +88,8 @@ def system_metrics(request):
 def application_metrics(request):
     """Get application-specific metrics"""
     try:
-        # Get API metrics from cache
-        api_metrics = cache.get('api_metrics', {
-            'total_requests': 0,
-            'total_response_time': 0,
-            'status_codes': {},
-            'endpoints': {},
-            'last_updated': time.time(),
-        })
-        
-        # Calculate derived metrics
-        avg_response_time = 0
-        if api_metrics['total_requests'] > 0:
-            avg_response_time = api_metrics['total_response_time'] / api_metrics['total_requests']
-        
-        # Get concurrent requests
-        concurrent_requests = cache.get('concurrent_requests', 0)
+        # Request metrics merged across all workers
+        api_metrics = get_api_metrics()
         
         # Database metrics
         db_metrics = get_database_metrics()
@@ -107,14 +102,19 @@ def application_metrics(request):
             'data': {
                 'api': {
                     'total_requests': api_metrics['total_requests'],
-                    'avg_response_time': round(avg_response_time, 3),
-                    'concurrent_requests': concurrent_requests,
+                    'avg_response_time': round(api_metrics['avg_response_time'], 3),
+                    'concurrent_requests': api_metrics['concurrent_requests'],
+                    'workers': api_metrics['workers'],
                     'status_codes': api_metrics['status_codes'],
                     'top_endpoints': get_top_endpoints(api_metrics['endpoints']),
+                    'slowest_endpoints': get_top_endpoints(api_metrics['endpoints'], key='p95'),
                     'last_updated': api_metrics['last_updated'],
                 },
                 'database': db_metrics,
                 'process': process_metrics,
+                'emotion_cache': get_emotion_cache().stats(),
+                'logging': log_pipeline.stats(),
+                'caches': get_cache_stats(),
             }
         })
         
@@ -127,17 +127,68 @@ def application_metrics(request):
 
 
 @require_http_methods(["GET"])
-def health_metrics(request):
-    """Get comprehensive health metrics"""
+def prometheus_metrics(request):
+    """Request metrics in the Prometheus text exposition format"""
+    try:
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    except Exception as e:
+        performance_logger.error(f"Failed to render Prometheus metrics: {e}")
+        return HttpResponse(f"# error: {e}\n", status=500, content_type='text/plain; charset=utf-8')
+
+
+@require_http_methods(["GET"])
+def cache_metrics(request):
+    """Hits, misses and evictions per cache namespace across all workers"""
+    try:
+        return JsonResponse({
+            'status': 'success',
+            'data': {
+                'caches': get_cache_stats(),
+                'timestamp': time.time(),
+            }
+        })
+        
+    except Exception as e:
+        performance_logger.error(f"Failed to get cache metrics: {e}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=500)
+
+
+@require_http_methods(["GET"])
+def slow_queries(request):
+    """Query shapes by total DB time, recent N+1 detections and slow queries profiled by this worker"""
     try:
-        # System health
-        system_health = check_system_health()
+        report = get_slow_query_log().report(limit=int(request.GET.get('limit', 20)))
         
-        # Database health
-        db_health = check_database_health()
+        return JsonResponse({
+            'status': 'success',
+            'data': {
+                'worker_id': metrics_store.registry.worker_id,
+                'sample_rate': getattr(settings, 'SQL_PROFILER_SAMPLE_RATE', 0),
+                'n_plus_one_threshold': getattr(settings, 'SQL_PROFILER_N_PLUS_ONE_THRESHOLD', 10),
+                **report,
+            }
+        })
         
-        # Application health
-        app_health = check_application_health()
+    except Exception as e:
+        performance_logger.error(f"Failed to get slow queries: {e}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=500)
+
+
+@require_http_methods(["GET"])
+def health_metrics(request):
+    """Get comprehensive health metrics"""
+    try:
+        # System, database and application checks, run concurrently and cached briefly
+        results = probes.run(['system', 'database', 'application'], fresh=request.GET.get('fresh') == '1')
+        system_health = results['system']
+        db_health = results['database']
+        app_health = results['application']
         
         # Overall health status
         overall_status = 'healthy'
@@ -212,16 +263,8 @@ def performance_trends(request):
         # Get time range from query parameters
         hours = int(request.GET.get('hours', 24))
         
-        # Get performance data from cache/storage
-        # In production, this would come from a time-series database
-        trends = cache.get(f'performance_trends_{hours}h', {
-            'response_times': [],
-            'request_rates': [],
-            'error_rates': [],
-            'cpu_usage': [],
-            'memory_usage': [],
-            'timestamps': [],
-        })
+        # Downsampled series recorded by the background sampler
+        trends = get_trends(hours)
         
         return JsonResponse({
             'status': 'success',
@@ -331,89 +374,15 @@ def get_process_metrics():
         }
 
 
-def check_system_health():
-    """Check overall system health"""
-    try:
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
-        # Health thresholds
-        cpu_healthy = cpu_percent < 80
-        memory_healthy = memory.percent < 85
-        disk_healthy = disk.percent < 90
-        
-        return {
-            'healthy': cpu_healthy and memory_healthy and disk_healthy,
-            'cpu_percent': cpu_percent,
-            'cpu_healthy': cpu_healthy,
-            'memory_percent': memory.percent,
-            'memory_healthy': memory_healthy,
-            'disk_percent': disk.percent,
-            'disk_healthy': disk_healthy,
-        }
-        
-    except Exception as e:
-        return {
-            'healthy': False,
-            'error': str(e)
-        }
-
-
-def check_database_health():
-    """Check database health"""
-    try:
-        start_time = time.time()
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-        response_time = time.time() - start_time
-        
-        return {
-            'healthy': response_time < 1.0,  # Less than 1 second
-            'response_time': response_time,
-            'status': 'connected',
-        }
-        
-    except Exception as e:
-        return {
-            'healthy': False,
-            'error': str(e),
-            'status': 'disconnected',
-        }
-
-
-def check_application_health():
-    """Check application-specific health"""
-    try:
-        # Check if critical services are running
-        api_metrics = cache.get('api_metrics', {})
-        last_request = api_metrics.get('last_updated', 0)
-        
-        # Consider app healthy if it received requests in the last 5 minutes
-        app_active = (time.time() - last_request) < 300
-        
-        return {
-            'healthy': app_active,
-            'last_request': last_request,
-            'active': app_active,
-        }
-        
-    except Exception as e:
-        return {
-            'healthy': False,
-            'error': str(e)
-        }
-
-
-def get_top_endpoints(endpoints):
-    """Get top endpoints by request count"""
+def get_top_endpoints(endpoints, key='count'):
+    """Get top endpoints by request count, or by another endpoint statistic such as p95"""
     if not endpoints:
         return []
     
-    # Sort by request count and return top 10
+    # Sort by the chosen statistic and return top 10
     sorted_endpoints = sorted(
         endpoints.items(),
-        key=lambda x: x[1]['count'],
+        key=lambda x: x[1][key] or 0,
         reverse=True
     )
     
@@ -422,6 +391,9 @@ def get_top_endpoints(endpoints):
             'endpoint': endpoint,
             'count': data['count'],
             'avg_time': round(data['avg_time'], 3),
+            'p50': round(data['p50'], 4) if data['p50'] is not None else None,
+            'p95': round(data['p95'], 4) if data['p95'] is not None else None,
+            'p99': round(data['p99'], 4) if data['p99'] is not None else None,
         }
         for endpoint, data in sorted_endpoints[:10]
     ]
@@ -429,11 +401,17 @@ def get_top_endpoints(endpoints):
 
 def get_rate_limit_metrics():
     """Get rate limiting metrics"""
-    # Simplified implementation
+    blocked = {}
+    for (name, labels), value in get_merged_metrics()['counters'].items():
+        if name == 'rate_limited_total':
+            scope = dict(labels)['scope']
+            blocked[scope] = blocked.get(scope, 0) + value
+    
     return {
-        'enabled': True,
-        'blocked_requests': cache.get('blocked_requests', 0),
-        'rate_limited_ips': cache.get('rate_limited_ips', []),
+        'enabled': bool(getattr(settings, 'RATE_LIMIT_RATE', '')),
+        'rate': getattr(settings, 'RATE_LIMIT_RATE', ''),
+        'blocked_requests': sum(blocked.values()),
+        'blocked_by_scope': blocked,
     }
 
 
@@ -0,0 +1,129 @@
+"""
+Shared rate-limit engine
+
+A sliding-window counter: each key keeps one integer per fixed window and
+the current rate is estimated as this window's count plus the previous
+window's count weighted by how much of it still overlaps the sliding
+window. Counters only ever change through ``cache.add`` and ``cache.incr``,
+which are atomic on the Redis, SQLite and local-memory cache backends, so
+concurrent requests cannot undercount the way a get-then-set counter does,
+and windows expire on their own instead of having their TTL pushed out by
+every hit.
+
+Used by ``RateLimitMiddleware`` and by the DRF throttle classes below.
+"""
+
+import time
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import throttling
+
+from .metrics import registry as metrics_registry
+
+KEY_PREFIX = 'ratelimit'
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+RateLimitResult = namedtuple('RateLimitResult', ['allowed', 'limit', 'remaining', 'retry_after'])
+
+
+def parse_rate(rate):
+    """(requests, seconds) for a DRF-style rate such as ``100/hour``"""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class RateLimiter:
+    """Sliding-window limit of ``rate`` hits per identity within one scope"""
+
+    def __init__(self, rate, scope, cache_alias=None):
+        self.rate = rate
+        self.scope = scope
+        self.limit, self.window = parse_rate(rate)
+        self.cache_alias = cache_alias or getattr(settings, 'RATE_LIMIT_CACHE_ALIAS', 'default')
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _key(self, ident, window_index):
+        return f"{KEY_PREFIX}:{self.scope}:{ident}:{window_index}"
+
+    def _incr(self, key, delta=1):
+        # Two windows are read at once, so each counter must outlive the next window
+        timeout = self.window * 2
+        for _ in range(2):
+            if delta > 0 and self.cache.add(key, delta, timeout):
+                return delta
+            try:
+                return self.cache.incr(key, delta)
+            except ValueError:
+                # Expired between add and incr; start the window again
+                continue
+        return delta
+
+    def hit(self, ident, now=None):
+        """Count one request for ``ident``; rejected requests are not charged"""
+        now = time.time() if now is None else now
+        window_index, offset = divmod(now, self.window)
+        window_index = int(window_index)
+        current_key = self._key(ident, window_index)
+
+        current = self._incr(current_key)
+        previous = self.cache.get(self._key(ident, window_index - 1), 0)
+        overlap = 1 - offset / self.window
+        estimate = previous * overlap + current
+
+        if estimate <= self.limit:
+            return RateLimitResult(True, self.limit, int(self.limit - estimate), 0)
+
+        # Give the slot back so clients hammering a limit are not locked out longer
+        try:
+            self.cache.decr(current_key)
+        except ValueError:
+            pass
+        current -= 1
+        return RateLimitResult(False, self.limit, 0, self._retry_after(previous, current, offset))
+
+    def _retry_after(self, previous, current, offset):
+        """Seconds until one more request fits under the limit"""
+        if current + 1 > self.limit or not previous:
+            return self.window - offset
+        # previous * (1 - t / window) + current + 1 <= limit, solved for t
+        drop_at = (1 - (self.limit - current - 1) / previous) * self.window
+        return max(0.0, drop_at - offset)
+
+    def reset(self, ident, now=None):
+        now = time.time() if now is None else now
+        window_index = int(now // self.window)
+        self.cache.delete_many([self._key(ident, window_index), self._key(ident, window_index - 1)])
+
+
+class SlidingWindowThrottleMixin:
+    """DRF throttle backed by ``RateLimiter`` instead of per-key timestamp lists"""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        result = RateLimiter(self.rate, self.scope).hit(self.key)
+        self.retry_after = result.retry_after
+        if not result.allowed:
+            metrics_registry.inc('rate_limited_total', labels={'scope': self.scope})
+        return result.allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class AnonRateThrottle(SlidingWindowThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SlidingWindowThrottleMixin, throttling.UserRateThrottle):
+    pass
@@ -0,0 +1,336 @@
+"""
+Background system sampler and ring-buffer time series
+
+A daemon thread samples system load (psutil) and request totals (the merged
+metrics registry) every ``SYSTEM_SAMPLER_INTERVAL`` seconds. Samples are
+downsampled into fixed-size ring buffers at 1 minute, 5 minute and 1 hour
+resolution, held in a memory-mapped file so the history survives restarts
+and can be read by every worker process. One process at a time holds the
+sampler lock and writes; the others only read.
+"""
+
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from django.conf import settings
+
+import psutil
+
+from .background import BackgroundThread
+
+performance_logger = logging.getLogger('performance')
+
+# Each field is averaged ('gauge') or summed ('counter') within a bucket
+FIELDS = (
+    ('cpu_percent', 'gauge'),
+    ('memory_percent', 'gauge'),
+    ('disk_percent', 'gauge'),
+    ('network_bytes_sent', 'counter'),
+    ('network_bytes_recv', 'counter'),
+    ('requests', 'counter'),
+    ('errors', 'counter'),
+    ('response_time_total', 'counter'),
+)
+
+# (name, resolution in seconds, points kept): 24 hours, 7 days and 90 days
+DEFAULT_TIERS = (
+    ('1m', 60, 1440),
+    ('5m', 300, 2016),
+    ('1h', 3600, 2160),
+)
+
+MAGIC = b'EDMRING1'
+# magic, field count, tier count, write sequence (odd while a write is in progress)
+FILE_HEADER = struct.Struct('<8sIIQ')
+# resolution, capacity, points written, pending bucket start, pending sample count
+TIER_HEADER = struct.Struct('<dQQdd')
+
+
+class RingBufferStore:
+    """Downsampling ring buffers in a memory-mapped file.
+
+    Every tier keeps the bucket in progress (its start, sample count and
+    running sums) in its header, so a restarted sampler resumes the partial
+    bucket instead of dropping it. Readers use the write sequence as a
+    seqlock and retry if a write overlapped their read.
+    """
+
+    def __init__(self, path, tiers=DEFAULT_TIERS, fields=FIELDS):
+        self.path = path
+        self.tiers = tuple(tiers)
+        self.fields = tuple(fields)
+        self.field_names = tuple(name for name, _ in self.fields)
+        self._pending = struct.Struct(f'<{len(self.fields)}d')
+        self._point = struct.Struct(f'<d{len(self.fields)}d')
+
+        self._tier_offsets = []
+        offset = FILE_HEADER.size
+        for _, _, capacity in self.tiers:
+            self._tier_offsets.append(offset)
+            offset += TIER_HEADER.size + self._pending.size + capacity * self._point.size
+        self.size = offset
+
+        self._map = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Map the file for writing, creating or resetting it if its layout does not match"""
+        with self._lock:
+            if self._map is not None:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size != self.size:
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, self.size)
+                self._map = mmap.mmap(fd, self.size)
+            finally:
+                os.close(fd)
+
+            if not self._layout_matches(self._map):
+                self._initialize()
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+    def _layout_matches(self, buffer):
+        magic, field_count, tier_count, _ = FILE_HEADER.unpack_from(buffer, 0)
+        if (magic, field_count, tier_count) != (MAGIC, len(self.fields), len(self.tiers)):
+            return False
+        for (_, resolution, capacity), offset in zip(self.tiers, self._tier_offsets):
+            tier_resolution, tier_capacity, _, _, _ = TIER_HEADER.unpack_from(buffer, offset)
+            if (tier_resolution, tier_capacity) != (resolution, capacity):
+                return False
+        return True
+
+    def _initialize(self):
+        self._map[:] = bytes(self.size)
+        FILE_HEADER.pack_into(self._map, 0, MAGIC, len(self.fields), len(self.tiers), 0)
+        for (_, resolution, capacity), offset in zip(self.tiers, self._tier_offsets):
+            TIER_HEADER.pack_into(self._map, offset, resolution, capacity, 0, 0, 0)
+        self._map.flush()
+
+    def record(self, timestamp, values):
+        """Add one sample to the bucket in progress of every tier"""
+        self.open()
+        with self._lock:
+            magic, field_count, tier_count, sequence = FILE_HEADER.unpack_from(self._map, 0)
+            FILE_HEADER.pack_into(self._map, 0, magic, field_count, tier_count, sequence + 1)
+            try:
+                for tier, offset in zip(self.tiers, self._tier_offsets):
+                    self._record_tier(tier, offset, timestamp, values)
+            finally:
+                FILE_HEADER.pack_into(self._map, 0, magic, field_count, tier_count, sequence + 2)
+
+    def _record_tier(self, tier, offset, timestamp, values):
+        _, resolution, capacity = tier
+        _, _, written, pending_start, pending_count = TIER_HEADER.unpack_from(self._map, offset)
+        pending_offset = offset + TIER_HEADER.size
+        bucket_start = timestamp - timestamp % resolution
+
+        if pending_count and bucket_start != pending_start:
+            # The bucket in progress is complete: append it to the ring
+            sums = self._pending.unpack_from(self._map, pending_offset)
+            point = [
+                total / pending_count if kind == 'gauge' else total
+                for total, (_, kind) in zip(sums, self.fields)
+            ]
+            slot = written % capacity
+            self._point.pack_into(
+                self._map,
+                pending_offset + self._pending.size + slot * self._point.size,
+                pending_start,
+                *point
+            )
+            written += 1
+            pending_count = 0
+
+        if not pending_count:
+            pending_start = bucket_start
+            sums = [0.0] * len(self.fields)
+        else:
+            sums = list(self._pending.unpack_from(self._map, pending_offset))
+
+        for index, name in enumerate(self.field_names):
+            sums[index] += values.get(name, 0.0)
+        self._pending.pack_into(self._map, pending_offset, *sums)
+        TIER_HEADER.pack_into(self._map, offset, resolution, capacity, written, pending_start, pending_count + 1)
+
+    def read(self, tier_name, since=None):
+        """Completed points of a tier, oldest first, as (timestamp, {field: value}) pairs"""
+        index = [name for name, _, _ in self.tiers].index(tier_name)
+        try:
+            with open(self.path, 'rb') as handle:
+                buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return []
+
+        try:
+            if len(buffer) != self.size or not self._layout_matches(buffer):
+                return []
+            for _ in range(10):
+                sequence = FILE_HEADER.unpack_from(buffer, 0)[3]
+                if sequence % 2:
+                    time.sleep(0.001)
+                    continue
+                points = self._read_tier(buffer, index, since)
+                if FILE_HEADER.unpack_from(buffer, 0)[3] == sequence:
+                    return points
+            # The writer kept overlapping us; a slightly torn read beats none
+            return self._read_tier(buffer, index, since)
+        finally:
+            buffer.close()
+
+    def _read_tier(self, buffer, index, since):
+        _, _, capacity = self.tiers[index]
+        offset = self._tier_offsets[index]
+        _, _, written, _, _ = TIER_HEADER.unpack_from(buffer, offset)
+        data_offset = offset + TIER_HEADER.size + self._pending.size
+
+        points = []
+        for position in range(max(0, written - capacity), written):
+            timestamp, *values = self._point.unpack_from(
+                buffer, data_offset + (position % capacity) * self._point.size
+            )
+            if since is None or timestamp >= since:
+                points.append((timestamp, dict(zip(self.field_names, values))))
+        return points
+
+
+class SystemSampler:
+    """Samples system and request metrics on a background thread"""
+
+    def __init__(self, store, interval=10):
+        self.store = store
+        self.interval = interval
+        self._thread = BackgroundThread('system-sampler', self._run)
+        self._lock_file = None
+        self._previous = None
+
+    def collect(self):
+        """Current gauges plus counter increases since the previous collection"""
+        from .metrics import get_api_metrics
+
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        network = psutil.net_io_counters()
+        api = get_api_metrics()
+
+        totals = {
+            'network_bytes_sent': network.bytes_sent,
+            'network_bytes_recv': network.bytes_recv,
+            'requests': api['total_requests'],
+            'errors': sum(count for status, count in api['status_codes'].items() if status.startswith('5')),
+            'response_time_total': api['total_response_time'],
+        }
+        previous, self._previous = self._previous, totals
+        if previous is None:
+            previous = totals
+
+        values = {
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'memory_percent': memory.percent,
+            'disk_percent': disk.percent,
+        }
+        for name, total in totals.items():
+            # A total that went down was reset (restarted worker): count from zero
+            values[name] = total - previous[name] if total >= previous[name] else total
+        return values
+
+    def sample(self, timestamp=None):
+        self.store.record(time.time() if timestamp is None else timestamp, self.collect())
+
+    def ensure_started(self):
+        """Start the sampling thread for this process if it is not running"""
+        self._thread.ensure_started(self._on_start)
+
+    def _on_start(self, forked):
+        self._lock_file = None
+        self._previous = None
+
+    def _acquire(self):
+        """Whether this process holds the sampler lock, taking it if it is free"""
+        if self._lock_file is not None:
+            return True
+        os.makedirs(os.path.dirname(self.store.path) or '.', exist_ok=True)
+        lock_file = open(f"{self.store.path}.lock", 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        # The first cpu_percent call only primes the measurement
+        psutil.cpu_percent(interval=None)
+        return True
+
+    def _run(self):
+        while True:
+            try:
+                if self._acquire():
+                    self.sample()
+            except Exception as e:
+                performance_logger.error(f"System sampler failed: {e}")
+            time.sleep(self.interval)
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    """Process-wide system sampler configured from settings"""
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = SystemSampler(
+                    RingBufferStore(settings.SYSTEM_SAMPLER_PATH),
+                    interval=getattr(settings, 'SYSTEM_SAMPLER_INTERVAL', 10)
+                )
+    return _sampler
+
+
+def get_trends(hours=24, sampler=None):
+    """Series for the last ``hours`` from the finest tier that covers them"""
+    sampler = sampler or get_sampler()
+    store = sampler.store
+    seconds = hours * 3600
+    tier_name, resolution, _ = next(
+        (tier for tier in store.tiers if tier[1] * tier[2] >= seconds),
+        store.tiers[-1]
+    )
+    points = store.read(tier_name, since=time.time() - seconds)
+
+    trends = {
+        'resolution': tier_name,
+        'timestamps': [],
+        'response_times': [],
+        'request_rates': [],
+        'error_rates': [],
+        'cpu_usage': [],
+        'memory_usage': [],
+        'disk_usage': [],
+        'network_sent_rates': [],
+        'network_recv_rates': [],
+    }
+    for timestamp, values in points:
+        requests = values['requests']
+        trends['timestamps'].append(timestamp)
+        trends['response_times'].append(round(values['response_time_total'] / requests, 4) if requests else None)
+        trends['request_rates'].append(round(requests / resolution, 4))
+        trends['error_rates'].append(round(values['errors'] / requests, 4) if requests else 0)
+        trends['cpu_usage'].append(round(values['cpu_percent'], 1))
+        trends['memory_usage'].append(round(values['memory_percent'], 1))
+        trends['disk_usage'].append(round(values['disk_percent'], 1))
+        trends['network_sent_rates'].append(round(values['network_bytes_sent'] / resolution, 1))
+        trends['network_recv_rates'].append(round(values['network_bytes_recv'] / resolution, 1))
+    return trends
@@ -11,6 +11,8 @@ https://docs.djangoproject.com/en/1.11/ref/settings/
 """
 
 import os
+import sys
+import tempfile
 from decouple import config
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -59,7 +61,12 @@ INSTALLED_APPS = [
 ]
 
 
+# Reverse proxies in front of the app (Render's load balancer is one); the client IP is the X-Forwarded-For
+# entry this many hops from the right, or REMOTE_ADDR when 0. Shared by the rate limit middleware and DRF throttles.
+NUM_PROXIES = config('NUM_PROXIES', default=1, cast=int)
+
 REST_FRAMEWORK = {
+    'NUM_PROXIES': NUM_PROXIES,
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
@@ -77,8 +84,8 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
     'NON_FIELD_ERRORS_KEY': 'error',
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'backend.ratelimit.AnonRateThrottle',
+        'backend.ratelimit.UserRateThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
@@ -89,8 +96,13 @@ REST_FRAMEWORK = {
 AUTH_USER_MODEL = 'accounts.User'
 
 MIDDLEWARE = [
+    'backend.tracing.TracingMiddleware',
+    'backend.middleware.MetricsMiddleware',
+    'backend.middleware.SQLProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    # After CORS, so preflights are answered before the limit and 429s carry CORS headers
+    'backend.middleware.RateLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -99,7 +111,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'backend.middleware.HealthCheckMiddleware',
     # 'backend.middleware.MonitoringMiddleware',  # Temporarily disabled due to logging issues
-    # 'backend.middleware.MetricsMiddleware',     # Temporarily disabled due to logging issues
+    'backend.tracing.ViewTracingMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -121,6 +133,15 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
+
+# Chat WebSocket fan-out. Leave CHAT_BROKER_URL empty for the in-process broker
+# (single process only; the Docker entry points then start one worker); point it at Redis when running more.
+CHAT_BROKER_URL = config('CHAT_BROKER_URL', default='')
+CHAT_BROKER_MAX_PENDING = config('CHAT_BROKER_MAX_PENDING', default=1000, cast=int)
+
+# Chat media still processing this many seconds after it was queued is assumed lost and queued again
+CHAT_MEDIA_PROCESSING_TIMEOUT = config('CHAT_MEDIA_PROCESSING_TIMEOUT', default=600, cast=int)
 
 
 # Database
@@ -258,6 +279,114 @@ CORS_ALLOW_HEADERS = [
 AZURE_FACE_KEY = os.environ.get('AZURE_FACE_KEY', '')
 AZURE_FACE_ENDPOINT = os.environ.get('AZURE_FACE_ENDPOINT', '')
 
+# Batched emotion analysis: worker pool size, per-frame timeout (seconds, from when the frame starts) and max frames per batch
+MOOD_ANALYSIS_WORKERS = config('MOOD_ANALYSIS_WORKERS', default=8, cast=int)
+MOOD_ANALYSIS_TIMEOUT = config('MOOD_ANALYSIS_TIMEOUT', default=15, cast=float)
+MOOD_ANALYSIS_MAX_BATCH = config('MOOD_ANALYSIS_MAX_BATCH', default=16, cast=int)
+
+# Emotion result cache: entries kept, seconds a result stays fresh and max perceptual hash distance for a match
+MOOD_ANALYSIS_CACHE_SIZE = config('MOOD_ANALYSIS_CACHE_SIZE', default=1024, cast=int)
+MOOD_ANALYSIS_CACHE_TTL = config('MOOD_ANALYSIS_CACHE_TTL', default=30, cast=float)
+MOOD_ANALYSIS_CACHE_DISTANCE = config('MOOD_ANALYSIS_CACHE_DISTANCE', default=4, cast=int)
+
+# Shared cache, one alias per namespace with its own key prefix and default TTL. With REDIS_URL set every
+# namespace lives in Redis (which evicts by its own maxmemory policy); otherwise each is a SQLite file under
+# CACHE_DIR shared by the workers on this node, evicting entries closest to expiry past MAX_ENTRIES.
+# Test runs get a private in-memory cache per process.
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+REDIS_URL = config('REDIS_URL', default='')
+CACHE_DIR = config('CACHE_DIR', default=':memory:' if TESTING else os.path.join(BASE_DIR, 'cache'))
+CACHE_NAMESPACES = {
+    'default': {'TIMEOUT': 300, 'MAX_ENTRIES': 10000},
+    'metrics': {'TIMEOUT': 300, 'MAX_ENTRIES': 1000},
+    'throttle': {'TIMEOUT': 120, 'MAX_ENTRIES': 100000},
+    'queries': {'TIMEOUT': 60, 'MAX_ENTRIES': 10000},
+}
+CACHES = {
+    name: {
+        'BACKEND': 'backend.cache_backends.RedisCache' if REDIS_URL else 'backend.cache_backends.SQLiteCache',
+        'LOCATION': REDIS_URL or (CACHE_DIR if CACHE_DIR == ':memory:' else os.path.join(CACHE_DIR, f'{name}.sqlite3')),
+        'KEY_PREFIX': name,
+        'TIMEOUT': policy['TIMEOUT'],
+        'OPTIONS': {} if REDIS_URL else {'MAX_ENTRIES': policy['MAX_ENTRIES']},
+    }
+    for name, policy in CACHE_NAMESPACES.items()
+}
+
+# Background jobs. Tests run tasks eagerly; without a broker, backend.background.enqueue runs them on an in-process pool.
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='')
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=TESTING, cast=bool)
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_TIMEZONE = TIME_ZONE
+
+# Daily analytics snapshots: refreshed every ANALYTICS_SNAPSHOT_INTERVAL seconds, backfilling this many days, by celery beat
+# or, with ANALYTICS_SNAPSHOT_SCHEDULER on, by whichever web process holds the lease in ANALYTICS_SNAPSHOT_CACHE_ALIAS;
+# a dashboard read only computes missing or partial rows itself for the last ANALYTICS_SNAPSHOT_READ_FILL_DAYS days.
+# The in-process scheduler is off unless enabled, and never under tests.
+ANALYTICS_SNAPSHOT_SCHEDULER = config('ANALYTICS_SNAPSHOT_SCHEDULER', default=False, cast=bool) and not TESTING
+ANALYTICS_SNAPSHOT_CACHE_ALIAS = config('ANALYTICS_SNAPSHOT_CACHE_ALIAS', default='default')
+ANALYTICS_SNAPSHOT_INTERVAL = config('ANALYTICS_SNAPSHOT_INTERVAL', default=900, cast=int)
+ANALYTICS_SNAPSHOT_BACKFILL_DAYS = config('ANALYTICS_SNAPSHOT_BACKFILL_DAYS', default=190, cast=int)
+ANALYTICS_SNAPSHOT_READ_FILL_DAYS = config('ANALYTICS_SNAPSHOT_READ_FILL_DAYS', default=7, cast=int)
+CELERY_BEAT_SCHEDULE = {
+    'refresh-analytics-snapshots': {
+        'task': 'assessments.tasks.refresh_analytics_snapshots',
+        'schedule': ANALYTICS_SNAPSHOT_INTERVAL,
+    },
+    'requeue-stale-chat-media': {
+        'task': 'community.tasks.requeue_stale_chat_media',
+        'schedule': CHAT_MEDIA_PROCESSING_TIMEOUT,
+    },
+}
+
+# Dashboard snapshots: served as they are for DASHBOARD_SNAPSHOT_TTL seconds, then refreshed in the background until DASHBOARD_SNAPSHOT_MAX_STALE
+DASHBOARD_SNAPSHOT_CACHE_ALIAS = config('DASHBOARD_SNAPSHOT_CACHE_ALIAS', default='queries')
+DASHBOARD_SNAPSHOT_TTL = config('DASHBOARD_SNAPSHOT_TTL', default=60, cast=int)
+DASHBOARD_SNAPSHOT_MAX_STALE = config('DASHBOARD_SNAPSHOT_MAX_STALE', default=3600, cast=int)
+
+# Request metrics: each worker flushes its totals to this cache every METRICS_FLUSH_INTERVAL seconds
+METRICS_CACHE_ALIAS = config('METRICS_CACHE_ALIAS', default='metrics')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=10, cast=float)
+METRICS_MAX_WORKERS = config('METRICS_MAX_WORKERS', default=64, cast=int)
+
+# System sampler: seconds between samples and the memory-mapped file holding the downsampled history;
+# test runs keep theirs in a per-process temporary file rather than the source tree
+SYSTEM_SAMPLER_INTERVAL = config('SYSTEM_SAMPLER_INTERVAL', default=10, cast=float)
+SYSTEM_SAMPLER_PATH = config('SYSTEM_SAMPLER_PATH', default=(
+    os.path.join(tempfile.gettempdir(), f'edumind-test-{os.getpid()}', 'system_metrics.ring') if TESTING
+    else os.path.join(BASE_DIR, 'logs', 'system_metrics.ring')
+))
+
+# SQL profiler: share of requests profiled, repeats of one query shape flagged as N+1 and the slow query threshold
+SQL_PROFILER_SAMPLE_RATE = config('SQL_PROFILER_SAMPLE_RATE', default=0.05, cast=float)
+SQL_PROFILER_N_PLUS_ONE_THRESHOLD = config('SQL_PROFILER_N_PLUS_ONE_THRESHOLD', default=10, cast=int)
+SQL_PROFILER_SLOW_QUERY_MS = config('SQL_PROFILER_SLOW_QUERY_MS', default=100, cast=float)
+
+# Per-client-IP request limit enforced by RateLimitMiddleware (empty disables it); counters live in this cache
+RATE_LIMIT_RATE = config('RATE_LIMIT_RATE', default='600/minute')
+RATE_LIMIT_CACHE_ALIAS = config('RATE_LIMIT_CACHE_ALIAS', default='throttle')
+
+# Alerting: one process holds the scheduler lease in this cache and evaluates rules every ALERTING_INTERVAL seconds;
+# a firing alert is re-notified at most every ALERT_REPEAT_INTERVAL seconds. Off unless enabled, and never under tests.
+ENABLE_ALERTING = config('ENABLE_ALERTING', default=False, cast=bool) and not TESTING
+ALERTING_INTERVAL = config('ALERTING_INTERVAL', default=60, cast=float)
+ALERTING_CACHE_ALIAS = config('ALERTING_CACHE_ALIAS', default='default')
+ALERT_REPEAT_INTERVAL = config('ALERT_REPEAT_INTERVAL', default=3600, cast=float)
+
+# Request tracing: share of requests traced and the most spans kept per trace (traces go to logs/traces.jsonl)
+TRACING_SAMPLE_RATE = config('TRACING_SAMPLE_RATE', default=0.01, cast=float)
+TRACING_MAX_SPANS = config('TRACING_MAX_SPANS', default=1000, cast=int)
+
+# Health probes: seconds a check result is fresh, served stale while refreshing, and waited for
+HEALTH_CHECK_TTL = config('HEALTH_CHECK_TTL', default=10, cast=float)
+HEALTH_CHECK_MAX_STALE = config('HEALTH_CHECK_MAX_STALE', default=60, cast=float)
+HEALTH_CHECK_TIMEOUT = config('HEALTH_CHECK_TIMEOUT', default=2, cast=float)
+
+# Queued logging: share of access-log records below WARNING that are written
+LOG_ACCESS_SAMPLE_RATE = config('LOG_ACCESS_SAMPLE_RATE', default=1.0, cast=float)
+
 # Update CSRF settings
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:3000",
@@ -284,43 +413,45 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
-        'json': {
-            'format': '{"level": "%(levelname)s", "time": "%(asctime)s", "module": "%(module)s", "message": "%(message)s", "process": %(process)d, "thread": %(thread)d}',
-        },
-        'access': {
-            'format': '%(asctime)s - %(levelname)s - %(message)s - Method: %(method)s - Path: %(path)s - Status: %(status)s - Time: %(response_time)s - User: %(user)s - IP: %(ip)s',
+        'raw': {
+            'format': '%(message)s',
         },
     },
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'backend.log_pipeline.QueuedRotatingFileHandler',
             'filename': 'logs/django.log',
-            'formatter': 'verbose',
             'maxBytes': 10485760,  # 10MB
             'backupCount': 5,
         },
         'security_file': {
             'level': 'WARNING',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'backend.log_pipeline.QueuedRotatingFileHandler',
             'filename': 'logs/security.log',
-            'formatter': 'json',
             'maxBytes': 10485760,
             'backupCount': 10,
         },
         'performance_file': {
             'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'backend.log_pipeline.QueuedRotatingFileHandler',
             'filename': 'logs/performance.log',
-            'formatter': 'json',
             'maxBytes': 10485760,
             'backupCount': 5,
         },
         'access_file': {
             'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'backend.log_pipeline.QueuedRotatingFileHandler',
             'filename': 'logs/access.log',
-            'formatter': 'access',
+            'maxBytes': 10485760,
+            'backupCount': 5,
+            'sample_rate': LOG_ACCESS_SAMPLE_RATE,
+        },
+        'traces_file': {
+            'level': 'INFO',
+            'class': 'backend.log_pipeline.QueuedRotatingFileHandler',
+            'filename': 'logs/traces.jsonl',
+            'formatter': 'raw',
             'maxBytes': 10485760,
             'backupCount': 5,
         },
@@ -369,6 +500,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'tracing': {
+            'handlers': ['traces_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -376,6 +512,12 @@ LOGGING = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Mood entry images are kept out of the database in a content-addressed blob store.
+# They are private, so they live outside MEDIA_ROOT and are served by an authenticated view.
+# Set MOOD_BLOB_STORAGE to an alias from STORAGES to use another storage backend.
+MOOD_BLOB_ROOT = config('MOOD_BLOB_ROOT', default=os.path.join(BASE_DIR, 'private_media', 'mood_blobs'))
+MOOD_BLOB_STORAGE = config('MOOD_BLOB_STORAGE', default='')
+
 # Email Configuration
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
@@ -0,0 +1,179 @@
+"""
+Per-request SQL profiler
+
+Installed with ``connection.execute_wrapper`` for a sampled share of
+requests, so it works without ``DEBUG`` and costs nothing on unsampled
+requests. Each query's SQL is reduced to a fingerprint (literals and
+placeholder lists collapsed) and a fingerprint repeated more than
+``SQL_PROFILER_N_PLUS_ONE_THRESHOLD`` times in one request is flagged as a
+probable N+1 loop. Worker-wide totals per fingerprint feed the
+``/monitoring/slow-queries/`` report.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+from django.conf import settings
+from django.db import connections
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """SQL shape with literals, placeholders and IN lists collapsed to ``?``"""
+    shape = _STRING_LITERAL.sub('?', sql)
+    shape = shape.replace('%s', '?')
+    shape = _NUMBER.sub('?', shape)
+    shape = _PLACEHOLDER_LIST.sub('(...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class QueryProfile:
+    """Queries executed while profiling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = {}
+        self.slow_queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start_time = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start_time
+            self.count += 1
+            self.duration += duration
+            shape = self.shapes.get(sql)
+            if shape is None:
+                shape = self.shapes[sql] = [0, 0.0]
+            shape[0] += 1
+            shape[1] += duration
+            if duration * 1000 >= getattr(settings, 'SQL_PROFILER_SLOW_QUERY_MS', 100):
+                self.slow_queries.append((sql, duration))
+
+    def fingerprints(self):
+        """[count, duration] per fingerprint; fingerprinting waits until the request is done"""
+        shapes = {}
+        for sql, (count, duration) in self.shapes.items():
+            totals = shapes.setdefault(fingerprint(sql), [0, 0.0])
+            totals[0] += count
+            totals[1] += duration
+        return shapes
+
+    def n_plus_one(self, threshold=None):
+        """Fingerprints repeated more than ``threshold`` times, most repeated first"""
+        if threshold is None:
+            threshold = getattr(settings, 'SQL_PROFILER_N_PLUS_ONE_THRESHOLD', 10)
+        repeated = [
+            (shape, count, duration)
+            for shape, (count, duration) in self.fingerprints().items()
+            if count > threshold
+        ]
+        return sorted(repeated, key=lambda item: item[1], reverse=True)
+
+
+@contextmanager
+def profile_queries():
+    """Profile every query run on this thread's connections inside the block"""
+    profile = QueryProfile()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile))
+        yield profile
+
+
+class SlowQueryLog:
+    """Bounded worker-wide totals per fingerprint plus recent N+1 and slow query events"""
+
+    def __init__(self, max_shapes=500, max_events=100):
+        self.max_shapes = max_shapes
+        self._lock = threading.Lock()
+        self._shapes = {}
+        self._n_plus_one = deque(maxlen=max_events)
+        self._slow_queries = deque(maxlen=max_events)
+        self.profiled_requests = 0
+
+    def record(self, profile, route, method):
+        shapes = profile.fingerprints()
+        n_plus_one = profile.n_plus_one()
+        now = time.time()
+        with self._lock:
+            self.profiled_requests += 1
+            for shape, (count, duration) in shapes.items():
+                totals = self._shapes.get(shape)
+                if totals is None:
+                    if len(self._shapes) >= self.max_shapes:
+                        # Make room by dropping the cheapest shape seen so far
+                        del self._shapes[min(self._shapes, key=lambda key: self._shapes[key]['total_time'])]
+                    totals = self._shapes[shape] = {
+                        'count': 0, 'total_time': 0.0, 'requests': 0, 'route': f"{method} {route}"
+                    }
+                totals['count'] += count
+                totals['total_time'] += duration
+                totals['requests'] += 1
+            for shape, count, duration in n_plus_one:
+                self._n_plus_one.append({
+                    'route': f"{method} {route}",
+                    'fingerprint': shape,
+                    'count': count,
+                    'time_ms': round(duration * 1000, 2),
+                    'timestamp': now,
+                })
+            for sql, duration in profile.slow_queries:
+                self._slow_queries.append({
+                    'route': f"{method} {route}",
+                    'fingerprint': fingerprint(sql),
+                    'time_ms': round(duration * 1000, 2),
+                    'timestamp': now,
+                })
+
+    def report(self, limit=20):
+        with self._lock:
+            shapes = sorted(self._shapes.items(), key=lambda item: item[1]['total_time'], reverse=True)
+            return {
+                'profiled_requests': self.profiled_requests,
+                'top_queries': [
+                    {
+                        'fingerprint': shape,
+                        'count': totals['count'],
+                        'requests': totals['requests'],
+                        'per_request': round(totals['count'] / totals['requests'], 1),
+                        'total_time_ms': round(totals['total_time'] * 1000, 2),
+                        'avg_time_ms': round(totals['total_time'] * 1000 / totals['count'], 3),
+                        'route': totals['route'],
+                    }
+                    for shape, totals in shapes[:limit]
+                ],
+                'n_plus_one': list(reversed(self._n_plus_one))[:limit],
+                'slow_queries': list(reversed(self._slow_queries))[:limit],
+            }
+
+    def clear(self):
+        with self._lock:
+            self._shapes.clear()
+            self._n_plus_one.clear()
+            self._slow_queries.clear()
+            self.profiled_requests = 0
+
+
+_slow_query_log = None
+_slow_query_log_lock = threading.Lock()
+
+
+def get_slow_query_log():
+    """Process-wide slow query log"""
+    global _slow_query_log
+    if _slow_query_log is None:
+        with _slow_query_log_lock:
+            if _slow_query_log is None:
+                _slow_query_log = SlowQueryLog()
+    return _slow_query_log
@@ -0,0 +1,129 @@
+"""
+Print the slowest request traces from the tracer's JSONL output
+
+Usage: python -m backend.trace_report [files...] [--limit N] [--route TEXT]
+
+Each trace's time is broken down by where it was spent, counting every
+span's own time (its duration minus its children's) towards middleware,
+view, serializer, db, http or other, so the parts add up to the total.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+DEFAULT_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs', 'traces.jsonl')
+
+CATEGORIES = ('middleware', 'view', 'serializer', 'db', 'http', 'other')
+
+
+def load_traces(paths):
+    """Spans of every trace in the given files, as lists of OTLP span dicts"""
+    traces = []
+    for path in paths:
+        with open(path) as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    document = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                spans = [
+                    span
+                    for resource in document.get('resourceSpans', [])
+                    for scope in resource.get('scopeSpans', [])
+                    for span in scope.get('spans', [])
+                ]
+                if spans:
+                    traces.append(spans)
+    return traces
+
+
+def duration_ms(span):
+    return (int(span['endTimeUnixNano']) - int(span['startTimeUnixNano'])) / 1e6
+
+
+def attribute(span, key):
+    for item in span.get('attributes', []):
+        if item['key'] == key:
+            return next(iter(item['value'].values()))
+    return None
+
+
+def category(span):
+    name = span['name']
+    if 'parentSpanId' not in span:
+        return 'middleware'
+    if name == 'db.query':
+        return 'db'
+    if name.startswith('serialize '):
+        return 'serializer'
+    if name.startswith('view'):
+        return 'view'
+    if name.startswith('HTTP '):
+        return 'http'
+    return 'other'
+
+
+def summarize(spans):
+    """Root span, total duration and own time, span count per category"""
+    root = next((span for span in spans if 'parentSpanId' not in span), spans[0])
+    children_time = {}
+    for span in spans:
+        parent = span.get('parentSpanId')
+        if parent:
+            children_time[parent] = children_time.get(parent, 0) + duration_ms(span)
+
+    breakdown = {name: [0.0, 0] for name in CATEGORIES}
+    for span in spans:
+        own = max(0.0, duration_ms(span) - children_time.get(span['spanId'], 0))
+        totals = breakdown[category(span)]
+        totals[0] += own
+        totals[1] += 1
+    return root, duration_ms(root), breakdown
+
+
+def report(traces, limit=10, route=None, out=sys.stdout):
+    summaries = [summarize(spans) + (spans,) for spans in traces]
+    if route:
+        summaries = [summary for summary in summaries if route in summary[0]['name']]
+    summaries.sort(key=lambda summary: summary[1], reverse=True)
+
+    if not summaries:
+        out.write('No traces found\n')
+        return
+
+    for rank, (root, total, breakdown, spans) in enumerate(summaries[:limit], start=1):
+        out.write(
+            f"{rank}. {total:9.1f}ms  {root['name']}  status={attribute(root, 'http.status_code')}  "
+            f"trace={root['traceId']}  request={attribute(root, 'http.request_id')}\n"
+        )
+        for name in CATEGORIES:
+            own, count = breakdown[name]
+            if not count:
+                continue
+            share = own / total * 100 if total else 0
+            out.write(f"     {name:<11}{own:9.1f}ms {share:5.1f}%  ({count} span{'s' if count != 1 else ''})\n")
+        slowest = sorted((span for span in spans if 'parentSpanId' in span), key=duration_ms, reverse=True)[:3]
+        for span in slowest:
+            detail = attribute(span, 'db.statement') or attribute(span, 'http.url') or ''
+            out.write(f"       {duration_ms(span):8.1f}ms  {span['name']}  {str(detail)[:100]}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Print the slowest request traces and their time breakdown')
+    parser.add_argument('files', nargs='*', help=f'Trace files (default: {DEFAULT_FILE} and its rotations)')
+    parser.add_argument('--limit', type=int, default=10, help='Number of traces to print')
+    parser.add_argument('--route', help='Only traces whose root span name contains this text')
+    args = parser.parse_args(argv)
+
+    paths = args.files or sorted(glob.glob(f"{DEFAULT_FILE}*"))
+    report(load_traces(paths), limit=args.limit, route=args.route)
+
+
+if __name__ == '__main__':
+    main()
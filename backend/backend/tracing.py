@@ -0,0 +1,343 @@
+"""
+Sampling request tracer
+
+``TracingMiddleware`` gives every request an ``X-Request-ID`` (reusing a
+well-formed incoming one) and, for a sampled share of requests, records a
+trace: a root span for the whole middleware stack, a child span for view
+dispatch (``ViewTracingMiddleware``), and spans for DRF serializer
+``.data``, every database query and every outbound ``requests`` call.
+Outbound calls carry the request ID and a W3C ``traceparent`` header.
+
+Finished traces are written one per line to the ``tracing`` logger (a
+rotating JSONL file) in the OTLP/JSON ``resourceSpans`` shape;
+``python -m backend.trace_report`` prints the slowest ones.
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+
+trace_logger = logging.getLogger('tracing')
+
+SERVICE_NAME = 'edumindsolutions-api'
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,128}$')
+_HEX_TRACE_ID = re.compile(r'^[0-9a-f]{32}$')
+
+_current_trace = ContextVar('current_trace', default=None)
+_current_span = ContextVar('current_span', default=None)
+
+
+def new_request_id():
+    return uuid.uuid4().hex
+
+
+def request_id_from(request):
+    """The incoming X-Request-ID if it is well formed, otherwise a new one"""
+    incoming = request.headers.get('X-Request-ID', '')
+    return incoming if _REQUEST_ID.match(incoming) else new_request_id()
+
+
+def get_request_id(request):
+    """Request ID assigned by TracingMiddleware, assigning one if it did not run"""
+    request_id = getattr(request, 'request_id', None)
+    if request_id is None:
+        request_id = request.request_id = request_id_from(request)
+    return request_id
+
+
+class Span:
+    __slots__ = ('span_id', 'parent_id', 'name', 'kind', 'start', 'end', 'attributes', 'status', 'message')
+
+    def __init__(self, name, kind, parent_id, attributes):
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = attributes
+        self.status = STATUS_OK
+        self.message = ''
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, error):
+        self.status = STATUS_ERROR
+        self.message = f"{type(error).__name__}: {error}"
+
+
+class Trace:
+    """Spans of one sampled request"""
+
+    def __init__(self, trace_id, max_spans):
+        self.trace_id = trace_id
+        self.max_spans = max_spans
+        self.spans = []
+        self.dropped = 0
+
+    def start_span(self, name, kind, parent, attributes):
+        span = Span(name, kind, parent.span_id if parent is not None else None, attributes)
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+        return span
+
+    def to_otlp(self):
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': _otlp_attributes({'service.name': SERVICE_NAME})},
+                'scopeSpans': [{
+                    'scope': {'name': __name__},
+                    'spans': [self._span_to_otlp(span) for span in self.spans],
+                }],
+            }],
+        }
+
+    def _span_to_otlp(self, span):
+        otlp = {
+            'traceId': self.trace_id,
+            'spanId': span.span_id,
+            'name': span.name,
+            'kind': span.kind,
+            'startTimeUnixNano': str(span.start),
+            'endTimeUnixNano': str(span.end or time.time_ns()),
+            'attributes': _otlp_attributes(span.attributes),
+            'status': {'code': span.status},
+        }
+        if span.parent_id:
+            otlp['parentSpanId'] = span.parent_id
+        if span.message:
+            otlp['status']['message'] = span.message
+        return otlp
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items()]
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def current_span():
+    return _current_span.get()
+
+
+@contextmanager
+def span(name, kind=KIND_INTERNAL, **attributes):
+    """Record a span under the current one; a no-op outside a sampled trace"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    record = trace.start_span(name, kind, _current_span.get(), attributes)
+    token = _current_span.set(record)
+    try:
+        yield record
+    except Exception as e:
+        record.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        record.end = time.time_ns()
+
+
+@contextmanager
+def start_trace(trace_id, name, kind=KIND_SERVER, **attributes):
+    """Make a new trace current and record its root span"""
+    trace = Trace(trace_id, getattr(settings, 'TRACING_MAX_SPANS', 1000))
+    token = _current_trace.set(trace)
+    try:
+        with span(name, kind, **attributes) as root:
+            yield trace, root
+    finally:
+        _current_trace.reset(token)
+
+
+def export(trace):
+    """Write a finished trace as one OTLP/JSON line"""
+    if trace.dropped:
+        trace.spans[0].set_attribute('trace.dropped_spans', trace.dropped)
+    trace_logger.info(json.dumps(trace.to_otlp(), separators=(',', ':')))
+
+
+def _trace_query(execute, sql, params, many, context):
+    with span('db.query', KIND_CLIENT, **{
+        'db.system': context['connection'].vendor,
+        'db.statement': sql,
+    }):
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def trace_queries():
+    """Record a span for every query on this thread's connections inside the block"""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(_trace_query))
+        yield
+
+
+_instrumented = False
+_instrument_lock = threading.Lock()
+
+
+def instrument():
+    """Patch DRF serializers and requests sessions to record spans; safe to call repeatedly"""
+    global _instrumented
+    if _instrumented:
+        return
+    with _instrument_lock:
+        if _instrumented:
+            return
+        _instrument_serializers()
+        _instrument_requests()
+        _instrumented = True
+
+
+def _instrument_serializers():
+    from rest_framework import serializers
+
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        data = serializer_class.data
+
+        def traced_data(self, _data=data):
+            if _current_trace.get() is None:
+                return _data.fget(self)
+            name = type(self.child).__name__ if isinstance(self, serializers.ListSerializer) else type(self).__name__
+            with span(f"serialize {name}", many=isinstance(self, serializers.ListSerializer)):
+                return _data.fget(self)
+
+        serializer_class.data = property(traced_data)
+
+
+def _instrument_requests():
+    import requests
+
+    send = requests.Session.send
+
+    def traced_send(self, request, **kwargs):
+        trace = _current_trace.get()
+        if trace is None:
+            return send(self, request, **kwargs)
+
+        with span(f"HTTP {request.method}", KIND_CLIENT, **{
+            'http.method': request.method,
+            'http.url': request.url.split('?')[0],
+        }) as record:
+            request.headers.setdefault('X-Request-ID', trace.trace_id)
+            request.headers.setdefault('traceparent', f"00-{trace.trace_id}-{record.span_id}-01")
+            response = send(self, request, **kwargs)
+            record.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                record.status = STATUS_ERROR
+            return response
+
+    requests.Session.send = traced_send
+
+
+class TracingMiddleware:
+    """
+    Assigns request IDs and traces a sampled share of requests
+
+    Sampling follows ``TRACING_SAMPLE_RATE``; with DEBUG on, an
+    ``X-Trace: 1`` request header forces a trace. Should be the outermost
+    middleware so its root span covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument()
+
+    def __call__(self, request):
+        request.request_id = request_id_from(request)
+        if not self.should_trace(request):
+            response = self.get_response(request)
+            response['X-Request-ID'] = request.request_id
+            return response
+
+        # Reuse a request ID that is already a valid trace ID so the two can be matched up
+        trace_id = request.request_id if _HEX_TRACE_ID.match(request.request_id) else new_request_id()
+        with start_trace(trace_id, f"HTTP {request.method}", **{
+            'http.method': request.method,
+            'http.target': request.path,
+            'http.request_id': request.request_id,
+        }) as (trace, root):
+            with trace_queries():
+                response = self.get_response(request)
+            resolver_match = getattr(request, 'resolver_match', None)
+            if resolver_match is not None:
+                root.name = f"HTTP {request.method} {resolver_match.route}"
+                root.set_attribute('http.route', resolver_match.route)
+            root.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                root.status = STATUS_ERROR
+
+        try:
+            export(trace)
+        except Exception as e:
+            logging.getLogger('performance').error(f"Failed to export trace: {e}")
+        response['X-Request-ID'] = request.request_id
+        response['X-Trace-ID'] = trace_id
+        return response
+
+    def should_trace(self, request):
+        if settings.DEBUG and request.headers.get('X-Trace') == '1':
+            return True
+        sample_rate = getattr(settings, 'TRACING_SAMPLE_RATE', 0)
+        return sample_rate > 0 and random.random() < sample_rate
+
+
+class ViewTracingMiddleware:
+    """
+    Records the view dispatch span; must be the innermost middleware
+
+    Everything inside this middleware is URL resolution, view middleware
+    and the view itself, so the root span minus this one is middleware time.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if _current_trace.get() is None:
+            return self.get_response(request)
+
+        with span('view') as record:
+            response = self.get_response(request)
+            resolver_match = getattr(request, 'resolver_match', None)
+            if resolver_match is not None:
+                record.name = f"view {resolver_match.view_name or resolver_match._func_path}"
+            return response
@@ -15,8 +15,8 @@ def api_root(request):
         'health': '/health/'
     })
 from .monitoring_views import (
-    system_metrics, application_metrics, health_metrics,
-    security_metrics, performance_trends, alert_webhook
+    system_metrics, application_metrics, prometheus_metrics, health_metrics,
+    security_metrics, performance_trends, slow_queries, cache_metrics, alert_webhook
 )
 
 from .health_check import health_check, detailed_health_check
@@ -34,9 +34,12 @@ urlpatterns = [
     # Monitoring and observability endpoints
     path('monitoring/system/', system_metrics, name='system-metrics'),
     path('monitoring/application/', application_metrics, name='application-metrics'),
+    path('monitoring/prometheus/', prometheus_metrics, name='prometheus-metrics'),
     path('monitoring/health/', health_metrics, name='health-metrics'),
     path('monitoring/security/', security_metrics, name='security-metrics'),
     path('monitoring/trends/', performance_trends, name='performance-trends'),
+    path('monitoring/slow-queries/', slow_queries, name='slow-queries'),
+    path('monitoring/cache/', cache_metrics, name='cache-metrics'),
     path('monitoring/alerts/webhook/', alert_webhook, name='alert-webhook'),
 
     # API endpoints
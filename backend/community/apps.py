@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CommunityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'community'
+
+    
+    def ready(self):
+        # Push chat messages and call state to WebSocket subscribers
+        from . import signals  # noqa: F401
@@ -6,6 +6,7 @@ from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.exceptions import NotFound
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from django.db import transaction
@@ -13,9 +14,13 @@ from django.utils import timezone
 import json
 import logging
 
+from backend.background import enqueue
+
 from .models import ChatRoom, ChatMessage, ChatRoomParticipant
 from .serializers import ChatMessageSerializer, ChatRoomSerializer
-from .media_utils import process_media_file
+from .media_utils import process_media_file, validate_media_file, parse_duration
+from .pagination import ChatMessageKeysetPagination
+from .tasks import process_chat_media, requeue_stale_media
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -67,8 +72,8 @@ def send_message(request, room_id):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Process voice file
-            processing_result = process_media_file(voice_file, 'voice')
+            # Validate voice file; metadata is extracted in the background
+            processing_result = validate_media_file(voice_file, 'voice')
             if not processing_result['success']:
                 return Response(
                     {'error': processing_result['error']},
@@ -77,9 +82,9 @@ def send_message(request, room_id):
             
             message_data.update({
                 'voice_file': voice_file,
-                'file_size': processing_result['file_size'],
+                'file_size': voice_file.size,
                 'mime_type': processing_result['mime_type'],
-                'duration': processing_result.get('duration')
+                'duration': parse_duration(request.data.get('duration'))
             })
             
         elif message_type == 'video':
@@ -90,8 +95,8 @@ def send_message(request, room_id):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Process video file
-            processing_result = process_media_file(video_file, 'video')
+            # Validate video file; metadata is extracted in the background
+            processing_result = validate_media_file(video_file, 'video')
             if not processing_result['success']:
                 return Response(
                     {'error': processing_result['error']},
@@ -100,9 +105,9 @@ def send_message(request, room_id):
             
             message_data.update({
                 'video_file': video_file,
-                'file_size': processing_result['file_size'],
+                'file_size': video_file.size,
                 'mime_type': processing_result['mime_type'],
-                'duration': processing_result.get('duration')
+                'duration': parse_duration(request.data.get('duration'))
             })
             
         elif message_type == 'image':
@@ -113,8 +118,8 @@ def send_message(request, room_id):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Process image file
-            processing_result = process_media_file(image_file, 'image')
+            # Validate image file; thumbnails are generated in the background
+            processing_result = validate_media_file(image_file, 'image')
             if not processing_result['success']:
                 return Response(
                     {'error': processing_result['error']},
@@ -123,7 +128,7 @@ def send_message(request, room_id):
             
             message_data.update({
                 'image_file': image_file,
-                'file_size': processing_result['file_size'],
+                'file_size': image_file.size,
                 'mime_type': processing_result['mime_type']
             })
             
@@ -135,8 +140,8 @@ def send_message(request, room_id):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Process file
-            processing_result = process_media_file(attachment_file, 'file')
+            # Validate file
+            processing_result = validate_media_file(attachment_file, 'file')
             if not processing_result['success']:
                 return Response(
                     {'error': processing_result['error']},
@@ -145,14 +150,21 @@ def send_message(request, room_id):
             
             message_data.update({
                 'attachment_file': attachment_file,
-                'file_size': processing_result['file_size'],
+                'file_size': attachment_file.size,
                 'mime_type': processing_result['mime_type']
             })
         
+        # Uploads are stored now and processed by a background job
+        if message_type != 'text':
+            message_data['processing_status'] = 'processing'
+        
         # Create message
         with transaction.atomic():
             message = ChatMessage.objects.create(**message_data)
             
+            if message.processing_status == 'processing':
+                transaction.on_commit(lambda: enqueue(process_chat_media, message.id))
+            
             # Update room last activity
             room.last_activity = timezone.now()
             room.save(update_fields=['last_activity'])
@@ -185,7 +197,7 @@ def send_message(request, room_id):
 @permission_classes([permissions.IsAuthenticated])
 def get_messages(request, room_id):
     """
-    Get messages for a chat room with pagination
+    Get messages for a chat room with since/before cursor pagination
     """
     try:
         room = get_object_or_404(ChatRoom, id=room_id)
@@ -197,24 +209,27 @@ def get_messages(request, room_id):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Get pagination parameters
-        page = int(request.GET.get('page', 1))
-        page_size = int(request.GET.get('page_size', 50))
-        offset = (page - 1) * page_size
-        
-        # Get messages
-        messages = ChatMessage.objects.filter(room=room).order_by('-created_at')[offset:offset + page_size]
-        messages = list(reversed(messages))  # Reverse to show oldest first
+        # Keyset pagination: ?since=<cursor> for newer messages, ?before=<cursor> for older,
+        # ?updated_since=<cursor> alongside since for messages already loaded that changed
+        paginator = ChatMessageKeysetPagination()
+        messages = paginator.paginate_queryset(
+            ChatMessage.objects.filter(room=room).select_related('author'),
+            request
+        )
+        # Media jobs lost with a restarted process are queued again when their message is read
+        requeue_stale_media(messages + paginator.updated)
         
         serializer = ChatMessageSerializer(messages, many=True)
         
         return Response({
             'messages': serializer.data,
-            'page': page,
-            'page_size': page_size,
-            'has_more': ChatMessage.objects.filter(room=room).count() > offset + page_size
+            'updated': ChatMessageSerializer(paginator.updated, many=True).data,
+            'page_size': paginator.get_page_size(request),
+            **paginator.get_cursors()
         })
         
+    except NotFound:
+        raise
     except Exception as e:
         logger.error(f"Error getting messages: {str(e)}")
         return Response(
@@ -0,0 +1,171 @@
+"""
+ASGI WebSocket endpoint streaming chat room events
+
+Clients connect to ``/ws/chat/<room_id>/`` and send
+``{"type": "auth", "token": "<access token>"}`` as their first frame; the
+token is kept out of the URL, which ends up in access logs. Once the user
+is authenticated and subscribed to the room they get ``{"type": "ready"}``
+followed by the same events the REST endpoints would otherwise be polled
+for: ``message``, ``message_updated``, ``user_joined``, ``user_left``,
+``call_started``, ``call_updated`` and ``call_ended``. Clients may send
+``typing`` and ``stop_typing``, which are relayed to the room, and ``ping``.
+
+Membership is checked at connect and again whenever a ``user_left`` event
+names the socket's user, so a participant who leaves the room is closed
+out rather than kept listening.
+"""
+
+import asyncio
+import json
+import logging
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from .models import ChatRoomParticipant
+from .realtime import get_broker, room_channel, room_event
+
+logger = logging.getLogger(__name__)
+
+# Application close codes, mirroring the HTTP status a REST call would get
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+CLOSE_OVERFLOW = 4408
+
+# Seconds a client has after the handshake to send its auth frame
+AUTH_TIMEOUT = 10
+
+RELAYED_EVENTS = {'typing', 'stop_typing'}
+
+# Events after which the named user's membership is checked again
+MEMBERSHIP_EVENTS = {'user_left'}
+
+
+async def receive_auth_token(receive):
+    """Token from the client's first frame; None if it sent anything else or nothing in time, False if it left"""
+    try:
+        message = await asyncio.wait_for(receive(), AUTH_TIMEOUT)
+    except asyncio.TimeoutError:
+        return None
+    if message['type'] == 'websocket.disconnect':
+        return False
+    try:
+        frame = json.loads(message.get('text') or '')
+        return frame['token'] if frame.get('type') == 'auth' and isinstance(frame.get('token'), str) else None
+    except (ValueError, AttributeError, KeyError):
+        return None
+
+
+@sync_to_async
+def authenticate(token):
+    """User for a JWT access token, or None"""
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+
+    close_old_connections()
+    if not token:
+        return None
+
+    authentication = JWTAuthentication()
+    try:
+        user = authentication.get_user(authentication.get_validated_token(token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return user if user.is_active else None
+
+
+@sync_to_async
+def is_room_participant(user, room_id):
+    """Whether the user is an active participant of an active room"""
+    close_old_connections()
+    return ChatRoomParticipant.objects.filter(
+        room_id=room_id, room__is_active=True, user=user, is_active=True
+    ).exists()
+
+
+def names_member_change(event, user):
+    """Whether an encoded room event changes the given user's membership"""
+    if not any(f'"{event_type}"' in event for event_type in MEMBERSHIP_EVENTS):
+        return False
+    try:
+        event = json.loads(event)
+        return event.get('type') in MEMBERSHIP_EVENTS and event.get('data', {}).get('user_id') == user.id
+    except (ValueError, AttributeError):
+        return False
+
+
+async def chat_room_socket(scope, receive, send, room_id):
+    """Stream one room's events to a participant until either side disconnects"""
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    # Accept so the client can send its token; nothing is sent to it until it is authenticated
+    await send({'type': 'websocket.accept'})
+    token = await receive_auth_token(receive)
+    if token is False:
+        return
+
+    user = await authenticate(token)
+    if user is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+    if not await is_room_participant(user, room_id):
+        await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        return
+
+    broker = get_broker()
+    channel = room_channel(room_id)
+    publish = sync_to_async(broker.publish, thread_sensitive=False)
+
+    # Subscribe before telling the client it is ready so no event after that is missed
+    with broker.subscribe(channel) as subscription:
+        await send({'type': 'websocket.send', 'text': json.dumps({'type': 'ready'})})
+
+        async def forward_events():
+            """Relay events until the subscription ends; returns False once the user is no longer a member"""
+            async for event in subscription:
+                await send({'type': 'websocket.send', 'text': event})
+                if names_member_change(event, user) and not await is_room_participant(user, room_id):
+                    return False
+            return True
+
+        async def handle_client():
+            while True:
+                message = await receive()
+                if message['type'] == 'websocket.disconnect':
+                    return
+                if message['type'] != 'websocket.receive' or not message.get('text'):
+                    continue
+
+                try:
+                    event_type = json.loads(message['text']).get('type')
+                except (ValueError, AttributeError):
+                    continue
+
+                if event_type == 'ping':
+                    await send({'type': 'websocket.send', 'text': json.dumps({'type': 'pong'})})
+                elif event_type in RELAYED_EVENTS:
+                    await publish(channel, room_event(room_id, event_type, {
+                        'user_id': user.id,
+                        'display_name': user.display_name
+                    }))
+
+        forwarder = asyncio.ensure_future(forward_events())
+        client = asyncio.ensure_future(handle_client())
+        done, pending = await asyncio.wait({forwarder, client}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        for task in done:
+            if task.exception() is not None:
+                logger.error(f"Chat socket for room {room_id} failed: {task.exception()}")
+
+        if forwarder in done and forwarder.exception() is None and forwarder.result() is False:
+            logger.info(f"User {user.id} left room {room_id}, closing their socket")
+            await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+            return
+
+        if subscription.overflowed:
+            logger.warning(f"Chat socket for user {user.id} in room {room_id} fell behind, closing")
+            await send({'type': 'websocket.close', 'code': CLOSE_OVERFLOW})
@@ -0,0 +1,13 @@
+"""
+Management command to queue chat media processing again for messages left stuck
+"""
+from django.core.management.base import BaseCommand
+from community.tasks import requeue_stale_media
+
+
+class Command(BaseCommand):
+    help = 'Queue media processing again for chat messages stuck processing longer than CHAT_MEDIA_PROCESSING_TIMEOUT'
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_media()
+        self.stdout.write(self.style.SUCCESS(f'Requeued {requeued} stale chat media jobs'))
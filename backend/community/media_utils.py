@@ -3,14 +3,26 @@ Utility functions for handling media files in chat messages
 """
 
 import os
+import json
+import shutil
+import subprocess
+import wave
 import mimetypes
+from io import BytesIO
+from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from django.conf import settings
-from PIL import Image
+from PIL import Image, ImageOps
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bounding boxes for the thumbnails generated for image messages
+THUMBNAIL_SIZES = {
+    'small': (150, 150),
+    'medium': (480, 480),
+    'large': (1080, 1080),
+}
+
 
 def validate_media_file(file, media_type):
     """
@@ -133,36 +145,144 @@ def process_audio_video(file, media_type):
         return {}
 
 
-def generate_thumbnail(image_file, size=(150, 150)):
+def generate_thumbnail(image_file, size=(150, 150), suffix='thumb'):
     """
     Generate thumbnail for image files
     
     Args:
         image_file: Image file object
         size: Tuple of (width, height) for thumbnail
+        suffix: Appended to the original name to build the thumbnail name
     
     Returns:
-        str: Path to generated thumbnail or None
+        str: Storage name of generated thumbnail or None
     """
     try:
         with Image.open(image_file) as img:
-            img.thumbnail(size, Image.Resampling.LANCZOS)
-            
-            # Generate thumbnail filename
-            name, ext = os.path.splitext(image_file.name)
-            thumbnail_name = f"{name}_thumb{ext}"
-            
-            # Save thumbnail
-            thumbnail_path = os.path.join('chat/thumbnails/', thumbnail_name)
-            
-            # This is a simplified version - in production you'd save to storage
-            return thumbnail_path
+            return save_thumbnail(img, image_file.name, size, suffix)
             
     except Exception as e:
         logger.error(f"Error generating thumbnail: {str(e)}")
         return None
 
 
+def save_thumbnail(img, source_name, size, suffix):
+    """Save a thumbnail of an opened image to storage and return its name"""
+    thumbnail = ImageOps.exif_transpose(img)
+    thumbnail.thumbnail(size, Image.Resampling.LANCZOS)
+    
+    # Keep transparency as PNG, store everything else as JPEG
+    if thumbnail.mode in ('RGBA', 'LA', 'P'):
+        image_format, ext = 'PNG', 'png'
+    else:
+        image_format, ext = 'JPEG', 'jpg'
+        thumbnail = thumbnail.convert('RGB')
+    
+    buffer = BytesIO()
+    thumbnail.save(buffer, format=image_format, quality=85)
+    
+    name = os.path.splitext(os.path.basename(source_name))[0]
+    thumbnail_name = os.path.join('chat/thumbnails/', f"{name}_{suffix}.{ext}")
+    return default_storage.save(thumbnail_name, ContentFile(buffer.getvalue()))
+
+
+def generate_thumbnails(image_file, sizes=None):
+    """
+    Generate a thumbnail per size from a single decode of the image
+    
+    Returns:
+        dict: Storage names keyed by size name
+    """
+    sizes = sizes or THUMBNAIL_SIZES
+    with Image.open(image_file) as img:
+        img.load()
+        return {
+            size_name: save_thumbnail(img, image_file.name, size, size_name)
+            for size_name, size in sizes.items()
+        }
+
+
+def probe_duration(media_file):
+    """
+    Duration of an audio/video file in whole seconds, or None if it cannot be read
+    
+    WAV files are read with the standard library; other containers need
+    ffprobe on the PATH.
+    """
+    media_file.seek(0)
+    try:
+        with wave.open(media_file, 'rb') as wav:
+            return round(wav.getnframes() / float(wav.getframerate()))
+    except (wave.Error, EOFError, ZeroDivisionError):
+        pass
+    
+    ffprobe = shutil.which('ffprobe')
+    if not ffprobe:
+        return None
+    
+    try:
+        path = media_file.path
+    except (AttributeError, NotImplementedError):
+        return None
+    
+    try:
+        result = subprocess.run(
+            [ffprobe, '-v', 'error', '-show_entries', 'format=duration', '-of', 'json', path],
+            capture_output=True, timeout=30, check=True
+        )
+        return round(float(json.loads(result.stdout)['format']['duration']))
+    except (subprocess.SubprocessError, KeyError, ValueError) as e:
+        logger.warning(f"Could not probe duration of {media_file.name}: {str(e)}")
+        return None
+
+
+def parse_duration(value):
+    """Client-reported duration in whole seconds, or None if missing or invalid"""
+    try:
+        return max(0, round(float(value)))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def extract_message_media(message):
+    """
+    Extract metadata and thumbnails for a stored chat message upload
+    
+    Returns:
+        dict: ChatMessage field updates
+    """
+    media_file = message.media_file
+    if media_file is None:
+        return {}
+    
+    updates = {
+        'file_size': media_file.size,
+        'media_metadata': {},
+    }
+    
+    with media_file.open('rb'):
+        if message.message_type == 'image':
+            with Image.open(media_file) as img:
+                updates['media_metadata'] = {
+                    'width': img.width,
+                    'height': img.height,
+                    'format': img.format
+                }
+                updates['mime_type'] = Image.MIME.get(img.format, message.mime_type)
+            media_file.seek(0)
+            updates['thumbnails'] = generate_thumbnails(media_file)
+        
+        elif message.message_type in ['voice', 'video']:
+            duration = probe_duration(media_file)
+            if duration is not None:
+                updates['duration'] = duration
+            updates['media_metadata'] = {
+                'format': media_file.name.split('.')[-1].lower() if '.' in media_file.name else None
+            }
+    
+    return updates
+
+
 def cleanup_old_media_files():
     """
     Cleanup old media files (can be run as a scheduled task)
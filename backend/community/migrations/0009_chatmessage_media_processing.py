@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0008_chatmessage_room_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='media_metadata',
+            field=models.JSONField(blank=True, default=dict, help_text='Extracted width, height and format'),
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='processing_status',
+            field=models.CharField(choices=[('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict, help_text='Thumbnail storage names keyed by size'),
+        ),
+    ]
@@ -356,6 +356,12 @@ class ChatMessage(models.Model):
         ('system', 'System Message'),
     ]
     
+    PROCESSING_STATUS = [
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+    
     room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='messages')
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     content = models.TextField(blank=True, help_text="Text content for text messages")
@@ -372,14 +378,26 @@ class ChatMessage(models.Model):
     file_size = models.PositiveIntegerField(null=True, blank=True, help_text="File size in bytes")
     mime_type = models.CharField(max_length=100, blank=True)
     
+    # Media processing runs in the background after upload
+    processing_status = models.CharField(max_length=20, choices=PROCESSING_STATUS, default='ready')
+    media_metadata = models.JSONField(default=dict, blank=True, help_text="Extracted width, height and format")
+    thumbnails = models.JSONField(default=dict, blank=True, help_text="Thumbnail storage names keyed by size")
+    
     is_anonymous = models.BooleanField(default=True)
     is_system_message = models.BooleanField(default=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'community_chat_message'
         ordering = ['created_at']
+        indexes = [
+            # Keyset pagination walks a room's messages in (created_at, id) order
+            models.Index(fields=['room', 'created_at', 'id'], name='chat_msg_room_created_id'),
+            # Polling clients ask for a room's messages changed since their last poll
+            models.Index(fields=['room', 'updated_at'], name='chat_msg_room_updated'),
+        ]
 
     def __str__(self):
         if self.message_type == 'text':
@@ -419,6 +437,26 @@ class ChatMessage(models.Model):
                 return f"http://localhost:8000{file_url}"
         return None
     
+    @property
+    def media_file(self):
+        """The uploaded file for this message type, if any"""
+        media_file = {
+            'voice': self.voice_file,
+            'video': self.video_file,
+            'image': self.image_file,
+            'file': self.attachment_file,
+        }.get(self.message_type)
+        return media_file or None
+    
+    @property
+    def thumbnail_urls(self):
+        """Full URLs of the generated thumbnails keyed by size"""
+        from django.conf import settings
+        from django.core.files.storage import default_storage
+        
+        base_url = getattr(settings, 'MEDIA_BASE_URL', 'http://localhost:8000')
+        return {size: f"{base_url}{default_storage.url(name)}" for size, name in self.thumbnails.items()}
+    
     @property
     def media_filename(self):
         """Get the filename for the media file"""
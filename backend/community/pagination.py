@@ -0,0 +1,157 @@
+"""
+Keyset pagination for chat message listings
+
+Messages are walked in (created_at, id) order. ``since`` returns messages
+after a cursor (what a client polls with to catch up), ``before`` returns the
+page preceding a cursor (scrolling back), and no cursor returns the latest
+page. Cursors are opaque tokens handed out in every response.
+
+A poll with ``since`` can also pass ``updated_since`` to get, under
+``updated``, the messages it already has that changed since its last poll,
+such as media that finished processing.
+"""
+
+import base64
+import binascii
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Updates are looked for a little before the last poll, in case one was stamped just before it and committed after
+UPDATE_OVERLAP = timedelta(seconds=2)
+
+
+def encode_cursor(message):
+    """Opaque cursor pointing at a message's (created_at, id) position"""
+    micros = (message.created_at - EPOCH) // timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(f"{micros}:{message.id}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(created_at, id) for a cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        micros, message_id = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+        return EPOCH + timedelta(microseconds=int(micros)), int(message_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError):
+        raise ValueError('Invalid cursor')
+
+
+def encode_updated_cursor(moment):
+    """Opaque cursor for the moment a poll looked for updated messages"""
+    micros = (moment - EPOCH) // timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(str(micros).encode()).decode().rstrip('=')
+
+
+def decode_updated_cursor(cursor):
+    """The moment an updated cursor was handed out; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return EPOCH + timedelta(microseconds=int(base64.urlsafe_b64decode(padded.encode()).decode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError):
+        raise ValueError('Invalid cursor')
+
+
+class ChatMessageKeysetPagination(BasePagination):
+    """Keyset pages of chat messages, always returned oldest first"""
+
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def _decode(self, request, param, decode=decode_cursor):
+        cursor = request.query_params.get(param)
+        if not cursor:
+            return None
+        try:
+            return decode(cursor)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        since = self._decode(request, 'since')
+        before = self._decode(request, 'before')
+        updated_since = self._decode(request, 'updated_since', decode_updated_cursor)
+        self.request = request
+        self.view = view
+        self.since = since
+        self.updated = []
+        self.polled_at = timezone.now()
+
+        if since is not None:
+            created_at, message_id = since
+            seen = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lte=message_id)
+            if updated_since is not None:
+                # Only messages the client already has; new ones arrive in the page itself
+                self.updated = list(
+                    queryset.filter(seen, updated_at__gt=updated_since - UPDATE_OVERLAP)
+                    .order_by('updated_at', 'id')[:self.max_page_size]
+                )
+                if len(self.updated) == self.max_page_size:
+                    # Pick up the rest on the next poll
+                    self.polled_at = self.updated[-1].updated_at
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=message_id)
+            ).order_by('created_at', 'id')
+            messages = list(queryset[:page_size + 1])
+            self.has_more = len(messages) > page_size
+            self.messages = messages[:page_size]
+        else:
+            if before is not None:
+                created_at, message_id = before
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id)
+                )
+            messages = list(queryset.order_by('-created_at', '-id')[:page_size + 1])
+            self.has_more = len(messages) > page_size
+            self.messages = list(reversed(messages[:page_size]))
+
+        return self.messages
+
+    def get_cursors(self):
+        """Cursors to fetch newer messages, to scroll further back and to poll for updates"""
+        if self.messages:
+            since_cursor = encode_cursor(self.messages[-1])
+            before_cursor = encode_cursor(self.messages[0])
+        else:
+            # Nothing new: keep polling from the same place
+            since_cursor = self.request.query_params.get('since') if self.since is not None else None
+            before_cursor = None
+
+        return {
+            'since_cursor': since_cursor,
+            'before_cursor': before_cursor,
+            'updated_cursor': encode_updated_cursor(self.polled_at),
+            'has_more': self.has_more,
+        }
+
+    def get_paginated_response(self, data):
+        updated = self.view.get_serializer(self.updated, many=True).data if self.updated else []
+        return Response({'results': data, 'updated': updated, **self.get_cursors()})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'results': schema,
+                'updated': schema,
+                'since_cursor': {'type': 'string', 'nullable': True},
+                'before_cursor': {'type': 'string', 'nullable': True},
+                'updated_cursor': {'type': 'string'},
+                'has_more': {'type': 'boolean'},
+            },
+        }
@@ -0,0 +1,189 @@
+"""
+Real-time event fan-out for chat rooms
+
+Views and signals publish room events (new messages, joins and leaves, call
+state changes) to a broker; each open WebSocket subscribes to its room's
+channel. The in-process broker only reaches sockets served by the same
+process, so multi-worker deployments set ``CHAT_BROKER_URL`` to a Redis URL
+and every process relays the shared Redis channel to its local subscribers.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from backend.background import BackgroundThread
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'chat.room.'
+
+_OVERFLOW = object()
+
+
+def room_channel(room_id):
+    return f"{CHANNEL_PREFIX}{room_id}"
+
+
+class Subscription:
+    """Queue of encoded events for one subscriber on one event loop"""
+
+    def __init__(self, broker, channel, max_pending):
+        self.broker = broker
+        self.channel = channel
+        self.max_pending = max_pending
+        self.overflowed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+
+    def __enter__(self):
+        self.broker._add(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.broker._discard(self)
+
+    def deliver(self, message):
+        """Queue a message from any thread"""
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # The subscriber's event loop has already shut down
+            self.broker._discard(self)
+
+    def _put(self, message):
+        if self.overflowed:
+            return
+        if self._queue.qsize() >= self.max_pending:
+            # A subscriber this far behind reconnects and reloads instead
+            self.overflowed = True
+            message = _OVERFLOW
+        self._queue.put_nowait(message)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self._queue.get()
+        if message is _OVERFLOW:
+            raise StopAsyncIteration
+        return message
+
+
+class InProcessBroker:
+    """Delivers events to subscribers in this process"""
+
+    def __init__(self, max_pending=1000):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, channel):
+        """Subscription for ``channel``; use as a context manager inside an event loop"""
+        return Subscription(self, channel, self.max_pending)
+
+    def publish(self, channel, event):
+        self._deliver(channel, json.dumps(event, cls=DjangoJSONEncoder))
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+    def _add(self, subscription):
+        with self._lock:
+            self._subscribers[subscription.channel].add(subscription)
+
+    def _discard(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+
+class RedisBroker(InProcessBroker):
+    """Publishes through Redis pub/sub and relays Redis messages to local subscribers"""
+
+    def __init__(self, url, max_pending=1000):
+        import redis
+
+        super().__init__(max_pending)
+        self._redis = redis.Redis.from_url(url)
+        self._listener = BackgroundThread('chat-broker', self._listen)
+
+    def subscribe(self, channel):
+        self._listener.ensure_started()
+        return super().subscribe(channel)
+
+    def publish(self, channel, event):
+        self._redis.publish(channel, json.dumps(event, cls=DjangoJSONEncoder))
+
+    def _listen(self):
+        """Relay every room channel to local subscribers, reconnecting on failure"""
+        backoff = 1
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                backoff = 1
+                for message in pubsub.listen():
+                    if message['type'] == 'pmessage':
+                        self._deliver(message['channel'].decode(), message['data'].decode())
+            except Exception as e:
+                logger.warning(f"Chat broker lost its Redis subscription: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                pubsub.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Process-wide broker: Redis when ``CHAT_BROKER_URL`` is set, in-process otherwise"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = getattr(settings, 'CHAT_BROKER_URL', '')
+                max_pending = getattr(settings, 'CHAT_BROKER_MAX_PENDING', 1000)
+                _broker = RedisBroker(url, max_pending) if url else InProcessBroker(max_pending)
+    return _broker
+
+
+def room_event(room_id, event_type, data):
+    return {
+        'type': event_type,
+        'room_id': room_id,
+        'data': data,
+        'timestamp': timezone.now().isoformat(),
+    }
+
+
+def send_room_event(room_id, event_type, data):
+    """Publish an event to a room now; broker failures are logged, never raised"""
+    try:
+        get_broker().publish(room_channel(room_id), room_event(room_id, event_type, data))
+    except Exception as e:
+        logger.error(f"Failed to publish {event_type} event for room {room_id}: {e}")
+
+
+def publish_room_event(room_id, event_type, data):
+    """Publish an event to a room once the current transaction commits"""
+    transaction.on_commit(lambda: send_room_event(room_id, event_type, data))
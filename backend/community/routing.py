@@ -0,0 +1,25 @@
+"""
+WebSocket routes for the community app
+"""
+
+import re
+
+from .consumers import chat_room_socket
+
+websocket_urlpatterns = [
+    (re.compile(r'^/ws/chat/(?P<room_id>\d+)/$'), chat_room_socket),
+]
+
+
+async def websocket_application(scope, receive, send):
+    """Dispatch a WebSocket connection to the matching route"""
+    for pattern, handler in websocket_urlpatterns:
+        match = pattern.match(scope['path'])
+        if match:
+            kwargs = {name: int(value) for name, value in match.groupdict().items()}
+            await handler(scope, receive, send, **kwargs)
+            return
+
+    # Unknown path: reject the handshake
+    await receive()
+    await send({'type': 'websocket.close', 'code': 4404})
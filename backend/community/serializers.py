@@ -150,6 +150,7 @@ class ChatMessageSerializer(serializers.ModelSerializer):
     author_display_name = serializers.ReadOnlyField()
     media_url = serializers.ReadOnlyField()
     media_filename = serializers.ReadOnlyField()
+    thumbnail_urls = serializers.ReadOnlyField()
     
     class Meta:
         model = ChatMessage
@@ -157,9 +158,13 @@ class ChatMessageSerializer(serializers.ModelSerializer):
             'id', 'room', 'author', 'author_display_name', 'content',
             'message_type', 'voice_file', 'video_file', 'image_file', 'attachment_file',
             'duration', 'file_size', 'mime_type', 'media_url', 'media_filename',
+            'processing_status', 'media_metadata', 'thumbnail_urls',
             'is_anonymous', 'is_system_message', 'created_at'
         ]
-        read_only_fields = ['author', 'created_at', 'media_url', 'media_filename']
+        read_only_fields = [
+            'author', 'created_at', 'media_url', 'media_filename',
+            'processing_status', 'media_metadata', 'thumbnail_urls'
+        ]
     
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
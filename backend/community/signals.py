@@ -0,0 +1,43 @@
+"""
+Publish chat room activity to connected WebSocket clients
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import ChatMessage, Call, CallParticipant
+from .realtime import publish_room_event
+
+
+@receiver(post_save, sender=ChatMessage)
+def publish_chat_message(sender, instance, created, **kwargs):
+    """Push new messages, including join/leave system messages, to the room"""
+    if not created:
+        return
+
+    from .serializers import ChatMessageSerializer
+    publish_room_event(instance.room_id, 'message', ChatMessageSerializer(instance).data)
+
+
+@receiver(post_save, sender=Call)
+def publish_call_state(sender, instance, created, **kwargs):
+    """Push call start, end and status changes to the room"""
+    from .call_views import call_status_data
+
+    if instance.status == 'ended':
+        event_type = 'call_ended'
+    elif created:
+        event_type = 'call_started'
+    else:
+        event_type = 'call_updated'
+    publish_room_event(instance.room_id, event_type, call_status_data(instance))
+
+
+@receiver(post_save, sender=CallParticipant)
+def publish_call_participants(sender, instance, **kwargs):
+    """Push the participant list when someone joins or leaves an active call"""
+    from .call_views import call_status_data
+
+    call = instance.call
+    if call.status == 'active':
+        publish_room_event(call.room_id, 'call_updated', call_status_data(call))
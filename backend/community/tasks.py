@@ -0,0 +1,89 @@
+"""
+Background jobs for the community app
+"""
+
+import logging
+from datetime import timedelta
+from functools import partial
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from backend.background import enqueue
+from .media_utils import extract_message_media
+from .models import ChatMessage
+from .realtime import send_room_event
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def process_chat_media(message_id):
+    """
+    Extract metadata and thumbnails for an uploaded chat message, then mark it ready
+    """
+    try:
+        message = ChatMessage.objects.get(pk=message_id)
+    except ChatMessage.DoesNotExist:
+        return
+    
+    try:
+        updates = extract_message_media(message)
+        updates['processing_status'] = 'ready'
+    except Exception as e:
+        logger.error(f"Error processing media for message {message_id}: {str(e)}")
+        updates = {'processing_status': 'failed'}
+    
+    # A queryset update skips auto_now; polling clients find the change by updated_at
+    ChatMessage.objects.filter(pk=message_id).update(updated_at=timezone.now(), **updates)
+    message.refresh_from_db()
+    
+    from .serializers import ChatMessageSerializer
+    send_room_event(message.room_id, 'message_updated', ChatMessageSerializer(message).data)
+    logger.info(f"Processed {message.message_type} media for message {message_id}: {message.processing_status}")
+
+
+def requeue_stale_media(messages=None):
+    """
+    Queue processing again for messages stuck in 'processing'; returns how many were queued
+
+    Without a broker a job waits on its web process's background pool and is
+    lost if that process restarts. A message still processing
+    ``CHAT_MEDIA_PROCESSING_TIMEOUT`` seconds after it was queued is claimed
+    by bumping its updated_at, so concurrent sweeps queue it once, and queued
+    again. ``messages`` limits the sweep to messages already loaded, at no
+    extra query unless one of them is stale; by default every message is checked.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'CHAT_MEDIA_PROCESSING_TIMEOUT', 600))
+    if messages is None:
+        stale_ids = list(
+            ChatMessage.objects.filter(processing_status='processing', updated_at__lt=cutoff)
+            .values_list('id', flat=True)
+        )
+    else:
+        stale_ids = [
+            message.id for message in messages
+            if message.processing_status == 'processing' and message.updated_at < cutoff
+        ]
+
+    requeued = 0
+    for message_id in stale_ids:
+        claimed = ChatMessage.objects.filter(
+            pk=message_id, processing_status='processing', updated_at__lt=cutoff
+        ).update(updated_at=timezone.now())
+        if claimed:
+            transaction.on_commit(partial(enqueue, process_chat_media, message_id))
+            requeued += 1
+
+    if requeued:
+        logger.warning(f"Requeued media processing for {requeued} stale chat messages")
+    return requeued
+
+
+@shared_task(ignore_result=True)
+def requeue_stale_chat_media():
+    """
+    Periodic sweep for chat messages whose media job was lost
+    """
+    requeue_stale_media()
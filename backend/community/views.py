@@ -17,6 +17,9 @@ from .serializers import (
     ChatRoomSerializer, ChatMessageSerializer, PeerSupportMatchSerializer,
     ModerationReportSerializer
 )
+from .pagination import ChatMessageKeysetPagination
+from .realtime import publish_room_event
+from .tasks import requeue_stale_media
 
 
 class CommunityHubView(generics.GenericAPIView):
@@ -763,6 +766,12 @@ class ChatRoomJoinView(APIView):
                 is_anonymous=False
             )
             
+            publish_room_event(room.id, 'user_joined', {
+                'user_id': request.user.id,
+                'display_name': request.user.display_name,
+                'participant_count': room.get_participant_count()
+            })
+            
             return Response({
                 'message': 'Successfully joined chat room',
                 'room_name': room.name,
@@ -811,6 +820,12 @@ class ChatRoomLeaveView(APIView):
             room.last_activity = timezone.now()
             room.save()
             
+            publish_room_event(room.id, 'user_left', {
+                'user_id': request.user.id,
+                'display_name': request.user.display_name,
+                'participant_count': room.get_participant_count()
+            })
+            
             return Response({
                 'message': 'Successfully left chat room',
                 'participant_count': room.get_participant_count()
@@ -864,6 +879,12 @@ class ChatRoomJoinByCodeView(APIView):
                 is_anonymous=False
             )
             
+            publish_room_event(room.id, 'user_joined', {
+                'user_id': request.user.id,
+                'display_name': request.user.display_name,
+                'participant_count': room.get_participant_count()
+            })
+            
             return Response({
                 'message': 'Successfully joined chat room',
                 'room_id': room.id,
@@ -876,9 +897,10 @@ class ChatRoomJoinByCodeView(APIView):
 
 
 class ChatMessageCRUDView(generics.ListCreateAPIView):
-    """CRUD operations for chat messages"""
+    """CRUD operations for chat messages, paged by since/before cursors"""
     permission_classes = [IsAuthenticated]
     serializer_class = ChatMessageSerializer
+    pagination_class = ChatMessageKeysetPagination
     
     def get_queryset(self):
         room_id = self.request.query_params.get('room_id')
@@ -891,10 +913,16 @@ class ChatMessageCRUDView(generics.ListCreateAPIView):
             if not room.participants.filter(id=self.request.user.id).exists():
                 return ChatMessage.objects.none()
             
-            return ChatMessage.objects.filter(room=room).order_by('created_at')
+            return ChatMessage.objects.filter(room=room).select_related('author').order_by('created_at', 'id')
         except ChatRoom.DoesNotExist:
             return ChatMessage.objects.none()
     
+    def paginate_queryset(self, queryset):
+        messages = super().paginate_queryset(queryset)
+        # Media jobs lost with a restarted process are queued again when their message is read
+        requeue_stale_media(messages + self.paginator.updated)
+        return messages
+    
     def perform_create(self, serializer):
         room_id = self.request.data.get('room')
         try:
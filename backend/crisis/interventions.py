@@ -0,0 +1,110 @@
+"""
+Crisis intervention metrics
+
+Counts of alerts and how quickly they were acknowledged and resolved, for
+any queryset of crisis alerts, in two queries: one for the counts and one
+for the response-time statistics. On PostgreSQL the mean and percentiles
+are aggregated in the database with ``percentile_cont``; other databases
+fetch just the two durations per alert and take the same linearly
+interpolated percentiles in Python.
+"""
+
+from datetime import timedelta
+from django.db import connections
+from django.db.models import Aggregate, Avg, Count, DurationField, ExpressionWrapper, F, Q
+
+PERCENTILES = (50, 90, 99)
+
+# Alerts handed on to emergency services rather than handled by a guide
+ESCALATION_LEVELS = ('imminent',)
+
+DURATIONS = {
+    'acknowledge': ExpressionWrapper(F('acknowledged_at') - F('created_at'), output_field=DurationField()),
+    'resolve': ExpressionWrapper(F('resolved_at') - F('created_at'), output_field=DurationField()),
+}
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL's continuous percentile of an ordered set"""
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+    def __init__(self, expression, percentile, **extra):
+        super().__init__(expression, percentile=percentile, **extra)
+
+
+def percentile(values, fraction):
+    """Linearly interpolated percentile of sorted values, as ``percentile_cont`` computes it"""
+    if not values:
+        return None
+    rank = fraction * (len(values) - 1)
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def _minutes(duration):
+    return None if duration is None else round(duration.total_seconds() / 60, 1)
+
+
+def _database_response_times(alerts):
+    """Mean and percentiles of each duration, aggregated by the database"""
+    aggregates = {}
+    for name, duration in DURATIONS.items():
+        aggregates[f"{name}_mean"] = Avg(duration)
+        for p in PERCENTILES:
+            aggregates[f"{name}_p{p}"] = PercentileCont(duration, p / 100)
+    row = alerts.aggregate(**aggregates)
+    return {
+        name: (row[f"{name}_mean"], [row[f"{name}_p{p}"] for p in PERCENTILES])
+        for name in DURATIONS
+    }
+
+
+def _python_response_times(alerts):
+    """Mean and percentiles of each duration from the durations alone"""
+    rows = (
+        alerts
+        .filter(Q(acknowledged_at__isnull=False) | Q(resolved_at__isnull=False))
+        .annotate(**{f"{name}_time": duration for name, duration in DURATIONS.items()})
+        .values_list(*(f"{name}_time" for name in DURATIONS))
+    )
+    columns = list(zip(*rows)) or [()] * len(DURATIONS)
+
+    response_times = {}
+    for name, column in zip(DURATIONS, columns):
+        values = sorted(value for value in column if value is not None)
+        mean = sum(values, timedelta()) / len(values) if values else None
+        response_times[name] = (mean, [percentile(values, p / 100) for p in PERCENTILES])
+    return response_times
+
+
+def intervention_metrics(alerts):
+    """
+    Counts and response times for a queryset of crisis alerts
+
+    ``acknowledge`` and ``resolve`` give the count, mean and percentiles of
+    the time from an alert being raised to it being acknowledged or
+    resolved, in minutes (None when no alert got that far).
+    """
+    alerts = alerts.order_by()
+    counts = alerts.aggregate(
+        total=Count('id'),
+        resolved=Count('id', filter=Q(status='resolved')),
+        escalations=Count('id', filter=Q(severity_level__in=ESCALATION_LEVELS)),
+        acknowledge_count=Count('id', filter=Q(acknowledged_at__isnull=False)),
+        resolve_count=Count('id', filter=Q(resolved_at__isnull=False)),
+    )
+
+    if connections[alerts.db].vendor == 'postgresql':
+        response_times = _database_response_times(alerts)
+    else:
+        response_times = _python_response_times(alerts)
+
+    metrics = {'total': counts['total'], 'resolved': counts['resolved'], 'escalations': counts['escalations']}
+    for name, (mean, percentiles) in response_times.items():
+        metrics[name] = dict(
+            {'count': counts[f"{name}_count"], 'mean': _minutes(mean)},
+            **{f"p{p}": _minutes(value) for p, value in zip(PERCENTILES, percentiles)}
+        )
+    return metrics
@@ -6,6 +6,8 @@ from rest_framework.views import APIView
 from django.utils import timezone
 from django.db.models import Count, Q
 from datetime import timedelta
+from backend.dashboard_snapshots import snapshots as dashboard_snapshots, wants_fresh
+from .interventions import intervention_metrics
 from .models import CrisisHotline, CrisisResource, CrisisAlert, UserSafetyPlan
 from .serializers import (
     CrisisHotlineSerializer, CrisisResourceSerializer, CrisisAlertSerializer,
@@ -229,7 +231,15 @@ class CrisisStatsView(APIView):
         if user_role not in ['guide', 'admin']:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Calculate statistics
+        # Served from a stored snapshot, refreshed in the background once stale
+        stats, snapshot = dashboard_snapshots.get(
+            'crisis_stats', self._get_stats, fresh=wants_fresh(request)
+        )
+        
+        return Response(dict(stats, snapshot=snapshot))
+    
+    def _get_stats(self):
+        """Alert counts and the average response time over the last week"""
         total_alerts = CrisisAlert.objects.count()
         active_alerts = CrisisAlert.objects.filter(status='active').count()
         high_risk_alerts = CrisisAlert.objects.filter(
@@ -245,26 +255,21 @@ class CrisisStatsView(APIView):
             created_at__gte=week_ago
         ).count()
         
-        # Calculate average response time from actual data
-        from django.db.models import Avg
-        response_time_avg = CrisisAlert.objects.filter(
-            created_at__gte=week_ago,
-            acknowledged_at__isnull=False
-        ).aggregate(
-            avg_response=Avg('acknowledged_at') - Avg('created_at')
-        )['avg_response'] or 0
+        # Minutes from an alert being raised to it being acknowledged
+        response_times = intervention_metrics(
+            CrisisAlert.objects.filter(created_at__gte=week_ago)
+        )['acknowledge']
         
-        stats = {
+        return {
             'total_alerts': total_alerts,
             'active_alerts': active_alerts,
             'high_risk_alerts': high_risk_alerts,
             'resolved_alerts': resolved_alerts,
             'users_with_safety_plans': users_with_safety_plans,
             'alerts_this_week': alerts_this_week,
-            'response_time_avg': response_time_avg
+            'response_time_avg': response_times['mean'] or 0,
+            'response_times': response_times
         }
-        
-        return Response(stats)
 
 class EmergencyProtocolView(APIView):
     """Emergency intervention protocols"""
@@ -0,0 +1,113 @@
+"""
+Keyset pagination for the guide client roster
+
+Clients are walked in (sort key, id) order for one of the roster orderings,
+ascending or, with a leading ``-``, descending. ``cursor`` returns the page
+after a cursor; cursors are opaque tokens that carry the ordering they were
+issued for, so a cursor cannot be replayed against another ordering.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+from .roster import EPOCH, ORDERINGS
+
+
+def encode_cursor(ordering, value, client_id):
+    """Opaque cursor pointing at a client's position in an ordering"""
+    if isinstance(value, datetime):
+        value = {'t': (value - EPOCH) // timedelta(microseconds=1)}
+    payload = json.dumps([ordering, value, client_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(ordering, sort value, id) for a cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        ordering, value, client_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if isinstance(value, dict):
+            value = EPOCH + timedelta(microseconds=int(value['t']))
+        return ordering, value, int(client_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError, OverflowError):
+        raise ValueError('Invalid cursor')
+
+
+class RosterKeysetPagination(BasePagination):
+    """Keyset pages of roster clients in the requested ordering"""
+
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    default_ordering = 'joined'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param) or self.default_ordering
+        if ordering.lstrip('-') not in ORDERINGS:
+            raise ValidationError({self.ordering_query_param: f"Choose one of {', '.join(ORDERINGS)}"})
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        descending = self.ordering.startswith('-')
+        self.field = ORDERINGS[self.ordering.lstrip('-')]
+
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                ordering, value, client_id = decode_cursor(cursor)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            if ordering != self.ordering:
+                raise NotFound(self.invalid_cursor_message)
+            after = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{after}": value}) | Q(**{self.field: value, f"id__{after}": client_id})
+            )
+
+        order = [f"-{self.field}", '-id'] if descending else [self.field, 'id']
+        clients = list(queryset.order_by(*order)[:page_size + 1])
+        self.has_more = len(clients) > page_size
+        self.clients = clients[:page_size]
+        return self.clients
+
+    def get_next_cursor(self):
+        if not self.has_more:
+            return None
+        last = self.clients[-1]
+        return encode_cursor(self.ordering, getattr(last, self.field), last.id)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'results': data,
+            'next_cursor': self.get_next_cursor(),
+            'has_more': self.has_more,
+            'ordering': self.ordering,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'results': schema,
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'has_more': {'type': 'boolean'},
+                'ordering': {'type': 'string'},
+            },
+        }
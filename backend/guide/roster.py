@@ -0,0 +1,169 @@
+"""
+Guide client roster
+
+Every roster row comes from one annotated user queryset: the latest
+assessment through correlated subqueries, the assessment count through a
+counting subquery and the guide's own assignment through a prefetch, so a
+page costs the same handful of queries however many clients there are.
+``risk_level`` and ``status`` are computed in the database too, so
+filtering and sorting by them happen there rather than in Python.
+"""
+
+from collections import namedtuple
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, IntegerField, OuterRef, Prefetch, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from assessments.latest import RISK_BUCKETS, RISK_LEVELS, latest_assessment
+from assessments.models import Assessment, ClientAssessmentAssignment
+
+User = get_user_model()
+
+# Days without an assessment after which a client counts as inactive
+INACTIVE_AFTER_DAYS = 30
+
+STATUSES = ('active', 'at_risk', 'inactive')
+
+RosterField = namedtuple('RosterField', ['columns', 'value'])
+
+ROSTER_FIELDS = {
+    'id': RosterField(('id',), lambda client: client.id),
+    'name': RosterField(
+        ('first_name', 'last_name', 'username'),
+        lambda client: client.display_name
+    ),
+    'email': RosterField(
+        ('email', 'is_anonymous_preferred'),
+        lambda client: 'Anonymous User' if client.is_anonymous_preferred else client.email
+    ),
+    'age': RosterField(('age',), lambda client: client.age or 0),
+    'status': RosterField((), lambda client: client.roster_status),
+    'lastAssessment': RosterField(
+        (), lambda client: client.latest_assessment_at.isoformat() if client.latest_assessment_at else None
+    ),
+    'riskLevel': RosterField((), lambda client: client.risk_level),
+    'lastContact': RosterField(
+        ('last_login', 'date_joined'),
+        lambda client: (client.last_login or client.date_joined).isoformat()
+    ),
+    'assignedDate': RosterField(
+        ('date_joined',),
+        lambda client: (
+            client.guide_assignments[0].assigned_date if getattr(client, 'guide_assignments', None)
+            else client.date_joined
+        ).isoformat()
+    ),
+    'assessmentCount': RosterField((), lambda client: client.assessment_count),
+}
+
+# Sort keys offered to clients, mapped to the annotation or column behind them
+ORDERINGS = {
+    'joined': 'date_joined',
+    'lastAssessment': 'last_assessment_sort',
+    'risk': 'risk_rank',
+    'assessments': 'assessment_count',
+}
+
+# Sort value for clients never assessed; cursors encode timestamps relative to it too
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def risk_level_expression():
+    """Risk bucket of the annotated ``latest_risk_level``, low when there is none"""
+    return Case(
+        *[
+            When(latest_risk_level__in=[level for level, bucket in RISK_BUCKETS.items() if bucket == name], then=Value(name))
+            for name in RISK_LEVELS if name != 'low'
+        ],
+        default=Value('low'),
+    )
+
+
+def status_expression(now=None):
+    """inactive without an assessment in the last INACTIVE_AFTER_DAYS days, at_risk at high or critical risk, else active"""
+    today = timezone.localdate(now)
+    cutoff = timezone.make_aware(datetime.combine(today - timedelta(days=INACTIVE_AFTER_DAYS), time.min))
+    return Case(
+        When(latest_assessment_at__isnull=True, then=Value('inactive')),
+        When(latest_assessment_at__lt=cutoff, then=Value('inactive')),
+        When(risk_level__in=['high', 'critical'], then=Value('at_risk')),
+        default=Value('active'),
+    )
+
+
+def assessment_count():
+    return Coalesce(
+        Subquery(
+            Assessment.objects
+            .filter(user_id=OuterRef('pk'))
+            .order_by()
+            .values('user_id')
+            .annotate(total=Count('id'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def client_roster(guide, fields=None, now=None):
+    """
+    Annotated queryset of clients for a guide's roster
+
+    ``fields`` limits the columns loaded and skips the assessment count and
+    assignment prefetch when they are not asked for; rows are built with
+    ``roster_row``.
+    """
+    fields = list(fields or ROSTER_FIELDS)
+    columns = {'id', 'date_joined'}
+    for name in fields:
+        columns.update(ROSTER_FIELDS[name].columns)
+
+    clients = (
+        User.objects
+        .filter(role='user')
+        .only(*columns)
+        .annotate(
+            latest_assessment_at=latest_assessment('completed_at'),
+            latest_risk_level=latest_assessment('risk_level'),
+        )
+        .annotate(risk_level=risk_level_expression())
+        .annotate(
+            roster_status=status_expression(now),
+            risk_rank=Case(
+                *[When(risk_level=name, then=Value(rank)) for rank, name in enumerate(RISK_LEVELS)],
+                output_field=IntegerField(),
+            ),
+            last_assessment_sort=Coalesce('latest_assessment_at', Value(EPOCH)),
+        )
+    )
+
+    if 'assessmentCount' in fields:
+        clients = clients.annotate(assessment_count=assessment_count())
+    if 'assignedDate' in fields and guide.role == 'guide':
+        clients = clients.prefetch_related(Prefetch(
+            'assessment_assignments',
+            queryset=ClientAssessmentAssignment.objects.filter(guide=guide).only('id', 'client_id', 'assigned_date'),
+            to_attr='guide_assignments',
+        ))
+    return clients
+
+
+def filter_roster(clients, statuses=None, risk_levels=None, search=None):
+    """Clients limited to some statuses, risk levels and a name or email search"""
+    if statuses:
+        clients = clients.filter(roster_status__in=statuses)
+    if risk_levels:
+        clients = clients.filter(risk_level__in=risk_levels)
+    if search:
+        clients = clients.filter(
+            Q(username__icontains=search) | Q(first_name__icontains=search) |
+            Q(last_name__icontains=search) | Q(email__icontains=search)
+        )
+    return clients
+
+
+def roster_row(client, fields=None):
+    """A roster entry for an annotated client, limited to ``fields``"""
+    return {name: ROSTER_FIELDS[name].value(client) for name in (fields or ROSTER_FIELDS)}
@@ -1,5 +1,7 @@
-# Guide URLs removed - guide functionality is integrated into assessments app per specification
+# Guide URLs - most guide functionality is integrated into assessments app per specification
+from django.urls import path
+from . import views
 
 urlpatterns = [
-    # Guide functionality has been integrated into assessments app
+    path('clients/', views.get_clients, name='guide-clients'),
 ]
@@ -1,65 +1,54 @@
 # Guide views - simplified to work with essential models only
-from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from assessments.models import ClientAssessmentAssignment, Assessment
+from datetime import timedelta
+from assessments.models import ClientAssessmentAssignment
+from crisis.interventions import intervention_metrics
 from crisis.models import CrisisAlert
+from .pagination import RosterKeysetPagination
+from .roster import ROSTER_FIELDS, client_roster, filter_roster, roster_row
 
 User = get_user_model()
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_clients(request):
-    """Get all users with role 'user' for guides and admins"""
+    """
+    Paginated roster of users with role 'user' for guides and admins
+    
+    Query parameters: ``status`` and ``riskLevel`` (comma separated) filter,
+    ``search`` matches names and email, ``ordering`` is one of joined,
+    lastAssessment, risk or assessments (``-`` for descending), ``fields``
+    picks the keys of each row, and ``cursor``/``page_size`` page through it.
+    """
     if request.user.role not in ['guide', 'admin']:
         return Response({'error': 'Permission denied'}, status=403)
     
-    # Get all users with role 'user'
-    users = User.objects.filter(role='user').order_by('date_joined')
+    fields = _list_param(request, 'fields')
+    unknown = [name for name in fields if name not in ROSTER_FIELDS]
+    if unknown:
+        return Response({'error': f"Unknown fields: {', '.join(unknown)}"}, status=400)
+    fields = fields or list(ROSTER_FIELDS)
     
-    clients_data = []
-    for user in users:
-        # Get latest assessment
-        latest_assessment = Assessment.objects.filter(
-            user=user
-        ).order_by('-completed_at').first()
-        
-        # Get assignment info if exists
-        assignment = ClientAssessmentAssignment.objects.filter(
-            client=user,
-            guide=request.user
-        ).first() if request.user.role == 'guide' else None
-        
-        # Determine status based on recent activity
-        status = 'active'
-        if latest_assessment:
-            days_since_assessment = (timezone.now().date() - latest_assessment.completed_at.date()).days
-            if days_since_assessment > 30:
-                status = 'inactive'
-            elif latest_assessment.risk_level in ['high', 'critical']:
-                status = 'at_risk'
-        else:
-            status = 'inactive'
-        
-        client_data = {
-            'id': user.id,
-            'name': user.display_name or f"{user.first_name} {user.last_name}".strip() or user.username,
-            'email': user.email if not getattr(user, 'is_anonymous_preferred', False) else 'Anonymous User',
-            'age': getattr(user, 'age', 0) or 0,
-            'status': status,
-            'lastAssessment': latest_assessment.completed_at.isoformat() if latest_assessment else None,
-            'riskLevel': latest_assessment.risk_level.lower() if latest_assessment and latest_assessment.risk_level else 'low',
-            'lastContact': user.last_login.isoformat() if user.last_login else user.date_joined.isoformat(),
-            'assignedDate': assignment.assigned_date.isoformat() if assignment else user.date_joined.isoformat(),
-            'assessmentCount': Assessment.objects.filter(user=user).count(),
-        }
-        
-        clients_data.append(client_data)
+    # Sorting by assessment count needs the count even when it is not returned
+    loaded = fields + ['assessmentCount'] if 'assessments' in request.query_params.get('ordering', '') else fields
+    clients = filter_roster(
+        client_roster(request.user, fields=loaded),
+        statuses=_list_param(request, 'status'),
+        risk_levels=_list_param(request, 'riskLevel'),
+        search=request.query_params.get('search')
+    )
     
-    return Response(clients_data)
+    paginator = RosterKeysetPagination()
+    page = paginator.paginate_queryset(clients, request)
+    return paginator.get_paginated_response([roster_row(client, fields) for client in page])
+
+def _list_param(request, name):
+    """Comma separated values of a query parameter"""
+    return [value for value in request.query_params.get(name, '').split(',') if value]
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -108,10 +97,17 @@ def get_analytics(request):
         status__in=['active', 'acknowledged']
     ).count()
     
+    # Mean time to acknowledge crisis alerts raised in the last 30 days
+    response_times = intervention_metrics(CrisisAlert.objects.filter(
+        created_at__gte=timezone.now() - timedelta(days=30)
+    ))['acknowledge']
+    response_time = response_times['mean']
+    
     return Response({
         'totalClients': total_clients,
         'activeAssignments': active_assignments,
         'crisisAlerts': crisis_alerts,
-        'responseTime': '2.3 hours',
+        'responseTime': f"{response_time / 60:.1f} hours" if response_time is not None else 'N/A',
+        'responseTimes': response_times,
         'completionRate': '85%'
     })
@@ -0,0 +1,99 @@
+"""
+Batched emotion analysis
+
+Fans frame analyses out over a shared, bounded thread pool so one slow
+upstream call does not hold a request worker per frame, and reuses a single
+pooled HTTP session for the calls to the emotion API.
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import TimeoutError
+from django.conf import settings
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend.background import BackgroundPool
+
+_lock = threading.Lock()
+_http_session = None
+
+analysis_pool = BackgroundPool('mood-analysis', max_workers=getattr(settings, 'MOOD_ANALYSIS_WORKERS', 8))
+
+
+def get_http_session():
+    """Process-wide requests session with a connection pool sized for the workers"""
+    global _http_session
+    if _http_session is None:
+        with _lock:
+            if _http_session is None:
+                pool_size = getattr(settings, 'MOOD_ANALYSIS_WORKERS', 8)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+    return _http_session
+
+
+class _FrameJob:
+    """One frame on the pool, recording when a worker picked it up"""
+
+    def __init__(self, analyzer, frame, include_breakdown):
+        self.analyzer = analyzer
+        self.frame = frame
+        self.include_breakdown = include_breakdown
+        self.started = threading.Event()
+        self.started_at = None
+
+    def __call__(self):
+        self.started_at = time.monotonic()
+        self.started.set()
+        result = self.analyzer(self.frame, self.include_breakdown)
+        result['processing_time'] = time.monotonic() - self.started_at
+        return result
+
+
+def _wait_for_frame(job, future, queue_deadline, timeout):
+    """The frame's result, or raise TimeoutError if it waited or ran too long"""
+    if not job.started.wait(max(queue_deadline - time.monotonic(), 0)) and future.cancel():
+        raise TimeoutError(f'Analysis did not start within {timeout}s')
+    job.started.wait()
+    try:
+        return future.result(timeout=max(job.started_at + timeout - time.monotonic(), 0))
+    except TimeoutError:
+        raise TimeoutError(f'Analysis timed out after {timeout}s') from None
+
+
+def analyze_frames(frames, analyzer, include_breakdown=True, timeout=None):
+    """Analyze frames concurrently and return one result per frame, in order.
+
+    Each result has a ``status`` of 'success', 'error' or 'timeout'. A frame's
+    ``timeout`` starts when a worker picks it up, so frames queued behind
+    others in a batch larger than the pool get their full time. A frame still
+    queued ``timeout`` seconds after the call is cancelled, and one still
+    running ``timeout`` seconds after it started is finished in the
+    background and its result discarded; both are reported as timed out.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'MOOD_ANALYSIS_TIMEOUT', 15)
+
+    queue_deadline = time.monotonic() + timeout
+    jobs = [_FrameJob(analyzer, frame, include_breakdown) for frame in frames]
+    # Each frame runs in a copy of the caller's context so tracing spans follow it onto the pool
+    futures = [analysis_pool.submit(None, contextvars.copy_context().run, job) for job in jobs]
+
+    results = []
+    for index, (job, future) in enumerate(zip(jobs, futures)):
+        try:
+            result = _wait_for_frame(job, future, queue_deadline, timeout)
+        except TimeoutError as e:
+            results.append({'index': index, 'status': 'timeout', 'error': str(e)})
+        except Exception as e:
+            results.append({'index': index, 'status': 'error', 'error': str(e)})
+        else:
+            results.append({'index': index, 'status': 'success', **result})
+
+    return results
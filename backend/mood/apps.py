@@ -7,5 +7,5 @@ class MoodConfig(AppConfig):
     verbose_name = 'Mood Tracking'
     
     def ready(self):
-        # Import signals if any
-        pass
+        # Keep daily MoodTrend rollups in sync with mood entries
+        from . import signals  # noqa: F401
@@ -0,0 +1,101 @@
+"""
+Content-addressed blob store for mood entry images
+
+Image payloads are stored once per SHA-256 digest through a Django storage
+backend, so mood entry rows only carry the digest and never the image bytes.
+"""
+
+import base64
+import binascii
+import hashlib
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, storages
+
+DEFAULT_MIME_TYPE = 'application/octet-stream'
+
+# Leading bytes of the image formats browsers capture from a webcam
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+
+
+def decode_image_data(image_data):
+    """Decode base64 or data-URL image text into (bytes, mime type)"""
+    mime_type = None
+    if image_data.startswith('data:'):
+        header, _, image_data = image_data.partition(',')
+        mime_type = header[len('data:'):].split(';')[0] or None
+
+    try:
+        content = base64.b64decode(image_data)
+    except (binascii.Error, ValueError):
+        raise ValueError('Invalid base64 image data')
+
+    return content, mime_type or sniff_mime_type(content)
+
+
+def sniff_mime_type(content):
+    """Guess an image mime type from its leading bytes"""
+    for signature, mime_type in IMAGE_SIGNATURES:
+        if content.startswith(signature):
+            return mime_type
+    if content[:4] == b'RIFF' and content[8:12] == b'WEBP':
+        return 'image/webp'
+    return DEFAULT_MIME_TYPE
+
+
+class BlobStore:
+    """Stores immutable blobs under their SHA-256 digest"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @staticmethod
+    def digest(content):
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def name_for(digest):
+        # Shard by the leading hex digits to keep directories small
+        return f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+    def put(self, content):
+        """Store content and return its digest; identical content is stored once"""
+        digest = self.digest(content)
+        name = self.name_for(digest)
+
+        if not self.storage.exists(name):
+            saved_name = self.storage.save(name, ContentFile(content))
+            if saved_name != name:
+                # Another writer stored the same blob first
+                self.storage.delete(saved_name)
+
+        return digest
+
+    def exists(self, digest):
+        return self.storage.exists(self.name_for(digest))
+
+    def open(self, digest):
+        return self.storage.open(self.name_for(digest), 'rb')
+
+    def size(self, digest):
+        return self.storage.size(self.name_for(digest))
+
+    def delete(self, digest):
+        self.storage.delete(self.name_for(digest))
+
+
+def get_blob_store():
+    """Blob store backed by the configured storage.
+
+    ``MOOD_BLOB_STORAGE`` may name an alias from ``settings.STORAGES``;
+    otherwise blobs live on the local filesystem under ``MOOD_BLOB_ROOT``.
+    """
+    alias = getattr(settings, 'MOOD_BLOB_STORAGE', '')
+    if alias:
+        return BlobStore(storages[alias])
+    return BlobStore(FileSystemStorage(location=settings.MOOD_BLOB_ROOT))
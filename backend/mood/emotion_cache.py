@@ -0,0 +1,198 @@
+"""
+Result cache for emotion analysis
+
+Webcam captures a few seconds apart are usually near-identical, so results are
+cached under a perceptual hash of the decoded frame instead of its bytes. A
+lookup matches any cached frame within a small Hamming distance of the new one
+in the same scope (normally one analysis session), with TTL expiry and LRU
+eviction.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from io import BytesIO
+from django.conf import settings
+
+from PIL import Image, UnidentifiedImageError
+
+from .blobs import decode_image_data
+
+HASH_BITS = 64
+
+
+def perceptual_hash(content):
+    """64-bit difference hash of an encoded image, or None if it cannot be decoded.
+
+    The frame is reduced to a 9x8 grayscale thumbnail and each bit records
+    whether a pixel is brighter than its right-hand neighbour, so small changes
+    in lighting, compression or framing flip only a few bits.
+    """
+    try:
+        with Image.open(BytesIO(content)) as image:
+            pixels = list(image.convert('L').resize((9, 8), Image.Resampling.LANCZOS).getdata())
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None
+
+    image_hash = 0
+    for row in range(8):
+        for column in range(8):
+            left = pixels[row * 9 + column]
+            right = pixels[row * 9 + column + 1]
+            image_hash = (image_hash << 1) | (left > right)
+    return image_hash
+
+
+class EmotionResultCache:
+    """Thread-safe LRU cache of analysis results keyed by perceptual hash"""
+
+    def __init__(self, max_entries=1024, ttl=30, max_distance=4):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+
+        # Split the hash into max_distance + 1 bands: two hashes within
+        # max_distance bits must agree exactly on at least one band
+        band_count = max_distance + 1
+        self._bands = [
+            (HASH_BITS * index // band_count, HASH_BITS * (index + 1) // band_count)
+            for index in range(band_count)
+        ]
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._band_index = defaultdict(set)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _band_keys(self, scope, image_hash):
+        for index, (start, end) in enumerate(self._bands):
+            value = (image_hash >> start) & ((1 << (end - start)) - 1)
+            yield (scope, index, value)
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        for band_key in self._band_keys(*key):
+            hashes = self._band_index.get(band_key)
+            if hashes is not None:
+                hashes.discard(key[1])
+                if not hashes:
+                    del self._band_index[band_key]
+
+    def _find(self, scope, image_hash, now):
+        """Closest live entry within max_distance, dropping expired candidates"""
+        candidates = {image_hash}
+        for band_key in self._band_keys(scope, image_hash):
+            candidates.update(self._band_index.get(band_key, ()))
+
+        best_key, best_distance = None, None
+        for candidate in candidates:
+            key = (scope, candidate)
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            if entry[0] <= now:
+                self._remove(key)
+                self.expirations += 1
+                continue
+            distance = (candidate ^ image_hash).bit_count()
+            if distance <= self.max_distance and (best_distance is None or distance < best_distance):
+                best_key, best_distance = key, distance
+        return best_key
+
+    def get(self, scope, image_hash):
+        """Cached result for a near-identical frame in scope, or None"""
+        with self._lock:
+            key = self._find(scope, image_hash, time.monotonic())
+            if key is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(self._entries[key][1])
+
+    def set(self, scope, image_hash, result):
+        key = (scope, image_hash)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(result))
+            for band_key in self._band_keys(scope, image_hash):
+                self._band_index[band_key].add(image_hash)
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._band_index.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'max_distance': self.max_distance,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_emotion_cache():
+    """Process-wide emotion result cache configured from settings"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmotionResultCache(
+                    max_entries=getattr(settings, 'MOOD_ANALYSIS_CACHE_SIZE', 1024),
+                    ttl=getattr(settings, 'MOOD_ANALYSIS_CACHE_TTL', 30),
+                    max_distance=getattr(settings, 'MOOD_ANALYSIS_CACHE_DISTANCE', 4)
+                )
+    return _cache
+
+
+def cached_analysis(image_data, analyzer, include_breakdown=True, scope=None, cache=None):
+    """Run ``analyzer`` on a frame unless a near-identical frame in scope was analyzed recently.
+
+    Results are always computed and cached with the full breakdown, which is
+    dropped from the returned copy when ``include_breakdown`` is false.
+    Frames that cannot be decoded as images bypass the cache, and results
+    marked ``fallback`` (stand-ins for a failed analysis) are never stored.
+    """
+    if cache is None:
+        cache = get_emotion_cache()
+
+    try:
+        content, _ = decode_image_data(image_data)
+    except ValueError:
+        content = b''
+    image_hash = perceptual_hash(content) if content else None
+
+    result = cache.get(scope, image_hash) if image_hash is not None else None
+    if result is not None:
+        result['cached'] = True
+    else:
+        result = analyzer(image_data, True)
+        if image_hash is not None and not result.get('fallback'):
+            cache.set(scope, image_hash, result)
+
+    if not include_breakdown:
+        result = {**result, 'emotions': {}}
+    return result
@@ -0,0 +1,48 @@
+"""
+Management command to backfill and repair the daily MoodTrend rollups
+"""
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from mood.rollups import rebuild_mood_trends
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily mood rollups (MoodTrend) from raw mood entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Only rebuild rollups for this user id (can be repeated)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Only rebuild the last N days instead of the full history'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Number of users to process per batch'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['days']:
+            since = timezone.localdate() - timedelta(days=options['days'] - 1)
+
+        self.stdout.write('Rebuilding mood rollups...')
+
+        written, deleted = rebuild_mood_trends(
+            user_ids=options['user_ids'],
+            since=since,
+            batch_size=options['batch_size']
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Wrote {written} daily rollups, removed {deleted} stale rollups')
+        )
@@ -0,0 +1,71 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:14
+
+import base64
+
+from django.db import migrations, models
+
+from mood.blobs import decode_image_data, get_blob_store
+
+
+def move_images_to_blob_store(apps, schema_editor):
+    """Write inline base64 images to the blob store and keep only their digest"""
+    MoodEntry = apps.get_model('mood', 'MoodEntry')
+    store = get_blob_store()
+
+    entries = (
+        MoodEntry.objects
+        .exclude(image_data__isnull=True)
+        .exclude(image_data='')
+        .only('id', 'image_data')
+    )
+    for entry in entries.iterator(chunk_size=100):
+        try:
+            content, mime_type = decode_image_data(entry.image_data)
+        except ValueError:
+            # Undecodable payloads were never viewable, drop them
+            continue
+        MoodEntry.objects.filter(pk=entry.pk).update(
+            image_sha256=store.put(content),
+            image_mime_type=mime_type
+        )
+
+
+def restore_images_from_blob_store(apps, schema_editor):
+    """Inline blob store images back into image_data as data URLs"""
+    MoodEntry = apps.get_model('mood', 'MoodEntry')
+    store = get_blob_store()
+
+    entries = MoodEntry.objects.exclude(image_sha256__isnull=True).only('id', 'image_sha256', 'image_mime_type')
+    for entry in entries.iterator(chunk_size=100):
+        if not store.exists(entry.image_sha256):
+            continue
+        with store.open(entry.image_sha256) as blob:
+            encoded = base64.b64encode(blob.read()).decode('ascii')
+        MoodEntry.objects.filter(pk=entry.pk).update(
+            image_data=f"data:{entry.image_mime_type};base64,{encoded}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mood', '0002_alter_moodanalysissession_id_alter_moodentry_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moodentry',
+            name='image_mime_type',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='moodentry',
+            name='image_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(move_images_to_blob_store, restore_images_from_blob_store),
+        migrations.RemoveField(
+            model_name='moodentry',
+            name='image_data',
+        ),
+    ]
@@ -4,6 +4,8 @@ from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 import json
 
+from .blobs import decode_image_data, get_blob_store
+
 User = get_user_model()
 
 class MoodEntry(models.Model):
@@ -38,8 +40,9 @@ class MoodEntry(models.Model):
     # Optional user notes
     notes = models.TextField(blank=True, null=True)
     
-    # Optional image data (base64 encoded)
-    image_data = models.TextField(blank=True, null=True)
+    # Optional webcam image, stored in the blob store under its SHA-256 digest
+    image_sha256 = models.CharField(max_length=64, blank=True, null=True, db_index=True)
+    image_mime_type = models.CharField(max_length=50, blank=True)
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
@@ -71,6 +74,25 @@ class MoodEntry(models.Model):
         )
         
         return {emotion: round(value * 100, 1) for emotion, value in sorted_emotions}
+    
+    @property
+    def has_image(self):
+        return bool(self.image_sha256)
+    
+    def set_image(self, image_data):
+        """Store base64 image data in the blob store and keep only its digest"""
+        if not image_data:
+            self.image_sha256 = None
+            self.image_mime_type = ''
+            return
+        
+        content, mime_type = decode_image_data(image_data)
+        self.image_sha256 = get_blob_store().put(content)
+        self.image_mime_type = mime_type
+    
+    def open_image(self):
+        """Open the stored image for reading"""
+        return get_blob_store().open(self.image_sha256)
 
 
 class MoodAnalysisSession(models.Model):
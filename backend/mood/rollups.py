@@ -0,0 +1,133 @@
+"""
+Daily mood rollups
+
+Keeps one MoodTrend row per user and day in sync with the raw MoodEntry rows,
+so dashboards can read per-day aggregates instead of scanning every entry.
+"""
+
+from django.db.models import Count, Sum, F, Window
+from django.db.models.functions import TruncDate, RowNumber
+from django.utils import timezone
+
+from .models import MoodEntry, MoodTrend
+
+ROLLUP_FIELDS = ['dominant_emotion', 'average_confidence', 'total_entries', 'emotion_distribution', 'updated_at']
+
+
+def daily_emotion_rows(entries):
+    """Group mood entries by user, day and emotion in one query.
+
+    Each row carries the entry count and confidence sum for that emotion,
+    plus a ``rank`` that is 1 for the dominant emotion of the day.
+    """
+    return (
+        entries
+        .annotate(day=TruncDate('timestamp'))
+        .values('user_id', 'day', 'emotion')
+        .annotate(entry_count=Count('id'), confidence_sum=Sum('confidence'))
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=[F('user_id'), F('day')],
+            order_by=[F('entry_count').desc(), F('emotion').asc()]
+        ))
+        .order_by()
+    )
+
+
+def fold_daily_rows(rows):
+    """Fold per-emotion rows into one summary per (user_id, day)"""
+
+    summaries = {}
+    for row in rows:
+        summary = summaries.setdefault((row['user_id'], row['day']), {
+            'dominant_emotion': None,
+            'confidence_sum': 0.0,
+            'total_entries': 0,
+            'emotion_distribution': {}
+        })
+        summary['total_entries'] += row['entry_count']
+        summary['confidence_sum'] += row['confidence_sum'] or 0.0
+        summary['emotion_distribution'][row['emotion']] = row['entry_count']
+        if row['rank'] == 1:
+            summary['dominant_emotion'] = row['emotion']
+
+    for summary in summaries.values():
+        summary['average_confidence'] = summary.pop('confidence_sum') / summary['total_entries']
+
+    return summaries
+
+
+def upsert_mood_trends(summaries, batch_size=500):
+    """Insert or update MoodTrend rows from folded summaries"""
+
+    trends = [
+        MoodTrend(user_id=user_id, date=day, **summary)
+        for (user_id, day), summary in summaries.items()
+    ]
+    MoodTrend.objects.bulk_create(
+        trends,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=ROLLUP_FIELDS
+    )
+    return len(trends)
+
+
+def refresh_mood_trend(user_id, day):
+    """Recompute one user's rollup for one day from the raw entries"""
+
+    entries = MoodEntry.objects.filter(user_id=user_id, timestamp__date=day)
+    summaries = fold_daily_rows(daily_emotion_rows(entries))
+
+    if not summaries:
+        MoodTrend.objects.filter(user_id=user_id, date=day).delete()
+        return None
+
+    upsert_mood_trends(summaries)
+    return summaries[(user_id, day)]
+
+
+def rebuild_mood_trends(user_ids=None, since=None, batch_size=200):
+    """Backfill and repair rollups from history.
+
+    Works through users in batches, upserts every day that has entries and
+    removes rollup rows whose entries no longer exist. Returns a tuple of
+    (rows written, rows deleted).
+    """
+
+    entries = MoodEntry.objects.all()
+    trends = MoodTrend.objects.all()
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+        trends = trends.filter(user_id__in=user_ids)
+    if since is not None:
+        entries = entries.filter(timestamp__date__gte=since)
+        trends = trends.filter(date__gte=since)
+
+    user_ids = sorted(
+        set(entries.order_by().values_list('user_id', flat=True).distinct()) |
+        set(trends.order_by().values_list('user_id', flat=True).distinct())
+    )
+
+    written = 0
+    deleted = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        summaries = fold_daily_rows(daily_emotion_rows(entries.filter(user_id__in=batch)))
+        written += upsert_mood_trends(summaries)
+
+        stale_ids = [
+            trend_id
+            for trend_id, user_id, day in trends.filter(user_id__in=batch).values_list('id', 'user_id', 'date')
+            if (user_id, day) not in summaries
+        ]
+        if stale_ids:
+            deleted += MoodTrend.objects.filter(id__in=stale_ids).delete()[0]
+
+    return written, deleted
+
+
+def rollup_date(timestamp):
+    """Calendar day an entry timestamp is rolled up under"""
+    return timezone.localdate(timestamp)
@@ -1,27 +1,67 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.urls import reverse
 from .models import MoodEntry, MoodAnalysisSession, MoodTrend, MoodInsight
+from .blobs import decode_image_data
 import base64
 import json
 from datetime import datetime, timedelta
 
 User = get_user_model()
 
-class MoodEntrySerializer(serializers.ModelSerializer):
+class MoodEntryImageMixin:
+    """Shared handling of the write-only base64 image field"""
+    
+    def validate_image_data(self, value):
+        """Validate base64 image data"""
+        if value:
+            try:
+                decode_image_data(value)
+            except ValueError:
+                raise serializers.ValidationError("Invalid base64 image data")
+        
+        return value
+    
+    def get_image_url(self, obj):
+        """URL of the streaming image endpoint, if the entry has an image"""
+        if not obj.image_sha256:
+            return None
+        url = reverse('mood:mood-entry-image', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+    
+    def create(self, validated_data):
+        """Store the image in the blob store before the entry is saved"""
+        image_data = validated_data.pop('image_data', None)
+        entry = MoodEntry(**validated_data)
+        entry.set_image(image_data)
+        entry.save()
+        return entry
+    
+    def update(self, instance, validated_data):
+        if 'image_data' in validated_data:
+            instance.set_image(validated_data.pop('image_data'))
+        return super().update(instance, validated_data)
+
+
+class MoodEntrySerializer(MoodEntryImageMixin, serializers.ModelSerializer):
     """Serializer for mood entries"""
     
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     emotion_percentage = serializers.ReadOnlyField(source='get_emotion_percentage')
     emotions_breakdown_formatted = serializers.ReadOnlyField(source='get_emotions_breakdown_formatted')
+    image_data = serializers.CharField(write_only=True, required=False, allow_blank=True, allow_null=True)
+    image_url = serializers.SerializerMethodField()
     
     class Meta:
         model = MoodEntry
         fields = [
             'id', 'user', 'user_name', 'timestamp', 'emotion', 'confidence', 
             'emotion_percentage', 'emotions_breakdown', 'emotions_breakdown_formatted',
-            'notes', 'image_data', 'created_at', 'updated_at'
+            'notes', 'image_data', 'image_url', 'has_image', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'user', 'timestamp', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'user', 'timestamp', 'has_image', 'created_at', 'updated_at']
     
     def validate_emotions_breakdown(self, value):
         """Validate emotions breakdown structure"""
@@ -38,30 +78,20 @@ class MoodEntrySerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(f"Invalid value for {emotion}: must be between 0 and 1")
         
         return value
-    
-    def validate_image_data(self, value):
-        """Validate base64 image data"""
-        if value:
-            try:
-                # Check if it's valid base64
-                if value.startswith('data:image'):
-                    # Remove data URL prefix
-                    value = value.split(',')[1]
-                base64.b64decode(value)
-            except Exception:
-                raise serializers.ValidationError("Invalid base64 image data")
-        
-        return value
 
 
-class MoodEntryCreateSerializer(serializers.ModelSerializer):
+class MoodEntryCreateSerializer(MoodEntryImageMixin, serializers.ModelSerializer):
     """Serializer for creating mood entries"""
     
+    image_data = serializers.CharField(write_only=True, required=False, allow_blank=True, allow_null=True)
+    image_url = serializers.SerializerMethodField()
+    
     class Meta:
         model = MoodEntry
         fields = [
-            'emotion', 'confidence', 'emotions_breakdown', 'notes', 'image_data'
+            'id', 'emotion', 'confidence', 'emotions_breakdown', 'notes', 'image_data', 'image_url'
         ]
+        read_only_fields = ['id']
     
     def create(self, validated_data):
         """Create mood entry with current user"""
@@ -73,6 +103,7 @@ class EmotionAnalysisRequestSerializer(serializers.Serializer):
     """Serializer for emotion analysis requests"""
     
     image_data = serializers.CharField()
+    session_id = serializers.CharField(max_length=100, required=False)
     include_breakdown = serializers.BooleanField(default=True)
     analysis_method = serializers.ChoiceField(
         choices=['mock', 'azure', 'aws', 'google'],
@@ -92,6 +123,32 @@ class EmotionAnalysisRequestSerializer(serializers.Serializer):
         return value
 
 
+class BatchEmotionAnalysisRequestSerializer(serializers.Serializer):
+    """Serializer for batched emotion analysis requests"""
+    
+    frames = serializers.ListField(child=serializers.CharField(), min_length=1)
+    session_id = serializers.CharField(max_length=100, required=False)
+    include_breakdown = serializers.BooleanField(default=True)
+    analysis_method = serializers.ChoiceField(
+        choices=['mock', 'azure', 'aws', 'google'],
+        default='mock'
+    )
+    
+    def validate_frames(self, value):
+        """Validate the batch size and that each frame is base64 image data"""
+        max_batch = getattr(settings, 'MOOD_ANALYSIS_MAX_BATCH', 16)
+        if len(value) > max_batch:
+            raise serializers.ValidationError(f"At most {max_batch} frames can be analyzed per batch")
+        
+        for index, frame in enumerate(value):
+            try:
+                decode_image_data(frame)
+            except ValueError:
+                raise serializers.ValidationError(f"Invalid base64 image data in frame {index}")
+        
+        return value
+
+
 class EmotionAnalysisResponseSerializer(serializers.Serializer):
     """Serializer for emotion analysis responses"""
     
@@ -100,6 +157,7 @@ class EmotionAnalysisResponseSerializer(serializers.Serializer):
     emotions = serializers.DictField()
     processing_time = serializers.FloatField()
     analysis_method = serializers.CharField()
+    cached = serializers.BooleanField(default=False)
 
 
 class MoodStatsSerializer(serializers.Serializer):
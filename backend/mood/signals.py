@@ -0,0 +1,68 @@
+"""
+Signal handlers that keep the daily MoodTrend rollups and image blobs in sync with MoodEntry
+"""
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .blobs import get_blob_store
+from .models import MoodEntry
+from .rollups import refresh_mood_trend, rollup_date
+
+
+@receiver(pre_save, sender=MoodEntry)
+def remember_previous_state(sender, instance, raw=False, **kwargs):
+    """Remember the rollup day and image of an existing entry before it changes"""
+    instance._previous_rollup_key = None
+    instance._previous_image_sha256 = None
+    if instance.pk and not raw:
+        previous = MoodEntry.objects.filter(pk=instance.pk).values('user_id', 'timestamp', 'image_sha256').first()
+        if previous:
+            instance._previous_rollup_key = (previous['user_id'], rollup_date(previous['timestamp']))
+            instance._previous_image_sha256 = previous['image_sha256']
+
+
+@receiver(post_save, sender=MoodEntry)
+def update_mood_rollup(sender, instance, raw=False, **kwargs):
+    """Upsert the user's rollup for the day of a created or updated entry"""
+    if raw:
+        return
+
+    keys = {(instance.user_id, rollup_date(instance.timestamp))}
+    if instance._previous_rollup_key:
+        keys.add(instance._previous_rollup_key)
+
+    for user_id, day in keys:
+        refresh_mood_trend(user_id, day)
+
+
+@receiver(post_delete, sender=MoodEntry)
+def remove_mood_rollup_entry(sender, instance, **kwargs):
+    """Recompute the user's rollup for the day of a deleted entry"""
+    refresh_mood_trend(instance.user_id, rollup_date(instance.timestamp))
+
+
+def delete_image_if_orphaned(digest):
+    """Delete an image blob after commit once no entry references it"""
+    def delete_blob():
+        # Re-check after commit, another entry may have stored the same image
+        if not MoodEntry.objects.filter(image_sha256=digest).exists():
+            get_blob_store().delete(digest)
+
+    if digest:
+        transaction.on_commit(delete_blob)
+
+
+@receiver(post_save, sender=MoodEntry)
+def remove_replaced_image(sender, instance, raw=False, **kwargs):
+    """Clean up the previous image blob when an entry's image is replaced"""
+    previous_digest = getattr(instance, '_previous_image_sha256', None)
+    if not raw and previous_digest and previous_digest != instance.image_sha256:
+        delete_image_if_orphaned(previous_digest)
+
+
+@receiver(post_delete, sender=MoodEntry)
+def remove_orphaned_image(sender, instance, **kwargs):
+    """Delete the entry's image blob once no other entry references it"""
+    delete_image_if_orphaned(instance.image_sha256)
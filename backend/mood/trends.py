@@ -0,0 +1,227 @@
+"""
+Read side of the daily mood rollups
+
+Builds trend series and summary statistics from MoodTrend rows, so the cost
+of a dashboard depends on the number of days rather than the number of entries.
+"""
+
+from django.db.models import Count, Sum, F, Q, Case, When, Value, CharField, FloatField, Window
+from django.db.models.functions import Coalesce, NullIf, RowNumber
+from django.utils import timezone
+from datetime import timedelta
+
+from .models import MoodEntry, MoodTrend
+
+ROLLUP_VALUES = ['user_id', 'date', 'dominant_emotion', 'average_confidence', 'total_entries', 'emotion_distribution']
+
+
+def get_user_rollups(user, since=None):
+    """Daily rollup rows for a user, oldest first"""
+
+    rollups = MoodTrend.objects.filter(user=user)
+    if since is not None:
+        rollups = rollups.filter(date__gte=since)
+    return list(rollups.order_by('date').values(*ROLLUP_VALUES))
+
+
+def rollups_since(rollups, since):
+    """Rollup rows on or after ``since``"""
+    return [rollup for rollup in rollups if rollup['date'] >= since]
+
+
+def summarize_rollups(rollups):
+    """Combine daily rollups into totals for the whole span"""
+
+    total_entries = 0
+    confidence_sum = 0.0
+    emotion_counts = {}
+
+    for rollup in rollups:
+        total_entries += rollup['total_entries']
+        confidence_sum += rollup['average_confidence'] * rollup['total_entries']
+        for emotion, count in rollup['emotion_distribution'].items():
+            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + count
+
+    dominant_emotion = None
+    if emotion_counts:
+        dominant_emotion = max(sorted(emotion_counts), key=emotion_counts.get)
+
+    return {
+        'total_entries': total_entries,
+        'average_confidence': confidence_sum / total_entries if total_entries else None,
+        'emotion_counts': emotion_counts,
+        'dominant_emotion': dominant_emotion
+    }
+
+
+def classify_trend(recent_avg, older_avg):
+    """Compare two average confidences and name the direction"""
+
+    if recent_avg > older_avg + 0.1:
+        return 'improving'
+    elif recent_avg < older_avg - 0.1:
+        return 'declining'
+    return 'stable'
+
+
+def weekly_mood_trend(rollups, today=None):
+    """Compare the recent half of the last week against the older half"""
+
+    today = today or timezone.localdate()
+    week = rollups_since(rollups, today - timedelta(days=6))
+
+    if sum(rollup['total_entries'] for rollup in week) < 2:
+        return 'stable'
+
+    split_date = today - timedelta(days=3)
+    recent = summarize_rollups([rollup for rollup in week if rollup['date'] >= split_date])
+    older = summarize_rollups([rollup for rollup in week if rollup['date'] < split_date])
+
+    return classify_trend(recent['average_confidence'] or 0, older['average_confidence'] or 0)
+
+
+def build_trend_data(user, days, rollups=None):
+    """Build the day-by-day mood trend for the last ``days`` days.
+
+    Pass already-loaded ``rollups`` to avoid querying them again.
+    """
+
+    end_date = timezone.localdate()
+    start_date = end_date - timedelta(days=days-1)
+
+    if rollups is None:
+        rollups = get_user_rollups(user, since=start_date)
+    daily = {rollup['date']: rollup for rollup in rollups_since(rollups, start_date)}
+
+    # Fill the days without entries so the series is continuous
+    trend_data = []
+    current_date = start_date
+
+    while current_date <= end_date:
+        day = daily.get(current_date)
+
+        if day:
+            avg_confidence = day['average_confidence']
+            dominant_emotion = day['dominant_emotion']
+            entry_count = day['total_entries']
+        else:
+            avg_confidence = None
+            dominant_emotion = None
+            entry_count = 0
+
+        trend_data.append({
+            'date': current_date.isoformat(),
+            'average_confidence': round(avg_confidence, 3) if avg_confidence else None,
+            'dominant_emotion': dominant_emotion,
+            'entry_count': entry_count
+        })
+
+        current_date += timedelta(days=1)
+
+    return trend_data
+
+
+def _weighted_confidence_sum(since, until=None):
+    """Sum of confidence over the rollups in a date window, weighted by entries"""
+    window = Q(camera_mood_trends__date__gte=since)
+    if until is not None:
+        window &= Q(camera_mood_trends__date__lt=until)
+    return Sum(
+        F('camera_mood_trends__average_confidence') * F('camera_mood_trends__total_entries'),
+        filter=window,
+        output_field=FloatField()
+    )
+
+
+def _window_entries(since, until=None):
+    """Number of entries in the rollups of a date window"""
+    window = Q(camera_mood_trends__date__gte=since)
+    if until is not None:
+        window &= Q(camera_mood_trends__date__lt=until)
+    return Sum('camera_mood_trends__total_entries', filter=window)
+
+
+def annotate_mood_profiles(users, today=None):
+    """Annotate users with their mood totals and week-over-week trend.
+
+    Everything comes from the daily rollups in one grouped query, and the
+    trend is computed in the database so it can be filtered on.
+    """
+    today = today or timezone.localdate()
+    week_start = today - timedelta(days=6)
+    prev_week_start = today - timedelta(days=13)
+
+    return (
+        users
+        .annotate(
+            total_sessions=Sum('camera_mood_trends__total_entries'),
+            week_entries=_window_entries(week_start),
+            week_confidence=_weighted_confidence_sum(week_start),
+            prev_week_entries=_window_entries(prev_week_start, week_start),
+            prev_week_confidence=_weighted_confidence_sum(prev_week_start, week_start),
+        )
+        .filter(total_sessions__gt=0)
+        .annotate(
+            week_average=Coalesce(F('week_confidence') / NullIf(F('week_entries'), 0), 0.0, output_field=FloatField()),
+            prev_week_average=Coalesce(F('prev_week_confidence') / NullIf(F('prev_week_entries'), 0), 0.0, output_field=FloatField()),
+        )
+        .annotate(
+            mood_trend=Case(
+                When(week_average__gt=F('prev_week_average') + 0.1, then=Value('improving')),
+                When(week_average__lt=F('prev_week_average') - 0.1, then=Value('declining')),
+                default=Value('stable'),
+                output_field=CharField()
+            )
+        )
+    )
+
+
+def get_latest_entries(user_ids):
+    """Latest mood entry per user, in one query"""
+
+    rows = (
+        MoodEntry.objects
+        .filter(user_id__in=user_ids)
+        .annotate(rank=Window(RowNumber(), partition_by=[F('user_id')], order_by=F('timestamp').desc()))
+        .filter(rank=1)
+        .values('user_id', 'emotion', 'confidence', 'timestamp')
+    )
+    return {row['user_id']: row for row in rows}
+
+
+def get_dominant_emotions(user_ids):
+    """Most common emotion per user over their whole history, in one query"""
+
+    rows = (
+        MoodEntry.objects
+        .filter(user_id__in=user_ids)
+        .values('user_id', 'emotion')
+        .annotate(entry_count=Count('id'))
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=[F('user_id')],
+            order_by=[F('entry_count').desc(), F('emotion').asc()]
+        ))
+        .filter(rank=1)
+        .order_by()
+    )
+    return {row['user_id']: row['emotion'] for row in rows}
+
+
+def get_mood_histories(user_ids, since, limit):
+    """Most recent daily rollups per user since a date, capped at ``limit`` points"""
+
+    rows = (
+        MoodTrend.objects
+        .filter(user_id__in=user_ids, date__gte=since)
+        .annotate(rank=Window(RowNumber(), partition_by=[F('user_id')], order_by=F('date').desc()))
+        .filter(rank__lte=limit)
+        .values('user_id', 'date', 'dominant_emotion', 'average_confidence')
+    )
+
+    histories = {}
+    for row in rows:
+        histories.setdefault(row['user_id'], []).append(row)
+    for history in histories.values():
+        history.sort(key=lambda row: row['date'])
+    return histories
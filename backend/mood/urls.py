@@ -7,9 +7,11 @@ urlpatterns = [
     # Mood entries
     path('entries/', views.MoodEntryListCreateView.as_view(), name='mood-entries'),
     path('entries/<int:pk>/', views.MoodEntryDetailView.as_view(), name='mood-entry-detail'),
+    path('entries/<int:pk>/image/', views.mood_entry_image, name='mood-entry-image'),
     
     # Emotion analysis
     path('analyze/', views.analyze_emotion, name='analyze-emotion'),
+    path('analyze/batch/', views.analyze_emotion_batch, name='analyze-emotion-batch'),
     
     # Statistics and analytics
     path('stats/', views.mood_stats, name='mood-stats'),
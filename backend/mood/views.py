@@ -1,15 +1,19 @@
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import PageNumberPagination, CursorPagination
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, Avg, Q, F
+from django.db.models.functions import Coalesce
+from django.http import FileResponse, HttpResponseNotModified
 from django.utils import timezone
 from datetime import datetime, timedelta
+from functools import partial
 import json
 import time
 import random
 import base64
+import uuid
 try:
     from PIL import Image
 except ImportError:
@@ -21,10 +25,18 @@ User = get_user_model()
 from .models import MoodEntry, MoodAnalysisSession, MoodTrend, MoodInsight
 from .serializers import (
     MoodEntrySerializer, MoodEntryCreateSerializer, EmotionAnalysisRequestSerializer,
-    EmotionAnalysisResponseSerializer, MoodStatsSerializer, MoodTrendSerializer,
+    EmotionAnalysisResponseSerializer, BatchEmotionAnalysisRequestSerializer, MoodStatsSerializer, MoodTrendSerializer,
     MoodAnalysisSessionSerializer, MoodInsightSerializer, MoodHistorySerializer,
     MoodDashboardSerializer
 )
+from wellness.streaks import get_current_streak
+from .analysis import analyze_frames, get_http_session
+from .emotion_cache import cached_analysis
+from .trends import (
+    build_trend_data, get_user_rollups, rollups_since, summarize_rollups,
+    weekly_mood_trend, annotate_mood_profiles, get_latest_entries,
+    get_dominant_emotions, get_mood_histories
+)
 
 
 class MoodEntryPagination(PageNumberPagination):
@@ -80,6 +92,33 @@ class MoodEntryDetailView(generics.RetrieveUpdateDestroyAPIView):
         return MoodEntry.objects.filter(user=self.request.user)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def mood_entry_image(request, pk):
+    """Stream the stored image of a mood entry from the blob store"""
+    
+    entries = MoodEntry.objects.all() if request.user.is_staff else MoodEntry.objects.filter(user=request.user)
+    entry = entries.filter(pk=pk).only('id', 'image_sha256', 'image_mime_type').first()
+    
+    if not entry or not entry.image_sha256:
+        return Response({'error': 'Image not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    # Blobs are immutable, so the digest is a strong validator
+    etag = f'"{entry.image_sha256}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        try:
+            image = entry.open_image()
+        except FileNotFoundError:
+            return Response({'error': 'Image not found'}, status=status.HTTP_404_NOT_FOUND)
+        response = FileResponse(image, content_type=entry.image_mime_type or 'application/octet-stream')
+    
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def analyze_emotion(request):
@@ -92,16 +131,17 @@ def analyze_emotion(request):
     image_data = serializer.validated_data['image_data']
     include_breakdown = serializer.validated_data['include_breakdown']
     analysis_method = serializer.validated_data['analysis_method']
+    cache_scope = analysis_cache_scope(request.user, serializer.validated_data.get('session_id'))
     
     start_time = time.time()
     
     try:
         # Use real Azure emotion analysis (with fallback to mock)
         if analysis_method == 'azure':
-            analysis_result = perform_azure_emotion_analysis(image_data, include_breakdown)
+            analysis_result = perform_azure_emotion_analysis(image_data, include_breakdown, cache_scope)
         else:
             # Default to Azure, fallback to mock if credentials not available
-            analysis_result = perform_azure_emotion_analysis(image_data, include_breakdown)
+            analysis_result = perform_azure_emotion_analysis(image_data, include_breakdown, cache_scope)
         
         processing_time = time.time() - start_time
         analysis_result['processing_time'] = processing_time
@@ -120,9 +160,66 @@ def analyze_emotion(request):
         )
 
 
-def perform_azure_emotion_analysis(image_data, include_breakdown=True):
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def analyze_emotion_batch(request):
+    """Analyze a batch of frames for one analysis session"""
+    
+    serializer = BatchEmotionAnalysisRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    frames = serializer.validated_data['frames']
+    include_breakdown = serializer.validated_data['include_breakdown']
+    analysis_method = serializer.validated_data['analysis_method']
+    session_id = serializer.validated_data.get('session_id') or uuid.uuid4().hex
+    
+    session, created = MoodAnalysisSession.objects.get_or_create(
+        session_id=session_id,
+        defaults={'user': request.user, 'analysis_method': analysis_method}
+    )
+    if session.user_id != request.user.id:
+        return Response({'error': 'Session not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    start_time = time.time()
+    analyzer = partial(perform_azure_emotion_analysis, cache_scope=analysis_cache_scope(request.user, session_id))
+    results = analyze_frames(frames, analyzer, include_breakdown)
+    processing_time = time.time() - start_time
+    
+    for result in results:
+        if result['status'] == 'success':
+            result['analysis_method'] = analysis_method
+    successful = sum(1 for result in results if result['status'] == 'success')
+    
+    # Accumulate session statistics atomically, batches may arrive concurrently
+    MoodAnalysisSession.objects.filter(pk=session.pk).update(
+        total_captures=F('total_captures') + len(frames),
+        successful_analyses=F('successful_analyses') + successful,
+        processing_time=Coalesce(F('processing_time'), 0.0) + processing_time,
+        analysis_method=analysis_method
+    )
+    session.refresh_from_db()
+    
+    return Response({
+        'session': MoodAnalysisSessionSerializer(session).data,
+        'processing_time': processing_time,
+        'successful_analyses': successful,
+        'results': results
+    }, status=status.HTTP_200_OK)
+
+
+def analysis_cache_scope(user, session_id=None):
+    """Cache scope for a user's frames, narrowed to one session when given"""
+    return f"{user.pk}:{session_id or ''}"
+
+
+def perform_azure_emotion_analysis(image_data, include_breakdown=True, cache_scope=None):
+    """Emotion analysis that reuses results for near-identical recent frames"""
+    return cached_analysis(image_data, request_azure_emotion_analysis, include_breakdown, scope=cache_scope)
+
+
+def request_azure_emotion_analysis(image_data, include_breakdown=True):
     """Real emotion analysis using Azure Cognitive Services"""
-    import requests
     import os
     from django.conf import settings
     
@@ -132,7 +229,7 @@ def perform_azure_emotion_analysis(image_data, include_breakdown=True):
     
     if not AZURE_FACE_KEY or not AZURE_FACE_ENDPOINT:
         print("Azure credentials not found, falling back to mock analysis")
-        return perform_mock_emotion_analysis(image_data, include_breakdown)
+        return fallback_emotion_analysis(image_data, include_breakdown)
     
     try:
         # Convert base64 to binary
@@ -155,8 +252,8 @@ def perform_azure_emotion_analysis(image_data, include_breakdown=True):
             'recognitionModel': 'recognition_04'
         }
         
-        # Make API request
-        response = requests.post(face_api_url, headers=headers, params=params, data=image_binary, timeout=10)
+        # Make API request over the shared connection pool
+        response = get_http_session().post(face_api_url, headers=headers, params=params, data=image_binary, timeout=10)
         
         if response.status_code == 200:
             faces = response.json()
@@ -200,22 +297,27 @@ def perform_azure_emotion_analysis(image_data, include_breakdown=True):
                 }
             else:
                 print("No faces detected in image")
-                return perform_mock_emotion_analysis(image_data, include_breakdown)
+                return fallback_emotion_analysis(image_data, include_breakdown)
                 
         else:
             print(f"Azure API error: {response.status_code} - {response.text}")
-            return perform_mock_emotion_analysis(image_data, include_breakdown)
+            return fallback_emotion_analysis(image_data, include_breakdown)
             
     except Exception as e:
         print(f"Error calling Azure Face API: {str(e)}")
-        return perform_mock_emotion_analysis(image_data, include_breakdown)
+        return fallback_emotion_analysis(image_data, include_breakdown)
 
 
-def perform_mock_emotion_analysis(image_data, include_breakdown=True):
+def fallback_emotion_analysis(image_data, include_breakdown=True):
+    """Mock analysis standing in for a failed Azure call, tagged so it is never cached"""
+    return {**perform_mock_emotion_analysis(image_data, include_breakdown), 'fallback': True}
+
+
+def perform_mock_emotion_analysis(image_data, include_breakdown=True, latency=None):
     """Fallback mock emotion analysis"""
     
     # Simulate processing time
-    time.sleep(random.uniform(0.5, 1.5))
+    time.sleep(random.uniform(0.5, 1.5) if latency is None else latency)
     
     # Mock emotions with realistic distributions
     emotions = ['happy', 'sad', 'neutral', 'surprised', 'angry', 'fear', 'disgust']
@@ -264,63 +366,38 @@ def mood_stats(request):
     """Get mood statistics for current user"""
     
     user = request.user
-    now = timezone.now()
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
+    today = timezone.localdate()
     
-    # Get all entries for user
-    all_entries = MoodEntry.objects.filter(user=user)
-    week_entries = all_entries.filter(timestamp__gte=week_ago)
-    month_entries = all_entries.filter(timestamp__gte=month_ago)
+    # Daily rollups for the user, one row per day with entries
+    rollups = get_user_rollups(user)
+    all_summary = summarize_rollups(rollups)
     
     # Basic stats
-    total_entries = all_entries.count()
-    entries_this_week = week_entries.count()
-    entries_this_month = month_entries.count()
+    total_entries = all_summary['total_entries']
+    entries_this_week = summarize_rollups(rollups_since(rollups, today - timedelta(days=6)))['total_entries']
+    entries_this_month = summarize_rollups(rollups_since(rollups, today - timedelta(days=29)))['total_entries']
     
     # Most common emotion
-    most_common = all_entries.values('emotion').annotate(
-        count=Count('emotion')
-    ).order_by('-count').first()
-    
-    most_common_emotion = most_common['emotion'] if most_common else 'neutral'
+    most_common_emotion = all_summary['dominant_emotion'] or 'neutral'
     
     # Average confidence
-    avg_confidence = all_entries.aggregate(
-        avg=Avg('confidence')
-    )['avg'] or 0.0
+    avg_confidence = all_summary['average_confidence'] or 0.0
     
     # Emotion distribution
-    emotion_dist = {}
-    emotion_counts = all_entries.values('emotion').annotate(count=Count('emotion'))
-    total_for_dist = sum(item['count'] for item in emotion_counts)
-    
-    for item in emotion_counts:
-        emotion_dist[item['emotion']] = round(item['count'] / total_for_dist * 100, 1) if total_for_dist > 0 else 0
+    emotion_dist = {
+        emotion: round(count / total_entries * 100, 1)
+        for emotion, count in all_summary['emotion_counts'].items()
+    } if total_entries else {}
     
     # Calculate mood trend
-    if week_entries.count() >= 2:
-        recent_half = week_entries.filter(timestamp__gte=now - timedelta(days=3.5))
-        older_half = week_entries.filter(timestamp__lt=now - timedelta(days=3.5))
-        
-        recent_avg = recent_half.aggregate(avg=Avg('confidence'))['avg'] or 0
-        older_avg = older_half.aggregate(avg=Avg('confidence'))['avg'] or 0
-        
-        if recent_avg > older_avg + 0.1:
-            mood_trend = 'improving'
-        elif recent_avg < older_avg - 0.1:
-            mood_trend = 'declining'
-        else:
-            mood_trend = 'stable'
-    else:
-        mood_trend = 'stable'
+    mood_trend = weekly_mood_trend(rollups, today)
     
     # Calculate streak
     streak_days = calculate_mood_streak(user)
     
     # Weekly and monthly trends
-    weekly_trend = get_mood_trend_data(user, 7)
-    monthly_trend = get_mood_trend_data(user, 30)
+    weekly_trend = build_trend_data(user, 7, rollups)
+    monthly_trend = build_trend_data(user, 30, rollups)
     
     stats_data = {
         'total_entries': total_entries,
@@ -345,64 +422,13 @@ def mood_stats(request):
 def calculate_mood_streak(user):
     """Calculate consecutive days with mood entries"""
     
-    today = timezone.now().date()
-    streak = 0
-    current_date = today
-    
-    while True:
-        # Check if user has entry for current_date
-        has_entry = MoodEntry.objects.filter(
-            user=user,
-            timestamp__date=current_date
-        ).exists()
-        
-        if has_entry:
-            streak += 1
-            current_date -= timedelta(days=1)
-        else:
-            break
-        
-        # Prevent infinite loop
-        if streak > 365:
-            break
-    
-    return streak
+    return get_current_streak(user, 'mood')
 
 
 def get_mood_trend_data(user, days):
     """Get mood trend data for specified number of days"""
     
-    end_date = timezone.now().date()
-    start_date = end_date - timedelta(days=days-1)
-    
-    trend_data = []
-    current_date = start_date
-    
-    while current_date <= end_date:
-        day_entries = MoodEntry.objects.filter(
-            user=user,
-            timestamp__date=current_date
-        )
-        
-        if day_entries.exists():
-            avg_confidence = day_entries.aggregate(avg=Avg('confidence'))['avg']
-            dominant_emotion = day_entries.values('emotion').annotate(
-                count=Count('emotion')
-            ).order_by('-count').first()['emotion']
-        else:
-            avg_confidence = None
-            dominant_emotion = None
-        
-        trend_data.append({
-            'date': current_date.isoformat(),
-            'average_confidence': round(avg_confidence, 3) if avg_confidence else None,
-            'dominant_emotion': dominant_emotion,
-            'entry_count': day_entries.count()
-        })
-        
-        current_date += timedelta(days=1)
-    
-    return trend_data
+    return build_trend_data(user, days)
 
 
 @api_view(['GET'])
@@ -424,60 +450,63 @@ def mood_trends(request):
     return Response(trend_data, status=status.HTTP_200_OK)
 
 
+class AdminMoodDashboardPagination(CursorPagination):
+    """Cursor pagination over users for the admin mood dashboard"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = 'id'
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAdminUser])
 def admin_mood_dashboard(request):
     """Get admin mood dashboard with all users data"""
     
     now = timezone.now()
-    today = now.date()
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
+    today = timezone.localdate()
+    month_start = today - timedelta(days=29)
+    
+    trend_filter = request.query_params.get('trend')
+    if trend_filter and trend_filter not in ('improving', 'declining', 'stable'):
+        return Response(
+            {'error': "trend must be one of 'improving', 'declining' or 'stable'"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        history_points = int(request.query_params.get('history_points', 30))
+    except ValueError:
+        return Response({'error': 'history_points must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    history_points = max(0, min(history_points, 30))
+    
+    # Per-user totals and trends from the daily rollups in one grouped query
+    users_with_moods = annotate_mood_profiles(User.objects.all(), today)
+    if trend_filter:
+        users_with_moods = users_with_moods.filter(mood_trend=trend_filter)
+    
+    paginator = AdminMoodDashboardPagination()
+    users = paginator.paginate_queryset(users_with_moods, request)
+    user_ids = [user.id for user in users]
     
-    # Get all users with mood entries
-    users_with_moods = User.objects.filter(camera_mood_entries__isnull=False).distinct()
+    # Page-level lookups, one query each regardless of page size
+    latest_entries = get_latest_entries(user_ids)
+    dominant_emotions = get_dominant_emotions(user_ids)
+    histories = get_mood_histories(user_ids, month_start, history_points) if history_points else {}
     
     user_profiles = []
-    for user in users_with_moods:
-        # Get user's mood entries
-        all_entries = MoodEntry.objects.filter(user=user)
-        recent_entries = all_entries.filter(timestamp__gte=month_ago)
+    for user in users:
+        latest_entry = latest_entries.get(user.id)
         
-        if not all_entries.exists():
-            continue
-            
-        # Latest mood
-        latest_entry = all_entries.first()
-        
-        # Calculate mood trend
-        week_entries = all_entries.filter(timestamp__gte=week_ago)
-        prev_week_entries = all_entries.filter(
-            timestamp__gte=now - timedelta(days=14),
-            timestamp__lt=week_ago
-        )
-        
-        current_avg = week_entries.aggregate(avg_conf=Avg('confidence'))['avg_conf'] or 0
-        prev_avg = prev_week_entries.aggregate(avg_conf=Avg('confidence'))['avg_conf'] or 0
-        
-        if current_avg > prev_avg + 0.1:
-            trend = 'improving'
-        elif current_avg < prev_avg - 0.1:
-            trend = 'declining'
-        else:
-            trend = 'stable'
-        
-        # Mood history for last 30 days
-        mood_history = []
-        for entry in recent_entries.order_by('timestamp'):
-            mood_history.append({
-                'emotion': entry.emotion,
-                'confidence': entry.confidence,
-                'timestamp': int(entry.timestamp.timestamp() * 1000)
-            })
-        
-        # Calculate average mood
-        emotion_counts = all_entries.values('emotion').annotate(count=Count('emotion')).order_by('-count')
-        avg_mood = emotion_counts.first()['emotion'] if emotion_counts else 'neutral'
+        # Daily mood history for last 30 days
+        mood_history = [
+            {
+                'emotion': rollup['dominant_emotion'],
+                'confidence': rollup['average_confidence'],
+                'timestamp': rollup_timestamp_ms(rollup['date'])
+            }
+            for rollup in histories.get(user.id, [])
+        ]
         
         user_profiles.append({
             'id': str(user.id),
@@ -485,17 +514,23 @@ def admin_mood_dashboard(request):
             'email': user.email,
             'lastActive': user.last_login.isoformat() if user.last_login else now.isoformat(),
             'currentMood': {
-                'emotion': latest_entry.emotion,
-                'confidence': latest_entry.confidence,
-                'timestamp': int(latest_entry.timestamp.timestamp() * 1000)
+                'emotion': latest_entry['emotion'],
+                'confidence': latest_entry['confidence'],
+                'timestamp': int(latest_entry['timestamp'].timestamp() * 1000)
             } if latest_entry else None,
             'moodHistory': mood_history,
-            'totalSessions': all_entries.count(),
-            'averageMood': avg_mood,
-            'moodTrend': trend
+            'totalSessions': user.total_sessions,
+            'averageMood': dominant_emotions.get(user.id, 'neutral'),
+            'moodTrend': user.mood_trend
         })
     
-    return Response(user_profiles, status=status.HTTP_200_OK)
+    return paginator.get_paginated_response(user_profiles)
+
+
+def rollup_timestamp_ms(day):
+    """Midnight of a rollup day as a millisecond epoch timestamp"""
+    midnight = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    return int(midnight.timestamp() * 1000)
 
 
 @api_view(['GET'])
@@ -504,18 +539,18 @@ def mood_dashboard(request):
     """Get comprehensive mood dashboard data"""
     
     user = request.user
-    now = timezone.now()
-    today = now.date()
-    week_ago = now - timedelta(days=7)
+    today = timezone.localdate()
+    
+    # Daily rollups for the user
+    rollups = get_user_rollups(user)
+    week_rollups = rollups_since(rollups, today - timedelta(days=6))
+    week_summary = summarize_rollups(week_rollups)
     
     # Basic stats
     all_entries = MoodEntry.objects.filter(user=user)
-    today_entries = all_entries.filter(timestamp__date=today)
-    week_entries = all_entries.filter(timestamp__gte=week_ago)
-    
-    total_entries = all_entries.count()
-    entries_today = today_entries.count()
-    entries_this_week = week_entries.count()
+    total_entries = summarize_rollups(rollups)['total_entries']
+    entries_today = summarize_rollups(rollups_since(rollups, today))['total_entries']
+    entries_this_week = week_summary['total_entries']
     
     # Latest entry
     latest_entry = all_entries.first()
@@ -524,33 +559,13 @@ def mood_dashboard(request):
     current_streak = calculate_mood_streak(user)
     
     # Weekly trends
-    if week_entries.count() >= 2:
-        recent_half = week_entries.filter(timestamp__gte=now - timedelta(days=3.5))
-        older_half = week_entries.filter(timestamp__lt=now - timedelta(days=3.5))
-        
-        recent_avg = recent_half.aggregate(avg=Avg('confidence'))['avg'] or 0
-        older_avg = older_half.aggregate(avg=Avg('confidence'))['avg'] or 0
-        
-        if recent_avg > older_avg + 0.1:
-            mood_trend = 'improving'
-        elif recent_avg < older_avg - 0.1:
-            mood_trend = 'declining'
-        else:
-            mood_trend = 'stable'
-    else:
-        mood_trend = 'stable'
+    mood_trend = weekly_mood_trend(rollups, today)
     
     # Dominant emotion this week
-    week_emotion = week_entries.values('emotion').annotate(
-        count=Count('emotion')
-    ).order_by('-count').first()
-    
-    dominant_emotion_week = week_emotion['emotion'] if week_emotion else None
+    dominant_emotion_week = week_summary['dominant_emotion']
     
     # Average confidence this week
-    average_confidence_week = week_entries.aggregate(
-        avg=Avg('confidence')
-    )['avg']
+    average_confidence_week = week_summary['average_confidence']
     
     # Recent entries (last 5)
     recent_entries = all_entries[:5]
@@ -583,11 +598,10 @@ def mood_dashboard(request):
         'latest_insight': latest_insight
     }
     
-    serializer = MoodDashboardSerializer(data=dashboard_data)
-    if serializer.is_valid():
-        return Response(serializer.data, status=status.HTTP_200_OK)
-    else:
-        return Response(serializer.errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    # Recent entries and the latest insight are model instances, so serialize
+    # the payload directly instead of validating it as input
+    serializer = MoodDashboardSerializer(dashboard_data)
+    return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class MoodInsightListView(generics.ListAPIView):
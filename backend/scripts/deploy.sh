@@ -45,4 +45,10 @@ echo "✅ Deployment script completed successfully!"
 echo "🚀 Starting Gunicorn server..."
 PORT=${PORT:-10000}
 echo "📡 Binding to port: $PORT"
-exec gunicorn backend.wsgi:application --bind 0.0.0.0:$PORT --workers 3 --timeout 120 --keep-alive 2 --max-requests 1000 --max-requests-jitter 100
+# Chat events only reach sockets in other workers through the Redis broker
+WORKERS=3
+if [ -z "$CHAT_BROKER_URL" ]; then
+    echo "⚠️  CHAT_BROKER_URL is not set: running a single worker"
+    WORKERS=1
+fi
+exec gunicorn backend.asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT --workers $WORKERS --timeout 120 --keep-alive 2 --max-requests 1000 --max-requests-jitter 100
@@ -0,0 +1,130 @@
+"""
+Load tests for the admin mood dashboard
+Seeds thousands of users and checks the query count stays constant as the user base grows
+"""
+
+from datetime import timedelta
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from mood.models import MoodEntry, MoodTrend
+
+User = get_user_model()
+
+TRENDS = {
+    'improving': (0.8, 0.5),
+    'declining': (0.4, 0.7),
+    'stable': (0.6, 0.6),
+}
+
+
+def seed_mood_users(count, start=0):
+    """Bulk-create users with a latest entry and two weeks of daily rollups"""
+    today = timezone.localdate()
+    users = User.objects.bulk_create([
+        User(email=f'mood{index}@example.com', username=f'mood{index}', password='!')
+        for index in range(start, start + count)
+    ])
+
+    entries = []
+    trends = []
+    for index, user in enumerate(users, start=start):
+        trend = list(TRENDS)[index % 3]
+        week_conf, prev_week_conf = TRENDS[trend]
+        entries.append(MoodEntry(user=user, emotion='happy', confidence=week_conf, emotions_breakdown={}))
+        for offset, confidence in ((0, week_conf), (2, week_conf), (5, week_conf), (9, prev_week_conf), (12, prev_week_conf)):
+            trends.append(MoodTrend(
+                user=user,
+                date=today - timedelta(days=offset),
+                dominant_emotion='happy',
+                average_confidence=confidence,
+                total_entries=2,
+                emotion_distribution={'happy': 2}
+            ))
+
+    MoodEntry.objects.bulk_create(entries, batch_size=2000)
+    MoodTrend.objects.bulk_create(trends, batch_size=2000)
+    return users
+
+
+class AdminMoodDashboardLoadTest(TestCase):
+    """Test the bulk admin mood dashboard"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            username='moodadmin',
+            password='testpass123',
+            is_staff=True,
+            is_active=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def get_dashboard(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/mood/admin/dashboard/', params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_query_count_constant_as_users_grow(self):
+        """100 users and 10k users cost the same number of queries"""
+        seed_mood_users(100)
+        small_queries, small_page = self.get_dashboard(page_size=100)
+
+        seed_mood_users(9900, start=100)
+        large_queries, large_page = self.get_dashboard(page_size=100)
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertLessEqual(large_queries, 5)
+        self.assertEqual(len(large_page['results']), 100)
+        self.assertIsNotNone(large_page['next'])
+
+    def test_trend_filter_and_profile_fields(self):
+        """Filtering by trend happens in the database"""
+        seed_mood_users(30)
+
+        for trend in TRENDS:
+            _, page = self.get_dashboard(trend=trend)
+            self.assertEqual(len(page['results']), 10)
+            for profile in page['results']:
+                self.assertEqual(profile['moodTrend'], trend)
+                self.assertEqual(profile['totalSessions'], 10)
+                self.assertEqual(profile['averageMood'], 'happy')
+                self.assertEqual(profile['currentMood']['emotion'], 'happy')
+
+        response = self.client.get('/api/mood/admin/dashboard/', {'trend': 'sideways'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_history_points_cap(self):
+        """history_points keeps only the most recent daily points"""
+        seed_mood_users(3)
+
+        _, page = self.get_dashboard(history_points=2)
+        for profile in page['results']:
+            history = profile['moodHistory']
+            self.assertEqual(len(history), 2)
+            self.assertLess(history[0]['timestamp'], history[1]['timestamp'])
+
+        _, page = self.get_dashboard()
+        self.assertEqual(len(page['results'][0]['moodHistory']), 5)
+
+    def test_cursor_walks_every_user_once(self):
+        """Following next cursors visits every user exactly once"""
+        seed_mood_users(25)
+
+        seen = []
+        url = '/api/mood/admin/dashboard/?page_size=10'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            seen.extend(profile['id'] for profile in data['results'])
+            url = data['next']
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
@@ -0,0 +1,127 @@
+"""
+Tests for the alert scheduler
+Checks opt-in startup, single-leader election, windowed rule evaluation and asynchronous notifications
+"""
+
+import threading
+from unittest.mock import patch
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from backend.alerting import AlertManager, AlertScheduler, MetricsCollector, alert_scheduler
+
+NOW = 1700000000.0
+HEALTHY = {'system': {}, 'application': {}, 'database': {'healthy': True}, 'security': {}}
+
+
+def history(cpu_values, requests=100, errors=0, end=NOW):
+    """One-minute points ending just before ``end``"""
+    start = end - 60 * len(cpu_values)
+    return [
+        (start + index * 60, {
+            'cpu_percent': cpu, 'memory_percent': 40.0, 'disk_percent': 30.0,
+            'network_bytes_sent': 0.0, 'network_bytes_recv': 0.0,
+            'requests': requests, 'errors': errors, 'response_time_total': requests * 0.1,
+        })
+        for index, cpu in enumerate(cpu_values)
+    ]
+
+
+class AlertSchedulerTest(TestCase):
+    """Test that only the lease holder evaluates alerts"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_single_leader(self):
+        first = AlertScheduler(MetricsCollector(), interval=60)
+        second = AlertScheduler(MetricsCollector(), interval=60)
+
+        with patch.object(MetricsCollector, 'run_alert_check', return_value=[]) as run_alert_check:
+            self.assertEqual(first.run_once(), [])
+            self.assertIsNone(second.run_once())
+            # The leader keeps renewing its lease
+            self.assertEqual(first.run_once(), [])
+            self.assertEqual(run_alert_check.call_count, 2)
+
+            first.release_leadership()
+            self.assertEqual(second.run_once(), [])
+            self.assertIsNone(first.run_once())
+
+    def test_requests_start_scheduler_only_when_enabled(self):
+        self.assertFalse(settings.ENABLE_ALERTING)
+        with patch.object(alert_scheduler, 'ensure_started') as ensure_started:
+            self.client.get('/monitoring/slow-queries/')
+            ensure_started.assert_not_called()
+
+            with override_settings(ENABLE_ALERTING=True):
+                self.client.get('/monitoring/slow-queries/')
+            ensure_started.assert_called_once()
+
+
+class WindowedRuleTest(TestCase):
+    """Test rules evaluated over the sampler's history"""
+
+    def setUp(self):
+        self.manager = AlertManager()
+        self.sent = []
+        self.manager._send_notifications = self.sent.append
+
+    def fired(self, points, metrics=HEALTHY, now=NOW):
+        with patch.object(self.manager, 'dispatch_notifications', side_effect=self.sent.append):
+            return {alert['rule_id'] for alert in self.manager.check_alerts(metrics, history=points, now=now)}
+
+    def test_sustained_breach_fires(self):
+        """High CPU for the whole five-minute window fires the warning rule"""
+        fired = self.fired(history([85, 90, 88, 92, 87]))
+        self.assertEqual(fired, {'high_cpu_usage'})
+        self.assertEqual(self.sent[0]['current_value'], 87)
+
+    def test_brief_spike_does_not_fire(self):
+        """One sample under the threshold inside the window keeps the rule quiet"""
+        self.assertEqual(self.fired(history([85, 90, 50, 92, 87])), set())
+        # Too little history to cover the window is not a breach either
+        self.assertEqual(self.fired(history([99])), {'critical_cpu_usage'})
+        self.assertNotIn('high_cpu_usage', self.fired(history([99, 99])))
+
+    def test_error_rate_and_resolution(self):
+        """Error rate comes from sampled 5xx counts and alerts resolve once the window clears"""
+        self.assertEqual(self.fired(history([10] * 3, requests=100, errors=20)), {'high_error_rate'})
+        self.assertIn('high_error_rate', self.manager.active_alerts)
+
+        self.assertEqual(self.fired(history([10] * 3, requests=100, errors=1), now=NOW), set())
+        self.assertNotIn('high_error_rate', self.manager.active_alerts)
+
+    @override_settings(ALERT_REPEAT_INTERVAL=600)
+    def test_notifications_repeat_at_interval(self):
+        self.fired(history([90] * 5))
+        self.fired(history([90] * 5, end=NOW + 60), now=NOW + 60)
+        self.assertEqual(len(self.sent), 1)
+        self.fired(history([90] * 5, end=NOW + 600), now=NOW + 600)
+        self.assertEqual(len(self.sent), 2)
+
+
+class AsyncNotificationTest(TestCase):
+    """Test that slow notification channels do not delay evaluation"""
+
+    def test_slow_email_does_not_block(self):
+        manager = AlertManager()
+        release = threading.Event()
+        delivered = []
+
+        def slow_email(alert, config):
+            release.wait(5)
+            delivered.append(alert['rule_id'])
+
+        with patch.object(manager, '_send_email_notification', side_effect=slow_email):
+            alerts = manager.check_alerts(HEALTHY, history=history([90] * 5), now=NOW)
+
+            # Evaluation returned while the email is still blocked
+            self.assertEqual(len(alerts), 1)
+            self.assertFalse(release.is_set())
+            self.assertEqual(delivered, [])
+            release.set()
+            manager._notifier.wait()
+
+        self.assertEqual(delivered, ['high_cpu_usage'])
@@ -0,0 +1,179 @@
+"""
+Tests for the daily analytics snapshots
+Checks per-day figures, incremental refresh, repair of partial days, the read fill cap, calendar-month and risk trend series, the analytics view that reads them and the in-process scheduler
+"""
+
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from assessments.models import Assessment, AssessmentType, DailyAnalyticsSnapshot
+from assessments.scheduler import SnapshotScheduler, snapshot_scheduler
+from assessments.snapshots import (
+    analytics_trends, day_bounds, get_daily_snapshots, month_starts, refresh_daily_snapshots
+)
+from assessments.tasks import refresh_analytics_snapshots
+
+User = get_user_model()
+
+
+class DailyAnalyticsSnapshotTest(TestCase):
+    """Test building, refreshing and reading the snapshots"""
+
+    def setUp(self):
+        caches['queries'].clear()
+        self.today = timezone.localdate()
+        self.assessment_type = AssessmentType.objects.create(
+            name='phq9', display_name='PHQ-9', description='Screening',
+            instructions='Answer every question', max_score=27
+        )
+        self.users = User.objects.bulk_create([
+            User(email=f'client{index}@example.com', username=f'client{index}') for index in range(4)
+        ])
+        # The last client joined yesterday; the others joined long ago
+        User.objects.filter(pk__in=[user.pk for user in self.users[:3]]).update(
+            date_joined=timezone.now() - timedelta(days=400)
+        )
+        User.objects.filter(pk=self.users[3].pk).update(date_joined=day_bounds(self.today - timedelta(days=1))[0])
+
+        self.assess(self.users[0], 'severe', 3)
+        self.assess(self.users[0], 'minimal', 1)
+        self.assess(self.users[1], 'moderately_severe', 1)
+        self.assess(self.users[1], 'moderate', 1)
+        self.assess(self.users[2], 'mild', 40)
+
+    def assess(self, user, risk_level, days_ago):
+        assessment = Assessment.objects.create(
+            user=user, assessment_type=self.assessment_type, total_score=0,
+            risk_level=risk_level, interpretation=''
+        )
+        completed_at = day_bounds(self.today - timedelta(days=days_ago))[0] + timedelta(hours=12)
+        Assessment.objects.filter(pk=assessment.pk).update(completed_at=completed_at)
+
+    def test_daily_figures(self):
+        refresh_daily_snapshots()
+        snapshots = {snapshot.date: snapshot for snapshot in DailyAnalyticsSnapshot.objects.all()}
+
+        three_days_ago = snapshots[self.today - timedelta(days=3)]
+        self.assertEqual(three_days_ago.total_users, 3)
+        self.assertEqual((three_days_ago.active_users, three_days_ago.assessments_completed), (1, 1))
+        self.assertEqual(
+            (three_days_ago.low_risk, three_days_ago.medium_risk, three_days_ago.high_risk, three_days_ago.critical_risk),
+            (2, 0, 0, 1)
+        )
+
+        # Yesterday the second client's later assessment wins and the new client counts as unassessed
+        yesterday = snapshots[self.today - timedelta(days=1)]
+        self.assertEqual(yesterday.total_users, 4)
+        self.assertEqual((yesterday.active_users, yesterday.assessments_completed), (2, 3))
+        self.assertEqual(
+            (yesterday.low_risk, yesterday.medium_risk, yesterday.high_risk, yesterday.critical_risk),
+            (3, 1, 0, 0)
+        )
+
+    def test_incremental_refresh(self):
+        self.assertEqual(refresh_daily_snapshots(), 190)
+        # Later runs only recompute from the earliest partial day, today's, onwards
+        self.assertEqual(refresh_daily_snapshots(), 1)
+        self.assertEqual(refresh_daily_snapshots(today=self.today + timedelta(days=2)), 3)
+
+        refresh_analytics_snapshots.delay()
+        output = StringIO()
+        call_command('rebuild_analytics_snapshots', days=10, stdout=output)
+        self.assertIn('Wrote 10 daily snapshots', output.getvalue())
+        call_command('rebuild_analytics_snapshots', missing=True, stdout=output)
+        self.assertIn('Wrote 1 missing or partial daily snapshots', output.getvalue())
+
+    def test_partial_days_are_rebuilt(self):
+        refresh_daily_snapshots()
+        yesterday = self.today - timedelta(days=1)
+        # Yesterday's row was last written during yesterday, before its last assessment
+        DailyAnalyticsSnapshot.objects.filter(date=yesterday).update(
+            assessments_completed=0, updated_at=day_bounds(yesterday)[0] + timedelta(hours=6)
+        )
+        DailyAnalyticsSnapshot.objects.filter(date=self.today).update(updated_at=timezone.now())
+
+        rows = {snapshot.date: snapshot for snapshot in get_daily_snapshots(yesterday, self.today)}
+        self.assertEqual(rows[yesterday].assessments_completed, 3)
+        self.assertEqual(DailyAnalyticsSnapshot.objects.get(date=yesterday).assessments_completed, 3)
+
+        # The scheduled refresh starts from the partial day, not the latest stored one
+        DailyAnalyticsSnapshot.objects.filter(date=yesterday).update(
+            assessments_completed=0, updated_at=day_bounds(yesterday)[0]
+        )
+        self.assertEqual(refresh_daily_snapshots(), 2)
+        self.assertEqual(DailyAnalyticsSnapshot.objects.get(date=yesterday).assessments_completed, 3)
+
+    def test_read_fill_is_capped(self):
+        with self.settings(ANALYTICS_SNAPSHOT_READ_FILL_DAYS=3):
+            with self.assertLogs('assessments.snapshots', 'WARNING'):
+                rows = get_daily_snapshots(self.today - timedelta(days=30), self.today)
+        self.assertEqual([row.date for row in rows], [self.today - timedelta(days=offset) for offset in (2, 1, 0)])
+        self.assertEqual(DailyAnalyticsSnapshot.objects.count(), 3)
+
+    def test_trend_series(self):
+        # Reads only fill in the last few days; the backfill covers the months
+        refresh_daily_snapshots()
+        trends = analytics_trends()
+        self.assertEqual(len(trends['weeklyEngagement']), 7)
+        self.assertEqual(trends['dates'][-1], self.today.isoformat())
+        self.assertEqual(trends['weeklyEngagement'][-2], 50.0)
+        self.assertEqual(trends['riskTrends'][-4], round(100 / 3, 1))
+        self.assertEqual(trends['riskTrends'][-1], 0)
+
+        # Calendar months, each assessment counted exactly once
+        self.assertEqual(len(trends['monthlyAssessments']), 6)
+        self.assertEqual(sum(trends['monthlyAssessments']), 5)
+        months = month_starts(self.today, 6)
+        self.assertEqual(months[-1], self.today.replace(day=1))
+        self.assertTrue(all(later > earlier for earlier, later in zip(months, months[1:])))
+
+        # Up to date snapshots are read in one query
+        with self.assertNumQueries(1):
+            analytics_trends()
+
+    def test_analytics_view(self):
+        admin = User.objects.create(email='admin@example.com', username='admin', role='admin')
+        client = APIClient()
+        client.force_authenticate(user=admin)
+
+        trends = client.get('/api/analytics/').data['trends']
+        self.assertEqual(trends['riskTrends'], analytics_trends()['riskTrends'])
+        self.assertEqual(len(trends['monthlyAssessments']), 6)
+
+
+class SnapshotSchedulerTest(TestCase):
+    """Test that only the lease holder refreshes the snapshots"""
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_single_leader(self):
+        first = SnapshotScheduler(interval=900)
+        second = SnapshotScheduler(interval=900)
+
+        self.assertEqual(first.run_once(), 190)
+        self.assertIsNone(second.run_once())
+        # The leader keeps renewing its lease and only rewrites today
+        self.assertEqual(first.run_once(), 1)
+
+        first.release_leadership()
+        self.assertEqual(second.run_once(), 1)
+        self.assertIsNone(first.run_once())
+
+    def test_requests_start_scheduler_only_when_enabled(self):
+        self.assertFalse(settings.ANALYTICS_SNAPSHOT_SCHEDULER)
+        with patch.object(snapshot_scheduler, 'ensure_started') as ensure_started:
+            self.client.get('/monitoring/slow-queries/')
+            ensure_started.assert_not_called()
+
+            with override_settings(ANALYTICS_SNAPSHOT_SCHEDULER=True):
+                self.client.get('/monitoring/slow-queries/')
+            ensure_started.assert_called_once()
@@ -0,0 +1,89 @@
+"""
+Tests for the fork-safe background helpers
+Checks keyed deduplication and waiting in the pool, starting a background thread once per process and queueing tasks without a broker
+"""
+
+import threading
+from unittest.mock import Mock, patch
+from django.test import SimpleTestCase, override_settings
+
+from backend.background import BackgroundPool, BackgroundThread, enqueue
+
+
+class BackgroundPoolTest(SimpleTestCase):
+    """Test the keyed thread pool"""
+
+    def test_keyed_jobs_run_once(self):
+        pool = BackgroundPool('test-pool', max_workers=2)
+        release = threading.Event()
+        calls = []
+
+        def job(name):
+            release.wait(5)
+            calls.append(name)
+            return name
+
+        first = pool.submit('report', job, 'first')
+        self.assertIs(pool.submit('report', job, 'second'), first)
+        self.assertIs(pool.running('report'), first)
+        unkeyed = pool.submit(None, job, 'unkeyed')
+
+        release.set()
+        pool.wait()
+        self.assertEqual(first.result(), 'first')
+        self.assertEqual(unkeyed.result(), 'unkeyed')
+        self.assertEqual(sorted(calls), ['first', 'unkeyed'])
+        self.assertIsNone(pool.running('report'))
+
+    def test_new_executor_after_fork(self):
+        pool = BackgroundPool('test-pool')
+        pool.submit('job', lambda: None).result()
+        executor = pool._executor
+        with patch('backend.background.os.getpid', return_value=-1):
+            pool.submit('job', lambda: None).result()
+            self.assertIsNot(pool._executor, executor)
+
+
+class BackgroundThreadTest(SimpleTestCase):
+    """Test the per-process daemon thread"""
+
+    def test_started_once_and_after_fork(self):
+        release = threading.Event()
+        thread = BackgroundThread('test-thread', lambda: release.wait(5))
+        starts = []
+
+        self.assertTrue(thread.ensure_started(starts.append))
+        self.assertFalse(thread.ensure_started(starts.append))
+        self.assertTrue(thread.is_running())
+        with patch('backend.background.os.getpid', return_value=-1):
+            self.assertFalse(thread.is_running())
+            self.assertTrue(thread.ensure_started(starts.append))
+        self.assertEqual(starts, [False, True])
+        release.set()
+
+
+class EnqueueTest(SimpleTestCase):
+    """Test where queued tasks run"""
+
+    def test_broker_or_eager_uses_celery(self):
+        task = Mock()
+        with override_settings(CELERY_BROKER_URL='redis://broker:6379/0', CELERY_TASK_ALWAYS_EAGER=False):
+            enqueue(task, 7)
+        with override_settings(CELERY_BROKER_URL='', CELERY_TASK_ALWAYS_EAGER=True):
+            enqueue(task, 8)
+        self.assertEqual([call.args for call in task.delay.call_args_list], [(7,), (8,)])
+        task.apply.assert_not_called()
+
+    def test_without_broker_runs_in_background(self):
+        release = threading.Event()
+        task = Mock()
+        task.apply.side_effect = lambda args, kwargs: release.wait(5)
+
+        with override_settings(CELERY_BROKER_URL='', CELERY_TASK_ALWAYS_EAGER=False):
+            future = enqueue(task, 7, size='large')
+        # The caller returns while the task is still running
+        self.assertFalse(future.done())
+        release.set()
+        future.result(timeout=5)
+        task.apply.assert_called_once_with((7,), {'size': 'large'})
+        task.delay.assert_not_called()
@@ -0,0 +1,108 @@
+"""
+Tests for the shared cache backends
+Checks SQLite cache semantics, atomic counters across processes, namespace eviction and the cache stats endpoint
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+from django.core.cache import caches
+from django.test import TestCase
+
+from backend.cache_backends import SQLiteCache, get_cache_stats
+
+
+def increment(location, times):
+    cache = SQLiteCache(location, {'KEY_PREFIX': 'shared'})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTest(TestCase):
+    """Test the single-node SQLite fallback"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'shared.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_cache(self, **params):
+        return SQLiteCache(self.location, {'KEY_PREFIX': 'shared', **params})
+
+    def test_cache_semantics(self):
+        cache = self.make_cache()
+        self.assertTrue(cache.add('lease', 'worker-1', 60))
+        self.assertFalse(cache.add('lease', 'worker-2', 60))
+        self.assertEqual(cache.get('lease'), 'worker-1')
+
+        cache.set_many({'snapshot': {'requests': 3}, 'count': 1})
+        self.assertEqual(cache.get_many(['snapshot', 'count', 'missing']), {'snapshot': {'requests': 3}, 'count': 1})
+        self.assertEqual(cache.incr('count', 4), 5)
+        self.assertEqual(cache.decr('count'), 4)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+        # Expired entries read as missing and can be added again
+        cache.set('expired', 'old', 0)
+        self.assertIsNone(cache.get('expired'))
+        self.assertTrue(cache.add('expired', 'new'))
+        self.assertTrue(cache.touch('expired', 60))
+        self.assertTrue(cache.delete('expired'))
+        self.assertFalse(cache.has_key('expired'))
+
+        # Another worker on the same node sees the same entries
+        self.assertEqual(self.make_cache().get('snapshot'), {'requests': 3})
+        self.assertIsNone(SQLiteCache(self.location, {'KEY_PREFIX': 'other'}).get('snapshot'))
+
+    def test_incr_is_atomic_across_processes(self):
+        cache = self.make_cache()
+        cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=increment, args=(self.location, 200)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+
+        self.assertEqual([process.exitcode for process in processes], [0] * 4)
+        self.assertEqual(cache.get('counter'), 800)
+
+    def test_eviction_closest_to_expiry(self):
+        """Past MAX_ENTRIES, expired entries go first, then those expiring soonest"""
+        cache = self.make_cache(OPTIONS={'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2})
+        cache.set('gone', 1, 0)
+        for index in range(11):
+            cache.set(f"key{index}", index, 100 + index)
+
+        info = cache.info()
+        self.assertLessEqual(info['entries'], 10)
+        self.assertIsNone(cache.get('gone'))
+        self.assertIsNone(cache.get('key0'))
+        self.assertEqual(cache.get('key10'), 10)
+
+
+class CacheStatsTest(TestCase):
+    """Test per-namespace statistics"""
+
+    def test_namespaces_and_stats(self):
+        queries = caches['queries']
+        queries.clear()
+        queries.set('report', [1, 2, 3])
+        queries.get('report')
+        queries.get('absent')
+
+        # Namespaces do not see each other's keys and keep their own TTLs
+        self.assertIsNone(caches['default'].get('report'))
+        self.assertEqual(queries.default_timeout, 60)
+
+        stats = get_cache_stats()
+        self.assertEqual(set(stats), {'default', 'metrics', 'throttle', 'queries'})
+        self.assertGreaterEqual(stats['queries']['hits'], 1)
+        self.assertGreaterEqual(stats['queries']['misses'], 1)
+        self.assertEqual(stats['queries']['backend']['backend'], 'sqlite')
+
+        data = self.client.get('/monitoring/cache/').json()['data']
+        self.assertIn('hit_rate', data['caches']['throttle'])
@@ -0,0 +1,185 @@
+"""
+Tests for background processing of chat media uploads
+Checks uploads are stored immediately and processed after the request, lost jobs are queued again and polls see the result
+"""
+
+import io
+import shutil
+import tempfile
+import wave
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from community.media_utils import THUMBNAIL_SIZES
+from community.models import ChatRoom, ChatRoomParticipant, ChatMessage
+from community.tasks import requeue_stale_media
+
+User = get_user_model()
+
+
+def make_jpeg(width=1600, height=1200):
+    buffer = io.BytesIO()
+    Image.linear_gradient('L').resize((width, height)).convert('RGB').save(buffer, format='JPEG')
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+def make_wav(seconds=3, rate=8000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b'\x00\x00' * rate * seconds)
+    return SimpleUploadedFile('note.wav', buffer.getvalue(), content_type='audio/wav')
+
+
+class ChatMediaProcessingTest(TestCase):
+    """Test media uploads are processed by the background task"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+
+        self.user = User.objects.create_user(
+            email='media@example.com',
+            username='mediauser',
+            password='testpass123',
+            is_active=True
+        )
+        self.room = ChatRoom.objects.create(name='Media room', description='Sharing files', creator=self.user)
+        ChatRoomParticipant.objects.create(room=self.room, user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = f'/api/community/chat/{self.room.id}/send-message/'
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def upload(self, **data):
+        return self.client.post(self.url, data, format='multipart')
+
+    def test_upload_does_not_decode_on_request_path(self):
+        """The request stores the file and defers all decoding to the job"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            with patch('community.media_utils.Image.open', side_effect=AssertionError('decoded during request')):
+                response = self.upload(message_type='image', image_file=make_jpeg())
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['processing_status'], 'processing')
+        self.assertTrue(callbacks)
+
+        message = ChatMessage.objects.get()
+        self.assertTrue(default_storage.exists(message.image_file.name))
+        self.assertEqual(message.thumbnails, {})
+
+    def test_image_thumbnails_and_metadata(self):
+        """The job writes one thumbnail per size and records the image metadata"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload(message_type='image', image_file=make_jpeg())
+        self.assertEqual(response.status_code, 201)
+
+        message = ChatMessage.objects.get()
+        self.assertEqual(message.processing_status, 'ready')
+        self.assertEqual(message.media_metadata, {'width': 1600, 'height': 1200, 'format': 'JPEG'})
+        self.assertEqual(message.mime_type, 'image/jpeg')
+        self.assertEqual(set(message.thumbnails), set(THUMBNAIL_SIZES))
+
+        for size_name, (max_width, max_height) in THUMBNAIL_SIZES.items():
+            with default_storage.open(message.thumbnails[size_name]) as thumbnail, Image.open(thumbnail) as img:
+                self.assertLessEqual(img.width, max_width)
+                self.assertLessEqual(img.height, max_height)
+
+        data = self.client.get(f'/api/community/chat/{self.room.id}/get-messages/').json()
+        self.assertEqual(set(data['messages'][0]['thumbnail_urls']), set(THUMBNAIL_SIZES))
+
+    def test_voice_duration_probed(self):
+        """The probed duration replaces the client-reported one"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.upload(message_type='voice', voice_file=make_wav(seconds=3), duration='7')
+        self.assertEqual(response.json()['duration'], 7)
+
+        for callback in callbacks:
+            callback()
+        message = ChatMessage.objects.get()
+        self.assertEqual(message.processing_status, 'ready')
+        self.assertEqual(message.duration, 3)
+        self.assertEqual(message.media_metadata, {'format': 'wav'})
+
+    def test_corrupt_image_marked_failed(self):
+        """Undecodable uploads end up failed instead of stuck processing"""
+        corrupt = SimpleUploadedFile('broken.png', b'not really a png', content_type='image/png')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload(message_type='image', image_file=corrupt)
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(ChatMessage.objects.get().processing_status, 'failed')
+
+    def upload_lost_image(self):
+        """An image whose processing job was never run, as if its process restarted"""
+        with self.captureOnCommitCallbacks():
+            self.upload(message_type='image', image_file=make_jpeg(320, 240))
+        return ChatMessage.objects.get()
+
+    def test_stale_processing_requeued(self):
+        """Messages stuck processing past the timeout are queued again exactly once"""
+        message = self.upload_lost_image()
+        self.assertEqual(requeue_stale_media(), 0)
+
+        ChatMessage.objects.filter(pk=message.pk).update(updated_at=timezone.now() - timedelta(minutes=11))
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(requeue_stale_media(), 1)
+            # Claimed: a concurrent sweep leaves it alone
+            self.assertEqual(requeue_stale_media(), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(ChatMessage.objects.get().processing_status, 'ready')
+
+        ChatMessage.objects.filter(pk=message.pk).update(
+            processing_status='processing', updated_at=timezone.now() - timedelta(minutes=11)
+        )
+        output = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('requeue_chat_media', stdout=output)
+        self.assertIn('Requeued 1 stale chat media jobs', output.getvalue())
+        self.assertEqual(ChatMessage.objects.get().processing_status, 'ready')
+
+    def test_reads_requeue_stale_messages(self):
+        """Loading a stale message queues its processing again"""
+        message = self.upload_lost_image()
+        ChatMessage.objects.filter(pk=message.pk).update(updated_at=timezone.now() - timedelta(minutes=11))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get('/api/community/chat-messages/', {'room_id': self.room.id})
+        self.assertEqual(response.json()['results'][0]['processing_status'], 'processing')
+        self.assertEqual(ChatMessage.objects.get().processing_status, 'ready')
+
+    def test_polls_see_processed_media(self):
+        """A poll with updated_since returns messages it already has once they are processed"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.upload(message_type='image', image_file=make_jpeg(320, 240))
+        page = self.client.get('/api/community/chat-messages/', {'room_id': self.room.id}).json()
+        cursors = {'since': page['since_cursor'], 'updated_since': page['updated_cursor']}
+        ChatMessage.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+
+        poll = self.client.get('/api/community/chat-messages/', {'room_id': self.room.id, **cursors}).json()
+        self.assertEqual((poll['results'], poll['updated']), ([], []))
+
+        for callback in callbacks:
+            callback()
+        poll = self.client.get('/api/community/chat-messages/', {'room_id': self.room.id, **cursors}).json()
+        self.assertEqual(poll['results'], [])
+        self.assertEqual([message['processing_status'] for message in poll['updated']], ['ready'])
+
+        data = self.client.get(f'/api/community/chat/{self.room.id}/get-messages/', cursors).json()
+        self.assertEqual([message['processing_status'] for message in data['updated']], ['ready'])
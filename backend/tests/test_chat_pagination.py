@@ -0,0 +1,131 @@
+"""
+Tests for keyset pagination of chat messages
+Checks incremental since-cursor fetches return only new messages in a fixed number of queries
+"""
+
+import unittest
+from datetime import timedelta
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from community.models import ChatRoom, ChatRoomParticipant, ChatMessage
+from community.serializers import ChatMessageSerializer
+
+User = get_user_model()
+
+
+def seed_messages(room, author, count, start=0):
+    """Bulk-create messages; every pair shares a timestamp to exercise the id tiebreaker"""
+    messages = ChatMessage.objects.bulk_create([
+        ChatMessage(room=room, author=author, content=f'message {index}')
+        for index in range(start, start + count)
+    ], batch_size=1000)
+    base = min(message.created_at for message in messages)
+    for offset, message in enumerate(messages):
+        message.created_at = base + timedelta(seconds=(start + offset) // 2)
+    ChatMessage.objects.bulk_update(messages, ['created_at'], batch_size=1000)
+    return messages
+
+
+class ChatMessagePaginationTest(TestCase):
+    """Test chat messages are fetched by keyset cursors"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='pager@example.com',
+            username='pageruser',
+            password='testpass123',
+            is_active=True
+        )
+        self.room = ChatRoom.objects.create(name='Busy room', description='Lots of chatter', creator=self.user)
+        ChatRoomParticipant.objects.create(room=self.room, user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def get_page(self, **params):
+        response = self.client.get('/api/community/chat-messages/', {'room_id': self.room.id, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_incremental_fetch_beats_full_history(self):
+        """Catching up on new messages costs a fixed page, not the whole history"""
+        seed_messages(self.room, self.user, 5000)
+        cursor = self.get_page()['since_cursor']
+        seed_messages(self.room, self.user, 10, start=5000)
+
+        full_history = ChatMessageSerializer(
+            ChatMessage.objects.filter(room=self.room).order_by('created_at'), many=True
+        ).data
+
+        with CaptureQueriesContext(connection) as queries:
+            page = self.get_page(since=cursor)
+
+        self.assertEqual(len(full_history), 5010)
+        self.assertEqual([message['content'] for message in page['results']], [f'message {index}' for index in range(5000, 5010)])
+        self.assertFalse(page['has_more'])
+        self.assertLessEqual(len(queries), 3)
+
+        # Nothing new keeps the same cursor
+        empty = self.get_page(since=page['since_cursor'])
+        self.assertEqual(empty['results'], [])
+        self.assertEqual(empty['since_cursor'], page['since_cursor'])
+
+    def test_scroll_back_visits_every_message_once(self):
+        """Following before cursors walks the history in order without gaps or repeats"""
+        seed_messages(self.room, self.user, 125)
+
+        seen = []
+        page = self.get_page(page_size=50)
+        while True:
+            seen = [message['content'] for message in page['results']] + seen
+            if not page['has_more']:
+                break
+            page = self.get_page(page_size=50, before=page['before_cursor'])
+
+        self.assertEqual(seen, [f'message {index}' for index in range(125)])
+
+    def test_since_pages_forward(self):
+        """A since cursor pages forward when more than one page is new"""
+        seed_messages(self.room, self.user, 5)
+        cursor = self.get_page()['since_cursor']
+        seed_messages(self.room, self.user, 7, start=5)
+
+        page = self.get_page(since=cursor, page_size=4)
+        self.assertTrue(page['has_more'])
+        page = self.get_page(since=page['since_cursor'], page_size=4)
+        self.assertFalse(page['has_more'])
+        self.assertEqual([message['content'] for message in page['results']], ['message 9', 'message 10', 'message 11'])
+
+    def test_chat_views_listing_shares_cursors(self):
+        """The media chat listing accepts the same cursors"""
+        seed_messages(self.room, self.user, 30)
+        cursor = self.get_page(page_size=10)['before_cursor']
+
+        response = self.client.get(f'/api/community/chat/{self.room.id}/get-messages/', {'before': cursor, 'page_size': 10})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([message['content'] for message in data['messages']], [f'message {index}' for index in range(10, 20)])
+        self.assertTrue(data['has_more'])
+
+    def test_invalid_cursor(self):
+        """Malformed cursors are rejected"""
+        response = self.client.get('/api/community/chat-messages/', {'room_id': self.room.id, 'since': 'garbage!'})
+        self.assertEqual(response.status_code, 404)
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'Query plan format is SQLite specific')
+    def test_keyset_query_uses_room_index(self):
+        """The since query is served by the (room, created_at, id) index"""
+        seed_messages(self.room, self.user, 20)
+        cursor = self.get_page()['since_cursor']
+
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page(since=cursor)
+        keyset_sql = next(query['sql'] for query in queries if 'community_chat_message' in query['sql'])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {keyset_sql}')
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('chat_msg_room_created_id', plan)
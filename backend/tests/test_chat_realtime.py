@@ -0,0 +1,193 @@
+"""
+Tests for the chat WebSocket transport
+Checks sockets authenticate in their first frame and room events are pushed to connected participants instead of being polled for
+"""
+
+import json
+from unittest.mock import patch
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from community.models import ChatRoom, ChatRoomParticipant
+from community.realtime import InProcessBroker, room_channel
+from community.routing import websocket_application
+
+User = get_user_model()
+
+
+class ChatRealtimeTest(TestCase):
+    """Test chat room events reach WebSocket subscribers"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='chat@example.com',
+            username='chatuser',
+            password='testpass123',
+            is_active=True
+        )
+        self.other = User.objects.create_user(
+            email='other@example.com',
+            username='otheruser',
+            password='testpass123',
+            is_active=True
+        )
+        self.room = ChatRoom.objects.create(name='Support room', description='Peer support', creator=self.user)
+        ChatRoomParticipant.objects.create(room=self.room, user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def connect(self, room_id=None, query_string=b''):
+        return ApplicationCommunicator(websocket_application, {
+            'type': 'websocket',
+            'path': f"/ws/chat/{room_id or self.room.id}/",
+            'query_string': query_string,
+        })
+
+    async def open_socket(self, user=None, room_id=None):
+        """Connect and send the auth frame; the response is the ready event or the close"""
+        communicator = self.connect(room_id)
+        await communicator.send_input({'type': 'websocket.connect'})
+        self.assertEqual(await communicator.receive_output(timeout=2), {'type': 'websocket.accept'})
+        token = str(AccessToken.for_user(user or self.user)) if user is not False else None
+        await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps({'type': 'auth', 'token': token})})
+        response = await communicator.receive_output(timeout=2)
+        return communicator, response
+
+    async def next_event(self, communicator):
+        response = await communicator.receive_output(timeout=2)
+        self.assertEqual(response['type'], 'websocket.send')
+        return json.loads(response['text'])
+
+    async def close_socket(self, communicator):
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait(timeout=2)
+
+    def post_committed(self, client, path, data=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(path, data or {}, format='json')
+        return response
+
+    async def test_rejects_anonymous_and_non_participants(self):
+        """Sockets need a valid token and room membership"""
+        communicator, response = await self.open_socket(user=False)
+        self.assertEqual(response, {'type': 'websocket.close', 'code': 4401})
+
+        communicator, response = await self.open_socket(user=self.other)
+        self.assertEqual(response, {'type': 'websocket.close', 'code': 4403})
+
+    async def test_token_only_accepted_in_first_frame(self):
+        """A token in the URL is ignored and a client that never sends one is closed"""
+        query_string = f"token={AccessToken.for_user(self.user)}".encode()
+        with patch('community.consumers.AUTH_TIMEOUT', 0.05):
+            communicator = self.connect(query_string=query_string)
+            await communicator.send_input({'type': 'websocket.connect'})
+            self.assertEqual(await communicator.receive_output(timeout=2), {'type': 'websocket.accept'})
+            self.assertEqual(await communicator.receive_output(timeout=2), {'type': 'websocket.close', 'code': 4401})
+
+        communicator = self.connect()
+        await communicator.send_input({'type': 'websocket.connect'})
+        await communicator.receive_output(timeout=2)
+        await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps({'type': 'ping'})})
+        self.assertEqual(await communicator.receive_output(timeout=2), {'type': 'websocket.close', 'code': 4401})
+
+    async def test_new_messages_are_pushed(self):
+        """A message posted over REST is delivered to connected participants"""
+        communicator, response = await self.open_socket()
+        self.assertEqual(json.loads(response['text']), {'type': 'ready'})
+
+        response = await sync_to_async(self.post_committed)(self.client, '/api/community/chat-messages/', {
+            'room': self.room.id,
+            'content': 'Hello everyone'
+        })
+        self.assertEqual(response.status_code, 201)
+
+        event = await self.next_event(communicator)
+        self.assertEqual(event['type'], 'message')
+        self.assertEqual(event['room_id'], self.room.id)
+        self.assertEqual(event['data']['content'], 'Hello everyone')
+        self.assertTrue(await communicator.receive_nothing())
+
+        await self.close_socket(communicator)
+
+    async def test_join_and_call_events(self):
+        """Joins and call state changes are pushed as they happen"""
+        communicator, _ = await self.open_socket()
+        other_client = APIClient()
+        other_client.force_authenticate(user=self.other)
+
+        await sync_to_async(self.post_committed)(other_client, f"/api/community/chat-rooms/{self.room.id}/join/")
+        system_message = await self.next_event(communicator)
+        joined = await self.next_event(communicator)
+        self.assertTrue(system_message['data']['is_system_message'])
+        self.assertEqual(joined['type'], 'user_joined')
+        self.assertEqual(joined['data']['participant_count'], 2)
+
+        await sync_to_async(self.post_committed)(
+            self.client, f"/api/community/chat-rooms/{self.room.id}/call/start/", {'type': 'video'}
+        )
+        started = await self.next_event(communicator)
+        updated = await self.next_event(communicator)
+        self.assertEqual(started['type'], 'call_started')
+        self.assertEqual(updated['type'], 'call_updated')
+        self.assertEqual(updated['data']['participants'], [self.user.display_name])
+
+        await sync_to_async(self.post_committed)(self.client, f"/api/community/chat-rooms/{self.room.id}/call/end/")
+        ended = await self.next_event(communicator)
+        self.assertEqual(ended['type'], 'call_ended')
+        self.assertFalse(ended['data']['has_active_call'])
+
+        await self.close_socket(communicator)
+
+    async def test_leaving_closes_socket(self):
+        """A participant who leaves stops receiving events; other members stay connected"""
+        await sync_to_async(ChatRoomParticipant.objects.create)(room=self.room, user=self.other)
+        mine, _ = await self.open_socket()
+        theirs, _ = await self.open_socket(user=self.other)
+        other_client = APIClient()
+        other_client.force_authenticate(user=self.other)
+
+        await sync_to_async(self.post_committed)(other_client, f"/api/community/chat-rooms/{self.room.id}/leave/")
+        for communicator in (mine, theirs):
+            self.assertEqual((await self.next_event(communicator))['type'], 'message')
+            self.assertEqual((await self.next_event(communicator))['type'], 'user_left')
+
+        self.assertEqual(await theirs.receive_output(timeout=2), {'type': 'websocket.close', 'code': 4403})
+        self.assertTrue(await mine.receive_nothing())
+        _, response = await self.open_socket(user=self.other)
+        self.assertEqual(response, {'type': 'websocket.close', 'code': 4403})
+
+        await self.close_socket(mine)
+
+    async def test_typing_relayed_and_ping(self):
+        """Typing notices fan out to the room and pings are answered"""
+        communicator, _ = await self.open_socket()
+
+        await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps({'type': 'ping'})})
+        self.assertEqual((await self.next_event(communicator))['type'], 'pong')
+
+        await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps({'type': 'typing'})})
+        event = await self.next_event(communicator)
+        self.assertEqual(event['type'], 'typing')
+        self.assertEqual(event['data']['user_id'], self.user.id)
+
+        await self.close_socket(communicator)
+
+    async def test_broker_fan_out_and_overflow(self):
+        """Subscribers only see their channel and a backlog past the limit ends the stream"""
+        broker = InProcessBroker(max_pending=2)
+
+        with broker.subscribe(room_channel(1)) as first, broker.subscribe(room_channel(2)) as second:
+            self.assertEqual(broker.subscriber_count(room_channel(1)), 1)
+            for index in range(3):
+                broker.publish(room_channel(1), {'index': index})
+
+            received = [json.loads(message)['index'] async for message in first]
+            self.assertEqual(received, [0, 1])
+            self.assertTrue(first.overflowed)
+            self.assertTrue(second._queue.empty())
+
+        self.assertEqual(broker.subscriber_count(room_channel(1)), 0)
@@ -0,0 +1,123 @@
+"""
+Tests for the dashboard snapshot service
+Checks fresh, stale and bypassed lookups, background refreshes, compute metrics and the dashboard views served from snapshots
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from assessments.models import AssessmentType, ClientAssessmentAssignment
+from assessments.views import AdminDashboardStatsView
+from backend.dashboard_snapshots import DashboardSnapshots, snapshot_key, snapshots
+from backend.metrics import registry as metrics_registry, series_key
+
+User = get_user_model()
+
+
+class Counter:
+    """Compute function that counts its calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {'calls': self.calls}
+
+
+class SnapshotServiceTest(TestCase):
+    """Test serving and refreshing stored payloads"""
+
+    def setUp(self):
+        caches['queries'].clear()
+        self.snapshots = DashboardSnapshots()
+
+    def test_fresh_and_bypass(self):
+        compute = Counter()
+        payload, meta = self.snapshots.get('report', compute, params={'days': 7}, scope=3)
+        self.assertEqual(payload, {'calls': 1})
+        self.assertEqual(meta['key'], 'dashboard:report:3:days=7')
+        self.assertFalse(meta['stale'])
+
+        # Served from the snapshot until ?fresh=1 asks for a recompute
+        self.assertEqual(self.snapshots.get('report', compute, params={'days': 7}, scope=3)[0], {'calls': 1})
+        self.assertEqual(self.snapshots.get('report', compute, params={'days': 7}, scope=3, fresh=True)[0], {'calls': 2})
+        self.assertEqual(self.snapshots.get('report', compute, params={'days': 7}, scope=3)[0], {'calls': 2})
+
+        # Other parameters and scopes are separate snapshots
+        self.assertNotEqual(snapshot_key('report', {'days': 7}, 3), snapshot_key('report', {'days': 7}, 4))
+        self.assertEqual(self.snapshots.get('report', compute, params={'days': 30}, scope=3)[0], {'calls': 3})
+
+        histograms = metrics_registry.snapshot()['histograms']
+        self.assertGreaterEqual(histograms[series_key('dashboard_snapshot_compute_seconds', {'view': 'report'})][0], 3)
+
+    @override_settings(DASHBOARD_SNAPSHOT_TTL=0)
+    def test_stale_while_refresh(self):
+        compute = Counter()
+        self.snapshots.get('report', compute)
+
+        # Past the TTL the old payload is served while one refresh runs in the background
+        payload, meta = self.snapshots.get('report', compute)
+        self.assertEqual(payload, {'calls': 1})
+        self.assertTrue(meta['stale'])
+        self.snapshots.wait()
+        self.assertEqual(compute.calls, 2)
+        self.assertEqual(self.snapshots.get('report', compute)[0], {'calls': 2})
+
+    @override_settings(DASHBOARD_SNAPSHOT_TTL=0, DASHBOARD_SNAPSHOT_MAX_STALE=0)
+    def test_too_old_is_recomputed(self):
+        compute = Counter()
+        self.snapshots.get('report', compute)
+        payload, meta = self.snapshots.get('report', compute)
+        self.assertEqual(payload, {'calls': 2})
+        self.assertFalse(meta['stale'])
+
+    def test_failed_compute_is_not_stored(self):
+        def fail():
+            raise RuntimeError('database unavailable')
+
+        with self.assertRaises(RuntimeError):
+            self.snapshots.get('report', fail)
+        self.assertIsNone(caches['queries'].get(snapshot_key('report')))
+
+
+class SnapshotViewsTest(TestCase):
+    """Test the dashboard views served from snapshots"""
+
+    def setUp(self):
+        caches['queries'].clear()
+        self.admin = User.objects.create(email='admin@example.com', username='admin', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def get_admin_dashboard(self, query=''):
+        request = APIRequestFactory().get(f'/admin/dashboard/{query}')
+        force_authenticate(request, user=self.admin)
+        return AdminDashboardStatsView.as_view()(request)
+
+    def test_fresh_bypass(self):
+        response = self.get_admin_dashboard()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_assignments'], 0)
+        self.assertIn('computeMs', response.data['snapshot'])
+
+        assessment_type = AssessmentType.objects.create(
+            name='phq9', display_name='PHQ-9', description='Screening',
+            instructions='Answer every question', max_score=27
+        )
+        ClientAssessmentAssignment.objects.create(guide=self.admin, client=self.admin, assessment_type=assessment_type)
+        self.assertEqual(self.get_admin_dashboard().data['total_assignments'], 0)
+        self.assertEqual(self.get_admin_dashboard('?fresh=1').data['total_assignments'], 1)
+
+    def test_dashboards_skip_queries_when_fresh(self):
+        for url in ['/api/analytics/', '/api/guide/analytics/', '/api/admin/system/stats/']:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertFalse(response.data['snapshot']['stale'])
+
+        # The guide snapshot is scoped to the guide
+        self.assertIsNotNone(snapshots.cache.get(snapshot_key('guide_analytics', {'days': 30}, self.admin.id)))
+        with self.assertNumQueries(0):
+            self.client.get('/api/analytics/?timeRange=30d')
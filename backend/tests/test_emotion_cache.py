@@ -0,0 +1,154 @@
+"""
+Tests for the perceptual-hash emotion result cache
+Benchmarks upstream calls saved on near-duplicate webcam frames
+"""
+
+import base64
+import time
+from functools import partial
+from io import BytesIO
+from unittest.mock import patch
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from PIL import Image
+from rest_framework.test import APIClient
+
+from mood.emotion_cache import EmotionResultCache, cached_analysis, get_emotion_cache, perceptual_hash
+from mood.views import perform_mock_emotion_analysis, request_azure_emotion_analysis
+
+User = get_user_model()
+
+
+def make_frame(seed, jitter=0):
+    """Base64 PNG of a synthetic scene; jitter shifts the brightness slightly"""
+    image = Image.new('L', (64, 48))
+    image.putdata([
+        min(255, ((x * (seed + 3) + y * (seed * 7 + 1)) % 200) + jitter)
+        for y in range(48) for x in range(64)
+    ])
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+class CountingAnalyzer:
+    """Mock analysis with fixed latency that counts upstream calls"""
+
+    def __init__(self, latency):
+        self.calls = 0
+        self.analyze = partial(perform_mock_emotion_analysis, latency=latency)
+
+    def __call__(self, image_data, include_breakdown=True):
+        self.calls += 1
+        return self.analyze(image_data, include_breakdown)
+
+
+class EmotionResultCacheTest(TestCase):
+    """Test near-duplicate frames reuse cached analyses"""
+
+    def test_near_duplicates_share_a_hash_neighbourhood(self):
+        """Small brightness changes stay within the match distance"""
+        original = perceptual_hash(base64.b64decode(make_frame(1)))
+        jittered = perceptual_hash(base64.b64decode(make_frame(1, jitter=3)))
+        other = perceptual_hash(base64.b64decode(make_frame(2)))
+
+        self.assertLessEqual((original ^ jittered).bit_count(), 4)
+        self.assertGreater((original ^ other).bit_count(), 4)
+        self.assertIsNone(perceptual_hash(b'not an image'))
+
+    def test_benchmark_upstream_calls(self):
+        """A session of jittered frames from two scenes costs two upstream calls"""
+        frames = [make_frame(index % 2 + 1, jitter=index % 4) for index in range(20)]
+
+        uncached = CountingAnalyzer(latency=0.02)
+        start_time = time.time()
+        for frame in frames:
+            uncached(frame)
+        uncached_time = time.time() - start_time
+
+        cache = EmotionResultCache()
+        analyzer = CountingAnalyzer(latency=0.02)
+        start_time = time.time()
+        results = [cached_analysis(frame, analyzer, scope='session', cache=cache) for frame in frames]
+        cached_time = time.time() - start_time
+
+        self.assertEqual(uncached.calls, 20)
+        self.assertEqual(analyzer.calls, 2)
+        self.assertLess(cached_time, uncached_time / 3)
+        self.assertEqual(cache.stats()['hits'], 18)
+        self.assertEqual(results[2]['emotions'], results[0]['emotions'])
+        self.assertTrue(results[2]['cached'])
+
+    def test_scopes_are_isolated(self):
+        """Frames from another session never hit this session's results"""
+        cache = EmotionResultCache()
+        analyzer = CountingAnalyzer(latency=0)
+
+        cached_analysis(make_frame(1), analyzer, scope='a', cache=cache)
+        cached_analysis(make_frame(1), analyzer, scope='b', cache=cache)
+        self.assertEqual(analyzer.calls, 2)
+
+    def test_ttl_and_lru_eviction(self):
+        """Expired entries miss and the least recently used entry is evicted first"""
+        cache = EmotionResultCache(max_entries=2, ttl=60, max_distance=0)
+        cache.set('s', 1, {'emotion': 'happy'})
+        cache.set('s', 2, {'emotion': 'sad'})
+        self.assertEqual(cache.get('s', 1)['emotion'], 'happy')
+
+        cache.set('s', 3, {'emotion': 'neutral'})
+        self.assertIsNone(cache.get('s', 2))
+        self.assertIsNotNone(cache.get('s', 1))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+        with patch('mood.emotion_cache.time.monotonic', return_value=time.monotonic() + 120):
+            self.assertIsNone(cache.get('s', 1))
+        self.assertEqual(cache.stats()['expirations'], 1)
+        self.assertEqual(cache.stats()['entries'], 1)
+
+    def test_breakdown_dropped_on_request(self):
+        """Results are cached with the breakdown even when the caller omits it"""
+        cache = EmotionResultCache()
+        analyzer = CountingAnalyzer(latency=0)
+
+        self.assertEqual(cached_analysis(make_frame(1), analyzer, False, scope='s', cache=cache)['emotions'], {})
+        self.assertTrue(cached_analysis(make_frame(1), analyzer, True, scope='s', cache=cache)['emotions'])
+
+    @patch('mood.views.time.sleep')
+    def test_fallback_results_not_cached(self, sleep):
+        """Mock results standing in for a failed Azure call are recomputed, not reused"""
+        cache = EmotionResultCache()
+        with self.settings(AZURE_FACE_KEY='', AZURE_FACE_ENDPOINT=''):
+            analyzer = CountingAnalyzer(latency=0)
+            analyzer.analyze = request_azure_emotion_analysis
+            for _ in range(2):
+                result = cached_analysis(make_frame(1), analyzer, scope='s', cache=cache)
+                self.assertTrue(result['fallback'])
+                self.assertNotIn('cached', result)
+
+        self.assertEqual(analyzer.calls, 2)
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    @patch('mood.views.request_azure_emotion_analysis', partial(perform_mock_emotion_analysis, latency=0))
+    def test_counters_exposed_in_monitoring(self):
+        """Repeated frames through the analyze endpoint show up as cache hits"""
+        get_emotion_cache().clear()
+        user = User.objects.create_user(
+            email='cache@example.com',
+            username='cacheuser',
+            password='testpass123',
+            is_active=True
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        for jitter in (0, 2):
+            response = client.post('/api/mood/analyze/', {
+                'image_data': make_frame(1, jitter=jitter),
+                'session_id': 'session-1'
+            }, format='json')
+            self.assertEqual(response.status_code, 200, response.content)
+        self.assertTrue(response.json()['cached'])
+
+        stats = client.get('/monitoring/application/').json()['data']['emotion_cache']
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
@@ -0,0 +1,105 @@
+"""
+Tests for the guide client roster
+Checks database-side status and risk, filtering, keyset pages in each ordering, field projection and a constant query count
+"""
+
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from assessments.models import Assessment, AssessmentType, ClientAssessmentAssignment
+
+User = get_user_model()
+
+
+class GuideRosterTest(TestCase):
+    """Test the paginated roster endpoint"""
+
+    def setUp(self):
+        self.guide = User.objects.create(email='guide@example.com', username='guide', role='guide')
+        self.api = APIClient()
+        self.api.force_authenticate(user=self.guide)
+        self.assessment_type = AssessmentType.objects.create(
+            name='phq9', display_name='PHQ-9', description='Screening',
+            instructions='Answer every question', max_score=27
+        )
+        self.clients = User.objects.bulk_create([
+            User(email=f'client{index}@example.com', username=f'client{index}') for index in range(30)
+        ])
+        # Clients cycle through: recent severe, recent mild, old moderate, never assessed
+        for index, client in enumerate(self.clients):
+            kind = index % 4
+            if kind == 0:
+                self.assess(client, 'severe')
+                self.assess(client, 'minimal', age=timedelta(days=5))
+            elif kind == 1:
+                self.assess(client, 'mild')
+            elif kind == 2:
+                self.assess(client, 'moderate', age=timedelta(days=45))
+        ClientAssessmentAssignment.objects.create(
+            guide=self.guide, client=self.clients[0], assessment_type=self.assessment_type
+        )
+
+    def assess(self, client, risk_level, age=None):
+        assessment = Assessment.objects.create(
+            user=client, assessment_type=self.assessment_type, total_score=0,
+            risk_level=risk_level, interpretation=''
+        )
+        if age is not None:
+            Assessment.objects.filter(pk=assessment.pk).update(completed_at=timezone.now() - age)
+
+    def walk(self, query):
+        """Every row across the pages of a roster query"""
+        rows = []
+        cursor = ''
+        while True:
+            response = self.api.get(f'/api/guide/clients/?{query}&page_size=7{cursor}')
+            self.assertEqual(response.status_code, 200)
+            rows.extend(response.data['results'])
+            if not response.data['has_more']:
+                return rows
+            cursor = f"&cursor={response.data['next_cursor']}"
+
+    def test_rows(self):
+        rows = {row['id']: row for row in self.walk('')}
+        self.assertEqual(len(rows), 30)
+
+        severe = rows[self.clients[0].id]
+        self.assertEqual((severe['riskLevel'], severe['status'], severe['assessmentCount']), ('critical', 'at_risk', 2))
+        self.assertEqual(severe['assignedDate'], ClientAssessmentAssignment.objects.get().assigned_date.isoformat())
+        self.assertEqual((rows[self.clients[1].id]['riskLevel'], rows[self.clients[1].id]['status']), ('low', 'active'))
+        self.assertEqual((rows[self.clients[2].id]['riskLevel'], rows[self.clients[2].id]['status']), ('medium', 'inactive'))
+        self.assertEqual(rows[self.clients[3].id]['lastAssessment'], None)
+        self.assertEqual(rows[self.clients[3].id]['assessmentCount'], 0)
+
+    def test_filters_and_orderings(self):
+        at_risk = self.walk('status=at_risk')
+        self.assertEqual({row['id'] for row in at_risk}, {client.id for client in self.clients[::4]})
+        self.assertEqual(len(self.walk('riskLevel=medium,critical')), 15)
+        self.assertEqual([row['id'] for row in self.walk('search=client29')], [self.clients[29].id])
+
+        for ordering in ['joined', '-joined', 'lastAssessment', '-lastAssessment', 'risk', '-risk', 'assessments']:
+            rows = self.walk(f'ordering={ordering}&fields=id,riskLevel')
+            self.assertEqual(len({row['id'] for row in rows}), 30, ordering)
+        ranks = [['low', 'medium', 'high', 'critical'].index(row['riskLevel']) for row in self.walk('ordering=-risk')]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+        self.assertEqual(self.api.get('/api/guide/clients/?ordering=name').status_code, 400)
+        self.assertEqual(self.api.get('/api/guide/clients/?cursor=bogus').status_code, 404)
+
+    def test_projection_and_query_count(self):
+        response = self.api.get('/api/guide/clients/?fields=id,status')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'status'})
+        self.assertEqual(self.api.get('/api/guide/clients/?fields=id,password').status_code, 400)
+
+        # The query count does not grow with the page size
+        with CaptureQueriesContext(connection) as small:
+            self.api.get('/api/guide/clients/?page_size=5')
+        with CaptureQueriesContext(connection) as large:
+            self.api.get('/api/guide/clients/?page_size=30')
+        self.assertEqual(len(small), len(large))
+        self.assertLessEqual(len(large), 3)
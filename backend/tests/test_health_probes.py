@@ -0,0 +1,132 @@
+"""
+Tests for the concurrent, cached health probes
+Checks parallel execution, per-check timeouts, TTL caching, stale-while-refresh and the health endpoints
+"""
+
+import threading
+import time
+from django.test import TestCase, override_settings
+
+from backend.health_probes import HealthProbes, probes
+
+
+class CountingCheck:
+    def __init__(self, delay=0.0, healthy=True):
+        self.delay = delay
+        self.healthy = healthy
+        self.calls = 0
+        self.finished = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        self.finished.set()
+        return {'healthy': self.healthy, 'calls': self.calls}
+
+
+@override_settings(HEALTH_CHECK_TTL=10, HEALTH_CHECK_MAX_STALE=60, HEALTH_CHECK_TIMEOUT=2)
+class HealthProbesTest(TestCase):
+    """Test the probe engine"""
+
+    def test_checks_run_concurrently(self):
+        """Total latency is the slowest check, not the sum"""
+        health = HealthProbes()
+        for name in ('database', 'cache', 'disk'):
+            health.register(name, CountingCheck(delay=0.3))
+
+        start_time = time.perf_counter()
+        results = health.run()
+        elapsed = time.perf_counter() - start_time
+
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(list(results), ['database', 'cache', 'disk'])
+        for result in results.values():
+            self.assertTrue(result['healthy'])
+            self.assertGreaterEqual(result['latency_ms'], 300)
+            self.assertFalse(result['stale'])
+
+    def test_timeout(self):
+        """A hanging check is reported as timed out, and its late result is kept"""
+        health = HealthProbes()
+        hanging = CountingCheck(delay=0.5)
+        health.register('database', hanging, timeout=0.05)
+
+        start_time = time.perf_counter()
+        result = health.run()['database']
+        self.assertLess(time.perf_counter() - start_time, 0.3)
+        self.assertFalse(result['healthy'])
+        self.assertEqual(result['status'], 'timeout')
+
+        # Probes during the hang reuse the running check instead of starting more
+        health.run()
+        hanging.finished.wait(2)
+        time.sleep(0.05)
+        self.assertEqual(hanging.calls, 1)
+        self.assertTrue(health.run()['database']['healthy'])
+
+    def test_ttl_and_stale_while_refresh(self):
+        """Fresh results are cached; expired ones are served stale while one refresh runs"""
+        health = HealthProbes()
+        check = CountingCheck()
+        health.register('cache', check)
+
+        self.assertEqual(health.run()['cache']['calls'], 1)
+        cached = health.run()['cache']
+        self.assertEqual(check.calls, 1)
+        self.assertFalse(cached['stale'])
+
+        with override_settings(HEALTH_CHECK_TTL=0):
+            check.delay = 0.2
+            check.finished.clear()
+            start_time = time.perf_counter()
+            stale = health.run()['cache']
+            self.assertLess(time.perf_counter() - start_time, 0.1)
+            self.assertTrue(stale['stale'])
+            self.assertEqual(stale['calls'], 1)
+            check.finished.wait(2)
+
+        time.sleep(0.05)
+        self.assertEqual(health.run()['cache']['calls'], 2)
+
+        # Too old to serve: the probe waits for a new result
+        with override_settings(HEALTH_CHECK_TTL=0, HEALTH_CHECK_MAX_STALE=0):
+            check.delay = 0
+            result = health.run()['cache']
+        self.assertEqual(result['calls'], 3)
+        self.assertFalse(result['stale'])
+
+    def test_failing_check(self):
+        health = HealthProbes()
+        health.register('disk', lambda: 1 / 0)
+        result = health.run()['disk']
+        self.assertFalse(result['healthy'])
+        self.assertIn('division by zero', result['error'])
+
+
+class HealthEndpointTest(TestCase):
+    """Test the endpoints backed by the shared probes"""
+
+    def setUp(self):
+        probes.clear()
+
+    def test_detailed_health_check(self):
+        response = self.client.get('/health/detailed/')
+        self.assertIn(response.status_code, (200, 503))
+        data = response.json()
+        self.assertIn(data['status'], ('healthy', 'degraded', 'unhealthy'))
+        self.assertEqual(data['database']['status'], 'connected')
+        self.assertIn('response_time', data['database'])
+        self.assertEqual(data['cache']['status'], 'connected')
+        self.assertEqual(set(data['latency_ms']), {'database', 'cache', 'disk', 'system'})
+
+        # The second probe is answered from the cache
+        cached = self.client.get('/health/detailed/').json()
+        self.assertEqual(cached['database']['checked_at'], data['database']['checked_at'])
+        fresh = self.client.get('/health/detailed/?fresh=1').json()
+        self.assertGreater(fresh['database']['checked_at'], data['database']['checked_at'])
+
+    def test_health_metrics(self):
+        data = self.client.get('/monitoring/health/').json()['data']
+        self.assertTrue(data['database']['healthy'])
+        self.assertIn('latency_ms', data['system'])
+        self.assertIn('active', data['application'])
@@ -0,0 +1,86 @@
+"""
+Tests for crisis intervention metrics
+Checks counts, mean and percentile response times in two queries, and the analytics, guide and crisis views that report them
+"""
+
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from assessments.models import AssessmentType, ClientAssessmentAssignment
+from crisis.interventions import intervention_metrics, percentile
+from crisis.models import CrisisAlert
+from guide.views import get_analytics
+
+User = get_user_model()
+
+
+class InterventionMetricsTest(TestCase):
+    """Test response-time statistics over crisis alerts"""
+
+    def setUp(self):
+        caches['queries'].clear()
+        self.admin = User.objects.create(email='admin@example.com', username='admin', role='admin')
+        self.client_user = User.objects.create(email='client@example.com', username='client')
+        now = timezone.now()
+        created_at = now - timedelta(days=2)
+
+        # Ten alerts resolved after 10, 20, ... 100 minutes, acknowledged after half that
+        for index in range(1, 11):
+            alert = CrisisAlert.objects.create(
+                user=self.client_user, alert_type='self_reported',
+                severity_level='imminent' if index == 10 else 'high', status='resolved'
+            )
+            CrisisAlert.objects.filter(pk=alert.pk).update(
+                created_at=created_at,
+                acknowledged_at=created_at + timedelta(minutes=5 * index),
+                resolved_at=created_at + timedelta(minutes=10 * index)
+            )
+        # One still open and one from long ago
+        CrisisAlert.objects.create(user=self.client_user, alert_type='keyword_detected', severity_level='low')
+        old = CrisisAlert.objects.create(user=self.admin, alert_type='keyword_detected', severity_level='low')
+        CrisisAlert.objects.filter(pk=old.pk).update(created_at=now - timedelta(days=400))
+
+    def test_metrics_in_two_queries(self):
+        alerts = CrisisAlert.objects.filter(created_at__gte=timezone.now() - timedelta(days=30))
+        with self.assertNumQueries(2):
+            metrics = intervention_metrics(alerts)
+
+        self.assertEqual((metrics['total'], metrics['resolved'], metrics['escalations']), (11, 10, 1))
+        self.assertEqual(metrics['resolve'], {'count': 10, 'mean': 55.0, 'p50': 55.0, 'p90': 91.0, 'p99': 99.1})
+        self.assertEqual(metrics['acknowledge']['mean'], 27.5)
+        self.assertEqual(metrics['acknowledge']['p50'], 27.5)
+
+        empty = intervention_metrics(CrisisAlert.objects.none())
+        self.assertEqual(empty['resolve'], {'count': 0, 'mean': None, 'p50': None, 'p90': None, 'p99': None})
+        self.assertIsNone(percentile([], 0.5))
+        self.assertEqual(percentile([1, 2, 3, 4], 0.5), 2.5)
+
+    def test_views(self):
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+
+        interventions = client.get('/api/analytics/?timeRange=30d').data['interventions']
+        self.assertEqual(interventions['totalInterventions'], 11)
+        self.assertEqual(interventions['averageResponseTime'], 55.0)
+        self.assertEqual(interventions['responseTimes']['resolve']['p90'], 91.0)
+
+        assessment_type = AssessmentType.objects.create(
+            name='phq9', display_name='PHQ-9', description='Screening',
+            instructions='Answer every question', max_score=27
+        )
+        ClientAssessmentAssignment.objects.create(guide=self.admin, client=self.client_user, assessment_type=assessment_type)
+        guide_interventions = client.get('/api/guide/analytics/').data['interventions']
+        self.assertEqual(guide_interventions['successfulInterventions'], 10)
+
+        # Crisis stats aggregate on SQLite too, where averaging timestamps is not supported
+        stats = client.get('/api/crisis/stats/')
+        self.assertEqual(stats.status_code, 200)
+        self.assertEqual(stats.data['response_time_avg'], 27.5)
+
+        request = APIRequestFactory().get('/analytics/')
+        force_authenticate(request, user=self.admin)
+        self.assertEqual(get_analytics(request).data['responseTime'], '0.5 hours')
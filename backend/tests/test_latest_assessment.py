@@ -0,0 +1,128 @@
+"""
+Tests for the latest-assessment-per-user primitive
+Checks latest selection, risk buckets, the analytics and guide views that use it and a 50k-user distribution
+"""
+
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models import Count
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from assessments.latest import latest_assessments, risk_bucket, risk_distribution
+from assessments.models import Assessment, AssessmentType, ClientAssessmentAssignment
+from guide.views import get_clients
+
+User = get_user_model()
+
+LEVELS = ['minimal', 'mild', 'moderate', 'moderately_severe', 'severe']
+
+
+def make_users(prefix, count, **fields):
+    return User.objects.bulk_create([
+        User(email=f'{prefix}{index}@example.com', username=f'{prefix}{index}', **fields)
+        for index in range(count)
+    ])
+
+
+def make_assessments(assessment_type, users, levels, age=None):
+    """One assessment per user, optionally backdated by ``age``"""
+    created = Assessment.objects.bulk_create([
+        Assessment(
+            user=user, assessment_type=assessment_type, total_score=0,
+            risk_level=levels[index % len(levels)], interpretation=''
+        )
+        for index, user in enumerate(users)
+    ], batch_size=5000)
+    if age is not None:
+        Assessment.objects.filter(id__in=[assessment.id for assessment in created]).update(
+            completed_at=timezone.now() - age
+        )
+    return created
+
+
+class LatestAssessmentTest(TestCase):
+    """Test latest assessment selection and risk distributions"""
+
+    def setUp(self):
+        caches['queries'].clear()
+        self.assessment_type = AssessmentType.objects.create(
+            name='phq9', display_name='PHQ-9', description='Screening',
+            instructions='Answer every question', max_score=27
+        )
+        # Four users with an old severe assessment; three also have a newer one
+        self.users = make_users('client', 5)
+        make_assessments(self.assessment_type, self.users[:4], ['severe'], age=timedelta(days=40))
+        make_assessments(self.assessment_type, self.users[:3], ['minimal', 'moderate', 'moderately_severe'])
+
+    def test_latest_per_user(self):
+        latest = {row.user_id: row.risk_level for row in latest_assessments()}
+        self.assertEqual(latest, {
+            self.users[0].id: 'minimal',
+            self.users[1].id: 'moderate',
+            self.users[2].id: 'moderately_severe',
+            self.users[3].id: 'severe',
+        })
+        self.assertEqual(risk_bucket('Moderately_Severe'), 'high')
+        self.assertEqual(risk_bucket(None, default='low'), 'low')
+
+    def test_distribution_in_one_query(self):
+        users = User.objects.filter(role='user')
+        with self.assertNumQueries(1):
+            counts = risk_distribution(users)
+        # The user without an assessment counts as low risk
+        self.assertEqual(counts, {'low': 2, 'medium': 1, 'high': 1, 'critical': 1})
+        self.assertEqual(risk_distribution(users, unassessed=None)['low'], 1)
+
+    def test_analytics_views(self):
+        admin = User.objects.create(email='admin@example.com', username='admin', role='admin')
+        client = APIClient()
+        client.force_authenticate(user=admin)
+
+        response = client.get('/api/analytics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['riskAssessment'], {
+            'lowRisk': 2, 'mediumRisk': 1, 'highRisk': 1, 'criticalRisk': 1
+        })
+
+        for user in self.users[1:3]:
+            ClientAssessmentAssignment.objects.create(guide=admin, client=user, assessment_type=self.assessment_type)
+        response = client.get('/api/guide/analytics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['riskAssessment'], {
+            'lowRisk': 0, 'mediumRisk': 1, 'highRisk': 1, 'criticalRisk': 0
+        })
+
+    def test_guide_clients(self):
+        guide = User.objects.create(email='guide@example.com', username='guide', role='guide')
+        request = APIRequestFactory().get('/clients/')
+        force_authenticate(request, user=guide)
+        clients = {client['id']: client for client in get_clients(request).data['results']}
+
+        self.assertEqual(clients[self.users[0].id]['riskLevel'], 'low')
+        self.assertEqual(clients[self.users[2].id]['status'], 'at_risk')
+        self.assertEqual(clients[self.users[3].id]['status'], 'inactive')
+        self.assertEqual(clients[self.users[4].id]['lastAssessment'], None)
+
+
+class RiskDistributionScaleTest(TestCase):
+    """The distribution stays one query at 50k users"""
+
+    def test_fifty_thousand_users(self):
+        assessment_type = AssessmentType.objects.create(
+            name='gad7', display_name='GAD-7', description='Screening',
+            instructions='Answer every question', max_score=21
+        )
+        users = make_users('scale', 50000)
+        make_assessments(assessment_type, users[:40000], ['severe'], age=timedelta(days=30))
+        make_assessments(assessment_type, users[:30000], LEVELS)
+
+        with self.assertNumQueries(1):
+            counts = risk_distribution(User.objects.filter(role='user'))
+
+        # 30k newer assessments cycle through the levels; 10k keep the old severe one; 10k have none
+        self.assertEqual(counts, {'low': 12000 + 10000, 'medium': 6000, 'high': 6000, 'critical': 6000 + 10000})
+        self.assertEqual(sum(counts.values()), 50000)
+        self.assertEqual(latest_assessments().values('user_id').aggregate(users=Count('user_id'))['users'], 40000)
@@ -0,0 +1,106 @@
+"""
+Tests for the queued logging pipeline
+Checks JSON-lines output, access-log sampling, bounded queueing with drop counters and non-blocking emits
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from django.test import TestCase
+
+from backend.log_pipeline import LogPipeline, QueuedHandler, QueuedRotatingFileHandler
+
+
+class SlowHandler(logging.Handler):
+    """Target that stalls like a disk until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.release_writes = threading.Event()
+        self.records = []
+
+    def emit_batch(self, records):
+        self.release_writes.wait(5)
+        self.records.extend(records)
+
+
+class LogPipelineTest(TestCase):
+    """Test the queue, listener and file handler"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.logger = logging.getLogger('test_log_pipeline')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+        shutil.rmtree(self.directory)
+
+    def read_lines(self, path):
+        with open(path) as handle:
+            return [json.loads(line) for line in handle]
+
+    def test_json_lines_with_extra(self):
+        """Records are written as JSON lines carrying their extra fields"""
+        path = os.path.join(self.directory, 'performance.log')
+        handler = QueuedRotatingFileHandler(path, maxBytes=10485760, backupCount=1)
+        self.logger.addHandler(handler)
+
+        self.logger.info('Performance metrics', extra={'path': '/api/"quoted"/', 'db_queries': 3})
+        try:
+            raise ValueError('broken')
+        except ValueError:
+            self.logger.exception('Request exception')
+        self.assertTrue(handler.pipeline.flush())
+
+        first, second = self.read_lines(path)
+        self.assertEqual(first['message'], 'Performance metrics')
+        self.assertEqual(first['path'], '/api/"quoted"/')
+        self.assertEqual(first['db_queries'], 3)
+        self.assertEqual(first['logger'], 'test_log_pipeline')
+        self.assertEqual(second['level'], 'ERROR')
+        self.assertIn('ValueError: broken', second['exception'])
+
+    def test_access_sampling(self):
+        """A sampled stream keeps warnings and counts what it skipped"""
+        path = os.path.join(self.directory, 'access.log')
+        handler = QueuedRotatingFileHandler(path, sample_rate=0)
+        self.logger.addHandler(handler)
+        before = handler.pipeline.sampled_out.get('test_log_pipeline', 0)
+
+        for _ in range(10):
+            self.logger.info('Request completed')
+        self.logger.warning('Slow request')
+        handler.pipeline.flush()
+
+        self.assertEqual([line['message'] for line in self.read_lines(path)], ['Slow request'])
+        self.assertEqual(handler.pipeline.sampled_out['test_log_pipeline'] - before, 10)
+
+    def test_full_queue_drops_without_blocking(self):
+        """A stalled writer never blocks the logging thread; overflow is dropped and counted"""
+        pipeline = LogPipeline(maxsize=50, batch_size=10, flush_interval=0.01)
+        target = SlowHandler()
+        self.logger.addHandler(QueuedHandler(target, pipeline=pipeline))
+
+        start_time = time.perf_counter()
+        for index in range(1000):
+            self.logger.info('record %d', index)
+        elapsed = time.perf_counter() - start_time
+
+        # The listener holds at most one batch while stalled, the queue holds the rest
+        dropped = pipeline.dropped['test_log_pipeline']
+        self.assertGreaterEqual(dropped, 1000 - 50 - 10)
+        self.assertLess(elapsed, 1, f"1000 emits took {elapsed:.3f}s")
+
+        target.release_writes.set()
+        self.assertTrue(pipeline.flush())
+        self.assertEqual(len(target.records) + dropped, 1000)
+        self.assertEqual(target.records[0].getMessage(), 'record 0')
+        self.assertEqual(pipeline.stats()['queue_size'], 0)
@@ -0,0 +1,154 @@
+"""
+Tests for the per-worker metrics registry
+Checks totals stay exact under concurrency, survive exited threads without keeping their shards, merge across workers, estimate quantiles and measures middleware overhead
+"""
+
+import gc
+import random
+import threading
+import time
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory
+
+from backend.metrics import DEFAULT_BUCKETS, MetricsRegistry, MetricsStore, get_api_metrics, histogram_quantile, series_key
+from backend.middleware import MetricsMiddleware
+
+THREADS = 8
+RECORDS = 1000
+
+
+class MetricsRegistryTest(TestCase):
+    """Test recording, flushing and merging of request metrics"""
+
+    def setUp(self):
+        caches['metrics'].clear()
+
+    def test_concurrent_records_are_exact(self):
+        """Counts from many threads add up without a lock on the record path"""
+        registry = MetricsRegistry()
+
+        def record():
+            for _ in range(RECORDS):
+                registry.inc('jobs_total', labels={'kind': 'test'})
+                registry.observe('job_seconds', 0.02)
+
+        threads = [threading.Thread(target=record) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot['counters'][series_key('jobs_total', {'kind': 'test'})], THREADS * RECORDS)
+        histogram = snapshot['histograms'][series_key('job_seconds')]
+        self.assertEqual(histogram[0], THREADS * RECORDS)
+        self.assertAlmostEqual(histogram[1], THREADS * RECORDS * 0.02)
+        self.assertEqual(sum(histogram[2:]), THREADS * RECORDS)
+
+    def test_exited_threads_are_retired(self):
+        """Shards of finished threads are folded into the totals and dropped"""
+        registry = MetricsRegistry()
+        registry.inc('jobs_total')
+
+        for _ in range(50):
+            thread = threading.Thread(target=lambda: (registry.inc('jobs_total'), registry.observe('job_seconds', 0.5)))
+            thread.start()
+            thread.join()
+        gc.collect()
+
+        self.assertEqual(len(registry._shards), 1)
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot['counters'][series_key('jobs_total')], 51)
+        self.assertEqual(snapshot['histograms'][series_key('job_seconds')][0], 50)
+
+    def test_workers_merge_through_shared_cache(self):
+        """Each worker flushes under its own key and readers see the sum"""
+        workers = [MetricsStore(MetricsRegistry()) for _ in range(2)]
+        for count, store in enumerate(workers, start=1):
+            for _ in range(count):
+                store.registry.inc('http_requests_total', labels={'status': '200'})
+            self.assertTrue(store.flush())
+
+        self.assertNotEqual(workers[0].slot, workers[1].slot)
+
+        # Re-flushing cumulative totals must not double count
+        workers[0].flush()
+        merged = workers[1].read()
+        self.assertEqual(merged['workers'], 2)
+        self.assertEqual(merged['counters'][series_key('http_requests_total', {'status': '200'})], 3)
+
+    def test_application_metrics_reflect_requests(self):
+        """Requests through the middleware show up per route template"""
+        before = self.client.get('/monitoring/application/').json()['data']['api']['total_requests']
+        for _ in range(3):
+            self.client.get('/monitoring/health/')
+
+        api = self.client.get('/monitoring/application/').json()['data']['api']
+        self.assertEqual(api['total_requests'], before + 4)
+        self.assertGreaterEqual(api['workers'], 1)
+        self.assertIn('GET monitoring/health/', [endpoint['endpoint'] for endpoint in api['top_endpoints']])
+
+    def test_quantiles_from_log_buckets(self):
+        """Estimated p50/p95/p99 land within one bucket width of the exact values"""
+        registry = MetricsRegistry()
+        generator = random.Random(7)
+        values = sorted(generator.lognormvariate(-3, 1) for _ in range(20000))
+        for value in values:
+            registry.observe('latency', value)
+
+        histogram = registry.snapshot()['histograms'][series_key('latency')]
+        self.assertEqual(len(histogram), 2 + len(DEFAULT_BUCKETS) + 1)
+        for quantile in (0.5, 0.95, 0.99):
+            exact = values[int(quantile * len(values))]
+            estimate = histogram_quantile(DEFAULT_BUCKETS, histogram, quantile)
+            self.assertAlmostEqual(estimate / exact, 1, delta=0.19)
+
+    def test_routes_keyed_by_template(self):
+        """Different object ids share one series and show up in the Prometheus exposition"""
+        for room_id in (1, 2, 3):
+            self.client.get(f'/api/community/chat-rooms/{room_id}/')
+
+        # Looked up among all endpoints: the top ten depend on what earlier tests requested
+        api = self.client.get('/monitoring/application/').json()['data']['api']
+        self.assertTrue(api['top_endpoints'])
+        endpoints = get_api_metrics()['endpoints']
+        room = endpoints['GET api/community/chat-rooms/<int:pk>/']
+        self.assertGreaterEqual(room['count'], 3)
+        self.assertIsNotNone(room['p99'])
+        self.assertFalse(any('chat-rooms/1/' in endpoint for endpoint in endpoints))
+
+        response = self.client.get('/monitoring/prometheus/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{method="GET",route="api/community/chat-rooms/<int:pk>/",le="+Inf"}',
+            body
+        )
+
+    def test_middleware_overhead(self):
+        """Recording a request adds only microseconds compared to no middleware"""
+        factory = RequestFactory()
+        response = HttpResponse()
+
+        def view(request):
+            return response
+
+        middleware = MetricsMiddleware(view)
+        request = factory.get('/api/mood/')
+        iterations = 5000
+
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            view(request)
+        baseline = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            middleware(request)
+        instrumented = time.perf_counter() - start_time
+
+        overhead = (instrumented - baseline) / iterations
+        self.assertLess(overhead, 200e-6, f"{overhead * 1e6:.1f}µs per request")
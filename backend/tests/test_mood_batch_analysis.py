@@ -0,0 +1,138 @@
+"""
+Tests for batched emotion analysis
+Benchmarks the shared worker pool against sequential analysis and checks per-frame timeouts and session bookkeeping
+"""
+
+import base64
+import threading
+import time
+from functools import partial
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from mood.analysis import analysis_pool, analyze_frames
+from mood.models import MoodAnalysisSession
+from mood.views import perform_mock_emotion_analysis
+
+User = get_user_model()
+
+FRAME = 'data:image/png;base64,' + base64.b64encode(b'\x89PNG\r\n\x1a\n' + b'\x00' * 256).decode('ascii')
+LATENCY = 0.2
+
+
+def failing_analysis(image_data, include_breakdown=True):
+    raise RuntimeError('upstream unavailable')
+
+
+class BatchEmotionAnalysisTest(TestCase):
+    """Test frames are analyzed concurrently on the shared pool"""
+
+    def setUp(self):
+        # Timed out frames from an earlier test may still hold workers
+        analysis_pool.wait()
+        self.user = User.objects.create_user(
+            email='batch@example.com',
+            username='batchuser',
+            password='testpass123',
+            is_active=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_pool_throughput_beats_sequential(self):
+        """Eight frames with fixed latency finish in well under the sequential time"""
+        analyzer = partial(perform_mock_emotion_analysis, latency=LATENCY)
+        frames = [FRAME] * 8
+
+        start_time = time.time()
+        for frame in frames:
+            analyzer(frame)
+        sequential = time.time() - start_time
+
+        start_time = time.time()
+        results = analyze_frames(frames, analyzer)
+        concurrent = time.time() - start_time
+
+        self.assertEqual([result['index'] for result in results], list(range(8)))
+        self.assertTrue(all(result['status'] == 'success' for result in results))
+        self.assertLess(concurrent, sequential / 3)
+
+    def test_timeouts_and_errors_reported_per_frame(self):
+        """Slow frames time out and failing frames report their error"""
+        slow = partial(perform_mock_emotion_analysis, latency=0.5)
+
+        results = analyze_frames([FRAME, FRAME], slow, timeout=0.05)
+        self.assertEqual([result['status'] for result in results], ['timeout', 'timeout'])
+
+        results = analyze_frames([FRAME], failing_analysis)
+        self.assertEqual(results[0]['status'], 'error')
+        self.assertIn('upstream unavailable', results[0]['error'])
+
+    def test_queued_frames_get_their_own_timeout(self):
+        """Frames queued behind a full pool are timed from when they start"""
+        workers = analysis_pool.max_workers
+        slow = partial(perform_mock_emotion_analysis, latency=0.3)
+
+        results = analyze_frames([FRAME] * (workers + 2), slow, timeout=0.5)
+        self.assertTrue(all(result['status'] == 'success' for result in results))
+
+    def test_frames_that_never_start_are_cancelled(self):
+        """A frame still queued at the timeout is dropped rather than run"""
+        release = threading.Event()
+        calls = []
+
+        def blocked(image_data, include_breakdown=True):
+            calls.append(image_data)
+            release.wait(5)
+            return {}
+
+        workers = analysis_pool.max_workers
+        results = analyze_frames([FRAME] * (workers + 1), blocked, timeout=0.05)
+        release.set()
+        analysis_pool.wait()
+
+        self.assertEqual([result['status'] for result in results], ['timeout'] * (workers + 1))
+        self.assertIn('did not start', results[-1]['error'])
+        self.assertEqual(len(calls), workers)
+
+    @patch('mood.views.request_azure_emotion_analysis', partial(perform_mock_emotion_analysis, latency=0.01))
+    def test_batch_endpoint_updates_session(self):
+        """Each batch adds its captures to the same analysis session"""
+        for _ in range(2):
+            response = self.client.post('/api/mood/analyze/batch/', {
+                'frames': [FRAME] * 3,
+                'session_id': 'session-1'
+            }, format='json')
+            self.assertEqual(response.status_code, 200, response.content)
+
+        data = response.json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertEqual(data['successful_analyses'], 3)
+
+        session = MoodAnalysisSession.objects.get(session_id='session-1')
+        self.assertEqual(session.user, self.user)
+        self.assertEqual(session.total_captures, 6)
+        self.assertEqual(session.successful_analyses, 6)
+        self.assertGreater(session.processing_time, 0)
+
+    @override_settings(MOOD_ANALYSIS_MAX_BATCH=4)
+    def test_batch_validation(self):
+        """Empty, oversized, undecodable and foreign-session batches are rejected"""
+        for frames in ([], [FRAME] * 5, ['not base64!']):
+            response = self.client.post('/api/mood/analyze/batch/', {'frames': frames}, format='json')
+            self.assertEqual(response.status_code, 400)
+
+        other = User.objects.create_user(
+            email='other@example.com',
+            username='otheruser',
+            password='testpass123',
+            is_active=True
+        )
+        MoodAnalysisSession.objects.create(user=other, session_id='theirs')
+        response = self.client.post('/api/mood/analyze/batch/', {
+            'frames': [FRAME],
+            'session_id': 'theirs'
+        }, format='json')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,135 @@
+"""
+Tests for the content-addressed mood image blob store
+Covers storing images outside the mood entry rows and streaming them back on demand
+"""
+
+import base64
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from mood.blobs import get_blob_store, decode_image_data
+from mood.models import MoodEntry
+
+User = get_user_model()
+
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + b'\x00' * 2048
+PNG_DATA_URL = 'data:image/png;base64,' + base64.b64encode(PNG_BYTES).decode('ascii')
+BREAKDOWN = {'happy': 0.7, 'sad': 0.1, 'angry': 0.0, 'surprised': 0.1, 'neutral': 0.1, 'fear': 0.0, 'disgust': 0.0}
+
+
+class MoodBlobStoreTest(TestCase):
+    """Test mood images are stored by digest and streamed on demand"""
+
+    def setUp(self):
+        self.blob_root = tempfile.mkdtemp()
+        self.override = override_settings(MOOD_BLOB_ROOT=self.blob_root)
+        self.override.enable()
+
+        self.user = User.objects.create_user(
+            email='blob@example.com',
+            username='blobuser',
+            password='testpass123',
+            is_active=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.blob_root, ignore_errors=True)
+
+    def create_entry(self, image_data=PNG_DATA_URL):
+        response = self.client.post('/api/mood/entries/', {
+            'emotion': 'happy',
+            'confidence': 0.7,
+            'emotions_breakdown': BREAKDOWN,
+            'image_data': image_data
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def test_decode_image_data(self):
+        """Data URLs and bare base64 decode to bytes and a mime type"""
+        self.assertEqual(decode_image_data(PNG_DATA_URL), (PNG_BYTES, 'image/png'))
+        self.assertEqual(decode_image_data(base64.b64encode(PNG_BYTES).decode())[1], 'image/png')
+        with self.assertRaises(ValueError):
+            decode_image_data('not base64!')
+
+    def test_identical_images_stored_once(self):
+        """Entries with the same image share one blob"""
+        first = self.create_entry()
+        second = self.create_entry()
+
+        digests = set(MoodEntry.objects.values_list('image_sha256', flat=True))
+        self.assertEqual(len(digests), 1)
+        self.assertTrue(get_blob_store().exists(digests.pop()))
+        self.assertTrue(first['image_url'].endswith(f"/api/mood/entries/{first['id']}/image/"))
+        self.assertNotEqual(first['id'], second['id'])
+
+    def test_list_responses_carry_no_image_bytes(self):
+        """Listing entries returns image URLs, never the payload"""
+        self.create_entry()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/mood/entries/')
+        entry = response.json()['results'][0]
+
+        self.assertNotIn('image_data', entry)
+        self.assertTrue(entry['has_image'])
+        self.assertLess(len(response.content), 2048)
+        self.assertFalse(any('image_data' in query['sql'] for query in queries))
+
+    def test_stream_image(self):
+        """The image endpoint streams the original bytes with a digest ETag"""
+        entry = self.create_entry()
+
+        response = self.client.get(entry['image_url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(b''.join(response.streaming_content), PNG_BYTES)
+
+        response = self.client.get(entry['image_url'], HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_users_cannot_stream_image(self):
+        """Images are only served to their owner"""
+        entry = self.create_entry()
+        other = User.objects.create_user(
+            email='other@example.com',
+            username='otheruser',
+            password='testpass123',
+            is_active=True
+        )
+        self.client.force_authenticate(user=other)
+
+        response = self.client.get(entry['image_url'])
+        self.assertEqual(response.status_code, 404)
+
+    def test_blob_removed_with_last_reference(self):
+        """Deleting the last entry that uses an image removes its blob"""
+        self.create_entry()
+        self.create_entry()
+        digest = MoodEntry.objects.values_list('image_sha256', flat=True).first()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MoodEntry.objects.first().delete()
+        self.assertTrue(get_blob_store().exists(digest))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MoodEntry.objects.first().delete()
+        self.assertFalse(get_blob_store().exists(digest))
+
+    def test_invalid_image_rejected(self):
+        """Undecodable image data is a validation error"""
+        response = self.client.post('/api/mood/entries/', {
+            'emotion': 'happy',
+            'confidence': 0.7,
+            'emotions_breakdown': BREAKDOWN,
+            'image_data': 'not base64!'
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
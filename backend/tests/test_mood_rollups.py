@@ -0,0 +1,186 @@
+"""
+Tests for the daily mood rollups kept in MoodTrend
+Covers the signal-driven upserts, the repair command and the dashboards that read from them
+"""
+
+from datetime import timedelta
+from io import StringIO
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from mood.models import MoodEntry, MoodTrend
+from mood.rollups import rebuild_mood_trends
+
+User = get_user_model()
+
+EMOTIONS = ['happy', 'sad', 'neutral', 'surprised', 'angry']
+
+
+def seed_mood_days(user, days, skip_every=5):
+    """One to three mood entries per day for the last ``days`` days, with rollups backfilled"""
+    now = timezone.now()
+    entries = []
+    timestamps = []
+    for offset in range(days):
+        # Leave some gaps so days without entries are exercised
+        if offset % skip_every == skip_every - 1:
+            continue
+        for slot in range(offset % 3 + 1):
+            entries.append(MoodEntry(
+                user=user,
+                emotion=EMOTIONS[(offset + slot) % len(EMOTIONS)],
+                confidence=0.5,
+                emotions_breakdown={}
+            ))
+            timestamps.append(now - timedelta(days=offset, minutes=slot))
+
+    entries = MoodEntry.objects.bulk_create(entries)
+    # timestamp is auto_now_add, so backdate it after the insert
+    for entry, timestamp in zip(entries, timestamps):
+        entry.timestamp = timestamp
+    MoodEntry.objects.bulk_update(entries, ['timestamp'], batch_size=500)
+
+    # Bulk writes skip the rollup signals
+    rebuild_mood_trends(user_ids=[user.id])
+    return entries
+
+
+class MoodRollupSignalTest(TestCase):
+    """Test that entry writes keep the daily rollup in sync"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='rollup@example.com',
+            username='rollupuser',
+            password='testpass123',
+            is_active=True
+        )
+        self.today = timezone.localdate()
+
+    def create_entry(self, emotion, confidence):
+        return MoodEntry.objects.create(
+            user=self.user,
+            emotion=emotion,
+            confidence=confidence,
+            emotions_breakdown={}
+        )
+
+    def test_create_upserts_daily_rollup(self):
+        """Creating entries updates one rollup row for the day"""
+        self.create_entry('happy', 0.8)
+        self.create_entry('happy', 0.6)
+        self.create_entry('sad', 0.4)
+
+        trend = MoodTrend.objects.get(user=self.user, date=self.today)
+        self.assertEqual(trend.total_entries, 3)
+        self.assertEqual(trend.dominant_emotion, 'happy')
+        self.assertAlmostEqual(trend.average_confidence, 0.6)
+        self.assertEqual(trend.emotion_distribution, {'happy': 2, 'sad': 1})
+
+    def test_update_and_delete_refresh_rollup(self):
+        """Updating or deleting an entry recomputes the day"""
+        entry = self.create_entry('sad', 0.5)
+        self.create_entry('happy', 0.7)
+
+        entry.emotion = 'happy'
+        entry.save()
+        trend = MoodTrend.objects.get(user=self.user, date=self.today)
+        self.assertEqual(trend.emotion_distribution, {'happy': 2})
+
+        MoodEntry.objects.filter(user=self.user).first().delete()
+        entry.refresh_from_db()
+        entry.delete()
+        self.assertFalse(MoodTrend.objects.filter(user=self.user).exists())
+
+    def test_moving_entry_to_another_day(self):
+        """Changing an entry timestamp moves it between daily rollups"""
+        entry = self.create_entry('neutral', 0.5)
+        entry.timestamp = entry.timestamp - timedelta(days=2)
+        entry.save()
+
+        self.assertFalse(MoodTrend.objects.filter(user=self.user, date=self.today).exists())
+        self.assertTrue(MoodTrend.objects.filter(
+            user=self.user, date=self.today - timedelta(days=2)
+        ).exists())
+
+
+class RebuildMoodTrendsCommandTest(TestCase):
+    """Test the backfill and repair command"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='backfill@example.com',
+            username='backfilluser',
+            password='testpass123',
+            is_active=True
+        )
+
+    def test_backfill_and_repair(self):
+        """The command recreates missing rollups and drops stale ones"""
+        seed_mood_days(self.user, days=60)
+        expected = MoodTrend.objects.filter(user=self.user).count()
+
+        MoodTrend.objects.filter(user=self.user).delete()
+        MoodTrend.objects.create(
+            user=self.user,
+            date=timezone.localdate() - timedelta(days=400),
+            dominant_emotion='sad',
+            average_confidence=0.5,
+            total_entries=1
+        )
+
+        out = StringIO()
+        call_command('rebuild_mood_trends', stdout=out)
+
+        self.assertEqual(MoodTrend.objects.filter(user=self.user).count(), expected)
+        self.assertIn('removed 1 stale', out.getvalue())
+
+
+class MoodDashboardRollupTest(TestCase):
+    """Test that dashboard cost does not depend on the number of entries"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def make_user(self, name, entries_per_day):
+        user = User.objects.create_user(
+            email=f'{name}@example.com',
+            username=name,
+            password='testpass123',
+            is_active=True
+        )
+        now = timezone.now()
+        entries = MoodEntry.objects.bulk_create([
+            MoodEntry(user=user, emotion='happy', confidence=0.7, emotions_breakdown={})
+            for _ in range(30 * entries_per_day)
+        ])
+        for index, entry in enumerate(entries):
+            entry.timestamp = now - timedelta(days=index // entries_per_day)
+        MoodEntry.objects.bulk_update(entries, ['timestamp'])
+        call_command('rebuild_mood_trends', stdout=StringIO())
+        return user
+
+    def count_queries(self, user, url):
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:2000])
+        return len(queries), response.json()
+
+    def test_dashboards_read_rollups(self):
+        """Stats and dashboard run the same queries for light and heavy users"""
+        light = self.make_user('light', 1)
+        heavy = self.make_user('heavy', 20)
+
+        for url in ('/api/mood/stats/', '/api/mood/dashboard/'):
+            light_queries, light_data = self.count_queries(light, url)
+            heavy_queries, heavy_data = self.count_queries(heavy, url)
+            self.assertEqual(light_queries, heavy_queries)
+
+        self.assertEqual(heavy_data['total_entries'], 600)
+        self.assertEqual(heavy_data['entries_today'], 20)
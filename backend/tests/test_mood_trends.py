@@ -0,0 +1,138 @@
+"""
+Benchmark tests for the mood trend engine
+Seeds a full year of mood entries and checks the trend endpoints run a fixed number of queries
+"""
+
+import random
+from datetime import timedelta
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db.models import Avg, Count
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from mood.models import MoodEntry
+from mood.rollups import rebuild_mood_trends
+from mood.trends import build_trend_data
+
+User = get_user_model()
+
+EMOTIONS = ['happy', 'sad', 'neutral', 'surprised', 'angry', 'fear', 'disgust']
+
+
+def seed_mood_year(user, days=365, skip_every=5):
+    """Create one to three mood entries per day for the last ``days`` days"""
+    rng = random.Random(user.id)
+    now = timezone.now()
+    entries = []
+    timestamps = []
+
+    for offset in range(days):
+        # Leave some gaps so the empty-day fill is exercised
+        if offset % skip_every == skip_every - 1:
+            continue
+        for slot in range(rng.randint(1, 3)):
+            entries.append(MoodEntry(
+                user=user,
+                emotion=rng.choice(EMOTIONS),
+                confidence=round(rng.uniform(0.2, 0.95), 3),
+                emotions_breakdown={}
+            ))
+            timestamps.append(now - timedelta(days=offset, minutes=slot))
+
+    entries = MoodEntry.objects.bulk_create(entries)
+    # timestamp is auto_now_add, so backdate it after the insert
+    for entry, timestamp in zip(entries, timestamps):
+        entry.timestamp = timestamp
+    MoodEntry.objects.bulk_update(entries, ['timestamp'], batch_size=500)
+
+    # Bulk writes skip the rollup signals, so backfill them like the command does
+    rebuild_mood_trends(user_ids=[user.id])
+    return entries
+
+
+def legacy_trend_data(user, days):
+    """Reference implementation: the old one-day-at-a-time loop"""
+    end_date = timezone.now().date()
+    current_date = end_date - timedelta(days=days-1)
+    trend_data = []
+
+    while current_date <= end_date:
+        day_entries = MoodEntry.objects.filter(user=user, timestamp__date=current_date)
+        if day_entries.exists():
+            avg_confidence = day_entries.aggregate(avg=Avg('confidence'))['avg']
+            counts = {
+                row['emotion']: row['count']
+                for row in day_entries.values('emotion').annotate(count=Count('emotion'))
+            }
+        else:
+            avg_confidence = None
+            counts = {}
+
+        trend_data.append({
+            'date': current_date.isoformat(),
+            'average_confidence': round(avg_confidence, 3) if avg_confidence else None,
+            'emotion_counts': counts,
+            'entry_count': day_entries.count()
+        })
+        current_date += timedelta(days=1)
+
+    return trend_data
+
+
+class MoodTrendEngineTest(TestCase):
+    """Test the grouped-query mood trend engine"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='trend@example.com',
+            username='trenduser',
+            password='testpass123',
+            is_active=True
+        )
+        seed_mood_year(cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_matches_legacy_output(self):
+        """Trend data matches the per-day loop it replaces"""
+        trend = build_trend_data(self.user, 30)
+        legacy = legacy_trend_data(self.user, 30)
+
+        self.assertEqual(len(trend), 30)
+        for day, expected in zip(trend, legacy):
+            self.assertEqual(day['date'], expected['date'])
+            self.assertEqual(day['entry_count'], expected['entry_count'])
+            self.assertEqual(day['average_confidence'], expected['average_confidence'])
+            if expected['emotion_counts']:
+                top = max(expected['emotion_counts'].values())
+                self.assertEqual(expected['emotion_counts'][day['dominant_emotion']], top)
+            else:
+                self.assertIsNone(day['dominant_emotion'])
+
+    def test_empty_days_are_filled(self):
+        """Days without entries are present with empty values"""
+        trend = build_trend_data(self.user, 365)
+        empty_days = [day for day in trend if day['entry_count'] == 0]
+
+        self.assertEqual(len(trend), 365)
+        self.assertTrue(empty_days)
+        for day in empty_days:
+            self.assertIsNone(day['average_confidence'])
+            self.assertIsNone(day['dominant_emotion'])
+
+    def test_single_query_per_period(self):
+        """Week, month and year trends each cost one query"""
+        for days in (7, 30, 365):
+            with self.assertNumQueries(1):
+                build_trend_data(self.user, days)
+
+    def test_trends_endpoint_query_count_is_fixed(self):
+        """The trends endpoint cost does not grow with the period"""
+        for period in ('week', 'month', 'year'):
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/mood/trends/', {'period': period})
+            self.assertEqual(response.status_code, 200)
@@ -0,0 +1,62 @@
+"""
+Tests for the per-request SQL profiler
+Checks query fingerprinting, N+1 detection, sampling and the slow query report
+"""
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from backend.sql_profiler import fingerprint, get_slow_query_log, profile_queries
+
+User = get_user_model()
+
+
+class SQLProfilerTest(TestCase):
+    """Test profiling of queries per request"""
+
+    def setUp(self):
+        get_slow_query_log().clear()
+        User.objects.bulk_create([
+            User(email=f'profiled{index}@example.com', username=f'profiled{index}')
+            for index in range(12)
+        ])
+
+    def test_fingerprint_collapses_literals(self):
+        """Queries differing only in values share one shape"""
+        first = fingerprint("SELECT * FROM t WHERE id = 5 AND name = 'bob' AND x IN (%s, %s, %s)")
+        second = fingerprint("SELECT *  FROM t WHERE id = 17 AND name = 'it''s' AND x IN (%s)")
+        self.assertEqual(first, "SELECT * FROM t WHERE id = ? AND name = ? AND x IN (...)")
+        self.assertEqual(first, second)
+        self.assertEqual(fingerprint('SELECT "t1"."col2" FROM "t1"'), 'SELECT "t1"."col2" FROM "t1"')
+
+    def test_per_row_loop_flagged(self):
+        """A query repeated once per row is reported as a probable N+1"""
+        with profile_queries() as profile:
+            for user in User.objects.all():
+                User.objects.filter(pk=user.pk).exists()
+
+        self.assertEqual(profile.count, 13)
+        (shape, count, duration), = profile.n_plus_one()
+        self.assertEqual(count, 12)
+        self.assertIn('LIMIT ?', shape)
+        self.assertGreater(duration, 0)
+        self.assertEqual(profile.n_plus_one(threshold=12), [])
+
+    @override_settings(SQL_PROFILER_SAMPLE_RATE=0)
+    def test_unsampled_requests_have_no_headers(self):
+        response = self.client.get('/monitoring/application/')
+        self.assertNotIn('X-DB-Query-Count', response)
+        self.assertEqual(get_slow_query_log().report()['profiled_requests'], 0)
+
+    @override_settings(SQL_PROFILER_SAMPLE_RATE=1, SQL_PROFILER_N_PLUS_ONE_THRESHOLD=0)
+    def test_sampled_request_reported(self):
+        """Profiled responses carry DB headers and land in the slow query report"""
+        response = self.client.get('/monitoring/application/')
+        self.assertGreaterEqual(int(response['X-DB-Query-Count']), 1)
+        self.assertTrue(response['X-DB-Time'].endswith('ms'))
+        self.assertGreaterEqual(int(response['X-DB-N-Plus-One']), 1)
+
+        data = self.client.get('/monitoring/slow-queries/').json()['data']
+        self.assertEqual(data['profiled_requests'], 1)
+        self.assertTrue(data['top_queries'])
+        self.assertEqual(data['n_plus_one'][0]['route'], 'GET monitoring/application/')
@@ -0,0 +1,169 @@
+"""
+Tests for persisted check-in streaks
+Covers incremental updates, the rebuild command and single-lookup streak reads
+"""
+
+from datetime import timedelta
+from io import StringIO
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from mood.models import MoodEntry as CameraMoodEntry
+from mood.views import calculate_mood_streak
+from wellness.models import MoodEntry, CheckInStreak, Achievement, UserAchievement
+from wellness.streaks import compute_streak, get_current_streak
+
+User = get_user_model()
+
+
+def check_in(user, day):
+    return MoodEntry.objects.create(
+        user=user,
+        mood_rating=4,
+        energy_level=3,
+        anxiety_level=2,
+        sleep_quality=4,
+        date=day
+    )
+
+
+class StreakComputationTest(TestCase):
+    """Test the streak arithmetic"""
+
+    def test_compute_streak(self):
+        """Current run ends on the last date, longest covers the whole history"""
+        today = timezone.now().date()
+        dates = [today - timedelta(days=offset) for offset in (9, 8, 7, 6, 2, 1, 0)]
+
+        self.assertEqual(compute_streak(dates), (3, 4, today))
+        self.assertEqual(compute_streak([]), (0, 0, None))
+
+
+class WellnessStreakTest(TestCase):
+    """Test incremental streak tracking for wellness check-ins"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='streak@example.com',
+            username='streakuser',
+            password='testpass123',
+            is_active=True
+        )
+        self.today = timezone.now().date()
+
+    def test_consecutive_check_ins_extend_streak(self):
+        """Each consecutive day extends the stored streak"""
+        for offset in (4, 3, 2, 1, 0):
+            check_in(self.user, self.today - timedelta(days=offset))
+
+        streak = CheckInStreak.objects.get(user=self.user, source='wellness')
+        self.assertEqual(streak.current_streak, 5)
+        self.assertEqual(streak.longest_streak, 5)
+        self.assertEqual(streak.last_check_in_date, self.today)
+
+    def test_gap_resets_and_backfill_repairs(self):
+        """A missed day resets the streak, a backdated check-in joins the runs again"""
+        check_in(self.user, self.today - timedelta(days=3))
+        check_in(self.user, self.today - timedelta(days=1))
+        check_in(self.user, self.today)
+        self.assertEqual(get_current_streak(self.user, 'wellness'), 2)
+
+        check_in(self.user, self.today - timedelta(days=2))
+        self.assertEqual(get_current_streak(self.user, 'wellness'), 4)
+
+    def test_delete_recomputes_streak(self):
+        """Deleting a check-in in the middle splits the streak"""
+        entries = [check_in(self.user, self.today - timedelta(days=offset)) for offset in (2, 1, 0)]
+        entries[1].delete()
+
+        streak = CheckInStreak.objects.get(user=self.user, source='wellness')
+        self.assertEqual(streak.current_streak, 1)
+        self.assertEqual(streak.longest_streak, 1)
+
+    def test_streak_broken_without_check_in_today(self):
+        """The current streak is zero until the user checks in today"""
+        check_in(self.user, self.today - timedelta(days=2))
+        check_in(self.user, self.today - timedelta(days=1))
+
+        self.assertEqual(get_current_streak(self.user, 'wellness'), 0)
+        self.assertEqual(CheckInStreak.objects.get(user=self.user).longest_streak, 2)
+
+    def test_achievement_check_is_a_single_lookup(self):
+        """Creating an entry awards streak achievements without walking history"""
+        Achievement.objects.create(
+            name='3_day_streak',
+            description='Log your mood for 3 consecutive days',
+            category='wellness',
+            icon='fire',
+            points_reward=25,
+            criteria={'type': 'mood_streak', 'target': 3}
+        )
+        for offset in (60, 59, 58):
+            check_in(self.user, self.today - timedelta(days=offset))
+        check_in(self.user, self.today - timedelta(days=2))
+        check_in(self.user, self.today - timedelta(days=1))
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.post('/api/wellness/api/v2/mood-entries-v2/', {
+            'mood_rating': 4,
+            'energy_level': 3,
+            'anxiety_level': 2,
+            'sleep_quality': 4,
+            'date': self.today.isoformat()
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(UserAchievement.objects.filter(
+            user=self.user, achievement__name='3_day_streak'
+        ).exists())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_current_streak(self.user, 'wellness'), 3)
+
+
+class MoodStreakRebuildTest(TestCase):
+    """Test the camera mood streak and the rebuild command"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='camera@example.com',
+            username='camerauser',
+            password='testpass123',
+            is_active=True
+        )
+
+    def test_rebuild_from_history(self):
+        """Bulk-loaded history is picked up by the rebuild command"""
+        now = timezone.now()
+        entries = CameraMoodEntry.objects.bulk_create([
+            CameraMoodEntry(user=self.user, emotion='happy', confidence=0.6, emotions_breakdown={})
+            for _ in range(10)
+        ])
+        for offset, entry in enumerate(entries):
+            entry.timestamp = now - timedelta(days=offset)
+        CameraMoodEntry.objects.bulk_update(entries, ['timestamp'])
+
+        self.assertEqual(calculate_mood_streak(self.user), 0)
+
+        call_command('rebuild_streaks', source='mood', stdout=StringIO())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(calculate_mood_streak(self.user), 10)
+        self.assertEqual(CheckInStreak.objects.get(user=self.user, source='mood').longest_streak, 10)
+
+    def test_new_camera_entry_updates_streak(self):
+        """Camera mood entries count towards the mood streak"""
+        CameraMoodEntry.objects.create(user=self.user, emotion='sad', confidence=0.4, emotions_breakdown={})
+        self.assertEqual(calculate_mood_streak(self.user), 1)
+
+    def test_deleting_user_cleans_up(self):
+        """Cascading deletes do not leave streak rows behind"""
+        CameraMoodEntry.objects.create(user=self.user, emotion='sad', confidence=0.4, emotions_breakdown={})
+        check_in(self.user, timezone.now().date())
+        self.user.delete()
+
+        self.assertFalse(CheckInStreak.objects.exists())
@@ -0,0 +1,134 @@
+"""
+Tests for the background system sampler
+Checks ring-buffer downsampling, wraparound, persistence across restarts and the trends endpoint
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from functools import partial
+from unittest.mock import patch
+from django.test import TestCase
+
+from backend.sampler import RingBufferStore, SystemSampler, get_trends
+
+TIERS = (
+    ('1m', 60, 3),
+    ('5m', 300, 4),
+)
+
+
+def sample(cpu, requests=0, errors=0, response_time_total=0.0):
+    return {
+        'cpu_percent': cpu,
+        'memory_percent': 50.0,
+        'disk_percent': 40.0,
+        'requests': requests,
+        'errors': errors,
+        'response_time_total': response_time_total,
+    }
+
+
+class RingBufferStoreTest(TestCase):
+    """Test downsampling ring buffers in a memory-mapped file"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'metrics.ring')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_downsampling_tiers(self):
+        """Gauges are averaged and counters summed per bucket at every resolution"""
+        store = RingBufferStore(self.path, tiers=TIERS)
+        # Ten samples every 30 seconds span five full minutes
+        for index in range(10):
+            store.record(index * 30, sample(cpu=index, requests=2))
+        store.record(600, sample(cpu=0))
+
+        minutes = store.read('1m')
+        # Only the newest three minutes fit the ring, oldest first
+        self.assertEqual([timestamp for timestamp, _ in minutes], [120, 180, 240])
+        self.assertEqual([values['cpu_percent'] for _, values in minutes], [4.5, 6.5, 8.5])
+        self.assertTrue(all(values['requests'] == 4 for _, values in minutes))
+
+        (timestamp, five_minutes), = store.read('5m')
+        self.assertEqual(timestamp, 0)
+        self.assertEqual(five_minutes['cpu_percent'], 4.5)
+        self.assertEqual(five_minutes['requests'], 20)
+
+        self.assertEqual(len(store.read('1m', since=200)), 1)
+
+    def test_history_survives_restart(self):
+        """A new store on the same file sees completed points and resumes the partial bucket"""
+        store = RingBufferStore(self.path, tiers=TIERS)
+        store.record(0, sample(cpu=10))
+        store.record(60, sample(cpu=20))
+        store.close()
+
+        restarted = RingBufferStore(self.path, tiers=TIERS)
+        self.assertEqual([values['cpu_percent'] for _, values in restarted.read('1m')], [10])
+        restarted.record(90, sample(cpu=40))
+        restarted.record(120, sample(cpu=0))
+        self.assertEqual([values['cpu_percent'] for _, values in restarted.read('1m')], [10, 30])
+
+    def test_layout_change_resets_file(self):
+        """A file written with different tiers is reset rather than misread"""
+        store = RingBufferStore(self.path, tiers=TIERS)
+        store.record(0, sample(cpu=10))
+        store.record(60, sample(cpu=10))
+        store.close()
+
+        other = RingBufferStore(self.path, tiers=(('1m', 60, 10),))
+        self.assertEqual(other.read('1m'), [])
+        other.record(0, sample(cpu=5))
+        self.assertEqual(other.read('1m'), [])
+
+
+class PerformanceTrendsTest(TestCase):
+    """Test performance_trends serves the sampled series"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.sampler = SystemSampler(RingBufferStore(os.path.join(self.directory, 'metrics.ring')))
+
+    def tearDown(self):
+        self.sampler.store.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_collect_reports_increases(self):
+        """Request counters are reported as increases between samples"""
+        api = {'total_requests': 10, 'status_codes': {'200': 8, '500': 2}, 'total_response_time': 1.0}
+        with patch('backend.metrics.get_api_metrics', return_value=api):
+            self.assertEqual(self.sampler.collect()['requests'], 0)
+            api = {'total_requests': 15, 'status_codes': {'200': 12, '500': 3}, 'total_response_time': 1.5}
+            with patch('backend.metrics.get_api_metrics', return_value=api):
+                values = self.sampler.collect()
+
+        self.assertEqual(values['requests'], 5)
+        self.assertEqual(values['errors'], 1)
+        self.assertAlmostEqual(values['response_time_total'], 0.5)
+        self.assertGreaterEqual(values['memory_percent'], 0)
+
+    def test_trends_endpoint(self):
+        """The last hour is served from the one-minute tier with derived rates"""
+        now = time.time()
+        start = now - now % 60 - 600
+        for minute in range(10):
+            self.sampler.store.record(start + minute * 60, sample(
+                cpu=minute, requests=120, errors=6, response_time_total=12.0
+            ))
+
+        with patch('backend.monitoring_views.get_trends', partial(get_trends, sampler=self.sampler)):
+            response = self.client.get('/monitoring/trends/?hours=1')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['resolution'], '1m')
+        self.assertEqual(len(data['timestamps']), 9)
+        self.assertEqual(data['request_rates'][0], 2.0)
+        self.assertEqual(data['error_rates'][0], 0.05)
+        self.assertEqual(data['response_times'][0], 0.1)
+        self.assertEqual(data['cpu_usage'][:3], [0.0, 1.0, 2.0])
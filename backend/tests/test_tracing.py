@@ -0,0 +1,125 @@
+"""
+Tests for request tracing
+Checks request IDs, sampled traces in OTLP shape, outbound call propagation and the slowest-trace report
+"""
+
+import io
+import json
+import time
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+import requests
+
+from backend import trace_report
+from backend.tracing import KIND_CLIENT, export, instrument, span, start_trace
+
+User = get_user_model()
+
+
+def exported_spans(logs):
+    (line,) = logs.output
+    document = json.loads(line.split(':', 2)[2])
+    return document['resourceSpans'][0]['scopeSpans'][0]['spans']
+
+
+class RequestIDTest(TestCase):
+    """Test X-Request-ID assignment and propagation"""
+
+    @override_settings(TRACING_SAMPLE_RATE=0)
+    def test_request_ids(self):
+        first = self.client.get('/monitoring/slow-queries/')['X-Request-ID']
+        second = self.client.get('/monitoring/slow-queries/')['X-Request-ID']
+        self.assertEqual(len(first), 32)
+        self.assertNotEqual(first, second)
+
+        response = self.client.get('/monitoring/slow-queries/', HTTP_X_REQUEST_ID='upstream-id.42')
+        self.assertEqual(response['X-Request-ID'], 'upstream-id.42')
+        response = self.client.get('/monitoring/slow-queries/', HTTP_X_REQUEST_ID='bad id\n')
+        self.assertNotEqual(response['X-Request-ID'], 'bad id\n')
+
+
+@override_settings(TRACING_SAMPLE_RATE=1)
+class SampledTraceTest(TestCase):
+    """Test spans recorded for a traced request"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='traced@example.com',
+            username='traceduser',
+            password='testpass123',
+            is_active=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_request_trace(self):
+        """A traced API request has middleware, view, serializer and DB spans in OTLP shape"""
+        with self.assertLogs('tracing', 'INFO') as logs:
+            response = self.client.get('/api/community/chat-rooms/')
+        self.assertEqual(response.status_code, 200)
+
+        spans = exported_spans(logs)
+        root = next(span for span in spans if 'parentSpanId' not in span)
+        self.assertEqual(root['name'], 'HTTP GET api/community/chat-rooms/')
+        self.assertEqual(root['kind'], 2)
+        self.assertEqual(root['traceId'], response['X-Trace-ID'])
+        self.assertEqual({span['traceId'] for span in spans}, {root['traceId']})
+
+        names = [span['name'] for span in spans]
+        self.assertTrue(any(name.startswith('view ') for name in names))
+        self.assertIn('serialize ChatRoomSerializer', names)
+        self.assertIn('db.query', names)
+        for span in spans:
+            self.assertLessEqual(int(span['startTimeUnixNano']), int(span['endTimeUnixNano']))
+
+    def test_outbound_requests_propagate(self):
+        """Outbound calls get a client span and carry the trace headers"""
+        instrument()
+        sent = {}
+
+        def fake_send(adapter, request, **kwargs):
+            sent.update(request.headers)
+            response = requests.Response()
+            response.status_code = 200
+            return response
+
+        with patch('requests.adapters.HTTPAdapter.send', fake_send):
+            with start_trace('a' * 32, 'job') as (trace, root):
+                requests.Session().post('https://example.com/face/detect?key=secret', json={})
+
+        client = trace.spans[1]
+        self.assertEqual(client.kind, KIND_CLIENT)
+        self.assertEqual(client.parent_id, root.span_id)
+        self.assertEqual(client.attributes['http.url'], 'https://example.com/face/detect')
+        self.assertEqual(client.attributes['http.status_code'], 200)
+        self.assertEqual(sent['traceparent'], f"00-{'a' * 32}-{client.span_id}-01")
+        self.assertEqual(sent['X-Request-ID'], 'a' * 32)
+
+
+class TraceReportTest(TestCase):
+    """Test the slowest-trace report"""
+
+    def test_breakdown_adds_up(self):
+        with self.assertLogs('tracing', 'INFO') as logs:
+            with start_trace('b' * 32, 'HTTP GET slow/') as (trace, root):
+                with span('view slow'):
+                    with span('db.query', KIND_CLIENT, **{'db.statement': 'SELECT 1'}):
+                        time.sleep(0.03)
+                    time.sleep(0.01)
+            export(trace)
+
+        spans = exported_spans(logs)
+        root, total, breakdown = trace_report.summarize(spans)
+        self.assertGreaterEqual(breakdown['db'][0], 30)
+        self.assertGreaterEqual(breakdown['view'][0], 10)
+        self.assertAlmostEqual(sum(own for own, _ in breakdown.values()), total, places=3)
+
+        out = io.StringIO()
+        trace_report.report([spans], out=out)
+        output = out.getvalue()
+        self.assertIn('1. ', output)
+        self.assertIn('HTTP GET slow/', output)
+        self.assertIn('SELECT 1', output)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import (
-    MoodEntry, Achievement, UserAchievement, UserPoints,
+    MoodEntry, Achievement, UserAchievement, UserPoints, CheckInStreak,
     DailyChallenge, UserChallengeCompletion, WellnessTip, UserWellnessTip,
     WeeklyChallenge, UserWeeklyChallengeProgress, MoodPattern
 )
@@ -88,6 +88,14 @@ class UserPointsAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at', 'updated_at')
     ordering = ('-total_points',)
 
+@admin.register(CheckInStreak)
+class CheckInStreakAdmin(admin.ModelAdmin):
+    list_display = ('user', 'source', 'current_streak', 'longest_streak', 'last_check_in_date')
+    list_filter = ('source', 'last_check_in_date')
+    search_fields = ('user__username',)
+    readonly_fields = ('updated_at',)
+    ordering = ('-current_streak',)
+
 @admin.register(WellnessTip)
 class WellnessTipAdmin(admin.ModelAdmin):
     list_display = ('title', 'tip_type', 'is_active', 'created_at')
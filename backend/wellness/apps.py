@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class WellnessConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'wellness'
+
+    def ready(self):
+        # Keep check-in streaks in sync with mood entries
+        from . import signals  # noqa: F401
@@ -24,6 +24,7 @@ from .serializers import (
     UserWeeklyChallengeProgressSerializer, MoodPatternSerializer, AIInsightSerializer
 )
 from .ai_wellness_service import AIWellnessService
+from .streaks import get_current_streak
 
 # MOOD TRACKING VIEWS
 class MoodEntryViewSet(viewsets.ModelViewSet):
@@ -67,17 +68,7 @@ class MoodEntryViewSet(viewsets.ModelViewSet):
     
     def get_consecutive_mood_days(self, user):
         """Calculate consecutive days of mood tracking"""
-        today = timezone.now().date()
-        consecutive_days = 0
-        
-        for i in range(365):  # Check up to a year
-            check_date = today - timedelta(days=i)
-            if MoodEntry.objects.filter(user=user, date=check_date).exists():
-                consecutive_days += 1
-            else:
-                break
-        
-        return consecutive_days
+        return get_current_streak(user, 'wellness')
     
     def award_achievement(self, user, achievement_name):
         """Award achievement if not already earned"""
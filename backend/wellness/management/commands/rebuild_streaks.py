@@ -0,0 +1,34 @@
+"""
+Management command to recompute check-in streaks from history
+"""
+from django.core.management.base import BaseCommand
+from wellness.streaks import rebuild_streaks
+
+
+class Command(BaseCommand):
+    help = 'Rebuild persisted check-in streaks from mood entry history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            choices=['wellness', 'mood', 'all'],
+            default='all',
+            help='Which check-in history to rebuild streaks from'
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Only rebuild streaks for this user id (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        sources = ['wellness', 'mood'] if options['source'] == 'all' else [options['source']]
+
+        for source in sources:
+            self.stdout.write(f'Rebuilding {source} streaks...')
+            count = rebuild_streaks(source, user_ids=options['user_ids'])
+            self.stdout.write(
+                self.style.SUCCESS(f'Rebuilt {count} {source} streaks')
+            )
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wellness', '0002_weeklychallenge_moodpattern_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckInStreak',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('wellness', 'Wellness Check-in'), ('mood', 'Camera Mood Entry')], max_length=20)),
+                ('current_streak', models.PositiveIntegerField(default=0, help_text='Consecutive days ending on the last check-in')),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('last_check_in_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='check_in_streaks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'wellness_check_in_streak',
+                'unique_together': {('user', 'source')},
+            },
+        ),
+    ]
@@ -139,6 +139,35 @@ class UserPoints(models.Model):
 
         self.save()
 
+class CheckInStreak(models.Model):
+    """Persisted check-in streak per user, updated as entries are written"""
+    SOURCE_CHOICES = [
+        ('wellness', 'Wellness Check-in'),
+        ('mood', 'Camera Mood Entry'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='check_in_streaks')
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    current_streak = models.PositiveIntegerField(default=0, help_text="Consecutive days ending on the last check-in")
+    longest_streak = models.PositiveIntegerField(default=0)
+    last_check_in_date = models.DateField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'wellness_check_in_streak'
+        unique_together = ['user', 'source']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.source} ({self.current_streak} days)"
+
+    def get_current_streak(self, today=None):
+        """Streak as of today; it is broken until the user checks in today"""
+        today = today or timezone.now().date()
+        if self.last_check_in_date == today:
+            return self.current_streak
+        return 0
+
 class DailyChallenge(models.Model):
     """Daily wellness challenges"""
     CHALLENGE_TYPES = [
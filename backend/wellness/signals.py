@@ -0,0 +1,44 @@
+"""
+Signal handlers that keep check-in streaks up to date as entries are written
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import MoodEntry
+from .streaks import record_check_in, rebuild_user_streak
+
+
+@receiver(post_save, sender=MoodEntry)
+def update_wellness_streak(sender, instance, created, raw=False, **kwargs):
+    """Advance the streak on a new check-in, recompute it when one is edited"""
+    if raw:
+        return
+    if created:
+        record_check_in(instance.user_id, 'wellness', instance.date)
+    else:
+        rebuild_user_streak(instance.user_id, 'wellness')
+
+
+@receiver(post_save, sender='mood.MoodEntry')
+def update_mood_streak(sender, instance, created, raw=False, **kwargs):
+    """Advance the camera mood streak on a new entry, recompute it when one is edited"""
+    if raw:
+        return
+    if created:
+        record_check_in(instance.user_id, 'mood', timezone.localdate(instance.timestamp))
+    else:
+        rebuild_user_streak(instance.user_id, 'mood')
+
+
+@receiver(post_delete, sender=MoodEntry)
+def remove_wellness_check_in(sender, instance, **kwargs):
+    """Recompute the streak after a check-in is deleted"""
+    rebuild_user_streak(instance.user_id, 'wellness')
+
+
+@receiver(post_delete, sender='mood.MoodEntry')
+def remove_mood_check_in(sender, instance, **kwargs):
+    """Recompute the camera mood streak after an entry is deleted"""
+    rebuild_user_streak(instance.user_id, 'mood')
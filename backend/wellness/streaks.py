@@ -0,0 +1,148 @@
+"""
+Check-in streak tracking
+
+Streaks are kept in CheckInStreak and updated as entries are written, so
+reading a streak is a single row lookup instead of a walk back through history.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import TruncDate
+from datetime import timedelta
+
+from .models import CheckInStreak, MoodEntry
+
+
+def get_check_in_dates(source, user_ids=None):
+    """Distinct (user_id, date) pairs with a check-in, ordered by user and date"""
+    if source == 'mood':
+        from mood.models import MoodEntry as CameraMoodEntry
+        entries = CameraMoodEntry.objects.annotate(day=TruncDate('timestamp'))
+    else:
+        entries = MoodEntry.objects.annotate(day=F('date'))
+
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+
+    return entries.values_list('user_id', 'day').distinct().order_by('user_id', 'day')
+
+
+def compute_streak(dates):
+    """Current run, longest run and last date from ascending distinct dates"""
+    current = longest = 0
+    previous = None
+
+    for day in dates:
+        if previous is not None and day == previous + timedelta(days=1):
+            current += 1
+        else:
+            current = 1
+        longest = max(longest, current)
+        previous = day
+
+    return current, longest, previous
+
+
+def get_current_streak(user, source):
+    """Current streak for a user as of today, from the stored tracker"""
+    streak = CheckInStreak.objects.filter(user=user, source=source).first()
+    return streak.get_current_streak() if streak else 0
+
+
+def record_check_in(user_id, source, day):
+    """Advance the user's streak for a check-in on ``day``"""
+    with transaction.atomic():
+        streak, created = CheckInStreak.objects.select_for_update().get_or_create(
+            user_id=user_id,
+            source=source
+        )
+        last = streak.last_check_in_date
+
+        if last is not None and day < last:
+            # Backdated check-in can join or split earlier runs
+            return rebuild_user_streak(user_id, source)
+        if last == day:
+            return streak
+
+        if last is not None and day == last + timedelta(days=1):
+            streak.current_streak += 1
+        else:
+            streak.current_streak = 1
+
+        streak.longest_streak = max(streak.longest_streak, streak.current_streak)
+        streak.last_check_in_date = day
+        streak.save()
+        return streak
+
+
+def rebuild_user_streak(user_id, source):
+    """Recompute one user's streak from their check-in history"""
+    dates = [day for _, day in get_check_in_dates(source, user_ids=[user_id])]
+    current, longest, last = compute_streak(dates)
+
+    if last is None:
+        # No history left (possibly mid user deletion), so only reset existing rows
+        CheckInStreak.objects.filter(user_id=user_id, source=source).update(
+            current_streak=0, longest_streak=0, last_check_in_date=None
+        )
+        return None
+
+    streak, _ = CheckInStreak.objects.update_or_create(
+        user_id=user_id,
+        source=source,
+        defaults={
+            'current_streak': current,
+            'longest_streak': longest,
+            'last_check_in_date': last
+        }
+    )
+    return streak
+
+
+def rebuild_streaks(source, user_ids=None, batch_size=500):
+    """Recompute streaks for every user with history in one pass over the dates"""
+    streaks = []
+    user_dates = []
+    current_user = None
+
+    def flush():
+        current, longest, last = compute_streak(user_dates)
+        streaks.append(CheckInStreak(
+            user_id=current_user,
+            source=source,
+            current_streak=current,
+            longest_streak=longest,
+            last_check_in_date=last
+        ))
+
+    for user_id, day in get_check_in_dates(source, user_ids).iterator():
+        if user_id != current_user:
+            if current_user is not None:
+                flush()
+            current_user = user_id
+            user_dates = []
+        user_dates.append(day)
+    if current_user is not None:
+        flush()
+
+    CheckInStreak.objects.bulk_create(
+        streaks,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['user', 'source'],
+        update_fields=['current_streak', 'longest_streak', 'last_check_in_date', 'updated_at']
+    )
+
+    # Users whose history is gone no longer have a streak
+    existing = CheckInStreak.objects.filter(source=source)
+    if user_ids is not None:
+        existing = existing.filter(user_id__in=user_ids)
+    stale_user_ids = sorted(
+        set(existing.values_list('user_id', flat=True)) - {streak.user_id for streak in streaks}
+    )
+    for start in range(0, len(stale_user_ids), batch_size):
+        CheckInStreak.objects.filter(
+            source=source,
+            user_id__in=stale_user_ids[start:start + batch_size]
+        ).update(current_streak=0, longest_streak=0, last_check_in_date=None)
+
+    return len(streaks)
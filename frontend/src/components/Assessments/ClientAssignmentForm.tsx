@@ -40,15 +40,27 @@ export const ClientAssignmentForm: React.FC<ClientAssignmentFormProps> = ({
   
   const [assessmentTypes, setAssessmentTypes] = useState<AssessmentType[]>([]);
   const [clients, setClients] = useState<Client[]>([]);
+  const [clientSearch, setClientSearch] = useState('');
+  // Whether more clients match than the one page shown
+  const [moreClients, setMoreClients] = useState(false);
+  // Kept so the picked client stays listed when the search changes
+  const [selectedClient, setSelectedClient] = useState<Client | null>(null);
   const [loading, setLoading] = useState(false);
 
+  const API_BASE_URL = 'http://localhost:8000/api';
+
   useEffect(() => {
-    fetchData();
+    fetchAssessmentTypes();
   }, []);
 
-  const fetchData = async () => {
+  useEffect(() => {
+    // One page per search, fetched once typing pauses
+    const timer = setTimeout(() => fetchClients(clientSearch.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [clientSearch]);
+
+  const fetchAssessmentTypes = async () => {
     try {
-      const API_BASE_URL = 'http://localhost:8000/api';
       const token = localStorage.getItem('access_token');
       
       if (!token) {
@@ -68,27 +80,44 @@ export const ClientAssignmentForm: React.FC<ClientAssignmentFormProps> = ({
         const assessmentData = await assessmentResponse.json();
         setAssessmentTypes(assessmentData.results || assessmentData);
       }
+    } catch (error) {
+      console.error('Error fetching data:', error);
+    }
+  };
+
+  const fetchClients = async (search: string) => {
+    try {
+      const token = localStorage.getItem('access_token');
+      if (!token) return;
 
-      // Fetch guide's clients
-      const clientsResponse = await fetch(`${API_BASE_URL}/guide/clients/`, {
+      // The server filters by name or email; only the fields the picker shows are sent
+      const params = new URLSearchParams({ fields: 'id,name,email,status', page_size: '50' });
+      if (search) params.set('search', search);
+      const clientsResponse = await fetch(`${API_BASE_URL}/guide/clients/?${params}`, {
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
         },
       });
-      
-      if (clientsResponse.ok) {
-        const clientsData = await clientsResponse.json();
-        setClients(clientsData.results || clientsData);
-      } else {
+
+      if (!clientsResponse.ok) {
         console.warn('Clients endpoint not available, using empty list');
         setClients([]);
+        setMoreClients(false);
+        return;
       }
+      const clientsData = await clientsResponse.json();
+      setClients(clientsData.results || clientsData);
+      setMoreClients(Boolean(clientsData.next_cursor));
     } catch (error) {
-      console.error('Error fetching data:', error);
+      console.error('Error fetching clients:', error);
     }
   };
 
+  const clientOptions = selectedClient && !clients.some(client => client.id === selectedClient.id)
+    ? [selectedClient, ...clients]
+    : clients;
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     setLoading(true);
@@ -145,12 +174,24 @@ export const ClientAssignmentForm: React.FC<ClientAssignmentFormProps> = ({
           <form onSubmit={handleSubmit} className="space-y-4">
             <div className="space-y-2">
               <Label htmlFor="client">Select Client</Label>
-              <Select value={formData.client} onValueChange={(value) => handleInputChange('client', value)}>
+              <Input
+                id="client_search"
+                placeholder="Search clients by name or email"
+                value={clientSearch}
+                onChange={(e) => setClientSearch(e.target.value)}
+              />
+              <Select
+                value={formData.client}
+                onValueChange={(value) => {
+                  setSelectedClient(clientOptions.find(client => client.id.toString() === value) || null);
+                  handleInputChange('client', value);
+                }}
+              >
                 <SelectTrigger>
                   <SelectValue placeholder="Choose a client" />
                 </SelectTrigger>
                 <SelectContent>
-                  {clients.map((client) => (
+                  {clientOptions.map((client) => (
                     <SelectItem key={client.id} value={client.id.toString()}>
                       <div className="flex flex-col">
                         <span>{client.name}</span>
@@ -162,7 +203,14 @@ export const ClientAssignmentForm: React.FC<ClientAssignmentFormProps> = ({
               </Select>
               {clients.length === 0 && (
                 <p className="text-xs text-muted-foreground">
-                  No clients found. Make sure you have clients assigned to you.
+                  {clientSearch.trim()
+                    ? 'No clients match this search.'
+                    : 'No clients found. Make sure you have clients assigned to you.'}
+                </p>
+              )}
+              {moreClients && (
+                <p className="text-xs text-muted-foreground">
+                  Showing the first {clients.length} clients. Search to find others.
                 </p>
               )}
             </div>
@@ -14,7 +14,7 @@ import {
   MoreVertical, Search, Pin, Archive, Smile, 
   Download, Eye, Calendar, MapPin, CheckCircle2, AlertCircle
 } from 'lucide-react';
-import { communityService, ChatMessage, ChatRoom } from '@/services/communityService';
+import { communityService, mergeChatMessages, replaceChatMessages, ChatMessage, ChatRoom } from '@/services/communityService';
 import { useToast } from '@/hooks/use-toast';
 import { ChatMessageInput } from '../chat/ChatMessageInput';
 import { ChatMessage as ChatMessageComponent } from '../chat/ChatMessage';
@@ -22,6 +22,7 @@ import CallControls from '../media/CallControls';
 import CallInterface from '../media/CallInterface';
 import EnhancedChatMessage from '../chat/EnhancedChatMessage';
 import { mediaService } from '@/services/mediaService';
+import { websocketService } from '@/services/websocketService';
 
 interface ChatInterfaceProps {
   roomId: number;
@@ -53,6 +54,17 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({ roomId, onLeave }) => {
   // Mock mode removed - using real backend only
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const fileInputRef = useRef<HTMLInputElement>(null);
+  // Cursor of the newest loaded message; later loads fetch only what came after it
+  const sinceCursorRef = useRef<string | null>(null);
+  // When the last load looked for changes; polls pick up messages updated after it
+  const updatedCursorRef = useRef<string | null>(null);
+  // Cursor of the oldest loaded message, for scrolling back through history
+  const [beforeCursor, setBeforeCursor] = useState<string | null>(null);
+  const [hasOlder, setHasOlder] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  const messagesContainerRef = useRef<HTMLDivElement>(null);
+  // Scroll height before older messages were prepended, to keep the view in place
+  const olderScrollHeightRef = useRef<number | null>(null);
   const { toast } = useToast();
 
   useEffect(() => {
@@ -62,9 +74,30 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({ roomId, onLeave }) => {
     // Check call status once on mount
     checkCallStatus();
     
-    // Fallback polling for development
+    // Messages and call state are pushed over the room socket
+    websocketService.connect(roomId, {
+      onConnect: () => {
+        setIsConnected(true);
+        // Catch up on anything sent while disconnected
+        loadMessages();
+        checkCallStatus();
+      },
+      onDisconnect: () => setIsConnected(false),
+      onMessage: (message) => {
+        setMessages(prev => mergeChatMessages(prev, [message]));
+      },
+      onMessageUpdated: (message) => {
+        // Media finished processing: swap in the updated message
+        setMessages(prev => mergeChatMessages(prev, [message]));
+      },
+      onCallStarted: applyCallStatus,
+      onCallUpdated: applyCallStatus,
+      onCallEnded: applyCallStatus,
+    });
+    
+    // Fallback polling while the socket is down
     const pollInterval = setInterval(() => {
-      if (!isConnected) {
+      if (!websocketService.isConnected()) {
         loadMessages();
         // Only check call status if endpoints are available
         if (callEndpointsAvailable) {
@@ -75,6 +108,7 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({ roomId, onLeave }) => {
     
     return () => {
       clearInterval(pollInterval);
+      websocketService.disconnect();
     };
   }, [roomId]);
 
@@ -118,20 +152,31 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({ roomId, onLeave }) => {
   };
 
   useEffect(() => {
+    const container = messagesContainerRef.current;
+    if (olderScrollHeightRef.current !== null && container) {
+      // Older messages were prepended: keep the ones in view where they were
+      container.scrollTop += container.scrollHeight - olderScrollHeightRef.current;
+      olderScrollHeightRef.current = null;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
   const loadRoomData = async () => {
     try {
       setLoading(true);
-      const [roomData, messagesData, participantsData] = await Promise.all([
+      const [roomData, messagePage, participantsData] = await Promise.all([
         communityService.getChatRoom(roomId),
-        communityService.getChatMessages(roomId),
+        communityService.getChatMessagePage(roomId),
         communityService.getChatRoomParticipants(roomId)
       ]);
       
       setRoom(roomData);
-      setMessages(Array.isArray(messagesData) ? messagesData : (messagesData as any)?.results || []);
+      sinceCursorRef.current = messagePage.since_cursor;
+      updatedCursorRef.current = messagePage.updated_cursor;
+      setBeforeCursor(messagePage.before_cursor);
+      setHasOlder(messagePage.has_more);
+      setMessages(messagePage.results);
       setParticipants(participantsData.participants || []);
     } catch (error) {
       console.error('Failed to load room data:', error);
@@ -147,13 +192,35 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({ roomId, onLeave }) => {
 
   const loadMessages = async () => {
     try {
-      const messagesData = await communityService.getChatMessages(roomId);
-      setMessages(Array.isArray(messagesData) ? messagesData : (messagesData as any)?.results || []);
+      const page = await communityService.getChatMessagePage(roomId, {
+        since: sinceCursorRef.current,
+        updatedSince: updatedCursorRef.current,
+      });
+      sinceCursorRef.current = page.since_cursor || sinceCursorRef.current;
+      updatedCursorRef.current = page.updated_cursor;
+      // Polls only see media finish processing through the updated list
+      setMessages(prev => mergeChatMessages(replaceChatMessages(prev, page.updated), page.results));
     } catch (error) {
       console.error('Failed to load messages:', error);
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!beforeCursor || loadingOlder) return;
+    try {
+      setLoadingOlder(true);
+      const page = await communityService.getChatMessagePage(roomId, { before: beforeCursor });
+      olderScrollHeightRef.current = messagesContainerRef.current?.scrollHeight ?? null;
+      setBeforeCursor(page.before_cursor);
+      setHasOlder(page.has_more);
+      setMessages(prev => mergeChatMessages(page.results, prev));
+    } catch (error) {
+      console.error('Failed to load older messages:', error);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   const handleSendMessage = async (messageData: {
     type: 'text' | 'voice' | 'video' | 'image' | 'file';
     content?: string;
@@ -291,13 +358,17 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({ roomId, onLeave }) => {
   };
 
   // Call management functions
+  const applyCallStatus = (status: any) => {
+    setHasActiveCall(status.has_active_call);
+    if (status.has_active_call) {
+      setActiveCallType(status.type || 'audio');
+    }
+  };
+
   const checkCallStatus = async () => {
     try {
       const status = await mediaService.getCallStatus(roomId);
-      setHasActiveCall(status.has_active_call);
-      if (status.has_active_call) {
-        setActiveCallType(status.type || 'audio');
-      }
+      applyCallStatus(status);
       // If we get here, endpoints are working
       setCallEndpointsAvailable(true);
     } catch (error) {
@@ -585,7 +656,14 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({ roomId, onLeave }) => {
             {/* Enhanced Messages Area */}
             <div className="flex-1 flex flex-col bg-gradient-to-b from-gray-50 to-white">
               {/* Messages Display */}
-              <div className="flex-1 overflow-y-auto p-6 space-y-4">
+              <div ref={messagesContainerRef} className="flex-1 overflow-y-auto p-6 space-y-4">
+                {hasOlder && (
+                  <div className="flex justify-center">
+                    <Button variant="outline" size="sm" onClick={loadOlderMessages} disabled={loadingOlder}>
+                      {loadingOlder ? 'Loading...' : 'Load older messages'}
+                    </Button>
+                  </div>
+                )}
                 <AnimatePresence>
                   {Array.isArray(messages) && messages.map((message, index) => {
                     // Check if this message is from the current user
@@ -5,7 +5,8 @@ import CallControls from '../media/CallControls';
 import CallInterface from '../media/CallInterface';
 import { VoiceRecorder } from './VoiceRecorder';
 import { mediaService } from '../../services/mediaService';
-import { communityService } from '../../services/communityService';
+import { communityService, mergeChatMessages, replaceChatMessages } from '../../services/communityService';
+import { websocketService } from '../../services/websocketService';
 
 interface ChatMessage {
   id: number;
@@ -60,22 +61,79 @@ export const EnhancedChatInterface: React.FC<EnhancedChatInterfaceProps> = ({
 
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const fileInputRef = useRef<HTMLInputElement>(null);
+  // Cursor of the newest loaded message; later loads fetch only what came after it
+  const sinceCursorRef = useRef<string | null>(null);
+  // When the last load looked for changes; polls pick up messages updated after it
+  const updatedCursorRef = useRef<string | null>(null);
+  // Cursor of the oldest loaded message, for scrolling back through history
+  const [beforeCursor, setBeforeCursor] = useState<string | null>(null);
+  const [hasOlder, setHasOlder] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  const messagesContainerRef = useRef<HTMLDivElement>(null);
+  // Scroll height before older messages were prepended, to keep the view in place
+  const olderScrollHeightRef = useRef<number | null>(null);
 
   useEffect(() => {
+    sinceCursorRef.current = null;
+    updatedCursorRef.current = null;
+    setBeforeCursor(null);
+    setHasOlder(false);
+    setMessages([]);
     loadMessages();
     checkCallStatus();
     
-    // Set up polling for new messages and call status
-    const messageInterval = setInterval(loadMessages, 3000);
-    const callInterval = setInterval(checkCallStatus, 5000);
+    // Updates are pushed over the room socket; poll only while it is down
+    let messageInterval: ReturnType<typeof setInterval> | null = null;
+    let callInterval: ReturnType<typeof setInterval> | null = null;
+    
+    const startPolling = () => {
+      if (messageInterval) return;
+      messageInterval = setInterval(loadMessages, 3000);
+      callInterval = setInterval(checkCallStatus, 5000);
+    };
+    
+    const stopPolling = () => {
+      if (messageInterval) clearInterval(messageInterval);
+      if (callInterval) clearInterval(callInterval);
+      messageInterval = null;
+      callInterval = null;
+    };
+    
+    startPolling();
+    websocketService.connect(roomId, {
+      onConnect: () => {
+        stopPolling();
+        // Catch up on anything sent while disconnected
+        loadMessages();
+        checkCallStatus();
+      },
+      onDisconnect: startPolling,
+      onMessage: (message) => {
+        setMessages(prev => mergeChatMessages(prev, [message as unknown as ChatMessage]));
+      },
+      onMessageUpdated: (message) => {
+        // Media finished processing: swap in the updated message
+        setMessages(prev => mergeChatMessages(prev, [message as unknown as ChatMessage]));
+      },
+      onCallStarted: applyCallStatus,
+      onCallUpdated: applyCallStatus,
+      onCallEnded: applyCallStatus,
+    });
     
     return () => {
-      clearInterval(messageInterval);
-      clearInterval(callInterval);
+      stopPolling();
+      websocketService.disconnect();
     };
   }, [roomId]);
 
   useEffect(() => {
+    const container = messagesContainerRef.current;
+    if (olderScrollHeightRef.current !== null && container) {
+      // Older messages were prepended: keep the ones in view where they were
+      container.scrollTop += container.scrollHeight - olderScrollHeightRef.current;
+      olderScrollHeightRef.current = null;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
@@ -85,21 +143,56 @@ export const EnhancedChatInterface: React.FC<EnhancedChatInterfaceProps> = ({
 
   const loadMessages = async () => {
     try {
-      const response = await communityService.getChatMessages(roomId);
-      setMessages(response);
+      const firstLoad = sinceCursorRef.current === null;
+      const page = await communityService.getChatMessagePage(roomId, {
+        since: sinceCursorRef.current,
+        updatedSince: updatedCursorRef.current,
+      });
+      if (firstLoad) {
+        // The first load is the latest page; has_more says whether older history exists
+        setBeforeCursor(page.before_cursor);
+        setHasOlder(page.has_more);
+      }
+      sinceCursorRef.current = page.since_cursor || sinceCursorRef.current;
+      updatedCursorRef.current = page.updated_cursor;
+      // Polls only see media finish processing through the updated list
+      setMessages(prev => mergeChatMessages(
+        replaceChatMessages(prev, page.updated as unknown as ChatMessage[]),
+        page.results as unknown as ChatMessage[]
+      ));
     } catch (error) {
       console.error('Failed to load messages:', error);
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!beforeCursor || loadingOlder) return;
+    try {
+      setLoadingOlder(true);
+      const page = await communityService.getChatMessagePage(roomId, { before: beforeCursor });
+      olderScrollHeightRef.current = messagesContainerRef.current?.scrollHeight ?? null;
+      setBeforeCursor(page.before_cursor);
+      setHasOlder(page.has_more);
+      setMessages(prev => mergeChatMessages(page.results as unknown as ChatMessage[], prev));
+    } catch (error) {
+      console.error('Failed to load older messages:', error);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
+  const applyCallStatus = (status: any) => {
+    setHasActiveCall(status.has_active_call);
+    if (status.has_active_call) {
+      setCallType(status.type || 'audio');
+      setParticipantCount(status.participants?.length || 0);
+    }
+  };
+
   const checkCallStatus = async () => {
     try {
       const status = await mediaService.getCallStatus(roomId);
-      setHasActiveCall(status.has_active_call);
-      if (status.has_active_call) {
-        setCallType(status.type || 'audio');
-        setParticipantCount(status.participants?.length || 0);
-      }
+      applyCallStatus(status);
     } catch (error) {
       console.error('Failed to check call status:', error);
     }
@@ -302,7 +395,18 @@ export const EnhancedChatInterface: React.FC<EnhancedChatInterfaceProps> = ({
       )}
 
       {/* Messages Area */}
-      <div className="flex-1 overflow-y-auto p-4 space-y-4">
+      <div ref={messagesContainerRef} className="flex-1 overflow-y-auto p-4 space-y-4">
+        {hasOlder && (
+          <div className="flex justify-center">
+            <button
+              onClick={loadOlderMessages}
+              disabled={loadingOlder}
+              className="px-3 py-1 text-sm text-gray-600 border border-gray-300 rounded-full hover:bg-gray-50 disabled:opacity-50"
+            >
+              {loadingOlder ? 'Loading...' : 'Load older messages'}
+            </button>
+          </div>
+        )}
         {messages.map((message) => (
           <EnhancedChatMessage
             key={message.id}
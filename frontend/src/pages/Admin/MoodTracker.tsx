@@ -27,12 +27,49 @@ interface UserMoodProfile {
   moodTrend: 'improving' | 'declining' | 'stable';
 }
 
+const toUserMoodProfile = (user: any): UserMoodProfile => ({
+  id: user.id,
+  name: user.name,
+  email: user.email,
+  lastActive: user.lastActive,
+  currentMood: user.currentMood ? {
+    emotion: user.currentMood.emotion as any,
+    confidence: user.currentMood.confidence,
+    timestamp: user.currentMood.timestamp
+  } : null,
+  moodHistory: user.moodHistory.map((mood: any) => ({
+    emotion: mood.emotion as any,
+    confidence: mood.confidence,
+    timestamp: mood.timestamp
+  })),
+  totalSessions: user.totalSessions,
+  averageMood: user.averageMood as any,
+  moodTrend: user.moodTrend as any
+});
+
 const AdminMoodTracker: React.FC = () => {
   const [users, setUsers] = useState<UserMoodProfile[]>([]);
   const [selectedUser, setSelectedUser] = useState<UserMoodProfile | null>(null);
   const [searchTerm, setSearchTerm] = useState('');
   const [filterMood, setFilterMood] = useState<string>('all');
   const [loading, setLoading] = useState(true);
+  // Link to the next page of users; later pages are fetched only when asked for
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const loadMoreUsers = async () => {
+    if (!nextPage || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const page = await moodService.getAdminMoodDashboard(nextPage);
+      setUsers(prev => [...prev, ...page.users.map(toUserMoodProfile)]);
+      setNextPage(page.next);
+    } catch (error) {
+      console.error('Failed to load more mood data:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   useEffect(() => {
     const fetchMoodData = async () => {
@@ -40,30 +77,11 @@ const AdminMoodTracker: React.FC = () => {
       
       try {
         console.log('Fetching real mood data from backend...');
-        const moodData = await moodService.getAdminMoodDashboard();
-        console.log('Received mood data:', moodData);
-        
-        const transformedUsers: UserMoodProfile[] = moodData.map((user: any) => ({
-          id: user.id,
-          name: user.name,
-          email: user.email,
-          lastActive: user.lastActive,
-          currentMood: user.currentMood ? {
-            emotion: user.currentMood.emotion as any,
-            confidence: user.currentMood.confidence,
-            timestamp: user.currentMood.timestamp
-          } : null,
-          moodHistory: user.moodHistory.map((mood: any) => ({
-            emotion: mood.emotion as any,
-            confidence: mood.confidence,
-            timestamp: mood.timestamp
-          })),
-          totalSessions: user.totalSessions,
-          averageMood: user.averageMood as any,
-          moodTrend: user.moodTrend as any
-        }));
+        const page = await moodService.getAdminMoodDashboard();
+        console.log('Received mood data:', page.users);
         
-        setUsers(transformedUsers);
+        setUsers(page.users.map(toUserMoodProfile));
+        setNextPage(page.next);
       } catch (error) {
         console.error('Failed to fetch mood data, falling back to mock data:', error);
         
@@ -199,7 +217,7 @@ const AdminMoodTracker: React.FC = () => {
         </div>
         <Badge variant="outline" className="flex items-center gap-2">
           <Users className="w-4 h-4" />
-          {users.length} Users Tracked
+          {users.length}{nextPage ? '+' : ''} Users Tracked
         </Badge>
       </div>
 
@@ -351,6 +369,13 @@ const AdminMoodTracker: React.FC = () => {
               </Card>
             ))}
           </div>
+          {nextPage && (
+            <div className="flex justify-center mt-6">
+              <Button onClick={loadMoreUsers} disabled={loadingMore} variant="outline">
+                {loadingMore ? 'Loading...' : 'Load more users'}
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
 
@@ -82,7 +82,7 @@ const MoodTracker: React.FC = () => {
         emotion: entry.emotion,
         confidence: entry.confidence,
         notes: entry.notes,
-        imageData: entry.image_data
+        imageData: entry.image_url || undefined
       }));
       
       setMoodData(formattedEntries);
@@ -317,7 +317,7 @@ const MoodTracker: React.FC = () => {
         timestamp: savedEntry.timestamp,
         emotion: savedEntry.emotion,
         confidence: savedEntry.confidence,
-        imageData: savedEntry.image_data,
+        imageData: savedEntry.image_url || undefined,
         notes: savedEntry.notes
       };
 
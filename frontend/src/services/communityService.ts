@@ -75,12 +75,39 @@ export interface ChatMessage {
   duration?: number;
   file_size?: number;
   mime_type?: string;
+  processing_status?: 'processing' | 'ready' | 'failed';
+  thumbnail_urls?: Record<string, string>;
   is_anonymous: boolean;
   is_system_message: boolean;
   created_at: string;
   file?: ChatFile; // Optional file attachment
 }
 
+export interface ChatMessagePage {
+  results: ChatMessage[];
+  // Messages at or before `since` that changed after `updated_since`, e.g. media that finished processing
+  updated: ChatMessage[];
+  since_cursor: string | null;
+  before_cursor: string | null;
+  updated_cursor: string;
+  has_more: boolean;
+}
+
+// Append newly fetched or pushed messages; ones already shown are replaced in place
+export function mergeChatMessages<T extends { id: number }>(existing: T[], incoming: T[]): T[] {
+  const updates = new Map(incoming.map(message => [message.id, message]));
+  const merged = existing.map(message => updates.get(message.id) || message);
+  const seen = new Set(existing.map(message => message.id));
+  return [...merged, ...incoming.filter(message => !seen.has(message.id))];
+}
+
+// Swap in changed versions of messages already shown, without adding any
+export function replaceChatMessages<T extends { id: number }>(existing: T[], updated: T[]): T[] {
+  if (!updated.length) return existing;
+  const updates = new Map(updated.map(message => [message.id, message]));
+  return existing.map(message => updates.get(message.id) || message);
+}
+
 export interface ChatFile {
   id: number;
   room: number;
@@ -462,6 +489,17 @@ class CommunityService {
     }
   }
 
+  async getChatMessagePage(
+    roomId: number,
+    cursor: { since?: string | null; before?: string | null; updatedSince?: string | null } = {}
+  ): Promise<ChatMessagePage> {
+    const params = new URLSearchParams({ room_id: roomId.toString() });
+    if (cursor.since) params.set('since', cursor.since);
+    if (cursor.before) params.set('before', cursor.before);
+    if (cursor.since && cursor.updatedSince) params.set('updated_since', cursor.updatedSince);
+    return apiClient.get<ChatMessagePage>(`/community/chat-messages/?${params.toString()}`);
+  }
+
   async sendChatMessage(roomId: number, content: string, isAnonymous: boolean = true): Promise<ChatMessage> {
     try {
       // First, verify the room exists and user has access
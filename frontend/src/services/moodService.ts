@@ -16,7 +16,8 @@ export interface MoodEntry {
     disgust: number;
   };
   notes?: string;
-  image_data?: string;
+  image_url?: string | null;
+  has_image?: boolean;
   created_at: string;
   updated_at: string;
 }
@@ -203,14 +204,20 @@ class MoodService {
   }
 
   /**
-   * Get admin mood dashboard data (admin only)
+   * Get one cursor page of the admin mood dashboard (admin only); pass the returned `next` to get the page after it
    */
-  async getAdminMoodDashboard(): Promise<any[]> {
+  async getAdminMoodDashboard(next: string | null = null): Promise<{ users: any[]; next: string | null }> {
     try {
       console.log('Fetching admin mood dashboard data...');
-      const result = await apiClient.get<any[]>('/mood/admin/dashboard/');
-      console.log('Admin mood data retrieved:', result);
-      return result;
+      // `next` is an absolute URL; only its cursor query is needed
+      const query = next ? new URL(next, window.location.origin).search : '';
+      const result: any = await apiClient.get<any>(`/mood/admin/dashboard/${query}`);
+      if (Array.isArray(result)) {
+        return { users: result, next: null };
+      }
+      const users = Array.isArray(result?.results) ? result.results : [];
+      console.log('Admin mood data retrieved:', users.length, 'users');
+      return { users, next: result?.next || null };
     } catch (error: any) {
       console.error('Failed to fetch admin mood data:', error);
       throw error;
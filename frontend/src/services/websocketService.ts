@@ -1,7 +1,8 @@
 import { ChatMessage } from './communityService';
+import { authService } from './authService';
 
 export interface WebSocketMessage {
-  type: 'message' | 'user_joined' | 'user_left' | 'typing' | 'stop_typing' | 'call_started' | 'call_ended';
+  type: 'auth' | 'ready' | 'message' | 'message_updated' | 'user_joined' | 'user_left' | 'typing' | 'stop_typing' | 'call_started' | 'call_updated' | 'call_ended' | 'ping' | 'pong';
   data?: any;
   room_id?: number;
   user_id?: number;
@@ -10,11 +11,13 @@ export interface WebSocketMessage {
 
 export interface WebSocketCallbacks {
   onMessage?: (message: ChatMessage) => void;
+  onMessageUpdated?: (message: ChatMessage) => void;
   onUserJoined?: (user: any) => void;
   onUserLeft?: (user: any) => void;
   onTyping?: (user: any) => void;
   onStopTyping?: (user: any) => void;
   onCallStarted?: (callData: any) => void;
+  onCallUpdated?: (callData: any) => void;
   onCallEnded?: (callData: any) => void;
   onConnect?: () => void;
   onDisconnect?: () => void;
@@ -29,6 +32,8 @@ class WebSocketService {
   private maxReconnectAttempts = 3; // Reduced from 5
   private reconnectInterval = 2000; // Increased from 1000ms
   private isConnecting = false;
+  // Set once the server has authenticated the socket and subscribed it to the room
+  private isReady = false;
 
   connect(roomId: number, callbacks: WebSocketCallbacks) {
     if (this.isConnecting || (this.ws && this.ws.readyState === WebSocket.CONNECTING)) {
@@ -38,22 +43,22 @@ class WebSocketService {
     this.roomId = roomId;
     this.callbacks = callbacks;
     this.isConnecting = true;
+    this.isReady = false;
 
     try {
       // Get the WebSocket URL from environment or use default
       const wsProtocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
       const wsHost = import.meta.env?.VITE_WS_HOST || window.location.host.replace(':3000', ':8000');
+      // The token goes in the first frame, not the URL, which ends up in access logs
       const wsUrl = `${wsProtocol}//${wsHost}/ws/chat/${roomId}/`;
 
-      console.log('🔌 Connecting to WebSocket:', wsUrl);
+      console.log('🔌 Connecting to WebSocket room:', roomId);
       
       this.ws = new WebSocket(wsUrl);
 
       this.ws.onopen = () => {
-        console.log('✅ WebSocket connected to room:', roomId);
-        this.isConnecting = false;
-        this.reconnectAttempts = 0;
-        this.callbacks.onConnect?.();
+        // Events only flow once the server answers the auth frame with 'ready'
+        this.ws?.send(JSON.stringify({ type: 'auth', token: authService.getAccessToken() }));
       };
 
       this.ws.onmessage = (event) => {
@@ -68,10 +73,12 @@ class WebSocketService {
       this.ws.onclose = (event) => {
         console.log('🔌 WebSocket disconnected:', event.code, event.reason);
         this.isConnecting = false;
+        this.isReady = false;
         this.callbacks.onDisconnect?.();
         
-        // Attempt to reconnect if not a clean close
-        if (event.code !== 1000 && this.reconnectAttempts < this.maxReconnectAttempts) {
+        // Attempt to reconnect if not a clean close or an auth/permission rejection
+        const rejected = event.code === 4401 || event.code === 4403;
+        if (event.code !== 1000 && !rejected && this.reconnectAttempts < this.maxReconnectAttempts) {
           this.scheduleReconnect();
         }
       };
@@ -99,9 +106,19 @@ class WebSocketService {
     console.log('📨 Received WebSocket message:', message);
 
     switch (message.type) {
+      case 'ready':
+        console.log('✅ WebSocket connected to room:', this.roomId);
+        this.isConnecting = false;
+        this.isReady = true;
+        this.reconnectAttempts = 0;
+        this.callbacks.onConnect?.();
+        break;
       case 'message':
         this.callbacks.onMessage?.(message.data);
         break;
+      case 'message_updated':
+        this.callbacks.onMessageUpdated?.(message.data);
+        break;
       case 'user_joined':
         this.callbacks.onUserJoined?.(message.data);
         break;
@@ -117,9 +134,14 @@ class WebSocketService {
       case 'call_started':
         this.callbacks.onCallStarted?.(message.data);
         break;
+      case 'call_updated':
+        this.callbacks.onCallUpdated?.(message.data);
+        break;
       case 'call_ended':
         this.callbacks.onCallEnded?.(message.data);
         break;
+      case 'pong':
+        break;
       default:
         console.log('🤷 Unknown message type:', message.type);
     }
@@ -142,7 +164,7 @@ class WebSocketService {
   }
 
   sendMessage(message: Partial<WebSocketMessage>) {
-    if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+    if (this.isConnected()) {
       const fullMessage: WebSocketMessage = {
         type: 'message',
         room_id: this.roomId || undefined,
@@ -183,10 +205,11 @@ class WebSocketService {
     this.callbacks = {};
     this.reconnectAttempts = 0;
     this.isConnecting = false;
+    this.isReady = false;
   }
 
   isConnected(): boolean {
-    return this.ws?.readyState === WebSocket.OPEN;
+    return this.isReady && this.ws?.readyState === WebSocket.OPEN;
   }
 
   getConnectionState(): string {
@@ -194,7 +217,7 @@ class WebSocketService {
     
     switch (this.ws.readyState) {
       case WebSocket.CONNECTING: return 'CONNECTING';
-      case WebSocket.OPEN: return 'CONNECTED';
+      case WebSocket.OPEN: return this.isReady ? 'CONNECTED' : 'CONNECTING';
       case WebSocket.CLOSING: return 'CLOSING';
       case WebSocket.CLOSED: return 'DISCONNECTED';
       default: return 'UNKNOWN';